@@ -0,0 +1,60 @@
+"""Create account balance snapshot table
+
+Revision ID: 20261016_01_create_account_balance_snapshots
+Revises: 1b440d1bc680
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_table(table_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return table_name in inspector.get_table_names()
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_01_create_account_balance_snapshots'
+down_revision = '1b440d1bc680'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_table('account_balance_snapshots'):
+        op.create_table(
+            'account_balance_snapshots',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('accounting_code_id', sa.String(36), nullable=False),
+            sa.Column('branch_id', sa.String(36), nullable=False, server_default=''),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('period_end', sa.Date(), nullable=False),
+            sa.Column('total_debits', sa.Numeric(19, 4), nullable=False, server_default='0'),
+            sa.Column('total_credits', sa.Numeric(19, 4), nullable=False, server_default='0'),
+            sa.Column('entry_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('is_closed', sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column('closed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(['accounting_code_id'], ['accounting_codes.id'],
+                                    name='fk_account_balance_snapshots_accounting_code_id', ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('accounting_code_id', 'branch_id', 'period_start',
+                                name='uq_account_balance_snapshot_period'),
+        )
+
+    if not _has_index('account_balance_snapshots', 'ix_account_balance_snapshots_accounting_code_id'):
+        op.create_index('ix_account_balance_snapshots_accounting_code_id', 'account_balance_snapshots', ['accounting_code_id'])
+    if not _has_index('account_balance_snapshots', 'idx_account_balance_snapshot_period'):
+        op.create_index('idx_account_balance_snapshot_period', 'account_balance_snapshots', ['period_end', 'is_closed'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_account_balance_snapshot_period', table_name='account_balance_snapshots')
+    op.drop_index('ix_account_balance_snapshots_accounting_code_id', table_name='account_balance_snapshots')
+    op.drop_table('account_balance_snapshots')
@@ -0,0 +1,33 @@
+"""Add journal entry keyset pagination indexes
+
+Revision ID: 20261016_02_add_journal_entry_keyset_indexes
+Revises: 20261016_01_create_account_balance_snapshots
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_02_add_journal_entry_keyset_indexes'
+down_revision = '20261016_01_create_account_balance_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_index('journal_entries', 'idx_journal_entries_date_id'):
+        op.create_index('idx_journal_entries_date_id', 'journal_entries', ['date', 'id'])
+    if not _has_index('journal_entries', 'idx_journal_entries_account_date_id'):
+        op.create_index('idx_journal_entries_account_date_id', 'journal_entries',
+                        ['accounting_code_id', 'date', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_journal_entries_account_date_id', table_name='journal_entries')
+    op.drop_index('idx_journal_entries_date_id', table_name='journal_entries')
@@ -0,0 +1,67 @@
+"""Create inventory cost layer table
+
+Revision ID: 20261016_03_create_inventory_cost_layers
+Revises: 20261016_02_add_journal_entry_keyset_indexes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_table(table_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return table_name in inspector.get_table_names()
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_03_create_inventory_cost_layers'
+down_revision = '20261016_02_add_journal_entry_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_table('inventory_cost_layers'):
+        op.create_table(
+            'inventory_cost_layers',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('product_id', sa.String(), nullable=False),
+            sa.Column('branch_id', sa.String(), nullable=True),
+            sa.Column('source_transaction_id', sa.String(), nullable=True),
+            sa.Column('received_date', sa.Date(), nullable=False),
+            sa.Column('original_quantity', sa.Integer(), nullable=False),
+            sa.Column('remaining_quantity', sa.Integer(), nullable=False),
+            sa.Column('unit_cost', sa.Numeric(15, 4), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'],
+                                    name='fk_inventory_cost_layers_product_id', ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], name='fk_inventory_cost_layers_branch_id'),
+            sa.ForeignKeyConstraint(['source_transaction_id'], ['inventory_transactions.id'],
+                                    name='fk_inventory_cost_layers_source_transaction_id', ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if not _has_index('inventory_cost_layers', 'idx_inventory_cost_layers_fifo'):
+        op.create_index('idx_inventory_cost_layers_fifo', 'inventory_cost_layers',
+                        ['product_id', 'received_date', 'created_at', 'id'])
+    if not _has_index('inventory_cost_layers', 'idx_inventory_cost_layers_open'):
+        op.create_index('idx_inventory_cost_layers_open', 'inventory_cost_layers', ['product_id', 'remaining_quantity'])
+    if not _has_index('inventory_cost_layers', 'ix_inventory_cost_layers_branch_id'):
+        op.create_index('ix_inventory_cost_layers_branch_id', 'inventory_cost_layers', ['branch_id'])
+    if not _has_index('inventory_cost_layers', 'ix_inventory_cost_layers_source_transaction_id'):
+        op.create_index('ix_inventory_cost_layers_source_transaction_id', 'inventory_cost_layers',
+                        ['source_transaction_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_cost_layers_source_transaction_id', table_name='inventory_cost_layers')
+    op.drop_index('ix_inventory_cost_layers_branch_id', table_name='inventory_cost_layers')
+    op.drop_index('idx_inventory_cost_layers_open', table_name='inventory_cost_layers')
+    op.drop_index('idx_inventory_cost_layers_fifo', table_name='inventory_cost_layers')
+    op.drop_table('inventory_cost_layers')
@@ -0,0 +1,78 @@
+"""Create branch stock level table
+
+Revision ID: 20261016_04_create_branch_stock_levels
+Revises: 20261016_03_create_inventory_cost_layers
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_table(table_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return table_name in inspector.get_table_names()
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_04_create_branch_stock_levels'
+down_revision = '20261016_03_create_inventory_cost_layers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_table('branch_stock_levels'):
+        op.create_table(
+            'branch_stock_levels',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('product_id', sa.String(), nullable=False),
+            sa.Column('branch_id', sa.String(length=36), nullable=False, server_default=''),
+            sa.Column('quantity', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_movement_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'],
+                                    name='fk_branch_stock_levels_product_id', ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('product_id', 'branch_id', name='uq_branch_stock_level_product_branch'),
+        )
+
+    if not _has_index('branch_stock_levels', 'idx_branch_stock_levels_branch'):
+        op.create_index('idx_branch_stock_levels_branch', 'branch_stock_levels', ['branch_id', 'product_id'])
+
+    # Backfill from the transaction log; scripts/check_branch_stock_drift.py --fix does the same later
+    op.execute(sa.text(
+        """
+        INSERT INTO branch_stock_levels (id, product_id, branch_id, quantity, last_movement_at, created_at, updated_at)
+        SELECT t.product_id || ':' || COALESCE(t.branch_id, p.branch_id, ''),
+               t.product_id,
+               COALESCE(t.branch_id, p.branch_id, ''),
+               SUM(CASE
+                   WHEN t.transaction_type IN ('goods_receipt', 'opening_stock', 'purchase', 'return',
+                        'sale_cancellation', 'job_return', 'production_receipt', 'headquarters_receipt',
+                        'headquarters_production_receipt', 'branch_receipt', 'stock_transfer_in', 'transfer_in')
+                       THEN ABS(t.quantity)
+                   WHEN t.transaction_type IN ('sale', 'damage', 'theft', 'expiry', 'write_off', 'job_issue',
+                        'issue_to_wip', 'headquarters_issue_to_production', 'branch_allocation',
+                        'stock_transfer_out', 'transfer_out', 'adjustment')
+                       THEN -ABS(t.quantity)
+                   ELSE 0 END),
+               MAX(t.created_at),
+               CURRENT_TIMESTAMP,
+               CURRENT_TIMESTAMP
+        FROM inventory_transactions t
+        JOIN products p ON p.id = t.product_id
+        WHERE NOT EXISTS (SELECT 1 FROM branch_stock_levels)
+        GROUP BY t.product_id, COALESCE(t.branch_id, p.branch_id, '')
+        """
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_branch_stock_levels_branch', table_name='branch_stock_levels')
+    op.drop_table('branch_stock_levels')
@@ -0,0 +1,65 @@
+"""Add materialised tree path to accounting dimension values
+
+Revision ID: 20261016_05_add_dimension_value_tree_path
+Revises: 20261016_04_create_branch_stock_levels
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(col['name'] == column_name for col in inspector.get_columns(table_name))
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_05_add_dimension_value_tree_path'
+down_revision = '20261016_04_create_branch_stock_levels'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_column('accounting_dimension_values', 'tree_path'):
+        op.add_column('accounting_dimension_values', sa.Column('tree_path', sa.String(length=400), nullable=True))
+
+    if not _has_index('accounting_dimension_values', 'idx_dimension_value_tree_path'):
+        op.create_index('idx_dimension_value_tree_path', 'accounting_dimension_values', ['tree_path'],
+                        postgresql_ops={'tree_path': 'varchar_pattern_ops'})
+
+    # Backfill from parent links: /<root id>/.../<own id>/
+    bind = op.get_bind()
+    parents = dict(bind.execute(sa.text(
+        "SELECT id, parent_value_id FROM accounting_dimension_values WHERE tree_path IS NULL OR tree_path = ''"
+    )).all())
+    if not parents:
+        return
+    parents.update(dict(bind.execute(sa.text(
+        "SELECT id, parent_value_id FROM accounting_dimension_values"
+    )).all()))
+    paths = {}
+    for start in parents:
+        chain = []
+        current = start
+        while current is not None and current not in paths and current not in chain:
+            chain.append(current)
+            parent = parents.get(current)
+            current = parent if parent in parents else None
+        parent_path = paths.get(current) if current is not None else None
+        for value_id in reversed(chain):
+            parent_path = paths[value_id] = f"{parent_path or '/'}{value_id}/"
+    bind.execute(
+        sa.text("UPDATE accounting_dimension_values SET tree_path = :tree_path WHERE id = :value_id"),
+        [{'value_id': value_id, 'tree_path': path} for value_id, path in paths.items()]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_dimension_value_tree_path', table_name='accounting_dimension_values')
+    op.drop_column('accounting_dimension_values', 'tree_path')
@@ -0,0 +1,35 @@
+"""Add grant metadata and expiry to user permissions
+
+Revision ID: 20261016_06_add_user_permission_grant_columns
+Revises: 20261016_05_add_dimension_value_tree_path
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(col['name'] == column_name for col in inspector.get_columns(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_06_add_user_permission_grant_columns'
+down_revision = '20261016_05_add_dimension_value_tree_path'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_column('user_permissions', 'granted_by'):
+        op.add_column('user_permissions', sa.Column('granted_by', sa.String(), sa.ForeignKey('users.id'), nullable=True))
+    if not _has_column('user_permissions', 'granted_at'):
+        op.add_column('user_permissions', sa.Column('granted_at', sa.DateTime(), nullable=True))
+    if not _has_column('user_permissions', 'expires_at'):
+        op.add_column('user_permissions', sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_permissions', 'expires_at')
+    op.drop_column('user_permissions', 'granted_at')
+    op.drop_column('user_permissions', 'granted_by')
@@ -0,0 +1,79 @@
+"""Add billing runs and billed periods on recurring invoices
+
+Revision ID: 20261016_07_add_billing_runs
+Revises: 20261016_06_add_user_permission_grant_columns
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_table(table_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return table_name in inspector.get_table_names()
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(col['name'] == column_name for col in inspector.get_columns(table_name))
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_07_add_billing_runs'
+down_revision = '20261016_06_add_user_permission_grant_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_table('billing_runs'):
+        op.create_table(
+            'billing_runs',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('reference_date', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(), nullable=False, server_default='running'),
+            sa.Column('total_cycles', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('processed_cycles', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('failed_cycles', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('invoices_created', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('error_message', sa.Text(), nullable=True),
+            sa.Column('created_by', sa.String(), sa.ForeignKey('users.id'), nullable=True),
+            sa.Column('meta_data', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if not _has_table('recurring_invoices'):
+        return
+    if not _has_column('recurring_invoices', 'period_start'):
+        op.add_column('recurring_invoices', sa.Column('period_start', sa.Date(), nullable=True))
+    if not _has_index('recurring_invoices', 'idx_recurring_invoices_cycle_period'):
+        op.create_index('idx_recurring_invoices_cycle_period', 'recurring_invoices', ['billing_cycle_id', 'period_start'])
+
+    # Items billed on one invoice each get a row carrying the same invoice number
+    inspector = sa.inspect(op.get_bind())
+    unique_names = [
+        constraint['name'] for constraint in inspector.get_unique_constraints('recurring_invoices')
+        if constraint['column_names'] == ['invoice_number'] and constraint['name']
+    ]
+    if unique_names:
+        with op.batch_alter_table('recurring_invoices') as batch_op:
+            for name in unique_names:
+                batch_op.drop_constraint(name, type_='unique')
+    if not _has_index('recurring_invoices', 'ix_recurring_invoices_invoice_number'):
+        op.create_index('ix_recurring_invoices_invoice_number', 'recurring_invoices', ['invoice_number'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recurring_invoices_invoice_number', table_name='recurring_invoices')
+    op.drop_index('idx_recurring_invoices_cycle_period', table_name='recurring_invoices')
+    op.drop_column('recurring_invoices', 'period_start')
+    op.drop_table('billing_runs')
@@ -0,0 +1,40 @@
+"""Create document number sequences table
+
+Revision ID: 20261016_08_create_document_sequences
+Revises: 20261016_07_add_billing_runs
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_table(table_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_08_create_document_sequences'
+down_revision = '20261016_07_add_billing_runs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not _has_table('document_sequences'):
+        op.create_table(
+            'document_sequences',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('document_type', sa.String(40), nullable=False),
+            sa.Column('branch_id', sa.String(36), nullable=False, server_default=''),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('document_type', 'branch_id', 'year', name='uq_document_sequence_scope'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('document_sequences')
@@ -0,0 +1,97 @@
+"""Bill each recurring item at most once per period
+
+Revision ID: 20261016_09_unique_billed_periods
+Revises: 20261016_08_create_document_sequences
+Create Date: 2026-10-16
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_09_unique_billed_periods'
+down_revision = '20261016_08_create_document_sequences'
+branch_labels = None
+depends_on = None
+
+# Payment terms the invoices were due on, to recover their invoice date from due_date
+_PAYMENT_TERMS = {'monthly': 30, 'quarterly': 90, 'annual': 365}
+_INTERVAL_MONTHS = {'monthly': 1, 'quarterly': 3, 'annual': 12, 'annually': 12, 'yearly': 12}
+_INTERVAL_DAYS = {'daily': 1, 'weekly': 7}
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(value.day, monthrange(year, month)[1]))
+
+
+def _period_start(start_date: date, interval: str, interval_count: int, reference_date: date) -> date:
+    # Same rule as app.services.billing_run_service.billing_period_start
+    count = max(int(interval_count or 1), 1)
+    interval = (interval or '').lower()
+    if interval in _INTERVAL_DAYS:
+        step = _INTERVAL_DAYS[interval] * count
+        return start_date + timedelta(days=(reference_date - start_date).days // step * step)
+    step = _INTERVAL_MONTHS.get(interval, 1) * count
+    months = (reference_date.year - start_date.year) * 12 + reference_date.month - start_date.month
+    period_start = _add_months(start_date, months // step * step)
+    if period_start > reference_date:
+        period_start = _add_months(start_date, (months // step - 1) * step)
+    return period_start
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('recurring_invoices'):
+        return
+
+    # Backfill the billed period of rows written before period_start existed. The first
+    # row of an item in a period claims it; later ones stay off-period (NULL), like
+    # invoices raised by hand for a period that was already billed.
+    rows = bind.execute(sa.text(
+        "SELECT r.id, r.billing_cycle_id, r.billable_item_id, r.due_date, "
+        "c.interval, c.interval_count, c.start_date "
+        "FROM recurring_invoices r JOIN billing_cycles c ON c.id = r.billing_cycle_id "
+        "WHERE r.period_start IS NULL ORDER BY r.created_at, r.id"
+    )).all()
+    claimed = set(bind.execute(sa.text(
+        "SELECT billing_cycle_id, billable_item_id, period_start FROM recurring_invoices "
+        "WHERE period_start IS NOT NULL"
+    )).all())
+    updates = []
+    for row_id, cycle_id, item_id, due_date, interval, interval_count, start_date in rows:
+        invoice_date = _as_date(due_date) - timedelta(days=_PAYMENT_TERMS.get(interval, 30))
+        start_date = _as_date(start_date)
+        if invoice_date < start_date:
+            continue
+        period_start = _period_start(start_date, interval, interval_count, invoice_date)
+        if (cycle_id, item_id, period_start) in claimed:
+            continue
+        claimed.add((cycle_id, item_id, period_start))
+        updates.append({'row_id': row_id, 'period_start': period_start})
+    if updates:
+        bind.execute(
+            sa.text("UPDATE recurring_invoices SET period_start = :period_start WHERE id = :row_id"),
+            updates
+        )
+
+    if not _has_index('recurring_invoices', 'uq_recurring_invoices_item_period'):
+        op.create_index('uq_recurring_invoices_item_period', 'recurring_invoices',
+                        ['billing_cycle_id', 'billable_item_id', 'period_start'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_recurring_invoices_item_period', table_name='recurring_invoices')
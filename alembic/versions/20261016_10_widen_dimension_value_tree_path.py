@@ -0,0 +1,45 @@
+"""Store dimension value tree paths as text
+
+Each hierarchy level adds a 37-character "<uuid>/" segment, so a String(400)
+tree_path overflowed at about ten levels.
+
+Revision ID: 20261016_10_widen_dimension_value_tree_path
+Revises: 20261016_09_unique_billed_periods
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(idx['name'] == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_10_widen_dimension_value_tree_path'
+down_revision = '20261016_09_unique_billed_periods'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite does not enforce VARCHAR lengths
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    if _has_index('accounting_dimension_values', 'idx_dimension_value_tree_path'):
+        op.drop_index('idx_dimension_value_tree_path', table_name='accounting_dimension_values')
+    op.alter_column('accounting_dimension_values', 'tree_path',
+                    type_=sa.Text(), existing_type=sa.String(length=400), existing_nullable=True)
+    op.create_index('idx_dimension_value_tree_path', 'accounting_dimension_values', ['tree_path'],
+                    postgresql_ops={'tree_path': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('idx_dimension_value_tree_path', table_name='accounting_dimension_values')
+    op.alter_column('accounting_dimension_values', 'tree_path',
+                    type_=sa.String(length=400), existing_type=sa.Text(), existing_nullable=True)
+    op.create_index('idx_dimension_value_tree_path', 'accounting_dimension_values', ['tree_path'],
+                    postgresql_ops={'tree_path': 'varchar_pattern_ops'})
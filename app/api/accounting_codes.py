@@ -1,23 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 from decimal import Decimal
 from datetime import datetime
-import logging
 from app.models.accounting import AccountingCode, JournalEntry
 from app.core.database import get_db
+from app.services.chart_of_accounts_service import ChartOfAccountsService
+from app.utils.logger import get_logger
 # from app.services.ifrs_reporting_service import IFRSReportingService
 # from app.services.accounting_service import AccountingService
 
 # Setup logger
-logger = logging.getLogger(__name__)
-# from app.services.ifrs_reporting_service import IFRSReportingService
-# from app.services.accounting_service import AccountingService
-
-# Setup logger
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Pydantic models for parent and branch info
 class ParentInfo(BaseModel):
@@ -93,44 +89,44 @@ AccountingCodeOut.model_rebuild()
 # Helper to serialize with sub-accounts
 def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
     try:
-        print(f"🔍 Serializing code: {code.id} ({code.code} - {code.name})")
+        logger.debug("Serializing code: %s (%s - %s)", code.id, code.code, code.name)
 
         # Get parent and branch information
         parent_info = None
         if code.parent_id:
-            print(f"  - Has parent_id: {code.parent_id}")
+            logger.debug("Has parent_id: %s", code.parent_id)
             try:
                 parent = code.parent
                 if parent:
-                    print(f"  - Found parent: {parent.code} - {parent.name}")
+                    logger.debug("Found parent: %s - %s", parent.code, parent.name)
                     parent_info = {
                         "id": parent.id,
                         "code": parent.code,
                         "name": parent.name
                     }
                 else:
-                    print(f"  - Warning: Parent with ID {code.parent_id} not found")
+                    logger.warning("Parent with ID %s not found", code.parent_id)
             except Exception as e:
-                print(f"  - Error getting parent: {str(e)}")
+                logger.error("Error getting parent: %s", e)
                 parent_info = None
 
         branch_info = None
         if code.branch_id and db:
-            print(f"  - Has branch_id: {code.branch_id}")
+            logger.debug("Has branch_id: %s", code.branch_id)
             try:
                 from app.models.branch import Branch
                 branch = db.query(Branch).filter(Branch.id == code.branch_id).first()
                 if branch:
-                    print(f"  - Found branch: {branch.code} - {branch.name}")
+                    logger.debug("Found branch: %s - %s", branch.code, branch.name)
                     branch_info = {
                         "id": branch.id,
                         "name": branch.name,
                         "code": branch.code
                     }
                 else:
-                    print(f"  - Warning: Branch with ID {code.branch_id} not found")
+                    logger.warning("Branch with ID %s not found", code.branch_id)
             except Exception as e:
-                print(f"  - Error getting branch: {str(e)}")
+                logger.error("Error getting branch: %s", e)
                 branch_info = None
 
         # Compute live totals from journal entries when a DB session is available
@@ -159,7 +155,7 @@ def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
 
                 # If this is a parent account, aggregate sub-account balances
                 if code.is_parent:
-                    print(f"  - Parent account detected, aggregating sub-account balances...")
+                    logger.debug("Parent account detected, aggregating sub-account balances...")
                     try:
                         sub_accounts = getattr(code, 'children', [])
                         if sub_accounts:
@@ -177,7 +173,7 @@ def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
 
                                 sub_debit_total += float(sub_debits)
                                 sub_credit_total += float(sub_credits)
-                                print(f"    - Sub-account {sub.code}: Debits={sub_debits}, Credits={sub_credits}")
+                                logger.debug("Sub-account %s: Debits=%s, Credits=%s", sub.code, sub_debits, sub_credits)
 
                             # Add sub-account totals to parent
                             live_total_debits += sub_debit_total
@@ -189,12 +185,12 @@ def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
                             else:
                                 live_balance = live_total_credits - live_total_debits
 
-                            print(f"  - Aggregated totals: Debits={live_total_debits}, Credits={live_total_credits}, Balance={live_balance}")
+                            logger.debug("Aggregated totals: Debits=%s, Credits=%s, Balance=%s", live_total_debits, live_total_credits, live_balance)
                     except Exception as sub_err:
-                        print(f"  - Error aggregating sub-account balances: {str(sub_err)}")
+                        logger.error("Error aggregating sub-account balances: %s", sub_err)
 
             except Exception as e:
-                print(f"  - Error computing live totals for {code.code}: {str(e)}")
+                logger.error("Error computing live totals for %s: %s", code.code, e)
                 live_total_debits = None
                 live_total_credits = None
                 live_balance = None
@@ -223,10 +219,10 @@ def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
         if include_subs:
             try:
                 sub_accounts = getattr(code, 'children', [])
-                print(f"  - Found {len(sub_accounts)} sub-accounts")
+                logger.debug("Found %s sub-accounts", len(sub_accounts))
                 result["sub_accounts"] = [serialize_code(sub, db, False) for sub in sub_accounts]
             except Exception as e:
-                print(f"  - Error getting sub-accounts: {str(e)}")
+                logger.error("Error getting sub-accounts: %s", e)
                 result["sub_accounts"] = []
         else:
             result["sub_accounts"] = []
@@ -234,97 +230,49 @@ def serialize_code(code: AccountingCode, db: Session = None, include_subs=True):
         return result
 
     except Exception as e:
-        print(f"❌ Error in serialize_code for code {getattr(code, 'id', 'unknown')}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in serialize_code for code %s: %s", getattr(code, 'id', 'unknown'), e)
         raise
 
 # Routes
-print("[DEBUG] Defining routes...")
-
-@router.get("/", response_model=List[AccountingCodeOut])
-def list_accounting_codes(db: Session = Depends(get_db)):
-    print("\n" + "="*80)
-    print("🔍 [API] GET /accounting-codes - Starting...")
-    print("="*80)
 
-    try:
-        # Log database connection info
-        print("\n🔧 Database connection details:")
-        print(f"  - Connection URL: {db.bind.url if hasattr(db, 'bind') and db.bind else 'Unknown'}")
-
-        # Check if AccountingCode table exists
-        from sqlalchemy import inspect
-        inspector = inspect(db.bind)
-        table_exists = inspector.has_table('accounting_codes')
-        print(f"  - Table 'accounting_codes' exists: {table_exists}")
-
-        if not table_exists:
-            raise HTTPException(
-                status_code=500,
-                detail="Database table 'accounting_codes' does not exist. Please run migrations."
-            )
+def _conditional_get(request: Request, response: Response, service: ChartOfAccountsService):
+    """ETag for the chart, or a 304 response when the client already has it"""
+    etag = service.get_etag()
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return etag, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return etag, None
 
-        # Query all accounting codes
-        print("\n📊 Querying accounting codes...")
-        from app.models.accounting import AccountingCode
-        codes = db.query(AccountingCode).all()
-        print(f"✅ Found {len(codes)} accounting codes in the database")
-
-        if not codes:
-            print("⚠️  No accounting codes found in the database")
-            return []
-
-        # Print sample of codes
-        print("\n📋 Sample of accounting codes:")
-        for i, code in enumerate(codes[:3]):
-            print(f"  {i+1}. ID: {code.id}")
-            print(f"     Code: {code.code}")
-            print(f"     Name: {code.name}")
-            print(f"     Type: {code.account_type}")
-            print(f"     Category: {code.category}")
-            print(f"     Parent ID: {code.parent_id}")
-            print(f"     Is Parent: {code.is_parent}")
-            print(f"     Normal Balance: {getattr(code, 'normal_balance', 'N/A')}")
-            print()
-
-        # Serialize the response
-        print("\n🔄 Serializing accounting codes...")
-        result = []
-        for i, code in enumerate(codes, 1):
-            try:
-                print(f"  🔄 Processing code {i}/{len(codes)}: {code.code} - {code.name}")
-                serialized = serialize_code(code, db)
-                result.append(serialized)
-                print(f"  ✅ Successfully serialized code {code.code}")
-            except Exception as e:
-                print(f"\n❌ [ERROR] Failed to serialize code {code.id} ({code.code}):")
-                print(f"  - Error Type: {type(e).__name__}")
-                print(f"  - Error Message: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                print("\n" + "-"*50 + "\n")
-                raise
-
-        print(f"\n✅ Successfully serialized {len(result)} accounting codes")
-        return result
 
-    except HTTPException as http_exc:
-        print(f"\n❌ [HTTP {http_exc.status_code}] {http_exc.detail}")
-        raise
+@router.get("/", response_model=List[AccountingCodeOut])
+def list_accounting_codes(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Every account with live (rolled-up) balances and its direct sub-accounts.
 
+    Supports conditional GET: send the returned ETag as If-None-Match to get a 304
+    while no account, branch or journal line has changed.
+    """
+    service = ChartOfAccountsService(db)
+    try:
+        etag, not_modified = _conditional_get(request, response, service)
+        return not_modified or service.get_accounts(etag)
     except Exception as e:
-        print(f"\n❌ [UNHANDLED ERROR] {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Failed to list accounting codes")
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred while retrieving accounting codes: {str(e)}"
         )
-    finally:
-        print("\n" + "="*80)
-        print("🏁 [API] GET /accounting-codes - Completed")
-        print("="*80 + "\n")
+
+
+@router.get("/tree", response_model=List[AccountingCodeOut])
+def get_chart_of_accounts_tree(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Root accounts with nested sub-accounts; parent balances include all descendants.
+
+    Built from three queries and cached per ETag; supports If-None-Match.
+    """
+    service = ChartOfAccountsService(db)
+    etag, not_modified = _conditional_get(request, response, service)
+    return not_modified or service.get_tree(etag)
 
 @router.get("/{code_id}", response_model=AccountingCodeOut)
 def get_accounting_code(code_id: str, db: Session = Depends(get_db)):
@@ -346,33 +294,33 @@ def create_accounting_code(data: AccountingCodeCreate, db: Session = Depends(get
     reporting_tag = data.reporting_tag or "TEMP"
     code_data['reporting_tag'] = reporting_tag
 
-    print(f"DEBUG: Setting currency to: {settings.default_currency}")
-    print(f"DEBUG: Generated reporting tag: {reporting_tag}")
-    print(f"DEBUG: Code data: {code_data}")
+    logger.debug("Setting currency to: %s", settings.default_currency)
+    logger.debug("Generated reporting tag: %s", reporting_tag)
+    logger.debug("Code data: %s", code_data)
 
     code = AccountingCode(**code_data)
     db.add(code)
     db.commit()
     db.refresh(code)
 
-    print(f"DEBUG: Saved code currency: {code.currency}")
-    print(f"DEBUG: Saved code reporting tag: {code.reporting_tag}")
+    logger.debug("Saved code currency: %s", code.currency)
+    logger.debug("Saved code reporting tag: %s", code.reporting_tag)
     return serialize_code(code, db)
 
 @router.put("/{code_id}", response_model=AccountingCodeOut)
 def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session = Depends(get_db)):
     """Update an existing accounting code with validation and error handling."""
-    print(f"\n🔄 [PUT] Updating accounting code {code_id}")
-    print(f"📝 Update data: {data.dict(exclude_unset=True)}")
+    logger.debug("[PUT] Updating accounting code %s", code_id)
+    logger.debug("Update data: %s", data.dict(exclude_unset=True))
 
     try:
         # Find the accounting code
         code = db.query(AccountingCode).filter_by(id=code_id).first()
         if not code:
-            print(f"❌ Accounting code {code_id} not found")
+            logger.warning("Accounting code %s not found", code_id)
             raise HTTPException(status_code=404, detail="Accounting code not found")
 
-        print(f"✅ Found accounting code: {code.name} ({code.code})")
+        logger.debug("Found accounting code: %s (%s)", code.name, code.code)
 
         # Get the update data, excluding unset values
         update_data = data.dict(exclude_unset=True)
@@ -384,28 +332,28 @@ def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session
                 # Check if parent exists
                 parent = db.query(AccountingCode).filter_by(id=parent_id).first()
                 if not parent:
-                    print(f"❌ Parent code {parent_id} not found")
+                    logger.warning("Parent code %s not found", parent_id)
                     raise HTTPException(status_code=400, detail="Parent accounting code not found")
 
                 # Prevent circular reference
                 if parent_id == code_id:
-                    print(f"❌ Cannot set account as its own parent")
+                    logger.warning("Cannot set account as its own parent")
                     raise HTTPException(status_code=400, detail="Account cannot be its own parent")
 
                 # Check if the new parent would create a circular reference
                 current = parent
                 while current and current.parent_id:
                     if current.parent_id == code_id:
-                        print(f"❌ Circular reference detected with parent {parent_id}")
+                        logger.warning("Circular reference detected with parent %s", parent_id)
                         raise HTTPException(status_code=400, detail="This change would create a circular reference")
                     current = db.query(AccountingCode).filter_by(id=current.parent_id).first()
 
-                print(f"✅ Parent validation passed for {parent.name} ({parent.code})")
+                logger.debug("Parent validation passed for %s (%s)", parent.name, parent.code)
 
                 # Set parent as a parent account if it isn't already
                 if not parent.is_parent:
                     parent.is_parent = True
-                    print(f"📝 Marked parent {parent.name} as parent account")
+                    logger.debug("Marked parent %s as parent account", parent.name)
 
         # Validate account type and category consistency
         if 'account_type' in update_data or 'category' in update_data:
@@ -413,16 +361,16 @@ def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session
             new_category = update_data.get('category', code.category)
 
             # Add any validation logic for account type/category combinations here
-            print(f"✅ Account type/category validation passed: {new_account_type}/{new_category}")
+            logger.debug("Account type/category validation passed: %s/%s", new_account_type, new_category)
 
         # Apply updates
         for key, value in update_data.items():
             if hasattr(code, key):
                 old_value = getattr(code, key)
                 setattr(code, key, value)
-                print(f"📝 Updated {key}: {old_value} -> {value}")
+                logger.debug("Updated %s: %s -> %s", key, old_value, value)
             else:
-                print(f"⚠️ Skipping unknown field: {key}")
+                logger.warning("Skipping unknown field: %s", key)
 
         # Regenerate reporting tag if account type or category changed
         if 'account_type' in update_data or 'category' in update_data:
@@ -432,12 +380,12 @@ def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session
             # )
             new_reporting_tag = "TEMP"  # Temporary while debugging imports
             code.reporting_tag = new_reporting_tag
-            print(f"📝 Updated reporting tag: {new_reporting_tag}")
+            logger.debug("Updated reporting tag: %s", new_reporting_tag)
 
         # Commit the changes
         db.commit()
         db.refresh(code)
-        print(f"✅ Successfully updated accounting code {code.name}")
+        logger.info("Successfully updated accounting code %s", code.name)
 
         return serialize_code(code, db)
 
@@ -446,9 +394,7 @@ def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error updating accounting code: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error updating accounting code: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error updating accounting code: {str(e)}"
@@ -457,22 +403,22 @@ def update_accounting_code(code_id: str, data: AccountingCodeUpdate, db: Session
 @router.delete("/{code_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_accounting_code(code_id: str, db: Session = Depends(get_db)):
     """Delete an accounting code with proper validation and cascade handling."""
-    print(f"\n🗑️ [DELETE] Deleting accounting code {code_id}")
+    logger.debug("[DELETE] Deleting accounting code %s", code_id)
 
     try:
         # Find the accounting code
         code = db.query(AccountingCode).filter_by(id=code_id).first()
         if not code:
-            print(f"❌ Accounting code {code_id} not found")
+            logger.warning("Accounting code %s not found", code_id)
             raise HTTPException(status_code=404, detail="Accounting code not found")
 
-        print(f"✅ Found accounting code: {code.name} ({code.code})")
+        logger.debug("Found accounting code: %s (%s)", code.name, code.code)
 
         # Check if this code has sub-accounts (children)
         children = db.query(AccountingCode).filter_by(parent_id=code_id).all()
         if children:
             child_names = [f"{child.name} ({child.code})" for child in children]
-            print(f"❌ Cannot delete: Has {len(children)} sub-accounts: {', '.join(child_names[:3])}")
+            logger.warning("Cannot delete: Has %s sub-accounts: %s", len(children), ', '.join(child_names[:3]))
             raise HTTPException(
                 status_code=400,
                 detail=f"Cannot delete account with sub-accounts. This account has {len(children)} sub-accounts. Please delete or reassign sub-accounts first."
@@ -484,17 +430,17 @@ def delete_accounting_code(code_id: str, db: Session = Depends(get_db)):
             from app.models.accounting import JournalEntry
             journal_entries = db.query(JournalEntry).filter_by(accounting_code_id=code_id).first()
             if journal_entries:
-                print(f"❌ Cannot delete: Account has journal entries")
+                logger.warning("Cannot delete: Account has journal entries")
                 raise HTTPException(
                     status_code=400,
                     detail="Cannot delete account that has journal entries. Please review and remove journal entries first."
                 )
         except ImportError:
             # JournalEntry model might not exist yet, skip this check
-            print("⚠️ JournalEntry model not found, skipping journal entry check")
+            logger.warning("JournalEntry model not found, skipping journal entry check")
         except Exception as e:
             # Other database errors, log but don't fail the deletion
-            print(f"⚠️ Could not check journal entries: {str(e)}")
+            logger.warning("Could not check journal entries: %s", e)
 
         # Check if this code is used in other transactions (purchases, sales, etc.)
         # You can add more checks here for other models that reference accounting codes
@@ -512,12 +458,12 @@ def delete_accounting_code(code_id: str, db: Session = Depends(get_db)):
                 # If this is the last child, mark parent as non-parent
                 if other_children == 0:
                     parent.is_parent = False
-                    print(f"📝 Marked parent {parent.name} as non-parent (no more children)")
+                    logger.debug("Marked parent %s as non-parent (no more children)", parent.name)
 
         # Delete the accounting code
         db.delete(code)
         db.commit()
-        print(f"✅ Successfully deleted accounting code {code.name} ({code.code})")
+        logger.info("Successfully deleted accounting code %s (%s)", code.name, code.code)
 
         return  # FastAPI automatically returns 204 No Content
 
@@ -526,9 +472,7 @@ def delete_accounting_code(code_id: str, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error deleting accounting code: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error deleting accounting code: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting accounting code: {str(e)}"
@@ -547,16 +491,16 @@ def get_sub_accounts(code_id: str, db: Session = Depends(get_db)):
 @router.post("/{code_id}/sub-accounts", response_model=AccountingCodeOut, status_code=status.HTTP_201_CREATED)
 def create_sub_account(code_id: str, data: AccountingCodeCreate, db: Session = Depends(get_db)):
     """Create a sub-account under the specified parent account."""
-    print(f"\n➕ [POST] Creating sub-account under {code_id}")
-    print(f"📝 Sub-account data: {data.model_dump()}")
+    logger.debug("[POST] Creating sub-account under %s", code_id)
+    logger.debug("Sub-account data: %s", data.model_dump())
 
     try:
         parent = db.query(AccountingCode).filter_by(id=code_id).first()
         if not parent:
-            print(f"❌ Parent accounting code {code_id} not found")
+            logger.warning("Parent accounting code %s not found", code_id)
             raise HTTPException(status_code=404, detail="Parent accounting code not found")
 
-        print(f"✅ Found parent: {parent.name} ({parent.code})")
+        logger.debug("Found parent: %s (%s)", parent.name, parent.code)
 
         # Get app settings for default currency
         from app.core.config import settings
@@ -576,13 +520,13 @@ def create_sub_account(code_id: str, data: AccountingCodeCreate, db: Session = D
         sub_data['parent_id'] = parent.id
         sub_data['is_parent'] = False
 
-        print(f"📝 Generated sub-account reporting tag: {reporting_tag}")
-        print(f"📝 Setting parent_id to: {parent.id}")
+        logger.debug("Generated sub-account reporting tag: %s", reporting_tag)
+        logger.debug("Setting parent_id to: %s", parent.id)
 
         # Validate that the code doesn't already exist
         existing_code = db.query(AccountingCode).filter_by(code=sub_data['code']).first()
         if existing_code:
-            print(f"❌ Account code {sub_data['code']} already exists")
+            logger.warning("Account code %s already exists", sub_data['code'])
             raise HTTPException(status_code=400, detail=f"Account code '{sub_data['code']}' already exists")
 
         sub = AccountingCode(**sub_data)
@@ -591,12 +535,12 @@ def create_sub_account(code_id: str, data: AccountingCodeCreate, db: Session = D
         # Mark parent as a parent account if it isn't already
         if not parent.is_parent:
             parent.is_parent = True
-            print(f"📝 Marked parent {parent.name} as parent account")
+            logger.debug("Marked parent %s as parent account", parent.name)
 
         db.commit()
         db.refresh(sub)
 
-        print(f"✅ Successfully created sub-account: {sub.name} ({sub.code})")
+        logger.info("Successfully created sub-account: %s (%s)", sub.name, sub.code)
         return serialize_code(sub, db)
 
     except HTTPException:
@@ -604,50 +548,47 @@ def create_sub_account(code_id: str, data: AccountingCodeCreate, db: Session = D
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error creating sub-account: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating sub-account: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error creating sub-account: {str(e)}"
         )
 
-print("[DEBUG] Reached sub-account management endpoints...")
 
 @router.delete("/{code_id}/sub-accounts/{sub_account_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_sub_account(code_id: str, sub_account_id: str, db: Session = Depends(get_db)):
     """Delete a specific sub-account."""
-    print(f"\n🗑️ [DELETE] Deleting sub-account {sub_account_id} from parent {code_id}")
+    logger.debug("[DELETE] Deleting sub-account %s from parent %s", sub_account_id, code_id)
 
     try:
         # Find the parent account
         parent = db.query(AccountingCode).filter_by(id=code_id).first()
         if not parent:
-            print(f"❌ Parent accounting code {code_id} not found")
+            logger.warning("Parent accounting code %s not found", code_id)
             raise HTTPException(status_code=404, detail="Parent accounting code not found")
 
         # Find the sub-account
         sub_account = db.query(AccountingCode).filter_by(id=sub_account_id, parent_id=code_id).first()
         if not sub_account:
-            print(f"❌ Sub-account {sub_account_id} not found under parent {code_id}")
+            logger.warning("Sub-account %s not found under parent %s", sub_account_id, code_id)
             raise HTTPException(status_code=404, detail="Sub-account not found under this parent")
 
-        print(f"✅ Found sub-account: {sub_account.name} ({sub_account.code})")
+        logger.debug("Found sub-account: %s (%s)", sub_account.name, sub_account.code)
 
         # Check if sub-account has any journal entries or transactions
         try:
             from app.models.accounting import JournalEntry
             journal_entries = db.query(JournalEntry).filter_by(accounting_code_id=sub_account_id).first()
             if journal_entries:
-                print(f"❌ Cannot delete: Sub-account has journal entries")
+                logger.warning("Cannot delete: Sub-account has journal entries")
                 raise HTTPException(
                     status_code=400,
                     detail="Cannot delete sub-account that has journal entries. Please review and remove journal entries first."
                 )
         except ImportError:
-            print("⚠️ JournalEntry model not found, skipping journal entry check")
+            logger.warning("JournalEntry model not found, skipping journal entry check")
         except Exception as e:
-            print(f"⚠️ Could not check journal entries: {str(e)}")
+            logger.warning("Could not check journal entries: %s", e)
 
         # Delete the sub-account
         db.delete(sub_account)
@@ -661,10 +602,10 @@ def delete_sub_account(code_id: str, sub_account_id: str, db: Session = Depends(
         # If this is the last child, mark parent as non-parent
         if other_children == 0:
             parent.is_parent = False
-            print(f"📝 Marked parent {parent.name} as non-parent (no more children)")
+            logger.debug("Marked parent %s as non-parent (no more children)", parent.name)
 
         db.commit()
-        print(f"✅ Successfully deleted sub-account {sub_account.name} ({sub_account.code})")
+        logger.info("Successfully deleted sub-account %s (%s)", sub_account.name, sub_account.code)
 
         return  # FastAPI automatically returns 204 No Content
 
@@ -673,23 +614,19 @@ def delete_sub_account(code_id: str, sub_account_id: str, db: Session = Depends(
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error deleting sub-account: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error deleting sub-account: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting sub-account: {str(e)}"
         )
 
-print("[DEBUG] Reached transaction endpoints section...")
 
 @router.get("/test-transactions")
 async def test_transactions_endpoint():
     """Simple test endpoint to verify route registration"""
-    print("[DEBUG] test_transactions_endpoint called")
+    logger.debug("test_transactions_endpoint called")
     return {"message": "Transactions endpoint is working"}
 
-print("[DEBUG] test_transactions_endpoint defined")
 
 @router.get("/{code_id}/transactions", response_model=AccountTransactionsOut)
 async def get_account_transactions(
@@ -707,7 +644,7 @@ async def get_account_transactions(
     The running balance starts from the oldest transaction and accumulates through
     each subsequent transaction.
     """
-    print(f"[DEBUG] get_account_transactions called for code_id: {code_id}")
+    logger.debug("get_account_transactions called for code_id: %s", code_id)
     try:
         # Verify the accounting code exists
         accounting_code = db.query(AccountingCode).filter(
@@ -734,19 +671,19 @@ async def get_account_transactions(
                 query = db.query(JournalEntry).filter(
                     JournalEntry.accounting_code_id.in_(account_ids)
                 )
-                print(f"[DEBUG] Parent account {accounting_code.code} - including {len(child_accounts)} child accounts")
+                logger.debug("Parent account %s - including %s child accounts", accounting_code.code, len(child_accounts))
             else:
                 # Parent has no children, just use parent account
                 query = db.query(JournalEntry).filter(
                     JournalEntry.accounting_code_id == code_id
                 )
-                print(f"[DEBUG] Parent account {accounting_code.code} - no child accounts found")
+                logger.debug("Parent account %s - no child accounts found", accounting_code.code)
         else:
             # Child account - only show its own transactions
             query = db.query(JournalEntry).filter(
                 JournalEntry.accounting_code_id == code_id
             )
-            print(f"[DEBUG] Child account {accounting_code.code} - showing own transactions only")
+            logger.debug("Child account %s - showing own transactions only", accounting_code.code)
 
         # Apply date filters if provided
         if start_date:
@@ -834,7 +771,6 @@ async def get_account_transactions(
             detail=f"Internal server error while fetching transactions: {str(e)}"
         )
 
-print("[DEBUG] get_account_transactions endpoint defined")
 
 @router.get("/categories/{account_type}")
 def get_categories_by_account_type(account_type: str):
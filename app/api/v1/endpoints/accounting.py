@@ -7,7 +7,7 @@ import datetime as dt
 from decimal import Decimal
 from sqlalchemy import func
 
-from app.models.accounting import AccountingEntry, JournalEntry, Ledger, AccountingCode
+from app.models.accounting import AccountingEntry, JournalEntry, Ledger, AccountingCode, NormalBalance
 from app.core.database import get_db
 from app.core.response_wrapper import UnifiedResponse
 from app.services.accounting_service import AccountingService
@@ -943,26 +943,27 @@ def get_trial_balance(
     if not as_of_date:
         as_of_date = date.today()
 
-    # Get all accounting codes
-    accounting_codes_query = db.query(AccountingCode)
+    # Opening balances and movements of every account from the ledger's grouped balance engine
+    from app.services.general_ledger_service import GeneralLedgerService
+    balances = GeneralLedgerService(db).get_account_balances(as_of_date=as_of_date)
     # Apply branch scoping for non-universal roles/users with a fixed branch
     if False:  # Role check removed for development
-        accounting_codes_query = accounting_codes_query.filter(AccountingCode.branch_id == 'default-branch')
-    accounting_codes = accounting_codes_query.all()
+        balances = [b for b in balances if b['branch_id'] == 'default-branch']
 
     trial_balance = []
 
-    for code in accounting_codes:
-        # Get total debits and credits for this account
-        total_debits = db.query(JournalEntry.debit_amount).filter(
-            JournalEntry.accounting_code_id == code.id,
-            JournalEntry.date <= as_of_date
-        ).with_entities(func.sum(JournalEntry.debit_amount)).scalar() or Decimal('0.0')
+    for balance in balances:
+        total_debits = balance['total_debits']
+        total_credits = balance['total_credits']
 
-        total_credits = db.query(JournalEntry.credit_amount).filter(
-            JournalEntry.accounting_code_id == code.id,
-            JournalEntry.date <= as_of_date
-        ).with_entities(func.sum(JournalEntry.credit_amount)).scalar() or Decimal('0.0')
+        # The year's opening balance counts on the side it sits on
+        opening = balance['opening_balance']
+        if balance['normal_balance'] == NormalBalance.CREDIT.value:
+            opening = -opening
+        if opening > 0:
+            total_debits += opening
+        elif opening < 0:
+            total_credits -= opening
 
         # Calculate net balance
         net_balance = total_debits - total_credits
@@ -970,9 +971,9 @@ def get_trial_balance(
         # Only include accounts with activity
         if total_debits > 0 or total_credits > 0:
             trial_balance_entry = TrialBalanceEntryOut(
-                account_code=code.code,
-                account_name=code.name,
-                type=code.account_type,
+                account_code=balance['account_code'],
+                account_name=balance['account_name'],
+                type=balance['account_type'],
                 debit_balance=total_debits,
                 credit_balance=total_credits,
                 net_balance=net_balance
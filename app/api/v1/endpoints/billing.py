@@ -110,6 +110,24 @@ class InvoiceGenerationResponse(BaseModel):
     """Invoice generation response schema"""
     count: int
     invoices: List[Dict]
+    run_id: Optional[str] = None
+    status: Optional[str] = None
+    total_cycles: Optional[int] = None
+    processed_cycles: Optional[int] = None
+    failed_cycles: Optional[int] = None
+    errors: Dict[str, str] = {}
+
+
+class BillingRunResponse(BaseModel):
+    """Billing run progress schema"""
+    run_id: str
+    status: str
+    reference_date: date
+    total_cycles: int
+    processed_cycles: int
+    failed_cycles: int
+    count: int
+    errors: Dict[str, str] = {}
 
 
 class DashboardStatsResponse(BaseModel):
@@ -351,6 +369,34 @@ async def generate_all_due_invoices(
         raise HTTPException(status_code=500, detail=f"Error generating invoices: {str(e)}")
 
 
+@router.get("/runs/{run_id}", response_model=BillingRunResponse)
+async def get_billing_run(
+    run_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a billing run"""
+    billing_service = BillingService(db)
+    run = billing_service.get_billing_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    return run
+
+
+@router.post("/runs/{run_id}/resume", response_model=InvoiceGenerationResponse)
+async def resume_billing_run(
+    run_id: str,
+    db: Session = Depends(get_db)
+):
+    """Continue a billing run that stopped part-way"""
+    try:
+        billing_service = BillingService(db)
+        return billing_service.resume_billing_run(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resuming billing run: {str(e)}")
+
+
 # ============================================================================
 # DASHBOARD & REPORTING
 # ============================================================================
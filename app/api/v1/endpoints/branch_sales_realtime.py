@@ -3,20 +3,24 @@ Real-time branch sales monitoring API endpoint.
 Optimized for high-traffic scenarios with caching and efficient queries.
 """
 
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy import func, text
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+import asyncio
 import json
-from functools import lru_cache
 import time
 
+from app.core.cache import get_cache
 from app.core.database import get_db
 from app.models.sales import Sale
 from app.models import Customer
 from app.models import Branch
+from app.services.branch_sales_aggregator import get_branch_sales_aggregator
 
 from app.utils.logger import get_logger, log_exception, log_error_with_context
 
@@ -33,6 +37,8 @@ class BranchSalesMetric(BaseModel):
     average_transaction: float
     active_now: int
     last_updated: str
+    payment_breakdown: Dict[str, float] = {}
+    hourly_data: List[Dict[str, Any]] = []
 
 class BranchSalesDetail(BaseModel):
     branch_id: str
@@ -52,112 +58,119 @@ class RealtimeSalesData(BaseModel):
     branches: List[BranchSalesMetric]
     total_network_sales: float
     active_branches: int
+    version: int = 0
 
 # Cache configuration
 CACHE_TTL = 5  # 5 seconds for real-time data
-_cache = {}
-_cache_timestamps = {}
+_cache = get_cache("branch_sales_realtime", max_entries=512, ttl_seconds=CACHE_TTL)
 
-def get_cached_data(key: str, ttl: int = CACHE_TTL) -> Optional[Any]:
+def get_cached_data(key: str) -> Optional[Any]:
     """Get cached data if still valid"""
-    if key in _cache:
-        cache_time = _cache_timestamps.get(key, 0)
-        if time.time() - cache_time < ttl:
-            return _cache[key]
-        else:
-            del _cache[key]
-            del _cache_timestamps[key]
-    return None
-
-def set_cache(key: str, data: Any) -> None:
-    """Cache data with timestamp"""
-    _cache[key] = data
-    _cache_timestamps[key] = time.time()
+    return _cache.get(key)
+
+def set_cache(key: str, data: Any, ttl: int = CACHE_TTL) -> None:
+    """Cache data for ``ttl`` seconds"""
+    _cache.set(key, data, ttl=ttl)
+
+# Live dashboard payloads rendered once per aggregator version, shared by all viewers
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_POLL_SECONDS = 1
+_live_payloads = get_cache("branch_sales_live", max_entries=8, ttl_seconds=300)
+
+def _build_realtime_data(snapshot: Dict[str, Any], exclude_empty: bool) -> RealtimeSalesData:
+    now = datetime.now().isoformat()
+    branches_data = []
+    total_network_sales = 0
+    active_branches_count = 0
+    for branch in sorted(snapshot['branches'], key=lambda b: b['today_amount'], reverse=True):
+        sales_today = branch['today_count']
+        if exclude_empty and sales_today == 0:
+            continue
+        amount_today = float(branch['today_amount'])
+        branches_data.append(BranchSalesMetric(
+            branch_id=branch['branch_id'],
+            branch_name=branch['branch_name'],
+            total_sales_today=amount_today,
+            total_sales_this_month=float(branch['month_amount']),
+            transaction_count_today=sales_today,
+            average_transaction=amount_today / sales_today if sales_today > 0 else 0,
+            active_now=sales_today,  # Simplified: use daily count as proxy for active
+            last_updated=now,
+            payment_breakdown={method: float(amount) for method, amount in branch['payments'].items()},
+            hourly_data=[
+                {'hour': hour, 'sales_count': bucket['count'], 'sales_amount': float(bucket['amount'])}
+                for hour, bucket in sorted(branch['hourly'].items())
+            ]
+        ))
+        total_network_sales += amount_today
+        if sales_today > 0:
+            active_branches_count += 1
+    return RealtimeSalesData(
+        timestamp=now,
+        branches=branches_data,
+        total_network_sales=total_network_sales,
+        active_branches=active_branches_count,
+        version=snapshot['version']
+    )
+
+def get_live_sales_data(exclude_empty: bool, db: Optional[Session] = None) -> RealtimeSalesData:
+    """Realtime payload for the current aggregator version (rendered once per version)"""
+    aggregator = get_branch_sales_aggregator()
+    aggregator.refresh_if_due(db)
+    key = f"{aggregator.version}:{exclude_empty}"
+    return _live_payloads.get_or_set(key, lambda: _build_realtime_data(aggregator.snapshot(db), exclude_empty))
 
 @router.get("/v1/branch-sales/realtime", response_model=RealtimeSalesData)
-async def get_realtime_branch_sales(
+def get_realtime_branch_sales(
     db: Session = Depends(get_db),
     exclude_empty: bool = Query(False, description="Exclude branches with no sales")
 ):
     """
     Get real-time sales data for all branches - optimized for high traffic.
-    Includes caching and efficient database queries.
+    Served from the in-process sales aggregator (updated as POS sales commit and
+    reconciled against the database periodically) instead of per-request aggregates.
 
     Parameters:
     - exclude_empty: If true, only returns branches with sales
     """
-    cache_key = f"realtime_sales_{exclude_empty}"
-    cached = get_cached_data(cache_key, ttl=3)
-
-    if cached:
-        return cached
-
     try:
-        now = datetime.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        # Use raw SQL for better performance on large datasets
-        query = text("""
-            SELECT
-                b.id,
-                b.name,
-                COUNT(CASE WHEN s.date >= :today_start THEN 1 END) as sales_today,
-                COUNT(CASE WHEN s.date >= :month_start THEN 1 END) as sales_month,
-                COALESCE(SUM(CASE WHEN s.date >= :today_start THEN s.total_amount ELSE 0 END), 0) as amount_today,
-                COALESCE(SUM(CASE WHEN s.date >= :month_start THEN s.total_amount ELSE 0 END), 0) as amount_month
-            FROM branches b
-            LEFT JOIN sales s ON b.id = s.branch_id
-            GROUP BY b.id, b.name
-            ORDER BY amount_today DESC
-        """)
-
-        results = db.execute(query, {
-            'today_start': today_start,
-            'month_start': month_start
-        }).fetchall()
-
-        branches_data = []
-        total_network_sales = 0
-        active_branches_count = 0
-
-        for row in results:
-            branch_id, branch_name, sales_today, sales_month, amount_today, amount_month = row
-
-            if exclude_empty and sales_today == 0:
-                continue
-
-            avg_transaction = float(amount_today / sales_today) if sales_today > 0 else 0
-
-            metric = BranchSalesMetric(
-                branch_id=branch_id,
-                branch_name=branch_name,
-                total_sales_today=float(amount_today),
-                total_sales_this_month=float(amount_month),
-                transaction_count_today=int(sales_today),
-                average_transaction=avg_transaction,
-                active_now=int(sales_today),  # Simplified: use daily count as proxy for active
-                last_updated=now.isoformat()
-            )
-
-            branches_data.append(metric)
-            total_network_sales += float(amount_today)
-            if sales_today > 0:
-                active_branches_count += 1
-
-        response = RealtimeSalesData(
-            timestamp=now.isoformat(),
-            branches=branches_data,
-            total_network_sales=total_network_sales,
-            active_branches=active_branches_count
-        )
-
-        set_cache(cache_key, response)
-        return response
-
+        return get_live_sales_data(exclude_empty, db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching realtime sales: {str(e)}")
 
+@router.get("/v1/branch-sales/realtime/stream")
+async def stream_realtime_branch_sales(
+    request: Request,
+    exclude_empty: bool = Query(False, description="Exclude branches with no sales")
+):
+    """
+    Server-Sent Events stream of the realtime branch sales payload.
+    Pushes a `sales` event whenever the live counters change, with a comment
+    heartbeat in between. Each change is rendered once and shared by all viewers.
+    """
+    aggregator = get_branch_sales_aggregator()
+
+    async def event_stream():
+        sent_version = None
+        last_sent = 0.0
+        while not await request.is_disconnected():
+            if sent_version != aggregator.version or aggregator.reconcile_due():
+                data = await run_in_threadpool(get_live_sales_data, exclude_empty)
+                if data.version != sent_version:
+                    sent_version = data.version
+                    last_sent = time.monotonic()
+                    yield f"id: {data.version}\nevent: sales\ndata: {data.model_dump_json()}\n\n"
+            if time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/v1/branch-sales/{branch_id}/detail", response_model=BranchSalesDetail)
 async def get_branch_sales_detail(
     branch_id: str,
@@ -169,7 +182,7 @@ async def get_branch_sales_detail(
     Optimized for high-frequency queries.
     """
     cache_key = f"branch_detail_{branch_id}_{hours}"
-    cached = get_cached_data(cache_key, ttl=5)
+    cached = get_cached_data(cache_key)
 
     if cached:
         return cached
@@ -274,7 +287,7 @@ async def get_branch_sales_detail(
             recent_sales=recent_sales
         )
 
-        set_cache(cache_key, detail)
+        set_cache(cache_key, detail, ttl=5)
         return detail
 
     except HTTPException:
@@ -293,7 +306,7 @@ async def get_branch_sales_comparison(
     Useful for real-time monitoring of competitive performance.
     """
     cache_key = f"comparison_{branch_ids}_{metric}"
-    cached = get_cached_data(cache_key, ttl=10)
+    cached = get_cached_data(cache_key)
 
     if cached:
         return cached
@@ -334,7 +347,7 @@ async def get_branch_sales_comparison(
             'branches': comparison_data
         }
 
-        set_cache(cache_key, result)
+        set_cache(cache_key, result, ttl=10)
         return result
 
     except Exception as e:
@@ -243,6 +243,8 @@ async def delete_branch(
             "purchase_orders WHERE branch_id = :bid",
             "invoices WHERE branch_id = :bid",
             # Inventory/Products
+            "branch_stock_levels WHERE branch_id = :bid",
+            "inventory_cost_layers WHERE branch_id = :bid",
             "products WHERE branch_id = :bid",
             "inventory_transactions WHERE branch_id = :bid",
             # People/Entities
@@ -260,6 +262,9 @@ async def delete_branch(
                 # Log but continue - some tables might not exist or might be empty
                 print(f"[DEBUG] Skipped: {delete_clause[:50]} - {str(e)[:50]}")
 
+        # Raw deletes bypass the ORM hooks that version the chart of accounts
+        from app.services.chart_of_accounts_service import mark_chart_of_accounts_changed
+        mark_chart_of_accounts_changed(db)
         db.commit()
         return {"message": "Branch deleted successfully"}
 
@@ -73,6 +73,15 @@ class GeneralLedgerResponse(BaseModel):
     summary: LedgerSummary
     filters: Dict[str, Any]
 
+class GeneralLedgerPageResponse(BaseModel):
+    """Keyset-paginated general ledger response"""
+    entries: List[LedgerEntry]
+    next_cursor: Optional[str] = None
+    has_more: bool
+    approximate_count: Optional[int] = None
+    summary: LedgerSummary
+    filters: Dict[str, Any]
+
 class TrialBalanceEntry(BaseModel):
     """Trial balance entry"""
     account_id: str
@@ -186,6 +195,50 @@ async def get_general_ledger(
             detail=f"Error retrieving general ledger: {str(e)}"
         )
 
+@router.get("/general-ledger/page", response_model=GeneralLedgerPageResponse)
+async def get_general_ledger_page(
+    account_id: Optional[str] = Query(None, description="Filter by specific account ID"),
+    account_code: Optional[str] = Query(None, description="Filter by account code (e.g., 1110)"),
+    account_type: Optional[str] = Query(None, description="Filter by account type (Asset, Liability, Equity, Revenue, Expense)"),
+    from_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)"),
+    branch_id: Optional[str] = Query(None, description="Filter by branch ID"),
+    search: Optional[str] = Query(None, description="Search in descriptions, references, and account names"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of entries to return"),
+    include_count: bool = Query(False, description="Include an approximate total row count"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get general ledger entries using keyset (cursor) pagination
+
+    Pages are keyed on (date, id) and running balances are carried forward from
+    earlier pages, so deep pages are as fast and as accurate as the first.
+    """
+    try:
+        ledger_service = GeneralLedgerService(db)
+        result = ledger_service.get_general_ledger_page(
+            account_id=account_id,
+            account_type=account_type,
+            from_date=from_date,
+            to_date=to_date,
+            branch_id=branch_id,
+            search=search,
+            cursor=cursor,
+            limit=limit,
+            account_code=account_code,
+            include_count=include_count
+        )
+        return GeneralLedgerPageResponse(**result)
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving general ledger page: {str(e)}"
+        )
+
 @router.get("/trial-balance", response_model=TrialBalanceResponse)
 async def get_trial_balance(
     as_of_date: Optional[date] = Query(None, description="Date for trial balance (defaults to today)"),
@@ -706,6 +759,14 @@ async def seed_one_entry(db: Session = Depends(get_db)):
             "VALUES (:id, :aid, :eid, :d, :desc, 0.0, :credit, 'seed', :branch_id, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
         ), {"id": str(uuid.uuid4()), "aid": equity_id, "eid": entry_id, "d": today, "desc": "Seed credit equity", "credit": 100.0, "branch_id": branch_id})
 
+        # Raw inserts bypass the ORM flush hook, so register the movements explicitly
+        from app.services.account_balance_snapshot_service import AccountBalanceSnapshotService
+        snapshots = AccountBalanceSnapshotService(db)
+        snapshots.record_movement(cash_id, branch_id, today, debit_amount=100.0)
+        snapshots.record_movement(equity_id, branch_id, today, credit_amount=100.0)
+        from app.services.chart_of_accounts_service import mark_chart_of_accounts_changed
+        mark_chart_of_accounts_changed(db)
+
         db.commit()
         return {"success": True, "message": "Seeded one balanced journal entry", "debit_account_id": cash_id, "credit_account_id": equity_id, "branch_id": branch_id}
     except Exception as e:
@@ -704,7 +704,7 @@ async def create_inventory_adjustment(
             elif adjustment.adjustment_type == 'theft':
                 transaction_type = 'theft'
             else:
-                transaction_type = 'adjustment'
+                transaction_type = 'adjustment_out'
 
         # Use inventory service to update quantity and create transaction
         inventory_service = InventoryService(db)
@@ -10,11 +10,12 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from pathlib import Path
+import json
 import re
 from collections import defaultdict
 
 from app.core.database import get_db
-from app.utils.logger import get_logger
+from app.utils.logger import get_logger, get_log_levels, set_log_levels
 from pydantic import BaseModel
 
 logger = get_logger(__name__)
@@ -51,6 +52,11 @@ class PerformanceMetric(BaseModel):
     execution_time: float
     timestamp: str
 
+class LogLevelsUpdate(BaseModel):
+    levels: Dict[str, str] = {}
+    default: Optional[str] = None
+    replace: bool = False
+
 class LogFileInfo(BaseModel):
     name: str
     size: int
@@ -74,6 +80,19 @@ def get_log_path(log_type: str = "app") -> Path:
 
 def parse_log_line(line: str) -> Optional[Dict[str, Any]]:
     """Parse a log line into components"""
+    # Structured format written by app.utils.logger: one JSON object per line
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+            return {
+                "timestamp": record.get("timestamp", ""),
+                "level": record.get("level", ""),
+                "module": record.get("logger", ""),
+                "message": record.get("message", ""),
+            }
+        except ValueError:
+            return None
+
     # Format: 2025-01-27 12:34:56,789 INFO module_name - message
     pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) (\w+) ([\w\.]+) - (.+)'
     match = re.match(pattern, line)
@@ -495,3 +514,26 @@ async def tail_log(
     except Exception as e:
         logger.error(f"Error tailing log: {e}")
         raise HTTPException(status_code=500, detail="Failed to tail log file")
+
+
+@router.get("/logs/levels")
+async def get_logging_levels():
+    """Per-module log level overrides in effect in this worker ("*" is the default)"""
+    return get_log_levels()
+
+
+@router.put("/logs/levels")
+async def update_logging_levels(update: LogLevelsUpdate):
+    """
+    Change log levels at runtime without a restart (applies to this worker process)
+
+    - **levels**: Logger or package name -> level, e.g. {"app.services.ifrs_reports_core": "DEBUG"}
+    - **default**: Level for modules without an override
+    - **replace**: Drop overrides not listed instead of merging
+    """
+    try:
+        levels = set_log_levels(update.levels, default=update.default, replace=update.replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("Log levels updated", extra={"log_levels": levels})
+    return levels
@@ -316,7 +316,9 @@ async def create_sale(
             'receipt_number': receipt_data['receipt_number'],
             'receipt_id': receipt_data['receipt_id'],
             'html_content': receipt_data['html_content'],
-            'pdf_path': receipt_data.get('pdf_path')
+            'pdf_path': receipt_data.get('pdf_path'),
+            'job_id': receipt_data.get('job_id'),
+            'pdf_status': receipt_data.get('pdf_status')
         }
 
     return {
@@ -442,6 +444,36 @@ async def refund_sale(
 
 # POS Receipt Endpoints
 
+@router.get("/receipts/jobs/{job_id}")
+async def get_receipt_job_status(job_id: str):
+    """Status of a queued receipt PDF render (queued, running, completed or failed)"""
+    from app.services.receipt_queue import get_receipt_queue
+
+    job = get_receipt_queue().get_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Receipt job not found")
+    return {"success": True, "data": job}
+
+
+@router.get("/receipts/{receipt_id}/pdf-status")
+async def get_receipt_pdf_status(receipt_id: str, db: Session = Depends(get_db)):
+    """PDF availability for a receipt; survives restarts where in-memory job status is lost"""
+    from app.models.receipt import Receipt
+
+    receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    return {
+        "success": True,
+        "data": {
+            "receipt_id": receipt.id,
+            "receipt_number": receipt.receipt_number,
+            "status": "completed" if receipt.pdf_path else "pending",
+            "pdf_path": receipt.pdf_path
+        }
+    }
+
+
 @router.get("/sales/{sale_id}/receipt")
 async def get_sale_receipt(
     sale_id: str,
@@ -51,7 +51,8 @@ from app.core.security import require_any
 from app.core.security import require_any, require_permission_or_roles
 from app.services.report_export_utils import export_key_value_pdf, flatten_dict
 from app.core.config import settings
-from app.core.cache import get_redis, redis_available
+from app.core.blocking import offload_blocking
+from app.core.cache import get_cache
 from app.core.metrics import (
     GENERIC_REPORT_REQUESTS,
     GENERIC_REPORT_FLAT_ROWS,
@@ -60,8 +61,35 @@ from app.core.metrics import (
 )
 from app.services.app_setting_service import AppSettingService
 
-# Simple in-process cache for generic report payloads (keyed by hash)
-_GENERIC_REPORT_CACHE: dict = {}
+_GENERIC_REPORT_MEDIA_TYPES = {
+    'pdf': 'application/pdf',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+def _encode_generic_report(entry) -> bytes:
+    # Keep pure bytes to avoid pickle risk: b"FMT:" + fmt + b"\nNAME:" + fname + b"\n\n" + data
+    fmt, content, fname = entry
+    return b"FMT:" + fmt.encode() + b"\nNAME:" + fname.encode() + b"\n\n" + content
+
+
+def _decode_generic_report(raw: bytes):
+    header, body = raw.split(b"\n\n", 1)
+    parts = header.split(b"\n")
+    fmt = parts[0][4:].decode()
+    fname = parts[1][5:].decode() if len(parts) > 1 and parts[1].startswith(b'NAME:') else f"report.{fmt}"
+    return fmt, body, fname
+
+
+# Rendered generic report exports (keyed by hash); Redis-backed when available, bounded LRU otherwise
+_GENERIC_REPORT_CACHE = get_cache(
+    'genrep',
+    max_entries=settings.generic_report_cache_max_entries,
+    max_bytes=settings.generic_report_cache_max_bytes,
+    ttl_seconds=settings.generic_report_cache_ttl_seconds,
+    codec=(_encode_generic_report, _decode_generic_report),
+    sizeof=lambda entry: len(entry[1])
+)
 from fastapi import Depends
 # Reports: accountants plus managers (managers may view/print sales & operational reports).
 # Universal roles (super_admin, admin) already bypass via security.ALLOWED_EVERYTHING.
@@ -164,7 +192,8 @@ def get_invoice_metrics(
         raise HTTPException(status_code=500, detail=f"Error generating invoice metrics: {exc}") from exc
 
 @router.get("/trial-balance")
-async def get_trial_balance(
+@offload_blocking()
+def get_trial_balance(
     as_of_date: Optional[date] = Query(None, description="Trial balance as of date"),
     include_zero_balances: bool = Query(False, description="Include accounts with zero balances"),
     account_type_filter: Optional[str] = Query(None, description="Filter by account type"),
@@ -191,18 +220,18 @@ async def get_trial_balance(
         if export:
             fmt = (export or "").lower()
             period = {"start": (as_of_date or date.today()).isoformat(), "end": (as_of_date or date.today()).isoformat()}
-            # Prepare rows robustly
-            try:
-                from app.services.report_export_utils import export_simple_table_pdf, export_trial_balance_rows
-                rows = export_trial_balance_rows(trial_balance.get('entries', []) if isinstance(trial_balance, dict) else trial_balance)
-            except Exception:
-                # Fallback generic row builder
-                rows = []
-                entries = trial_balance.get('entries', []) if isinstance(trial_balance, dict) else (trial_balance or [])
-                for r in entries:
-                    rows.append([
-                        r.get('code'), r.get('name'), r.get('type'), f"{r.get('debit',0):,.2f}", f"{r.get('credit',0):,.2f}"
-                    ])
+            # Export the same rows the JSON response carries
+            from app.services.report_export_utils import export_simple_table_pdf, export_trial_balance_rows
+            rows = export_trial_balance_rows([
+                {
+                    'code': r.get('account_code'),
+                    'name': r.get('account_name'),
+                    'type': r.get('account_type'),
+                    'debit': r.get('debit_balance', 0),
+                    'credit': r.get('credit_balance', 0)
+                }
+                for r in trial_balance.get('accounts', [])
+            ])
             if fmt == 'pdf':
                 cols = ["Code","Name","Type","Debit","Credit"]
                 buf = export_simple_table_pdf("Trial Balance", period, cols, rows, include_logo=include_logo, include_watermark=include_watermark, watermark_text=watermark_text)
@@ -217,13 +246,12 @@ async def get_trial_balance(
                     df = pd.DataFrame(rows, columns=["Code","Name","Type","Debit","Credit"])
                     df.to_excel(writer, sheet_name='Trial Balance', index=False)
                     # Summary sheet if available
-                    if isinstance(trial_balance, dict):
-                        summary_items = []
-                        for k in ("total_debits","total_credits","difference"):
-                            if k in trial_balance:
-                                summary_items.append([k.replace('_',' ').title(), trial_balance.get(k)])
-                        if summary_items:
-                            pd.DataFrame(summary_items, columns=['Metric','Value']).to_excel(writer, sheet_name='Summary', index=False)
+                    summary_items = []
+                    for k, label in (("total_debits", "Total Debits"), ("total_credits", "Total Credits"), ("variance", "Difference")):
+                        if k in trial_balance:
+                            summary_items.append([label, float(trial_balance[k])])
+                    if summary_items:
+                        pd.DataFrame(summary_items, columns=['Metric','Value']).to_excel(writer, sheet_name='Summary', index=False)
                 wb.seek(0)
                 fname = f"trial_balance_{period['end']}.xlsx"
                 return StreamingResponse(wb, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": f"attachment; filename={fname}"})
@@ -242,7 +270,8 @@ async def get_trial_balance(
         raise HTTPException(status_code=500, detail=f"Error generating trial balance: {str(e)}")
 
 @router.get("/balance-sheet")
-async def get_balance_sheet(
+@offload_blocking()
+def get_balance_sheet(
     as_of_date: Optional[date] = Query(None, description="Balance sheet as of date"),
     comparison_date: Optional[date] = Query(None, description="Comparison date for prior period"),
     detail_level: str = Query("summary", description="Level of detail: summary or detailed"),
@@ -327,12 +356,14 @@ async def get_balance_sheet(
         raise HTTPException(status_code=500, detail=f"Error generating balance sheet: {str(e)}")
 
 @router.get("/debtors-aging")
-async def get_debtors_aging(
+@offload_blocking()
+def get_debtors_aging(
     as_of_date: Optional[date] = Query(None, description="Aging as of date"),
     customer_id: Optional[str] = Query(None, description="Filter by specific customer"),
     min_amount: Optional[Decimal] = Query(None, description="Minimum amount to include"),
     currency: Optional[str] = Query(None, description="Filter by currency"),
     branch_id: Optional[str] = Query(None, description="Filter by branch"),
+    include_invoices: bool = Query(False, description="Embed each customer's outstanding invoices"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
     include_logo: bool = Query(True, description="Include logo (PDF)"),
     include_watermark: bool = Query(True, description="Include watermark (PDF)"),
@@ -351,7 +382,8 @@ async def get_debtors_aging(
             customer_id=customer_id,
             min_amount=min_amount,
             currency=currency,
-            branch_id=branch_id
+            branch_id=branch_id,
+            include_invoices=include_invoices
         )
 
         # Optional export
@@ -409,12 +441,14 @@ async def get_debtors_aging(
         raise HTTPException(status_code=500, detail=f"Error generating debtors aging: {str(e)}")
 
 @router.get("/creditors-aging")
-async def get_creditors_aging(
+@offload_blocking()
+def get_creditors_aging(
     as_of_date: Optional[date] = Query(None, description="Aging as of date"),
     supplier_id: Optional[str] = Query(None, description="Filter by specific supplier"),
     min_amount: Optional[Decimal] = Query(None, description="Minimum amount to include"),
     currency: Optional[str] = Query(None, description="Filter by currency"),
     branch_id: Optional[str] = Query(None, description="Filter by branch"),
+    include_details: bool = Query(False, description="Fill the per-bucket purchase lists"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
     include_logo: bool = Query(True, description="Include logo (PDF)"),
     include_watermark: bool = Query(True, description="Include watermark (PDF)"),
@@ -433,7 +467,8 @@ async def get_creditors_aging(
             supplier_id=supplier_id,
             min_amount=min_amount,
             currency=currency,
-            branch_id=branch_id
+            branch_id=branch_id,
+            include_details=include_details
         )
         # Optional export
         if export:
@@ -488,8 +523,53 @@ async def get_creditors_aging(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating creditors aging: {str(e)}")
 
+@router.get("/debtors-aging/{customer_id}/invoices")
+@offload_blocking()
+def get_debtor_invoices(
+    customer_id: str,
+    as_of_date: Optional[date] = Query(None, description="Aging as of date"),
+    branch_id: Optional[str] = Query(None, description="Filter by branch"),
+    limit: int = Query(100, ge=1, le=1000, description="Invoices per page"),
+    offset: int = Query(0, ge=0, description="Invoices to skip"),
+    db: Session = Depends(get_db)
+):
+    """
+    Page through a customer's outstanding invoices (debtors aging drill-down)
+    """
+    try:
+        page = AgingReportsService(db).get_debtor_invoices_page(
+            customer_id, as_of_date=as_of_date, branch_id=branch_id, limit=limit, offset=offset
+        )
+        return {"success": True, "data": page, "generated_at": datetime.now().isoformat()}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading debtor invoices: {str(e)}")
+
+@router.get("/creditors-aging/{supplier_id}/purchases")
+@offload_blocking()
+def get_creditor_purchases(
+    supplier_id: str,
+    as_of_date: Optional[date] = Query(None, description="Aging as of date"),
+    branch_id: Optional[str] = Query(None, description="Filter by branch"),
+    limit: int = Query(100, ge=1, le=1000, description="Purchases per page"),
+    offset: int = Query(0, ge=0, description="Purchases to skip"),
+    db: Session = Depends(get_db)
+):
+    """
+    Page through a supplier's outstanding purchases (creditors aging drill-down)
+    """
+    try:
+        page = AgingReportsService(db).get_creditor_purchases_page(
+            supplier_id, as_of_date=as_of_date, branch_id=branch_id, limit=limit, offset=offset
+        )
+        return {"success": True, "data": page, "generated_at": datetime.now().isoformat()}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading creditor purchases: {str(e)}")
+
 @router.get("/customer-aging-summary")
-async def get_customer_aging_summary(
+@offload_blocking()
+def get_customer_aging_summary(
     as_of_date: Optional[date] = Query(None, description="Summary as of date"),
     db: Session = Depends(get_db)
 ):
@@ -513,7 +593,8 @@ async def get_customer_aging_summary(
         raise HTTPException(status_code=500, detail=f"Error generating customer aging summary: {str(e)}")
 
 @router.get("/supplier-aging-summary")
-async def get_supplier_aging_summary(
+@offload_blocking()
+def get_supplier_aging_summary(
     as_of_date: Optional[date] = Query(None, description="Summary as of date"),
     db: Session = Depends(get_db)
 ):
@@ -537,7 +618,8 @@ async def get_supplier_aging_summary(
         raise HTTPException(status_code=500, detail=f"Error generating supplier aging summary: {str(e)}")
 
 @router.get("/ifrs-compliance-check")
-async def get_ifrs_compliance_check(
+@offload_blocking()
+def get_ifrs_compliance_check(
     as_of_date: Optional[date] = Query(None, description="Compliance check as of date"),
     db: Session = Depends(get_db)
 ):
@@ -635,7 +717,8 @@ def _get_compliance_recommendations(compliance_checks: dict) -> list:
     return recommendations
 
 @router.get("/financial/dashboard")
-async def get_financial_dashboard(
+@offload_blocking()
+def get_financial_dashboard(
     start_date: Optional[date] = Query(None, description="Dashboard start date"),
     end_date: Optional[date] = Query(None, description="Dashboard end date"),
     db: Session = Depends(get_db)
@@ -725,8 +808,8 @@ def _sum(entries, attr):
 
 
 def _account_side(entry):
-    # Determine natural balance side (simplified)
-    code = getattr(entry, 'accounting_code', None)
+    # Determine natural balance side (simplified) of a journal entry's account, or of an account
+    code = getattr(entry, 'accounting_code', entry)
     t = (getattr(code, 'account_type', '') or '').lower()
     if t in ("asset", "expense", "cost_of_goods_sold"):  # debit-nature
         return 'debit'
@@ -743,7 +826,8 @@ def _net_balance(entry):
 
 
 @router.get("/income-statement")
-async def get_income_statement(
+@offload_blocking()
+def get_income_statement(
     start_date: Optional[date] = Query(None, description="Start date"),
     end_date: Optional[date] = Query(None, description="End date"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
@@ -754,17 +838,18 @@ async def get_income_statement(
 ):
     """IFRS-style Income Statement (Statement of Profit or Loss)"""
     try:
-        from app.models.accounting import JournalEntry, AccountingCode
+        from app.models.accounting import AccountingCode
         s, e = _parse_dates(start_date, end_date)
 
-        entries = db.query(JournalEntry).filter(JournalEntry.date >= s, JournalEntry.date <= e).all()
+        from app.services.account_balance_snapshot_service import AccountBalanceSnapshotService
+        movements = AccountBalanceSnapshotService(db).get_period_movements(s, e)
         by_account = {}
-        for je in entries:
-            code = je.accounting_code
-            if not code:
-                continue
-            acct = by_account.setdefault(code.id, {"code": code.code, "name": code.name, "type": getattr(code, 'account_type', None), "balance": 0})
-            acct['balance'] += _net_balance(je)
+        if movements:
+            codes = db.query(AccountingCode).filter(AccountingCode.id.in_(list(movements.keys()))).all()
+            for code in codes:
+                debit, credit = movements[code.id]
+                balance = float(debit - credit) if _account_side(code) == 'debit' else float(credit - debit)
+                by_account[code.id] = {"code": code.code, "name": code.name, "type": getattr(code, 'account_type', None), "balance": balance}
 
         revenue_total = 0; cogs_total = 0; expense_total = 0; other_income = 0; other_expense = 0
         lines = []
@@ -837,7 +922,8 @@ async def get_income_statement(
 
 
 @router.post("/generic-report/export")
-async def export_generic_report(
+@offload_blocking(limit=2)
+def export_generic_report(
     payload: Dict[str, Any],
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
     include_logo: bool = Query(True, description="Include logo"),
@@ -869,48 +955,16 @@ async def export_generic_report(
         cache_basis = json.dumps({"title": title, "period": period, "data": data_section}, sort_keys=True)
         cache_key = hashlib.sha256((cache_basis + (export or '') + str(include_logo) + str(include_watermark) + (watermark_text or '')).encode('utf-8')).hexdigest()
 
-        # Purge expired entries opportunistically
-        now_ts = datetime.now().timestamp()
-        ttl = settings.generic_report_cache_ttl_seconds
-        to_delete = [k for k,(ts,_) in _GENERIC_REPORT_CACHE.items() if now_ts - ts > ttl]
-        for k in to_delete:
-            _GENERIC_REPORT_CACHE.pop(k, None)
-
         cache_hit = False
         if export:
-            # Redis first
-            if redis_available():
-                r = get_redis()
-                if r:
-                    cached = r.get(f"genrep:{cache_key}")
-                    if cached:
-                        # format|filename|binary
-                        try:
-                            # First 2 lines meta separated by \n then raw bytes after a sentinel
-                            # Simpler: store meta dict + bytes in one pickle? Keep pure bytes to avoid pickle risk. Use a simple delimiter.
-                            # Structure: b"FMT:" + fmt + b"\nNAME:" + fname + b"\n\n" + data
-                            raw: bytes = cached  # type: ignore
-                            if raw.startswith(b'FMT:'):
-                                header, body = raw.split(b"\n\n",1)
-                                parts = header.split(b"\n")
-                                fmt_line = parts[0][4:].decode()
-                                name_line = parts[1][5:].decode() if len(parts)>1 and parts[1].startswith(b'NAME:') else f"report.{fmt_line}"
-                                media_type = 'application/pdf' if fmt_line=='pdf' else 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                                cache_hit = True
-                                resp = StreamingResponse(BytesIO(body), media_type=media_type, headers={"Content-Disposition": f"attachment; filename={name_line}"})
-                                resp.headers['X-Cache'] = 'HIT'
-                                resp.headers['X-Cache-Backend'] = 'redis'
-                                return resp
-                        except Exception:
-                            pass
-            else:
-                if cache_key in _GENERIC_REPORT_CACHE:
-                    cached_media_type, cached_bytes, cached_fname = _GENERIC_REPORT_CACHE[cache_key][1]
-                    cache_hit = True
-                    resp = StreamingResponse(BytesIO(cached_bytes), media_type=cached_media_type, headers={"Content-Disposition": f"attachment; filename={cached_fname}"})
-                    resp.headers['X-Cache'] = 'HIT'
-                    resp.headers['X-Cache-Backend'] = 'memory'
-                    return resp
+            cached = _GENERIC_REPORT_CACHE.get(cache_key)
+            if cached:
+                cached_fmt, cached_bytes, cached_fname = cached
+                cache_hit = True
+                resp = StreamingResponse(BytesIO(cached_bytes), media_type=_GENERIC_REPORT_MEDIA_TYPES.get(cached_fmt, _GENERIC_REPORT_MEDIA_TYPES['xlsx']), headers={"Content-Disposition": f"attachment; filename={cached_fname}"})
+                resp.headers['X-Cache'] = 'HIT'
+                resp.headers['X-Cache-Backend'] = _GENERIC_REPORT_CACHE.backend
+                return resp
 
         # Flatten and validate row count
         flat_rows = flatten_dict(data_section, max_depth=3)
@@ -924,17 +978,12 @@ async def export_generic_report(
                 buf = export_key_value_pdf(title, period, data_section, include_logo=include_logo, include_watermark=include_watermark, watermark_text=watermark_text)
                 content = buf.getvalue()
                 fname = f"{title.lower().replace(' ','_')}.pdf"
-                if redis_available():
-                    r = get_redis()
-                    if r:
-                        r.setex(f"genrep:{cache_key}", ttl, b"FMT:pdf\nNAME:"+fname.encode()+b"\n\n"+content)
-                else:
-                    _GENERIC_REPORT_CACHE[cache_key] = (now_ts, ('application/pdf', content, fname))
+                _GENERIC_REPORT_CACHE.set(cache_key, ('pdf', content, fname))
                 set_cache_size(len(_GENERIC_REPORT_CACHE))
                 buf.seek(0)
                 resp = StreamingResponse(buf, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename={fname}"})
                 resp.headers['X-Cache'] = 'MISS'
-                resp.headers['X-Cache-Backend'] = 'redis' if redis_available() else 'memory'
+                resp.headers['X-Cache-Backend'] = _GENERIC_REPORT_CACHE.backend
                 return resp
             if fmt == 'xlsx':
                 import pandas as pd
@@ -955,20 +1004,15 @@ async def export_generic_report(
                 output.seek(0)
                 content = output.getvalue()
                 fname = f"{title.lower().replace(' ','_')}.xlsx"
-                if redis_available():
-                    r = get_redis()
-                    if r:
-                        r.setex(f"genrep:{cache_key}", ttl, b"FMT:xlsx\nNAME:"+fname.encode()+b"\n\n"+content)
-                else:
-                    _GENERIC_REPORT_CACHE[cache_key] = (now_ts, ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', content, fname))
+                _GENERIC_REPORT_CACHE.set(cache_key, ('xlsx', content, fname))
                 set_cache_size(len(_GENERIC_REPORT_CACHE))
                 output.seek(0)
                 resp = StreamingResponse(output, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": f"attachment; filename={fname}"})
                 resp.headers['X-Cache'] = 'MISS'
-                resp.headers['X-Cache-Backend'] = 'redis' if redis_available() else 'memory'
+                resp.headers['X-Cache-Backend'] = _GENERIC_REPORT_CACHE.backend
                 return resp
         base_response = {"title": title, "period": period, "flat_rows": len(flat_rows), "data": data_section}
-        base_response['cache_backend'] = 'redis' if redis_available() else 'memory'
+        base_response['cache_backend'] = _GENERIC_REPORT_CACHE.backend
         base_response['cache_hit'] = cache_hit
         GENERIC_REPORT_REQUESTS.labels(format=export or 'json', cache_hit=str(cache_hit).lower(), backend=base_response['cache_backend']).inc()
         return base_response
@@ -985,7 +1029,8 @@ async def export_generic_report(
 
 
 @router.get("/cash-flow-statement")
-async def get_cash_flow_statement(
+@offload_blocking()
+def get_cash_flow_statement(
     start_date: Optional[date] = Query(None, description="Start date"),
     end_date: Optional[date] = Query(None, description="End date"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
@@ -1121,7 +1166,8 @@ async def get_profit_loss_alias(
     return await get_income_statement(start_date=start_date, end_date=end_date, db=db)
 
 @router.get("/performance/dashboard")
-async def get_performance_dashboard(
+@offload_blocking()
+def get_performance_dashboard(
     start_date: Optional[date] = Query(None, description="Dashboard start date"),
     end_date: Optional[date] = Query(None, description="Dashboard end date"),
     db: Session = Depends(get_db)
@@ -1148,7 +1194,8 @@ async def get_performance_dashboard(
         raise HTTPException(status_code=500, detail=f"Error generating performance dashboard: {str(e)}")
 
 @router.get("/debug/database-stats")
-async def get_database_stats(db: Session = Depends(get_db)):
+@offload_blocking()
+def get_database_stats(db: Session = Depends(get_db)):
     """Debug endpoint to check what data exists in the database"""
     from app.models.accounting import AccountingCode, JournalEntry
 
@@ -1192,7 +1239,8 @@ async def get_database_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/debug/raw-accounting-data")
-async def get_raw_accounting_data(db: Session = Depends(get_db)):
+@offload_blocking()
+def get_raw_accounting_data(db: Session = Depends(get_db)):
     """Get comprehensive accounting data to debug trial balance issues"""
     try:
         from app.models.accounting import AccountingCode, JournalEntry
@@ -1253,7 +1301,8 @@ async def get_raw_accounting_data(db: Session = Depends(get_db)):
         return {"success": False, "error": str(e)}
 
 @router.get("/management/kpi-metrics")
-async def get_kpi_metrics(
+@offload_blocking()
+def get_kpi_metrics(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
@@ -1342,7 +1391,8 @@ async def get_kpi_metrics(
         raise HTTPException(status_code=500, detail=f"Error calculating KPI metrics: {str(e)}")
 
 @router.get("/management/financial-summary")
-async def get_financial_summary(
+@offload_blocking()
+def get_financial_summary(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
@@ -1485,7 +1535,8 @@ async def get_financial_summary(
         raise HTTPException(status_code=500, detail=f"Error generating financial summary: {str(e)}")
 
 @router.get("/management/sales-report")
-async def get_sales_report(
+@offload_blocking()
+def get_sales_report(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
@@ -1524,7 +1575,8 @@ async def get_sales_report(
         raise HTTPException(status_code=500, detail=f"Error generating sales report: {str(e)}")
 
 @router.get("/management/customer-analysis")
-async def get_customer_analysis(
+@offload_blocking()
+def get_customer_analysis(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -1545,7 +1597,8 @@ async def get_customer_analysis(
         raise HTTPException(status_code=500, detail=f"Error generating customer analysis: {str(e)}")
 
 @router.get("/management/performance-metrics")
-async def get_performance_metrics(
+@offload_blocking()
+def get_performance_metrics(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -1566,7 +1619,8 @@ async def get_performance_metrics(
         raise HTTPException(status_code=500, detail=f"Error generating performance metrics: {str(e)}")
 
 @router.get("/management/inventory-report", response_model=InventoryReportResponse)
-async def get_inventory_report(
+@offload_blocking()
+def get_inventory_report(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -1609,9 +1663,9 @@ async def get_inventory_report(
             try:
                 # Assuming entry['date'] is a string like 'YYYY-MM-DD...'
                 month = entry['date'][:7]
-                if entry['transaction_type'] in ['goods_receipt', 'return', 'opening_stock', 'production_receipt']:
+                if entry['transaction_type'] in ['goods_receipt', 'return', 'opening_stock', 'production_receipt', 'adjustment_in']:
                     stock_movement_agg[month]['stock_in'] += entry['quantity']
-                elif entry['transaction_type'] in ['sale', 'damage', 'theft', 'adjustment', 'issue_to_wip']:
+                elif entry['transaction_type'] in ['sale', 'damage', 'theft', 'adjustment', 'adjustment_out', 'issue_to_wip']:
                     stock_movement_agg[month]['stock_out'] += abs(entry['quantity'])
             except (KeyError, TypeError):
                 # Skip malformed entries
@@ -1681,7 +1735,8 @@ async def get_inventory_report(
         raise HTTPException(status_code=500, detail=f"Error generating inventory report: {str(e)}")
 
 @router.get("/cogs/monthly")
-async def get_monthly_cogs_report(
+@offload_blocking()
+def get_monthly_cogs_report(
     year: int = Query(..., description="Year for the report"),
     month: int = Query(..., description="Month (1-12) for the report"),
     product_id: Optional[str] = Query(None, description="Filter by specific product"),
@@ -1714,7 +1769,8 @@ async def get_monthly_cogs_report(
         raise HTTPException(status_code=500, detail=f"Error generating monthly COGS report: {str(e)}")
 
 @router.get("/cogs/quarterly")
-async def get_quarterly_cogs_report(
+@offload_blocking()
+def get_quarterly_cogs_report(
     year: int = Query(..., description="Year for the report"),
     quarter: int = Query(..., description="Quarter (1-4) for the report"),
     product_id: Optional[str] = Query(None, description="Filter by specific product"),
@@ -1747,7 +1803,8 @@ async def get_quarterly_cogs_report(
         raise HTTPException(status_code=500, detail=f"Error generating quarterly COGS report: {str(e)}")
 
 @router.get("/cogs/annual")
-async def get_annual_cogs_report(
+@offload_blocking()
+def get_annual_cogs_report(
     year: int = Query(..., description="Year for the report"),
     product_id: Optional[str] = Query(None, description="Filter by specific product"),
     category_id: Optional[str] = Query(None, description="Filter by product category"),
@@ -1776,11 +1833,13 @@ async def get_annual_cogs_report(
         raise HTTPException(status_code=500, detail=f"Error generating annual COGS report: {str(e)}")
 
 @router.get("/cogs/trend-analysis")
-async def get_cogs_trend_analysis(
+@offload_blocking()
+def get_cogs_trend_analysis(
     start_date: date = Query(..., description="Start date for trend analysis"),
     end_date: date = Query(..., description="End date for trend analysis"),
-    period_type: str = Query("monthly", description="Period type: monthly or quarterly"),
+    period_type: str = Query("monthly", description="Period type: monthly, quarterly or annual"),
     product_id: Optional[str] = Query(None, description="Filter by specific product"),
+    breakdown: Optional[str] = Query(None, description="Per-period breakdown: product|category"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
     db: Session = Depends(get_db)
 ):
@@ -1795,7 +1854,8 @@ async def get_cogs_trend_analysis(
             start_date=start_date,
             end_date=end_date,
             period_type=period_type,
-            product_id=product_id
+            product_id=product_id,
+            breakdown=breakdown
         )
 
         return {
@@ -1810,7 +1870,8 @@ async def get_cogs_trend_analysis(
 
 
 @router.get("/financial-statements/balance-sheet", response_model=FinancialReportResponse)
-async def get_balance_sheet(
+@offload_blocking()
+def get_balance_sheet(
     as_of_date: Optional[date] = Query(None, description="Balance sheet as of date"),
     comparison_date: Optional[date] = Query(None, description="Comparison balance sheet date"),
     include_notes: bool = Query(False, description="Include financial notes"),
@@ -1844,7 +1905,8 @@ async def get_balance_sheet(
 
 
 @router.get("/financial-statements/income-statement", response_model=FinancialReportResponse)
-async def get_income_statement(
+@offload_blocking()
+def get_income_statement(
     start_date: Optional[date] = Query(None, description="Period start date"),
     end_date: Optional[date] = Query(None, description="Period end date (defaults to today)"),
     comparison_start_date: Optional[date] = Query(None, description="Comparison period start"),
@@ -1880,7 +1942,8 @@ async def get_income_statement(
 
 
 @router.get("/financial-statements/cash-flow", response_model=FinancialReportResponse)
-async def get_cash_flow_statement(
+@offload_blocking()
+def get_cash_flow_statement(
     start_date: Optional[date] = Query(None, description="Period start date"),
     end_date: Optional[date] = Query(None, description="Period end date (defaults to today)"),
     method: str = Query("indirect", description="Cash flow method: indirect|direct"),
@@ -1913,7 +1976,8 @@ async def get_cash_flow_statement(
 
 
 @router.get("/financial-statements/changes-in-equity", response_model=FinancialReportResponse)
-async def get_statement_of_changes_in_equity(
+@offload_blocking()
+def get_statement_of_changes_in_equity(
     start_date: Optional[date] = Query(None, description="Period start date"),
     end_date: Optional[date] = Query(None, description="Period end date (defaults to today)"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
@@ -1969,7 +2033,8 @@ async def get_statement_of_changes_in_equity(
 
 
 @router.get("/financial-statements/trial-balance-enhanced", response_model=FinancialReportResponse)
-async def get_enhanced_trial_balance(
+@offload_blocking()
+def get_enhanced_trial_balance(
     as_of_date: Optional[date] = Query(None, description="Trial balance date (defaults to today)"),
     include_zero_balances: bool = Query(False, description="Include accounts with zero balances"),
     account_type_filter: Optional[str] = Query(None, description="Filter by account type"),
@@ -2001,7 +2066,8 @@ async def get_enhanced_trial_balance(
 
 
 @router.get("/financial-statements/complete-package", response_model=FinancialReportResponse)
-async def get_complete_financial_package(
+@offload_blocking(limit=2)
+def get_complete_financial_package(
     as_of_date: Optional[date] = Query(None, description="Reporting date (defaults to today)"),
     include_comparatives: bool = Query(True, description="Include comparative figures"),
     export: Optional[str] = Query(None, description="Export format: pdf|xlsx"),
@@ -2036,7 +2102,8 @@ async def get_complete_financial_package(
 
 
 @router.post("/financial-statements/export")
-async def export_financial_statement(
+@offload_blocking(limit=2)
+def export_financial_statement(
     export_request: ReportExportRequest,
     db: Session = Depends(get_db)
 ):
@@ -2096,7 +2163,8 @@ async def export_financial_statement(
 
 
 @router.get("/financial-statements/summary")
-async def get_financial_summary(
+@offload_blocking()
+def get_financial_summary(
     as_of_date: Optional[date] = Query(None, description="Summary date (defaults to today)"),
     db: Session = Depends(get_db)
 ):
@@ -2164,7 +2232,8 @@ async def get_financial_summary(
         raise HTTPException(status_code=500, detail=f"Error generating financial summary: {str(e)}")
 
 @router.get("/inventory/summary")
-async def get_inventory_summary(
+@offload_blocking()
+def get_inventory_summary(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2251,7 +2320,8 @@ async def get_inventory_summary(
         raise HTTPException(status_code=500, detail=error_detail)
 
 @router.get("/inventory/stock-movement")
-async def get_stock_movement_report(
+@offload_blocking()
+def get_stock_movement_report(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     start_date: Optional[date] = Query(None, description="Start date for movement report"),
     end_date: Optional[date] = Query(None, description="End date for movement report"),
@@ -2286,7 +2356,8 @@ async def get_stock_movement_report(
         raise HTTPException(status_code=500, detail=f"Error generating stock movement report: {str(e)}")
 
 @router.get("/inventory/aging-analysis")
-async def get_inventory_aging_analysis(
+@offload_blocking()
+def get_inventory_aging_analysis(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2316,7 +2387,8 @@ async def get_inventory_aging_analysis(
         raise HTTPException(status_code=500, detail=f"Error generating inventory aging analysis: {str(e)}")
 
 @router.get("/inventory/abc-analysis")
-async def get_abc_analysis(
+@offload_blocking()
+def get_abc_analysis(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2346,7 +2418,8 @@ async def get_abc_analysis(
         raise HTTPException(status_code=500, detail=f"Error generating ABC analysis: {str(e)}")
 
 @router.get("/inventory/valuation-methods")
-async def get_valuation_methods_comparison(
+@offload_blocking()
+def get_valuation_methods_comparison(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2378,7 +2451,8 @@ async def get_valuation_methods_comparison(
 
 
 @router.get("/inventory/category-analysis")
-async def get_inventory_category_analysis(
+@offload_blocking()
+def get_inventory_category_analysis(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2409,7 +2483,8 @@ async def get_inventory_category_analysis(
 
 
 @router.get("/integration/dashboard-statistics")
-async def get_integration_dashboard_statistics(
+@offload_blocking()
+def get_integration_dashboard_statistics(
     branch_id: Optional[str] = Query(None, description="Branch ID filter"),
     db: Session = Depends(get_db)
 ):
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func, and_
+from sqlalchemy import or_, func, and_, select
 from typing import List, Optional, Dict
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import date, datetime, timedelta
@@ -725,17 +725,50 @@ class InvoiceResponse(InvoiceBase):
     customer_name: Optional[str] = None
     items_count: int
 
-from fastapi.responses import StreamingResponse
-import csv
+from app.models.user import User
 from app.utils.logger import get_logger, log_exception, log_error_with_context
+from app.utils.streaming_export import EXPORT_FORMATS, stream_query, streaming_export_response
 
 logger = get_logger(__name__)
-from io import StringIO
+
+SALES_EXPORT_HEADER = [
+    "Reference",
+    "Date",
+    "Customer",
+    "Cashier",
+    "Payment Method",
+    "Currency",
+    "Subtotal (Ex VAT)",
+    "VAT Amount",
+    "Total Amount",
+    "Status",
+    "Items Count",
+    "Notes",
+]
+
+
+def _sales_export_row(row) -> list:
+    parts = [p for p in [row.first_name, row.last_name] if p]
+    cashier = " ".join(parts) if parts else row.username
+    return [
+        row.reference,
+        row.date.isoformat() if row.date else "",
+        row.customer_name or "Walk-in Customer",
+        cashier or "",
+        row.payment_method or "",
+        row.currency or "",
+        float(row.total_amount_ex_vat or 0),
+        float(row.total_vat_amount or 0),
+        float(row.total_amount or 0),
+        row.status or "",
+        row.items_count,
+        (row.notes or "").replace("\n", " ").strip(),
+    ]
 
 
 @router.get("/export")
 @router.get("/export.csv")
-async def export_sales_csv(
+def export_sales_csv(
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -743,11 +776,28 @@ async def export_sales_csv(
     search: Optional[str] = None,
     branch_id: Optional[str] = Query(None, description="Filter by branch id"),
     cashier_id: Optional[str] = Query(None, description="Filter by cashier/salesperson id"),
+    export_format: str = Query("csv", alias="format", description="csv or xlsx"),
     db: Session = Depends(get_db),
 ):
-    """Export filtered sales to CSV (ignores pagination)."""
+    """Export filtered sales to CSV or XLSX (ignores pagination).
+
+    Rows are streamed from a server-side cursor, so memory use does not grow with
+    the date range. A plain (sync) handler: the cursor is read from the threadpool
+    that iterates the sync body, never on the event loop.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
     try:
-        query = db.query(Sale)
+        items_count = (
+            select(func.count(SaleItem.id)).where(SaleItem.sale_id == Sale.id).correlate(Sale).scalar_subquery()
+        )
+        query = db.query(
+            Sale.reference, Sale.date, Customer.name.label("customer_name"),
+            User.first_name, User.last_name, User.username,
+            Sale.payment_method, Sale.currency, Sale.total_amount_ex_vat, Sale.total_vat_amount,
+            Sale.total_amount, Sale.status, items_count.label("items_count"), Sale.notes,
+        ).select_from(Sale).outerjoin(Customer, Customer.id == Sale.customer_id) \
+            .outerjoin(User, User.id == Sale.salesperson_id)
         if status:
             query = query.filter(Sale.status == status)
         if customer_id:
@@ -764,56 +814,9 @@ async def export_sales_csv(
         if cashier_id:
             query = query.filter(Sale.salesperson_id == cashier_id)
 
-        sales = query.order_by(Sale.date.desc()).all()
-
-        # Build CSV
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow([
-            "Reference",
-            "Date",
-            "Customer",
-            "Cashier",
-            "Payment Method",
-            "Currency",
-            "Subtotal (Ex VAT)",
-            "VAT Amount",
-            "Total Amount",
-            "Status",
-            "Items Count",
-            "Notes",
-        ])
-        for sale in sales:
-            # Build salesperson name if available
-            cashier = None
-            if getattr(sale, "salesperson", None):
-                first = getattr(sale.salesperson, "first_name", None)
-                last = getattr(sale.salesperson, "last_name", None)
-                username = getattr(sale.salesperson, "username", None)
-                parts = [p for p in [first, last] if p]
-                cashier = " ".join(parts) if parts else username
-            writer.writerow([
-                sale.reference,
-                sale.date.isoformat() if sale.date else "",
-                sale.customer.name if sale.customer else "Walk-in Customer",
-                cashier or "",
-                sale.payment_method or "",
-                sale.currency or "",
-                float(sale.total_amount_ex_vat or 0),
-                float(sale.total_vat_amount or 0),
-                float(sale.total_amount or 0),
-                sale.status or "",
-                len(sale.sale_items or []),
-                (sale.notes or "").replace("\n", " ").strip(),
-            ])
-
-        buffer.seek(0)
-        filename = f"sales_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        headers = {
-            "Content-Disposition": f"attachment; filename={filename}",
-            "Content-Type": "text/csv; charset=utf-8",
-        }
-        return StreamingResponse(iter([buffer.getvalue()]), media_type="text/csv", headers=headers)
+        rows = (_sales_export_row(row) for row in stream_query(query.order_by(Sale.date.desc())))
+        return streaming_export_response(rows, SALES_EXPORT_HEADER, "sales_export", export_format,
+                                         sheet_title="Sales")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to export sales: {e}")
 
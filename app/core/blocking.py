@@ -0,0 +1,133 @@
+"""Run blocking work (SQLAlchemy queries, pandas/reportlab rendering) off the event loop.
+
+``async def`` endpoints that call synchronous services stall every other request on
+the worker while they run. ``offload_blocking`` turns a plain ``def`` endpoint into an
+``async`` one that runs its body on a dedicated, sized thread pool, separate from
+FastAPI's default threadpool so heavy reports cannot starve dependency resolution and
+ordinary sync routes. Each decorated route also gets its own concurrency limit.
+
+``start_event_loop_monitor`` samples how late the loop wakes a periodic timer and
+records it as ``event_loop_lag_seconds``, which shows any blocking work still left on
+the loop.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .config import settings
+from .metrics import BLOCKING_CALL_SECONDS, BLOCKING_WAIT_SECONDS, BLOCKING_INFLIGHT, EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.blocking_pool_workers,
+                                               thread_name_prefix="blocking")
+    return _executor
+
+
+def shutdown_blocking_executor(wait: bool = True):
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor:
+        executor.shutdown(wait=wait)
+
+
+class RouteLimiter:
+    """Per-route concurrency limit (one asyncio semaphore per event loop)"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+async def run_blocking(func: Callable[..., Any], *args, limiter: Optional[RouteLimiter] = None, **kwargs) -> Any:
+    """Await ``func(*args, **kwargs)`` on the blocking pool, honouring the route limit"""
+    route = limiter.name if limiter else getattr(func, "__name__", "anonymous")
+    queued_at = time.perf_counter()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    async def _run():
+        started = {}
+
+        def _timed():
+            started['at'] = time.perf_counter()
+            BLOCKING_WAIT_SECONDS.labels(route=route).observe(started['at'] - queued_at)
+            return call()
+
+        BLOCKING_INFLIGHT.labels(route=route).inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(get_blocking_executor(), _timed)
+        finally:
+            BLOCKING_INFLIGHT.labels(route=route).dec()
+            if 'at' in started:
+                BLOCKING_CALL_SECONDS.labels(route=route).observe(time.perf_counter() - started['at'])
+
+    if limiter is None:
+        return await _run()
+    async with limiter.semaphore():
+        return await _run()
+
+
+def offload_blocking(limit: Optional[int] = None, name: Optional[str] = None):
+    """Decorator: run a synchronous endpoint body on the blocking pool.
+
+    Args:
+        limit: Maximum concurrent executions of this route per worker
+            (defaults to ``settings.blocking_route_concurrency``)
+        name: Metric label for the route (defaults to the function name)
+
+    Returns:
+        An ``async`` wrapper with the original signature, so FastAPI resolves
+        parameters and dependencies exactly as before.
+    """
+    def decorator(func: Callable[..., Any]):
+        limiter = RouteLimiter(name or func.__name__, limit or settings.blocking_route_concurrency)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await run_blocking(func, *args, limiter=limiter, **kwargs)
+
+        wrapper.limiter = limiter
+        return wrapper
+    return decorator
+
+
+async def _monitor_event_loop(interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - scheduled - interval)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        if lag >= 1.0:
+            logger.warning("Event loop was blocked for %.2fs", lag)
+
+
+def start_event_loop_monitor(interval: Optional[float] = None) -> asyncio.Task:
+    """Start the event-loop lag sampler on the running loop (cancel the task to stop)"""
+    return asyncio.get_running_loop().create_task(
+        _monitor_event_loop(interval or settings.event_loop_lag_interval_seconds)
+    )
@@ -1,4 +1,9 @@
-from typing import Optional, Any
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Any, Callable, Dict, List, Tuple
 from functools import lru_cache
 try:
     import redis
@@ -7,15 +12,21 @@ except ImportError:
     redis = None
     RedisType = Any
 from .config import settings
+from .metrics import CACHE_REQUESTS, CACHE_EVICTIONS, CACHE_ENTRIES, CACHE_BYTES
 
 _redis_client: Optional[RedisType] = None
+_redis_retry_at: float = 0.0
+REDIS_RETRY_SECONDS = 30
 
 def get_redis() -> Optional[RedisType]:
-    global _redis_client
+    global _redis_client, _redis_retry_at
     if redis is None:
         return None
     if _redis_client is not None:
         return _redis_client
+    # Don't pay a connection attempt on every call while Redis is down
+    if time.monotonic() < _redis_retry_at:
+        return None
     try:
         _redis_client = redis.from_url(settings.redis_url, decode_responses=False)  # binary safe
         # quick ping to validate
@@ -23,7 +34,239 @@ def get_redis() -> Optional[RedisType]:
         return _redis_client
     except Exception:
         _redis_client = None
+        _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
         return None
 
 def redis_available() -> bool:
     return get_redis() is not None
+
+
+def _reset_redis():
+    """Drop the client after a failed command so the next call reconnects (after backoff)"""
+    global _redis_client, _redis_retry_at
+    _redis_client = None
+    _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+
+def _estimate_size(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class CacheNamespace:
+    """Bounded LRU/TTL cache for one namespace.
+
+    Entries live in an OrderedDict in LRU order, so lookups, expiry checks and
+    evictions are O(1). The namespace is bounded by entry count and, optionally, by
+    total estimated bytes. ``get_or_set`` is single-flight: concurrent misses for
+    the same key wait for one computation instead of each computing the value.
+
+    When a ``codec`` (encode, decode) pair is given and Redis is reachable, values
+    are stored in Redis under ``<name>:<key>`` so all workers share them; if Redis
+    is unavailable or errors, the namespace falls back to its in-memory store.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 ttl_seconds: float = 300, codec: Optional[Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = None,
+                 sizeof: Callable[[Any], int] = _estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.codec = codec
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @property
+    def backend(self) -> str:
+        return 'redis' if self.codec and redis_available() else 'memory'
+
+    def get(self, key: str, default: Any = None) -> Any:
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if self.codec:
+            client = get_redis()
+            if client is not None:
+                try:
+                    client.setex(self._redis_key(key), max(1, int(ttl)), self.codec[0](value))
+                    return
+                except Exception:
+                    _reset_redis()
+        self._store(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        if self.codec:
+            client = get_redis()
+            if client is not None:
+                try:
+                    client.delete(self._redis_key(key))
+                except Exception:
+                    _reset_redis()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[2]
+            self._update_gauges()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def keys(self) -> List[str]:
+        """Keys of the live in-memory entries (values held in Redis are not listed)"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, entry in self._entries.items() if entry[0] > now]
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value or compute it once, even under concurrent misses"""
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            value = factory()
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'namespace': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'backend': self.backend
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _redis_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        if self.codec:
+            client = get_redis()
+            if client is not None:
+                try:
+                    raw = client.get(self._redis_key(key))
+                except Exception:
+                    raw = None
+                    _reset_redis()
+                if raw is not None:
+                    try:
+                        value = self.codec[1](raw)
+                        CACHE_REQUESTS.labels(namespace=self.name, result='hit').inc()
+                        return True, value
+                    except Exception:
+                        # Unreadable entry (e.g. an older format): treat as a miss
+                        pass
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    CACHE_REQUESTS.labels(namespace=self.name, result='hit').inc()
+                    return True, entry[1]
+                self._evict(key, 'ttl')
+                self._update_gauges()
+        CACHE_REQUESTS.labels(namespace=self.name, result='miss').inc()
+        return False, None
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Larger than the whole namespace budget: not cacheable
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            self._drop_expired_head()
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)), 'lru')
+            while self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)), 'bytes')
+            self._update_gauges()
+
+    def _drop_expired_head(self, limit: int = 8) -> None:
+        """Reclaim a few expired entries from the LRU end without scanning the namespace"""
+        now = time.monotonic()
+        for _ in range(limit):
+            if not self._entries:
+                return
+            oldest_key = next(iter(self._entries))
+            if self._entries[oldest_key][0] > now:
+                return
+            self._evict(oldest_key, 'ttl')
+
+    def _evict(self, key: str, reason: Optional[str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[2]
+        if reason:
+            CACHE_EVICTIONS.labels(namespace=self.name, reason=reason).inc()
+
+    def _update_gauges(self) -> None:
+        CACHE_ENTRIES.labels(namespace=self.name).set(len(self._entries))
+        CACHE_BYTES.labels(namespace=self.name).set(self._bytes)
+
+
+_namespaces: Dict[str, CacheNamespace] = {}
+_namespaces_lock = threading.Lock()
+
+
+def get_cache(name: str, **config) -> CacheNamespace:
+    """Get (or create on first use) the shared cache namespace ``name``.
+
+    Keyword arguments are passed to ``CacheNamespace`` the first time the namespace
+    is created and ignored afterwards.
+    """
+    namespace = _namespaces.get(name)
+    if namespace is not None:
+        return namespace
+    with _namespaces_lock:
+        if name not in _namespaces:
+            _namespaces[name] = CacheNamespace(name, **config)
+        return _namespaces[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: namespace.stats() for name, namespace in list(_namespaces.items())}
@@ -55,10 +55,49 @@ class Settings(BaseSettings):
     generic_report_max_flat_rows: int = Field(5000)
     generic_report_max_bytes: int = Field(2_000_000)  # ~2MB raw JSON
     generic_report_cache_ttl_seconds: int = Field(600)
+    generic_report_cache_max_entries: int = Field(256)
+    generic_report_cache_max_bytes: int = Field(64_000_000)  # in-memory fallback budget
     generic_report_allowed_meta_keys: str = Field("title,period,data")  # comma-separated
 
     # Inventory posting configuration: 'immediate' or 'received'
     inventory_posting_mode: str = Field("immediate")
 
+    # Receipt PDF rendering queue: 'thread' (in-process pool) or 'celery' (requires celery + redis)
+    receipt_queue_backend: str = Field("thread")
+    receipt_queue_workers: int = Field(2)
+
+    # Blocking work from async endpoints runs on its own pool (separate from FastAPI's default threadpool)
+    blocking_pool_workers: int = Field(16)
+    blocking_route_concurrency: int = Field(4)  # default per-route limit
+    event_loop_lag_interval_seconds: float = Field(0.5)
+
+    # Live branch sales aggregator: how often in-process counters are rebuilt from the sales table
+    branch_sales_reconcile_seconds: int = Field(60)
+
+    # Per-day COGS rollup shared by COGS period reports and trends (cached per calendar month)
+    cogs_rollup_cache_ttl_seconds: int = Field(600)
+    cogs_rollup_open_month_ttl_seconds: int = Field(60)  # current/future months change more often
+
+    # Compiled per-user permission sets; commits that change grants or roles drop entries at once
+    permission_cache_ttl_seconds: int = Field(30)
+
+    # Logging (app/utils/logger.py): default level and per-module overrides, e.g.
+    # LOG_LEVELS="app.services.ifrs_reports_core=DEBUG,app.api=WARNING"
+    log_level: str = Field("INFO")
+    log_levels: str = Field("")
+
+    # Chart-of-accounts tree, keyed by a fingerprint of accounts, branches and journal lines
+    chart_of_accounts_cache_ttl_seconds: int = Field(600)
+
+    # VAT totals of closed periods; commits touching a transaction in the period drop them at once
+    vat_period_cache_ttl_seconds: int = Field(3600)
+
+    # Bulk recurring billing: billing cycles invoiced per transaction
+    billing_run_chunk_size: int = Field(500)
+
+    # Document numbers: block of POS / receipt numbers each worker reserves at a time
+    # (invoices and credit notes are always numbered gap-free inside their transaction)
+    document_sequence_block_size: int = Field(50)
+
 
 settings = Settings()
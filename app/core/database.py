@@ -2,7 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 from app.core.db_utils import resolve_database_url
-import logging, re
+import logging, re, threading
 
 logger = logging.getLogger("db.init")
 
@@ -28,11 +28,36 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
-        # Lightweight bootstrap for IFRS tags when startup events didn't run (e.g., direct dependency usage in tests)
+# Core chart-of-accounts bootstrap state. The check runs once per process (or
+# after invalidate_core_accounts_bootstrap) instead of on every request session.
+_core_accounts_bootstrapped = False
+_core_accounts_lock = threading.Lock()
+
+
+def invalidate_core_accounts_bootstrap():
+    """Force the next session to re-check core accounts (call after seeding or resets)"""
+    global _core_accounts_bootstrapped
+    with _core_accounts_lock:
+        _core_accounts_bootstrapped = False
+
+
+def ensure_core_accounts(db, force: bool = False) -> bool:
+    """
+    Ensure the minimal IFRS-tagged accounts exist, at most once per process.
+
+    Args:
+        db: Database session
+        force: Re-run the check even if it already succeeded
+
+    Returns:
+        True if the bootstrap check ran in this call
+    """
+    global _core_accounts_bootstrapped
+    if _core_accounts_bootstrapped and not force:
+        return False
+    with _core_accounts_lock:
+        if _core_accounts_bootstrapped and not force:
+            return False
         try:
             from app.models.accounting import AccountingCode
             needed = {
@@ -77,9 +102,22 @@ def get_db():
                     updated += 1
             if updated or created:
                 db.commit()
-        except Exception:
-            # Suppress any bootstrap errors to avoid masking primary DB usage errors
-            pass
+            _core_accounts_bootstrapped = True
+        except Exception as exc:
+            # Suppress bootstrap errors to avoid masking primary DB usage errors; retried next session
+            db.rollback()
+            logger.warning(f"Core accounts bootstrap failed: {exc}")
+        return True
+
+
+def get_db():
+    """Dependency to get database session"""
+    db = SessionLocal()
+    try:
+        # Fallback for when startup events didn't run (e.g., direct dependency usage in tests);
+        # after the first successful check this adds no queries.
+        if not _core_accounts_bootstrapped:
+            ensure_core_accounts(db)
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
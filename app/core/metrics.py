@@ -4,6 +4,8 @@ class DummyMetric:
         return self
     def inc(self, *args, **kwargs):
         pass
+    def dec(self, *args, **kwargs):
+        pass
     def observe(self, *args, **kwargs):
         pass
     def set(self, *args, **kwargs):
@@ -35,12 +37,72 @@ try:
         'generic_report_cache_entries',
         'Current in-memory generic report cache entries'
     )
+
+    # Shared cache layer metrics (app.core.cache)
+    CACHE_REQUESTS = Counter(
+        'cache_requests_total',
+        'Cache lookups by namespace and result',
+        ['namespace','result']
+    )
+
+    CACHE_EVICTIONS = Counter(
+        'cache_evictions_total',
+        'Cache evictions by namespace and reason',
+        ['namespace','reason']
+    )
+
+    CACHE_ENTRIES = Gauge(
+        'cache_entries',
+        'Current in-memory entries per cache namespace',
+        ['namespace']
+    )
+
+    CACHE_BYTES = Gauge(
+        'cache_bytes',
+        'Current estimated in-memory bytes per cache namespace',
+        ['namespace']
+    )
+
+    # Blocking work offloaded from async endpoints (app.core.blocking)
+    BLOCKING_CALL_SECONDS = Histogram(
+        'blocking_call_seconds',
+        'Time spent running offloaded blocking calls',
+        ['route'],
+        buckets=(0.01,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60)
+    )
+
+    BLOCKING_WAIT_SECONDS = Histogram(
+        'blocking_wait_seconds',
+        'Time offloaded calls waited for a route slot and a pool thread',
+        ['route'],
+        buckets=(0.001,0.01,0.05,0.1,0.25,0.5,1,2.5,5,10)
+    )
+
+    BLOCKING_INFLIGHT = Gauge(
+        'blocking_inflight',
+        'Offloaded blocking calls currently admitted per route',
+        ['route']
+    )
+
+    EVENT_LOOP_LAG_SECONDS = Histogram(
+        'event_loop_lag_seconds',
+        'How late the event loop woke a periodic timer (time the loop was blocked)',
+        buckets=(0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5)
+    )
 except ImportError:
     # Create dummy objects when prometheus_client is not available
     GENERIC_REPORT_REQUESTS = DummyMetric()
     GENERIC_REPORT_FLAT_ROWS = DummyMetric()
     GENERIC_REPORT_SIZE_BYTES = DummyMetric()
     GENERIC_REPORT_CACHE_SIZE = DummyMetric()
+    CACHE_REQUESTS = DummyMetric()
+    CACHE_EVICTIONS = DummyMetric()
+    CACHE_ENTRIES = DummyMetric()
+    CACHE_BYTES = DummyMetric()
+    BLOCKING_CALL_SECONDS = DummyMetric()
+    BLOCKING_WAIT_SECONDS = DummyMetric()
+    BLOCKING_INFLIGHT = DummyMetric()
+    EVENT_LOOP_LAG_SECONDS = DummyMetric()
 
 def set_cache_size(n: int):
     try:
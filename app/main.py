@@ -4,9 +4,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+import logging
 
 from app.core.config import settings
-from app.core.database import get_db, engine
+from app.core.database import get_db, engine, ensure_core_accounts
+from app.core.blocking import start_event_loop_monitor, shutdown_blocking_executor
 from app.models import Base
 from app.api.v1.api import api_router
 from app.api.v1.endpoints import landed_costs
@@ -22,6 +24,9 @@ import scripts.seeds.seed_accounts  # noqa
 import scripts.seeds.seed_demo_users  # noqa
 from sqlalchemy import text
 from app.services.ifrs_reporting_service import IFRSReportingService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Create database tables (note: tiny edit to trigger reload)
 Base.metadata.create_all(bind=engine)
@@ -69,9 +74,9 @@ def apply_ifrs_core_tags(db: Session) -> None:
                 if remaining
                 else ""
             )
-            print(f"[IFRS] Assigned or corrected reporting tags for {updates} of {reviewed} accounts{msg_suffix}")
+            logger.info("[IFRS] Assigned or corrected reporting tags for %s of %s accounts%s", updates, reviewed, msg_suffix)
         elif remaining == 0:
-            print("[IFRS] All accounting codes already have valid IFRS tags")
+            logger.debug("[IFRS] All accounting codes already have valid IFRS tags")
 
         if manual_review:
             preview = ", ".join(
@@ -79,25 +84,23 @@ def apply_ifrs_core_tags(db: Session) -> None:
                 for acct in manual_review[:5]
             )
             extra = "..." if len(manual_review) > 5 else ""
-            print(
-                f"[IFRS] {len(manual_review)} accounts still need manual classification: {preview}{extra}"
-            )
+            logger.warning("[IFRS] %s accounts still need manual classification: %s%s", len(manual_review), preview, extra)
     except Exception as exc:
         db.rollback()
-        print(f"[IFRS] Startup tagging failed: {exc}")
+        logger.error("[IFRS] Startup tagging failed: %s", exc)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    print("Starting CNPERP ERP System...")
+    logger.info("Starting CNPERP ERP System...")
     # Ensure DB connection pool is fresh (important after enum/type migrations)
     try:
         engine.dispose()
-        print("[INIT] Disposed SQLAlchemy engine pool to refresh DB type caches")
+        logger.debug("Disposed SQLAlchemy engine pool to refresh DB type caches")
     except Exception as de:
-        print(f"[INIT] Engine dispose warning: {de}")
+        logger.warning("Engine dispose warning: %s", de)
     # Seed core POS permissions if missing
     db = SessionLocal()
     try:
@@ -113,41 +116,41 @@ async def lifespan(app: FastAPI):
                 new += 1
         if new:
             db.commit()
-            print(f"[INIT] Seeded {new} POS permissions")
+            logger.info("Seeded %s POS permissions", new)
         # Run unified Plan A baseline seeds (idempotent)
         try:
             from scripts.seeds.registry import run_selected
             # Seed baseline plus demo users to enable initial login
             run_selected(db, ["roles_permissions","units","accounts","demo_users"])
-            print("[INIT] Baseline Plan A seeds applied")
+            logger.info("Baseline Plan A seeds applied")
         except Exception as se:
-            print(f"[INIT] Baseline seeding error: {se}")
+            logger.error("Baseline seeding error: %s", se)
 
         # Ensure app_settings singleton exists
         try:
             from app.models.app_setting import AppSetting
             instance = db.query(AppSetting).first()
             if not instance:
-                print("[INIT] Creating app_settings singleton...")
+                logger.debug("Creating app_settings singleton...")
                 instance = AppSetting()
                 db.add(instance)
                 db.commit()
-                print("[INIT] App settings created successfully")
+                logger.info("App settings created successfully")
             else:
-                print("[INIT] App settings already exists")
+                logger.debug("App settings already exists")
         except Exception as ase:
-            print(f"[INIT] App settings creation error: {ase}")
+            logger.error("App settings creation error: %s", ase)
 
         # Ensure product_assemblies has unit_of_measure_id (idempotent quick migration)
         try:
-            print("[INIT] Ensuring product_assemblies.unit_of_measure_id column exists...")
+            logger.debug("Ensuring product_assemblies.unit_of_measure_id column exists...")
             with engine.connect() as conn:
                 exists = conn.execute(text(
                     "SELECT 1 FROM information_schema.columns WHERE table_name='product_assemblies' AND column_name='unit_of_measure_id'"
                 )).first()
                 if not exists:
                     conn.execute(text("ALTER TABLE product_assemblies ADD COLUMN IF NOT EXISTS unit_of_measure_id VARCHAR NULL"))
-                    print("[INIT] Added column unit_of_measure_id to product_assemblies")
+                    logger.info("Added column unit_of_measure_id to product_assemblies")
                 # Ensure FK exists
                 fk_exists = conn.execute(text(
                     "SELECT 1 FROM information_schema.table_constraints WHERE table_name='product_assemblies' AND constraint_name='fk_product_assemblies_unit_of_measure_id'"
@@ -156,21 +159,25 @@ async def lifespan(app: FastAPI):
                     conn.execute(text(
                         "ALTER TABLE product_assemblies ADD CONSTRAINT fk_product_assemblies_unit_of_measure_id FOREIGN KEY (unit_of_measure_id) REFERENCES unit_of_measures(id) ON DELETE SET NULL"
                     ))
-                    print("[INIT] Added FK fk_product_assemblies_unit_of_measure_id")
+                    logger.info("Added FK fk_product_assemblies_unit_of_measure_id")
                 conn.commit()
-            print("[INIT] product_assemblies schema OK")
+            logger.debug("product_assemblies schema OK")
         except Exception as me:
-            print(f"[INIT] Quick migration check failed (non-fatal): {me}")
+            logger.warning("Quick migration check failed (non-fatal): %s", me)
 
         apply_ifrs_core_tags(db)
+        ensure_core_accounts(db, force=True)
 
     except Exception as e:
-        print(f"[INIT] Permission seeding failed: {e}")
+        logger.error("Permission seeding failed: %s", e)
     finally:
         db.close()
+    loop_monitor = start_event_loop_monitor()
     yield
     # Shutdown
-    print("Shutting down CNPERP ERP System...")
+    logger.info("Shutting down CNPERP ERP System...")
+    loop_monitor.cancel()
+    shutdown_blocking_executor(wait=False)
 
 
 def create_application() -> FastAPI:
@@ -222,10 +229,10 @@ def create_application() -> FastAPI:
     from app.routers.banking_dimensions import router as banking_dimensions_router
     app.include_router(banking_dimensions_router, tags=["Banking Dimensions"])
 
-    # Print all registered routes for diagnostics
-    print("[DEBUG] Registered routes:")
-    for route in app.routes:
-        print(f"[DEBUG] {route.path} -> {getattr(route, 'methods', None)}")
+    # Log all registered routes for diagnostics (DEBUG only)
+    if logger.isEnabledFor(logging.DEBUG):
+        for route in app.routes:
+            logger.debug("Registered route %s -> %s", route.path, getattr(route, 'methods', None))
 
     @app.get("/")
     async def root():
@@ -266,10 +273,10 @@ def create_application() -> FastAPI:
 
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
-        import traceback
-        error_detail = f"{exc.__class__.__name__}: {str(exc)}"
-        traceback.print_exc()
-        print(f"[ERROR] {request.method} {request.url.path}: {error_detail}")
+        logger.error(
+            "Unhandled %s on %s %s: %s", exc.__class__.__name__, request.method, request.url.path, exc,
+            exc_info=exc, extra={"method": request.method, "path": request.url.path},
+        )
         return JSONResponse(
             status_code=500,
             content={
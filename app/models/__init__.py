@@ -5,7 +5,7 @@ from .role import Role, Permission, RolePermission, UserAuditLog
 from .branch import Branch
 from .accounting import (
     AccountingCode, AccountingEntry, JournalEntry, JournalTransaction,
-    Ledger, OpeningBalance
+    Ledger, OpeningBalance, AccountBalanceSnapshot
 )
 from .accounting_dimensions import (
     AccountingDimension, AccountingDimensionValue, AccountingDimensionAssignment,
@@ -17,7 +17,7 @@ from .accounting_code_dimensions import (
 )
 from .inventory import (
     Product, ProductAssembly, InventoryTransaction, InventoryAdjustment,
-    SerialNumber, UnitOfMeasure
+    SerialNumber, UnitOfMeasure, InventoryCostLayer, BranchStockLevel
 )
 from .inventory_allocation import (
     BranchInventoryAllocation, InventoryAllocationRequest, InventoryAllocationMovement,
@@ -44,13 +44,14 @@ from .banking import (
     ReconciliationItem, Beneficiary
 )
 from .billing import (
-    BillingCycle, BillableItem, RecurringInvoice, RecurringPayment
+    BillingCycle, BillableItem, RecurringInvoice, RecurringPayment, BillingRun
 )
 from .vat import (
     VatReconciliation, VatReconciliationItem, VatPayment
 )
 from .pos import PosSession, PosShiftReconciliation
 from .receipt import Receipt
+from .document_sequence import DocumentSequence
 from .notifications import Notification, NotificationUser
 from .import_jobs import ImportJob
 from .app_setting import AppSetting
@@ -84,9 +85,12 @@ __all__ = [
     "JournalTransaction",
     "Ledger",
     "OpeningBalance",
+    "AccountBalanceSnapshot",
     "Product",
     "ProductAssembly",
     "InventoryTransaction",
+    "InventoryCostLayer",
+    "BranchStockLevel",
     "InventoryAdjustment",
     "SerialNumber",
     "UnitOfMeasure",
@@ -135,12 +139,14 @@ __all__ = [
     "BillableItem",
     "RecurringInvoice",
     "RecurringPayment",
+    "BillingRun",
     "VatReconciliation",
     "VatReconciliationItem",
     "VatPayment",
     "PosSession",
     "PosShiftReconciliation",
     "Receipt",
+    "DocumentSequence",
     "Notification",
     "NotificationUser",
     "ImportJob",
@@ -178,3 +184,24 @@ __all__ = [
     "AccountingCodeDimensionTemplate",
     "AccountingCodeDimensionTemplateItem",
 ]
+
+# Registers the flush hook that keeps account_balance_snapshots in step with journal_entries
+from app.services import account_balance_snapshot_service as _account_balance_snapshots  # noqa: E402,F401
+# Registers the commit hook that invalidates the cached AppSetting snapshot
+from app.services import app_settings_cache as _app_settings_cache  # noqa: E402,F401
+# Registers the commit hook that feeds committed sales into the live branch sales counters
+from app.services import branch_sales_aggregator as _branch_sales_aggregator  # noqa: E402,F401
+# Registers the flush hook that opens and consumes FIFO cost layers for inventory transactions
+from app.services import inventory_cost_layer_service as _inventory_cost_layers  # noqa: E402,F401
+# Registers the flush hook that keeps branch_stock_levels in step with inventory_transactions
+from app.services import branch_stock_level_service as _branch_stock_levels  # noqa: E402,F401
+# Registers the flush hooks that maintain the materialised paths of dimension values
+from app.services import dimension_hierarchy_service as _dimension_hierarchy  # noqa: E402,F401
+# Registers the commit hook that drops cached per-user permission sets when grants or roles change
+from app.services import permission_cache as _permission_cache  # noqa: E402,F401
+# Registers the commit hook that drops cached VAT totals of periods whose transactions change
+from app.services import enhanced_vat_service as _enhanced_vat  # noqa: E402,F401
+# Registers the commit hook that drops cached daily COGS of months whose source rows change
+from app.services import cogs_reports_service as _cogs_reports  # noqa: E402,F401
+# Registers the commit hook that moves the chart-of-accounts ETag on account, journal or branch writes
+from app.services import chart_of_accounts_service as _chart_of_accounts  # noqa: E402,F401
@@ -7,7 +7,7 @@ from app.models.accounting_constants import (
     NormalBalance, AccountType
 )
 import uuid
-from sqlalchemy import Column, String, Boolean, Text, DateTime, Date, ForeignKey, Numeric, Integer, CheckConstraint, Enum
+from sqlalchemy import Column, String, Boolean, Text, DateTime, Date, ForeignKey, Numeric, Integer, CheckConstraint, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, validates, object_session
 from sqlalchemy.exc import IntegrityError
 from typing import Optional, List, Dict, Any, TYPE_CHECKING
@@ -283,6 +283,11 @@ class AccountingEntry(BaseModel):
 class JournalEntry(BaseModel):
     """Journal entry line items"""
     __tablename__ = "journal_entries"
+    __table_args__ = (
+        # Keyset pagination and per-account running balances order by (date, id)
+        Index('idx_journal_entries_date_id', 'date', 'id'),
+        Index('idx_journal_entries_account_date_id', 'accounting_code_id', 'date', 'id'),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
 
@@ -361,6 +366,39 @@ class OpeningBalance(BaseModel):
     accounting_code = relationship("AccountingCode", back_populates="opening_balances")
 
 
+class AccountBalanceSnapshot(BaseModel):
+    """Per-account, per-branch, per-month debit/credit totals.
+
+    Maintained incrementally whenever journal entries are flushed (see
+    app.services.account_balance_snapshot_service) and rebuilt in one pass by
+    scripts/rebuild_account_balance_snapshots.py. Reports sum the closed periods and
+    add a grouped journal delta for the open period instead of replaying history.
+    """
+    __tablename__ = "account_balance_snapshots"
+    __table_args__ = (
+        UniqueConstraint('accounting_code_id', 'branch_id', 'period_start',
+                         name='uq_account_balance_snapshot_period'),
+        Index('idx_account_balance_snapshot_period', 'period_end', 'is_closed'),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    accounting_code_id = Column(String(36), ForeignKey("accounting_codes.id", ondelete='CASCADE'),
+                                nullable=False, index=True)
+    # Empty string (not NULL) for entries posted without a branch so the unique key upserts cleanly
+    branch_id = Column(String(36), nullable=False, default='', server_default='')
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    total_debits = Column(Numeric(19, 4), nullable=False, default=0, server_default='0')
+    total_credits = Column(Numeric(19, 4), nullable=False, default=0, server_default='0')
+    entry_count = Column(Integer, nullable=False, default=0, server_default='0')
+    is_closed = Column(Boolean, nullable=False, default=False, server_default='false')
+    closed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    accounting_code = relationship("AccountingCode")
+
+
 class JournalSaleAudit(BaseModel):
     """Linkage audit table: ties auto-posted journal entries to POS sales with user & branch traceability"""
     __tablename__ = "journal_sale_audit"
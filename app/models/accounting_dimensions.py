@@ -169,6 +169,7 @@ class AccountingDimensionValue(BaseModel):
         UniqueConstraint('dimension_id', 'code', name='uq_dimension_value_code'),
         Index('idx_dimension_value_active', 'dimension_id', 'is_active'),
         Index('idx_dimension_value_hierarchy', 'parent_value_id'),
+        Index('idx_dimension_value_tree_path', 'tree_path', postgresql_ops={'tree_path': 'text_pattern_ops'}),
         {
             'comment': 'Specific values within accounting dimensions'
         }
@@ -201,6 +202,11 @@ class AccountingDimensionValue(BaseModel):
     hierarchy_path = Column(String(500), nullable=True,
                            comment='Full path in hierarchy (e.g., /sales/retail/online)')
 
+    # Maintained by app.services.dimension_hierarchy_service on every flush; unbounded, as
+    # each level adds a 37-character "<uuid>/" segment
+    tree_path = Column(Text, nullable=True,
+                       comment='Materialised path of value IDs from the root (/<root id>/.../<own id>/)')
+
     # Configuration
     is_active = Column(Boolean, default=True, nullable=False,
                       comment='Whether this value is active for use')
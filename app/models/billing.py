@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, Text, Date, ForeignKey, Numeric, Integer, JSON
+from sqlalchemy import Column, String, Boolean, Text, Date, DateTime, ForeignKey, Numeric, Integer, JSON, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -62,7 +62,11 @@ class RecurringInvoice(BaseModel):
 
     billing_cycle_id = Column(ForeignKey("billing_cycles.id"), nullable=False)
     billable_item_id = Column(ForeignKey("billable_items.id"), nullable=False)
-    invoice_number = Column(String, nullable=False, unique=True)
+    # One row per billed item, so items billed on the same invoice share its number
+    invoice_number = Column(String, nullable=False, index=True)
+    # Start of the billing period this row bills; an item is billed at most once per period.
+    # NULL for invoices raised by hand for a period that was already billed
+    period_start = Column(Date, nullable=True)
     due_date = Column(Date, nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
     status = Column(String, default="pending", nullable=False)
@@ -74,6 +78,12 @@ class RecurringInvoice(BaseModel):
     billable_item = relationship("BillableItem", back_populates="recurring_invoices")
     recurring_payments = relationship("RecurringPayment", back_populates="recurring_invoice")
 
+    __table_args__ = (
+        Index('idx_recurring_invoices_cycle_period', 'billing_cycle_id', 'period_start'),
+        Index('uq_recurring_invoices_item_period', 'billing_cycle_id', 'billable_item_id', 'period_start',
+              unique=True),
+    )
+
 
 class RecurringPayment(BaseModel):
     """Recurring payment model"""
@@ -91,3 +101,22 @@ class RecurringPayment(BaseModel):
 
     # Relationships
     recurring_invoice = relationship("RecurringInvoice", back_populates="recurring_payments")
+
+
+class BillingRun(BaseModel):
+    """Bulk recurring-billing run: progress of one generate-all-due-invoices pass"""
+    __tablename__ = "billing_runs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    reference_date = Column(Date, nullable=False)
+    status = Column(String, default="running", nullable=False)  # running, completed, completed_with_errors, failed
+    total_cycles = Column(Integer, default=0, nullable=False)
+    processed_cycles = Column(Integer, default=0, nullable=False)
+    failed_cycles = Column(Integer, default=0, nullable=False)
+    invoices_created = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    error_message = Column(Text)
+    created_by = Column(ForeignKey("users.id"), nullable=True)
+    meta_data = Column(JSON, default={})  # failed cycle ids and their errors
@@ -0,0 +1,23 @@
+import uuid
+from sqlalchemy import Column, String, Integer, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class DocumentSequence(BaseModel):
+    """Last number issued for one document type, branch and year.
+
+    Advanced by app.services.document_sequence_service with one indexed
+    UPDATE ... RETURNING per number (or per block of numbers).
+    """
+    __tablename__ = "document_sequences"
+    __table_args__ = (
+        UniqueConstraint('document_type', 'branch_id', 'year', name='uq_document_sequence_scope'),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    document_type = Column(String(40), nullable=False)  # invoice, credit_note, receipt, pos_sale, job_card
+    # Empty string (not NULL) for company-wide sequences so the unique key upserts cleanly
+    branch_id = Column(String(36), nullable=False, default='', server_default='')
+    year = Column(Integer, nullable=False)
+    last_value = Column(Integer, nullable=False, default=0, server_default='0')
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, Text, Date, ForeignKey, Numeric, Integer
+from sqlalchemy import Column, String, Boolean, Text, Date, DateTime, ForeignKey, Numeric, Integer, Index, UniqueConstraint
 from sqlalchemy import types as _types
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
@@ -194,6 +194,59 @@ class InventoryTransaction(BaseModel):
     job_card = relationship("JobCard", back_populates="inventory_transactions")
 
 
+
+class InventoryCostLayer(BaseModel):
+    """FIFO cost layer: one inbound movement and the quantity of it still on hand.
+
+    Inbound inventory transactions open a layer; outbound ones consume the oldest open
+    layers first (see app.services.inventory_cost_layer_service). FIFO issue cost and
+    stock valuation are read from the open layers instead of replaying history.
+    """
+    __tablename__ = "inventory_cost_layers"
+    __table_args__ = (
+        Index('idx_inventory_cost_layers_fifo', 'product_id', 'received_date', 'created_at', 'id'),
+        Index('idx_inventory_cost_layers_open', 'product_id', 'remaining_quantity'),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    product_id = Column(ForeignKey("products.id", ondelete='CASCADE'), nullable=False)
+    branch_id = Column(ForeignKey("branches.id"), nullable=True, index=True)
+    source_transaction_id = Column(String, ForeignKey("inventory_transactions.id", ondelete='SET NULL'),
+                                   nullable=True, index=True)
+    received_date = Column(Date, nullable=False)
+    original_quantity = Column(Integer, nullable=False)
+    remaining_quantity = Column(Integer, nullable=False)
+    unit_cost = Column(Numeric(15, 4), nullable=False, default=0)
+
+    product = relationship("Product")
+
+
+class BranchStockLevel(BaseModel):
+    """On-hand quantity of a product in a branch.
+
+    Maintained in the same transaction as every inventory transaction flush (see
+    app.services.branch_stock_level_service), so stock lookups read one row instead
+    of summing the product's movement history. scripts/check_branch_stock_drift.py
+    compares the table against inventory_transactions and repairs drifted rows.
+    """
+    __tablename__ = "branch_stock_levels"
+    __table_args__ = (
+        UniqueConstraint('product_id', 'branch_id', name='uq_branch_stock_level_product_branch'),
+        Index('idx_branch_stock_levels_branch', 'branch_id', 'product_id'),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    product_id = Column(ForeignKey("products.id", ondelete='CASCADE'), nullable=False)
+    # Empty string (not NULL) for movements without a branch so the unique key upserts cleanly
+    branch_id = Column(String(36), nullable=False, default='', server_default='')
+    quantity = Column(Integer, nullable=False, default=0, server_default='0')
+    last_movement_at = Column(DateTime, nullable=True)
+
+    product = relationship("Product")
+
+
 class InventoryAdjustment(BaseModel):
     """Inventory adjustments for stock corrections"""
     __tablename__ = "inventory_adjustments"
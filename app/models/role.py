@@ -54,9 +54,12 @@ class UserPermission(BaseModel):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(ForeignKey("users.id"), nullable=False)
     permission_id = Column(ForeignKey("permissions.id"), nullable=False)
+    granted_by = Column(ForeignKey("users.id"))
+    granted_at = Column(DateTime)
+    expires_at = Column(DateTime)  # Temporary grants stop applying after this time
 
     # Relationships
-    user = relationship("User", back_populates="user_permissions")
+    user = relationship("User", back_populates="user_permissions", foreign_keys=[user_id])
     permission = relationship("Permission")
 
 
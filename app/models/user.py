@@ -30,7 +30,8 @@ class User(BaseModel):
     branch = relationship("Branch", back_populates="users")
     role_obj = relationship("Role", back_populates="users")
     audit_logs = relationship("UserAuditLog", back_populates="user", cascade="all, delete-orphan")
-    user_permissions = relationship("UserPermission", back_populates="user", cascade="all, delete-orphan")
+    user_permissions = relationship("UserPermission", back_populates="user", foreign_keys="UserPermission.user_id",
+                                    cascade="all, delete-orphan")
     beneficiaries = relationship("Beneficiary", back_populates="user")
     pos_sessions = relationship("PosSession", back_populates="user", foreign_keys="PosSession.user_id")
     import_jobs = relationship("ImportJob", back_populates="user")
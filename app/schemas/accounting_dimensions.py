@@ -23,6 +23,12 @@ class DimensionTypeEnum(str, Enum):
     CUSTOM = "custom"
 
 
+class PivotModeEnum(str, Enum):
+    """Subtotals produced by a cross-dimension pivot"""
+    ROLLUP = "rollup"  # Hierarchical subtotals in pivot dimension order
+    CUBE = "cube"      # Subtotals for every combination of pivot dimensions
+
+
 class DimensionScopeEnum(str, Enum):
     """Scope of dimension application"""
     GLOBAL = "global"
@@ -262,12 +268,19 @@ class DimensionAnalysisFilter(BaseModel):
     account_types: Optional[List[str]] = None
     branch_ids: Optional[List[str]] = None
     include_inactive: bool = Field(default=False)
+    include_descendants: bool = Field(default=False,
+                                      description="Let dimension_values also match descendants of the listed values")
+    pivot_dimension_ids: Optional[List[str]] = Field(default=None,
+                                                     description="Dimension IDs to cross-tabulate, outermost first")
+    pivot_mode: PivotModeEnum = Field(default=PivotModeEnum.ROLLUP)
 
 
 class DimensionAnalysisResult(BaseModel):
     """Schema for dimension analysis results"""
-    dimension_breakdown: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+    dimension_breakdown: Dict[str, Dict[str, Dict[str, float]]] = Field(default_factory=dict,
+                                                                        description="Dimension -> value -> totals")
     totals: Dict[str, float] = Field(default_factory=dict)
+    pivot: Optional[List[Dict[str, Any]]] = None
     period_comparison: Optional[Dict[str, Any]] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
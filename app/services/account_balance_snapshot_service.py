@@ -0,0 +1,422 @@
+"""
+Account Balance Snapshot Service
+
+Maintains the account_balance_snapshots table (one row per account, branch and
+calendar month) and answers "balance as of date" questions from it:
+
+- Closed periods are read straight from the snapshot table.
+- The open period is aggregated from journal_entries in a single grouped query.
+
+Snapshots are kept current by a session flush hook, so every ORM posting path
+(POS, invoices, purchases, banking, manual journals, ...) maintains them without
+calling this service explicitly. Paths that insert journal rows with raw SQL must
+call AccountBalanceSnapshotService.record_movement().
+
+The upsert runs inside the posting transaction, which keeps snapshots exact
+without a reconciliation job but holds the row lock of each (account, branch,
+month) touched until commit. Concurrent postings to the same busy rows - every
+POS sale hits the branch's cash, revenue and VAT accounts - therefore commit one
+after another. That is accepted here because posting transactions are short;
+rows are written in key order so two postings never wait on each other in a
+cycle. If it becomes a bottleneck, the upsert can move to an after_commit hook
+or a batched job that folds journal_entries into the table.
+"""
+
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import uuid
+
+from sqlalchemy import and_, event, extract, func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.accounting import AccountBalanceSnapshot, JournalEntry
+
+ZERO = Decimal('0')
+
+# (accounting_code_id, branch_id or '', period_start)
+SnapshotKey = Tuple[str, str, date]
+
+_TRACKED_COLUMNS = ('accounting_code_id', 'branch_id', 'date', 'debit_amount', 'credit_amount')
+_INSERT_CHUNK_SIZE = 1000
+
+
+def period_bounds(value: date) -> Tuple[date, date]:
+    """Return the first and last day of the snapshot period (calendar month) containing value."""
+    if isinstance(value, datetime):
+        value = value.date()
+    start = value.replace(day=1)
+    end = value.replace(day=monthrange(value.year, value.month)[1])
+    return start, end
+
+
+def _snapshot_key(accounting_code_id: Optional[str], branch_id: Optional[str], entry_date) -> Optional[SnapshotKey]:
+    if not accounting_code_id or entry_date is None:
+        return None
+    return accounting_code_id, branch_id or '', period_bounds(entry_date)[0]
+
+
+def _to_decimal(value) -> Decimal:
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _write_snapshot(connection, key: SnapshotKey, debits: Decimal, credits: Decimal,
+                    count: int, replace: bool = False) -> None:
+    """Upsert one snapshot row, either adding the deltas or replacing the totals."""
+    table = AccountBalanceSnapshot.__table__
+    code_id, branch_id, start = key
+    now = datetime.utcnow()
+    values = {
+        'id': str(uuid.uuid4()),
+        'accounting_code_id': code_id,
+        'branch_id': branch_id,
+        'period_start': start,
+        'period_end': period_bounds(start)[1],
+        'total_debits': debits,
+        'total_credits': credits,
+        'entry_count': count,
+        'is_closed': False,
+        'created_at': now,
+        'updated_at': now,
+    }
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values)
+        if replace:
+            updates = {
+                'total_debits': stmt.excluded.total_debits,
+                'total_credits': stmt.excluded.total_credits,
+                'entry_count': stmt.excluded.entry_count,
+            }
+        else:
+            updates = {
+                'total_debits': table.c.total_debits + stmt.excluded.total_debits,
+                'total_credits': table.c.total_credits + stmt.excluded.total_credits,
+                'entry_count': table.c.entry_count + stmt.excluded.entry_count,
+            }
+        updates['updated_at'] = now
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['accounting_code_id', 'branch_id', 'period_start'],
+            set_=updates,
+        ))
+        return
+
+    # Portable fallback: update in place, insert when the period row does not exist yet
+    match = and_(
+        table.c.accounting_code_id == code_id,
+        table.c.branch_id == branch_id,
+        table.c.period_start == start,
+    )
+    if replace:
+        changes = {'total_debits': debits, 'total_credits': credits, 'entry_count': count}
+    else:
+        changes = {
+            'total_debits': table.c.total_debits + debits,
+            'total_credits': table.c.total_credits + credits,
+            'entry_count': table.c.entry_count + count,
+        }
+    changes['updated_at'] = now
+    result = connection.execute(table.update().where(match).values(**changes))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**values))
+
+
+def _recompute_snapshots(connection, keys: Iterable[SnapshotKey]) -> None:
+    """Recalculate snapshot rows from journal_entries (used for edits and deletes)."""
+    je = JournalEntry.__table__
+    for key in keys:
+        code_id, branch_id, start = key
+        end = period_bounds(start)[1]
+        branch_filter = je.c.branch_id.is_(None) | (je.c.branch_id == '') if not branch_id else je.c.branch_id == branch_id
+        row = connection.execute(
+            je.select().with_only_columns(
+                func.coalesce(func.sum(je.c.debit_amount), 0),
+                func.coalesce(func.sum(je.c.credit_amount), 0),
+                func.count(je.c.id),
+            ).where(and_(
+                je.c.accounting_code_id == code_id,
+                branch_filter,
+                je.c.date >= start,
+                je.c.date <= end,
+            ))
+        ).first()
+        _write_snapshot(connection, key, _to_decimal(row[0]), _to_decimal(row[1]), int(row[2] or 0), replace=True)
+
+
+def _history_values(obj: JournalEntry) -> Tuple[Dict[str, object], Dict[str, object], bool]:
+    """Return (previous, current, changed) values of the tracked journal columns."""
+    previous: Dict[str, object] = {}
+    current: Dict[str, object] = {}
+    changed = False
+    for column in _TRACKED_COLUMNS:
+        history = get_history(obj, column)
+        if history.has_changes():
+            changed = True
+            previous[column] = history.deleted[0] if history.deleted else None
+            current[column] = history.added[0] if history.added else None
+        else:
+            value = history.unchanged[0] if history.unchanged else getattr(obj, column, None)
+            previous[column] = value
+            current[column] = value
+    return previous, current, changed
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_account_balance_snapshots(session: Session, flush_context) -> None:
+    """Fold journal entries written by this flush into their snapshot periods."""
+    additions: Dict[SnapshotKey, List] = defaultdict(lambda: [ZERO, ZERO, 0])
+    recompute: Set[SnapshotKey] = set()
+
+    for obj in session.new:
+        if not isinstance(obj, JournalEntry):
+            continue
+        key = _snapshot_key(obj.accounting_code_id, obj.branch_id, obj.date)
+        if key is None:
+            continue
+        bucket = additions[key]
+        bucket[0] += _to_decimal(obj.debit_amount)
+        bucket[1] += _to_decimal(obj.credit_amount)
+        bucket[2] += 1
+
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, JournalEntry):
+            continue
+        previous, current, changed = _history_values(obj)
+        if not changed and obj not in session.deleted:
+            continue
+        for values in (previous, current):
+            key = _snapshot_key(values['accounting_code_id'], values['branch_id'], values['date'])
+            if key is not None:
+                recompute.add(key)
+
+    if not additions and not recompute:
+        return
+
+    connection = session.connection()
+    # Fixed key order, so concurrent postings lock shared rows in the same order
+    for key, (debits, credits, count) in sorted(additions.items()):
+        if key in recompute:
+            continue
+        _write_snapshot(connection, key, debits, credits, count)
+    if recompute:
+        _recompute_snapshots(connection, sorted(recompute))
+
+
+class AccountBalanceSnapshotService:
+    """Read and maintain per-period account balance snapshots"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get_last_closed_period_end(self, as_of_date: date) -> Optional[date]:
+        """Latest closed snapshot period that ends on or before as_of_date."""
+        return self.db.query(func.max(AccountBalanceSnapshot.period_end)).filter(
+            AccountBalanceSnapshot.is_closed.is_(True),
+            AccountBalanceSnapshot.period_end <= as_of_date,
+        ).scalar()
+
+    def get_account_totals(
+        self,
+        as_of_date: date,
+        branch_id: Optional[str] = None,
+    ) -> Dict[str, Tuple[Decimal, Decimal]]:
+        """
+        Cumulative debits and credits per account up to and including as_of_date.
+
+        Reads closed snapshots up to the last closed period and adds one grouped
+        journal_entries delta for the remaining (open) days.
+
+        Returns:
+            Dict mapping accounting_code_id to (total_debits, total_credits)
+        """
+        totals: Dict[str, List[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+        cutoff = self.get_last_closed_period_end(as_of_date)
+
+        if cutoff is not None:
+            snapshot_query = self.db.query(
+                AccountBalanceSnapshot.accounting_code_id,
+                func.sum(AccountBalanceSnapshot.total_debits),
+                func.sum(AccountBalanceSnapshot.total_credits),
+            ).filter(AccountBalanceSnapshot.period_end <= cutoff)
+            if branch_id:
+                snapshot_query = snapshot_query.filter(AccountBalanceSnapshot.branch_id == branch_id)
+            for code_id, debits, credits in snapshot_query.group_by(AccountBalanceSnapshot.accounting_code_id):
+                totals[code_id][0] += _to_decimal(debits)
+                totals[code_id][1] += _to_decimal(credits)
+
+        delta_query = self.db.query(
+            JournalEntry.accounting_code_id,
+            func.coalesce(func.sum(JournalEntry.debit_amount), 0),
+            func.coalesce(func.sum(JournalEntry.credit_amount), 0),
+        ).filter(JournalEntry.date <= as_of_date)
+        if cutoff is not None:
+            delta_query = delta_query.filter(JournalEntry.date > cutoff)
+        if branch_id:
+            delta_query = delta_query.filter(JournalEntry.branch_id == branch_id)
+        for code_id, debits, credits in delta_query.group_by(JournalEntry.accounting_code_id):
+            totals[code_id][0] += _to_decimal(debits)
+            totals[code_id][1] += _to_decimal(credits)
+
+        return {code_id: (values[0], values[1]) for code_id, values in totals.items()}
+
+    def get_period_movements(
+        self,
+        start_date: date,
+        end_date: date,
+        branch_id: Optional[str] = None,
+    ) -> Dict[str, Tuple[Decimal, Decimal]]:
+        """Debits and credits per account posted between start_date and end_date (inclusive)."""
+        closing = self.get_account_totals(end_date, branch_id)
+        opening = self.get_account_totals(start_date - timedelta(days=1), branch_id)
+        movements: Dict[str, Tuple[Decimal, Decimal]] = {}
+        for code_id, (debits, credits) in closing.items():
+            open_debits, open_credits = opening.get(code_id, (ZERO, ZERO))
+            if debits == open_debits and credits == open_credits:
+                continue
+            movements[code_id] = (debits - open_debits, credits - open_credits)
+        return movements
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def record_movement(
+        self,
+        accounting_code_id: str,
+        branch_id: Optional[str],
+        entry_date: date,
+        debit_amount=0,
+        credit_amount=0,
+    ) -> None:
+        """Register a journal line inserted outside the ORM (raw SQL posting paths)."""
+        key = _snapshot_key(accounting_code_id, branch_id, entry_date)
+        if key is None:
+            return
+        _write_snapshot(self.db.connection(), key, _to_decimal(debit_amount), _to_decimal(credit_amount), 1)
+
+    def rebuild(self, close_through: Optional[date] = None) -> Dict[str, int]:
+        """
+        Recreate every snapshot from journal_entries in one grouped pass.
+
+        Args:
+            close_through: Mark periods ending on or before this date as closed
+                (default: every period before the current month)
+
+        Returns:
+            Dict with the number of snapshot rows written and periods closed
+        """
+        if close_through is None:
+            close_through = date.today().replace(day=1) - timedelta(days=1)
+        return self._replace_snapshots(None, None, close_through)
+
+    def close_period(self, year: int, month: int) -> Dict[str, int]:
+        """
+        Recalculate every period since the last closed one through the given month
+        exactly from journal_entries and mark them closed.
+
+        Returns:
+            Dict with the number of snapshot rows written and periods closed
+        """
+        end = period_bounds(date(year, month, 1))[1]
+        last_closed = self.get_last_closed_period_end(end)
+        start = last_closed + timedelta(days=1) if last_closed else None
+        return self._replace_snapshots(start, end, end)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _grouped_journal_totals(
+        self,
+        start: Optional[date],
+        end: Optional[date],
+    ) -> Dict[SnapshotKey, List]:
+        year_col = extract('year', JournalEntry.date)
+        month_col = extract('month', JournalEntry.date)
+        query = self.db.query(
+            JournalEntry.accounting_code_id,
+            JournalEntry.branch_id,
+            year_col.label('year'),
+            month_col.label('month'),
+            func.coalesce(func.sum(JournalEntry.debit_amount), 0),
+            func.coalesce(func.sum(JournalEntry.credit_amount), 0),
+            func.count(JournalEntry.id),
+        ).filter(
+            JournalEntry.date.isnot(None),
+            JournalEntry.accounting_code_id.isnot(None),
+        )
+        if start is not None:
+            query = query.filter(JournalEntry.date >= start)
+        if end is not None:
+            query = query.filter(JournalEntry.date <= end)
+        query = query.group_by(JournalEntry.accounting_code_id, JournalEntry.branch_id, year_col, month_col)
+
+        merged: Dict[SnapshotKey, List] = defaultdict(lambda: [ZERO, ZERO, 0])
+        for code_id, branch_id, year, month, debits, credits, count in query:
+            key = (code_id, branch_id or '', date(int(year), int(month), 1))
+            merged[key][0] += _to_decimal(debits)
+            merged[key][1] += _to_decimal(credits)
+            merged[key][2] += int(count or 0)
+        return merged
+
+    def _replace_snapshots(
+        self,
+        start: Optional[date],
+        end: Optional[date],
+        close_through: date,
+    ) -> Dict[str, int]:
+        """Replace snapshot rows for whole periods between start and end (None = unbounded)."""
+        merged = self._grouped_journal_totals(start, end)
+
+        now = datetime.utcnow()
+        rows = []
+        for (code_id, branch_id, period_start), (debits, credits, count) in merged.items():
+            period_end = period_bounds(period_start)[1]
+            closed = period_end <= close_through
+            rows.append({
+                'id': str(uuid.uuid4()),
+                'accounting_code_id': code_id,
+                'branch_id': branch_id,
+                'period_start': period_start,
+                'period_end': period_end,
+                'total_debits': debits,
+                'total_credits': credits,
+                'entry_count': count,
+                'is_closed': closed,
+                'closed_at': now if closed else None,
+                'created_at': now,
+                'updated_at': now,
+            })
+
+        table = AccountBalanceSnapshot.__table__
+        stale = table.delete()
+        if start is not None:
+            stale = stale.where(table.c.period_start >= start)
+        if end is not None:
+            stale = stale.where(table.c.period_end <= end)
+        try:
+            self.db.execute(stale)
+            for offset in range(0, len(rows), _INSERT_CHUNK_SIZE):
+                self.db.execute(table.insert(), rows[offset:offset + _INSERT_CHUNK_SIZE])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            'snapshots_written': len(rows),
+            'periods_closed': len({row['period_start'] for row in rows if row['is_closed']}),
+        }
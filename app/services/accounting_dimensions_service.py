@@ -8,8 +8,8 @@ dimension values, and their assignments to financial transactions.
 import json
 from datetime import datetime, date
 from typing import Dict, List, Optional, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import and_, or_, func, desc, asc, literal_column, null, select, union_all
 from sqlalchemy.exc import IntegrityError
 
 from app.models.accounting_dimensions import (
@@ -22,8 +22,10 @@ from app.schemas.accounting_dimensions import (
     AccountingDimensionCreate, AccountingDimensionUpdate,
     AccountingDimensionValueCreate, AccountingDimensionValueUpdate,
     AccountingDimensionAssignmentCreate, AccountingDimensionAssignmentUpdate,
-    DimensionAnalysisFilter, DimensionAnalysisResult, DimensionValidationResult
+    DimensionAnalysisFilter, DimensionAnalysisResult, DimensionValidationResult,
+    PivotModeEnum
 )
+from app.services.dimension_hierarchy_service import subtree_condition
 from app.utils.logger import get_logger, log_exception, log_error_with_context
 
 logger = get_logger(__name__)
@@ -378,102 +380,214 @@ class AccountingDimensionService:
 
     # Analysis and reporting
     def analyze_by_dimensions(self, filters: DimensionAnalysisFilter) -> DimensionAnalysisResult:
-        """Perform multi-dimensional analysis of financial data"""
-        # Build base query for journal entries with dimension assignments
-        query = self.db.query(
-            JournalEntry,
-            AccountingDimensionAssignment,
-            AccountingDimension,
-            AccountingDimensionValue
-        ).join(
-            AccountingDimensionAssignment,
-            JournalEntry.id == AccountingDimensionAssignment.journal_entry_id
-        ).join(
-            AccountingDimension,
-            AccountingDimensionAssignment.dimension_id == AccountingDimension.id
-        ).join(
-            AccountingDimensionValue,
-            AccountingDimensionAssignment.dimension_value_id == AccountingDimensionValue.id
-        )
+        """Perform multi-dimensional analysis of financial data
 
-        # Apply filters
-        filter_conditions = []
+        Allocation percentages are applied and totals grouped by dimension
+        value in the database, so only aggregates are returned. When
+        ``pivot_dimension_ids`` is set the result also carries a
+        cross-dimension pivot with ROLLUP or CUBE subtotals.
+        """
+        assignment = AccountingDimensionAssignment
+        share = assignment.allocation_percentage / literal_column('100.0')
+        debit = func.sum(func.coalesce(JournalEntry.debit_amount, 0) * share)
+        credit = func.sum(func.coalesce(JournalEntry.credit_amount, 0) * share)
 
-        # Date filters
-        if filters.date_from:
-            filter_conditions.append(JournalEntry.date >= filters.date_from)
-        if filters.date_to:
-            filter_conditions.append(JournalEntry.date <= filters.date_to)
-
-        # Branch filters
-        if filters.branch_ids:
-            filter_conditions.append(JournalEntry.branch_id.in_(filters.branch_ids))
+        conditions = self._analysis_entry_conditions(filters)
 
         # Dimension value filters
         if filters.dimension_values:
-            dimension_filters = []
-            for dim_id, value_ids in filters.dimension_values.items():
-                dimension_filters.append(
-                    and_(
-                        AccountingDimensionAssignment.dimension_id == dim_id,
-                        AccountingDimensionAssignment.dimension_value_id.in_(value_ids)
-                    )
-                )
-            if dimension_filters:
-                filter_conditions.append(or_(*dimension_filters))
+            conditions.append(or_(*[
+                and_(assignment.dimension_id == dim_id,
+                     self._value_filter(filters, AccountingDimensionValue, assignment, value_ids))
+                for dim_id, value_ids in filters.dimension_values.items()
+            ]))
 
         # Active filters
         if not filters.include_inactive:
-            filter_conditions.extend([
+            conditions.extend([
                 AccountingDimension.is_active == True,
                 AccountingDimensionValue.is_active == True
             ])
 
-        if filter_conditions:
-            query = query.filter(and_(*filter_conditions))
-
-        # Execute query and process results
-        results = query.all()
+        stmt = select(
+            AccountingDimension.name,
+            AccountingDimensionValue.name,
+            debit,
+            credit,
+            func.count(),
+        ).select_from(JournalEntry).join(
+            assignment, JournalEntry.id == assignment.journal_entry_id
+        ).join(
+            AccountingDimension, assignment.dimension_id == AccountingDimension.id
+        ).join(
+            AccountingDimensionValue, assignment.dimension_value_id == AccountingDimensionValue.id
+        )
+        if filters.account_types:
+            stmt = stmt.join(AccountingCode, AccountingCode.id == JournalEntry.accounting_code_id)
+        stmt = stmt.where(*conditions).group_by(
+            AccountingDimension.id, AccountingDimension.name,
+            AccountingDimensionValue.id, AccountingDimensionValue.name
+        )
 
-        # Aggregate data by dimensions
         dimension_breakdown = {}
         totals = {'debit': 0.0, 'credit': 0.0, 'net': 0.0}
+        total_entries = 0
+
+        # Dimensions or values sharing a name are reported together
+        for dim_name, value_name, debit_total, credit_total, count in self.db.execute(stmt):
+            debit_total = float(debit_total or 0)
+            credit_total = float(credit_total or 0)
+            bucket = dimension_breakdown.setdefault(dim_name, {}).setdefault(
+                value_name, {'debit': 0.0, 'credit': 0.0, 'net': 0.0, 'count': 0}
+            )
+            bucket['debit'] += debit_total
+            bucket['credit'] += credit_total
+            bucket['net'] += debit_total - credit_total
+            bucket['count'] += count
 
-        for entry, assignment, dimension, value in results:
-            dim_name = dimension.name
-            value_name = value.name
-
-            if dim_name not in dimension_breakdown:
-                dimension_breakdown[dim_name] = {}
-
-            if value_name not in dimension_breakdown[dim_name]:
-                dimension_breakdown[dim_name][value_name] = {
-                    'debit': 0.0, 'credit': 0.0, 'net': 0.0, 'count': 0
-                }
-
-            # Calculate allocated amounts
-            debit_amount = (entry.debit_amount or 0) * (assignment.allocation_percentage / 100)
-            credit_amount = (entry.credit_amount or 0) * (assignment.allocation_percentage / 100)
-
-            dimension_breakdown[dim_name][value_name]['debit'] += float(debit_amount)
-            dimension_breakdown[dim_name][value_name]['credit'] += float(credit_amount)
-            dimension_breakdown[dim_name][value_name]['net'] += float(debit_amount - credit_amount)
-            dimension_breakdown[dim_name][value_name]['count'] += 1
+            totals['debit'] += debit_total
+            totals['credit'] += credit_total
+            totals['net'] += debit_total - credit_total
+            total_entries += count
 
-            totals['debit'] += float(debit_amount)
-            totals['credit'] += float(credit_amount)
-            totals['net'] += float(debit_amount - credit_amount)
+        pivot = None
+        if filters.pivot_dimension_ids:
+            pivot = self._pivot_by_dimensions(filters)
 
         return DimensionAnalysisResult(
             dimension_breakdown=dimension_breakdown,
             totals=totals,
+            pivot=pivot,
             metadata={
                 'filter_applied': filters.dict(),
-                'total_entries': len(results),
+                'total_entries': total_entries,
                 'analysis_date': datetime.now().isoformat()
             }
         )
 
+    def _analysis_entry_conditions(self, filters: DimensionAnalysisFilter) -> List:
+        """Journal entry filters shared by the breakdown and the pivot"""
+        conditions = []
+
+        # Date filters
+        if filters.date_from:
+            conditions.append(JournalEntry.date >= filters.date_from)
+        if filters.date_to:
+            conditions.append(JournalEntry.date <= filters.date_to)
+
+        # Branch filters
+        if filters.branch_ids:
+            conditions.append(JournalEntry.branch_id.in_(filters.branch_ids))
+
+        # Account type filters (the caller joins AccountingCode)
+        if filters.account_types:
+            conditions.append(AccountingCode.account_type.in_(filters.account_types))
+
+        return conditions
+
+    def _value_filter(self, filters: DimensionAnalysisFilter, value, assignment, value_ids: List[str]):
+        """Match the selected values, or their whole subtrees with include_descendants"""
+        if filters.include_descendants:
+            return subtree_condition(self.db, value, value_ids)
+        return assignment.dimension_value_id.in_(value_ids)
+
+    def _pivot_by_dimensions(self, filters: DimensionAnalysisFilter) -> List[Dict[str, Any]]:
+        """Cross-tabulate journal entries over several dimensions
+
+        Each pivot dimension joins its own assignment, so an entry is
+        allocated by the product of its percentages and entries missing any
+        pivot dimension are left out. PostgreSQL computes the subtotals with
+        GROUP BY ROLLUP/CUBE; other databases get the same grouping sets
+        as a UNION ALL of plain GROUP BY queries.
+
+        Returns:
+            One row per grouping: the value name for every pivot dimension
+            (None where the row is a subtotal over that dimension) plus
+            debit, credit, net and count.
+        """
+        dimension_ids = list(dict.fromkeys(filters.pivot_dimension_ids))
+        dimensions = {
+            d.id: d.name for d in self.db.query(AccountingDimension).filter(
+                AccountingDimension.id.in_(dimension_ids)
+            )
+        }
+        missing = [dim_id for dim_id in dimension_ids if dim_id not in dimensions]
+        if missing:
+            raise ValueError(f"Unknown pivot dimension(s): {', '.join(missing)}")
+
+        stmt = select().select_from(JournalEntry)
+        if filters.account_types:
+            stmt = stmt.join(AccountingCode, AccountingCode.id == JournalEntry.accounting_code_id)
+        conditions = self._analysis_entry_conditions(filters)
+        share = literal_column('1.0')
+        value_columns = []
+        for position, dim_id in enumerate(dimension_ids):
+            assignment = aliased(AccountingDimensionAssignment, name=f'pivot_assignment_{position}')
+            value = aliased(AccountingDimensionValue, name=f'pivot_value_{position}')
+            stmt = stmt.join(
+                assignment,
+                and_(assignment.journal_entry_id == JournalEntry.id, assignment.dimension_id == dim_id)
+            ).join(value, value.id == assignment.dimension_value_id)
+            if filters.dimension_values.get(dim_id):
+                conditions.append(self._value_filter(filters, value, assignment, filters.dimension_values[dim_id]))
+            if not filters.include_inactive:
+                conditions.append(value.is_active == True)
+            share = share * assignment.allocation_percentage / literal_column('100.0')
+            value_columns.append(value.name.label(f'value_{position}'))
+        stmt = stmt.where(*conditions)
+
+        measures = [
+            func.sum(func.coalesce(JournalEntry.debit_amount, 0) * share).label('debit'),
+            func.sum(func.coalesce(JournalEntry.credit_amount, 0) * share).label('credit'),
+            func.count().label('count'),
+        ]
+
+        width = len(value_columns)
+        if self.db.get_bind().dialect.name == 'postgresql':
+            grouping = func.rollup if filters.pivot_mode == PivotModeEnum.ROLLUP else func.cube
+            query = stmt.add_columns(
+                *value_columns, *measures, func.grouping(*value_columns).label('grouping_mask')
+            ).group_by(grouping(*value_columns))
+        else:
+            if filters.pivot_mode == PivotModeEnum.ROLLUP:
+                grouping_sets = [tuple(range(size)) for size in range(width, -1, -1)]
+            else:
+                grouping_sets = [
+                    tuple(i for i in range(width) if not mask & (1 << (width - 1 - i)))
+                    for mask in range(1 << width)
+                ]
+            parts = []
+            for grouped in grouping_sets:
+                # Same bit layout as GROUPING(): the first column is the high bit
+                mask = sum(1 << (width - 1 - i) for i in range(width) if i not in grouped)
+                parts.append(stmt.add_columns(
+                    *[column if i in grouped else null().label(column.name) for i, column in enumerate(value_columns)],
+                    *measures,
+                    literal_column(str(mask)).label('grouping_mask'),
+                ).group_by(*[value_columns[i] for i in grouped]))
+            query = union_all(*parts)
+
+        pivot = []
+        names = [dimensions[dim_id] for dim_id in dimension_ids]
+        for row in self.db.execute(query).mappings():
+            debit_total = float(row['debit'] or 0)
+            credit_total = float(row['credit'] or 0)
+            pivot.append({
+                'dimensions': {
+                    name: (None if row['grouping_mask'] & (1 << (width - 1 - i)) else row[f'value_{i}'])
+                    for i, name in enumerate(names)
+                },
+                'is_subtotal': bool(row['grouping_mask']),
+                'debit': debit_total,
+                'credit': credit_total,
+                'net': debit_total - credit_total,
+                'count': row['count'],
+            })
+        # Detail rows first, then subtotals from the innermost outwards
+        pivot.sort(key=lambda r: (sum(v is None for v in r['dimensions'].values()),
+                                  [v or '' for v in r['dimensions'].values()]))
+        return pivot
+
     def validate_journal_entry_dimensions(self, journal_entry_id: str) -> DimensionValidationResult:
         """Validate that journal entry has all required dimension assignments"""
         # Get all required dimensions for the branch
@@ -528,6 +642,12 @@ class AccountingDimensionService:
     # Helper methods
     def _would_create_circular_reference(self, value_id: str, new_parent_id: str) -> bool:
         """Check if setting a new parent would create a circular reference"""
+        value = self.get_dimension_value(value_id)
+        parent = self.get_dimension_value(new_parent_id)
+        if value is not None and parent is not None and value.tree_path and parent.tree_path:
+            # The new parent lies in the value's own subtree
+            return parent.tree_path.startswith(value.tree_path)
+
         current_id = new_parent_id
         visited = set()
 
@@ -541,26 +661,40 @@ class AccountingDimensionService:
 
         return False
 
+    def get_value_subtree(self, value_id: str, include_inactive: bool = False) -> List[AccountingDimensionValue]:
+        """Get a value and all of its descendants with one indexed path query"""
+        query = self.db.query(AccountingDimensionValue).filter(
+            subtree_condition(self.db, AccountingDimensionValue, [value_id])
+        )
+        if not include_inactive:
+            query = query.filter(AccountingDimensionValue.is_active == True)
+        return query.order_by(AccountingDimensionValue.tree_path).all()
+
     def get_dimension_hierarchy_tree(self, dimension_id: str) -> List[Dict[str, Any]]:
-        """Get hierarchical tree structure for a dimension"""
+        """Get hierarchical tree structure for a dimension
+
+        Children are indexed by parent once and full paths are carried down
+        from the parent, so the tree builds in linear time.
+        """
         all_values = self.get_dimension_values(dimension_id, is_active=True)
 
-        # Build hierarchy tree
-        value_map = {v.id: v for v in all_values}
-        tree = []
+        children_by_parent: Dict[Optional[str], List[AccountingDimensionValue]] = {}
+        for value in all_values:
+            children_by_parent.setdefault(value.parent_value_id, []).append(value)
 
-        def build_tree(parent_id: Optional[str] = None) -> List[Dict[str, Any]]:
-            children = [v for v in all_values if v.parent_value_id == parent_id]
+        def build_tree(parent_id: Optional[str] = None, parent_path: Optional[str] = None) -> List[Dict[str, Any]]:
+            children = children_by_parent.get(parent_id, [])
             result = []
 
             for child in sorted(children, key=lambda x: (x.display_order, x.name)):
+                full_path = f"{parent_path} > {child.name}" if parent_path else child.name
                 node = {
                     'id': child.id,
                     'code': child.code,
                     'name': child.name,
-                    'full_path': child.get_full_path(),
+                    'full_path': full_path,
                     'level': child.hierarchy_level,
-                    'children': build_tree(child.id)
+                    'children': build_tree(child.id, full_path)
                 }
                 result.append(node)
 
@@ -1,17 +1,71 @@
 """
 Aging Reports Service - IFRS Compliant
 Service for generating debtors and creditors aging reports
+
+Bucket totals are computed by the database with a CASE-based GROUP BY, so a
+summary never loads the outstanding invoices or purchases themselves.
+Per-document drill-down rows are streamed separately, page by page.
 """
 
-from typing import Dict, List, Optional
-from datetime import date
+from typing import Dict, Iterator, List, Optional
+from datetime import date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from app.models.sales import Sale, Customer, Invoice
+from sqlalchemy import case, func, or_, select
+from app.models.sales import Customer, Invoice
 from app.models.purchases import Purchase, Supplier
 from app.services.ifrs_reports_core import IFRSReportsCore
 
+AGING_BUCKETS = ('current', 'days_31_60', 'days_61_90', 'days_91_120', 'days_120_plus')
+# Inclusive upper bound in days of every bucket except the last
+BUCKET_DAY_LIMITS = (30, 60, 90, 120)
+# Labels of the creditors detail lists, keyed like AGING_BUCKETS
+CREDITOR_BUCKET_LABELS = dict(zip(AGING_BUCKETS, ('0-30', '31-60', '61-90', '91-120', '120+')))
+OUTSTANDING_INVOICE_STATUSES = ('draft', 'sent', 'partial', 'overdue')
+DRILL_DOWN_BATCH_SIZE = 500
+
+
+def aging_bucket(days_outstanding: int) -> str:
+    """Aging bucket name for a number of days outstanding"""
+    for bucket, limit in zip(AGING_BUCKETS, BUCKET_DAY_LIMITS):
+        if days_outstanding <= limit:
+            return bucket
+    return AGING_BUCKETS[-1]
+
+
+def _bucket_case(date_column, as_of_date: date):
+    """SQL CASE naming the aging bucket of each row.
+
+    Days outstanding are compared through cut-off dates computed here, which
+    keeps the expression portable across backends. Undated documents count
+    as current, as they always have.
+    """
+    cutoffs = [as_of_date - timedelta(days=limit) for limit in BUCKET_DAY_LIMITS]
+    whens = [(or_(date_column.is_(None), date_column >= cutoffs[0]), AGING_BUCKETS[0])]
+    whens += [(date_column >= cutoff, bucket) for cutoff, bucket in zip(cutoffs[1:], AGING_BUCKETS[1:])]
+    return case(*whens, else_=AGING_BUCKETS[-1])
+
+
+def _bucket_sums(bucket, amount) -> List:
+    """One SUM(CASE ...) column per aging bucket"""
+    return [
+        func.coalesce(func.sum(case((bucket == name, amount), else_=0)), 0).label(name)
+        for name in AGING_BUCKETS
+    ]
+
+
+def _invoice_outstanding():
+    # total_amount when set, otherwise the legacy total column
+    return (
+        func.coalesce(func.nullif(Invoice.total_amount, 0), Invoice.total, 0)
+        - func.coalesce(Invoice.amount_paid, 0)
+    )
+
+
+def _purchase_outstanding():
+    return Purchase.total_amount - func.coalesce(Purchase.amount_paid, 0)
+
+
 class AgingReportsService:
     """Service for generating aging reports with IFRS compliance"""
     
@@ -25,148 +79,71 @@ class AgingReportsService:
         customer_id: Optional[str] = None,
         min_amount: Decimal = None,
         currency: str = None,
-        branch_id: Optional[str] = None
+        branch_id: Optional[str] = None,
+        include_invoices: bool = False
     ) -> Dict:
         """
         Generate Debtors Aging Report
         IFRS 9: Financial Instruments - Expected Credit Losses
+
+        Args:
+            include_invoices: Embed each customer's outstanding invoices. Off by
+                default; use iter_debtor_invoices/get_debtor_invoices_page to
+                drill down instead.
         """
         if as_of_date is None:
             as_of_date = date.today()
         
-        # Initialize customer aging data
-        customer_aging = {}
-        total_outstanding = Decimal('0.00')
-        
-        # Try to get invoices, but handle gracefully if model issues exist
-        try:
-            # Include draft and other non-paid invoices as outstanding
-            query = self.db.query(Invoice).filter(
-                Invoice.status.in_(['draft', 'sent', 'partial', 'overdue'])  # Outstanding invoices including drafts
+        outstanding = _invoice_outstanding()
+        bucket = _bucket_case(Invoice.date, as_of_date)
+        total = func.sum(outstanding)
+        stmt = (
+            select(
+                Invoice.customer_id,
+                Customer.name,
+                Customer.contact_person,
+                Customer.phone,
+                Customer.email,
+                *_bucket_sums(bucket, outstanding),
+                total.label('total_outstanding'),
+                func.count(Invoice.id).label('invoice_count'),
+                func.min(Invoice.date).label('oldest_invoice_date'),
             )
-            # Filter by branch if provided
-            if branch_id:
-                query = query.filter(Invoice.branch_id == branch_id)
-            
-            if customer_id:
-                query = query.filter(Invoice.customer_id == customer_id)
-                
-            outstanding_invoices = query.all()
-            
-            for invoice in outstanding_invoices:
-                try:
-                    # Use total_amount if set, otherwise fall back to total
-                    invoice_amount = invoice.total_amount or invoice.total
-                    outstanding_amount = invoice_amount - (invoice.amount_paid or Decimal('0.00'))
-                    
-                    if outstanding_amount <= 0:  # Skip fully paid
-                        continue
-                        
-                    if min_amount and outstanding_amount < min_amount:
-                        continue
-                        
-                    days_outstanding = (as_of_date - invoice.date).days if invoice.date else 0
-                    
-                    # Initialize customer if not exists
-                    customer_key = invoice.customer_id
-                    if customer_key not in customer_aging:
-                        customer_aging[customer_key] = {
-                            'customer_id': invoice.customer_id,
-                            'customer_name': invoice.customer.name if invoice.customer else 'Unknown Customer',
-                            'customer_code': getattr(invoice.customer, 'code', '') if invoice.customer else '',
-                            'contact_person': getattr(invoice.customer, 'contact_person', '') if invoice.customer else '',
-                            'phone': getattr(invoice.customer, 'phone', '') if invoice.customer else '',
-                            'email': getattr(invoice.customer, 'email', '') if invoice.customer else '',
-                            'current': Decimal('0.00'),
-                            'days_31_60': Decimal('0.00'),
-                            'days_61_90': Decimal('0.00'),
-                            'days_91_120': Decimal('0.00'),
-                            'days_120_plus': Decimal('0.00'),
-                            'total_outstanding': Decimal('0.00'),
-                            'invoice_count': 0,
-                            'oldest_invoice_date': invoice.date,
-                            'invoices': []
-                        }
-                    
-                    # Add to appropriate aging bucket
-                    if days_outstanding <= 30:
-                        customer_aging[customer_key]['current'] += outstanding_amount
-                    elif days_outstanding <= 60:
-                        customer_aging[customer_key]['days_31_60'] += outstanding_amount
-                    elif days_outstanding <= 90:
-                        customer_aging[customer_key]['days_61_90'] += outstanding_amount
-                    elif days_outstanding <= 120:
-                        customer_aging[customer_key]['days_91_120'] += outstanding_amount
-                    else:
-                        customer_aging[customer_key]['days_120_plus'] += outstanding_amount
-                    
-                    # Update customer totals
-                    customer_aging[customer_key]['total_outstanding'] += outstanding_amount
-                    customer_aging[customer_key]['invoice_count'] += 1
-                    
-                    # Track oldest invoice for credit assessment
-                    if invoice.date and (not customer_aging[customer_key]['oldest_invoice_date'] or 
-                                       invoice.date < customer_aging[customer_key]['oldest_invoice_date']):
-                        customer_aging[customer_key]['oldest_invoice_date'] = invoice.date
-                    
-                    # Add invoice details for drill-down
-                    customer_aging[customer_key]['invoices'].append({
-                        'invoice_id': invoice.id,
-                        'invoice_number': invoice.invoice_number or f"INV-{invoice.id[:8]}",
-                        'invoice_date': invoice.date,
-                        'due_date': invoice.due_date or invoice.date,
-                        'total_amount': float(invoice.total_amount),
-                        'amount_paid': float(invoice.amount_paid or 0),
-                        'outstanding_amount': float(outstanding_amount),
-                        'days_outstanding': days_outstanding,
-                        'status': invoice.status
-                    })
-                    
-                    total_outstanding += outstanding_amount
-                    
-                except Exception as e:
-                    # Skip problematic records
-                    continue
-                    
-        except Exception:
-            # If there are no invoices or model issues, return empty structure
-            pass
+            .select_from(Invoice)
+            .outerjoin(Customer, Customer.id == Invoice.customer_id)
+            .where(*self._invoice_filters(outstanding, customer_id, min_amount, branch_id))
+            .group_by(Invoice.customer_id, Customer.name, Customer.contact_person, Customer.phone, Customer.email)
+            .order_by(total.desc())
+        )
         
-        # Convert to list and format for frontend
         debtors_list = []
-        for customer_data in customer_aging.values():
-            # Convert Decimal to float for JSON serialization
+        for row in self.db.execute(stmt):
             debtor_record = {
-                'customer_id': customer_data['customer_id'],
-                'customer_name': customer_data['customer_name'],
-                'customer_code': customer_data['customer_code'],
-                'contact_person': customer_data['contact_person'],
-                'phone': customer_data['phone'],
-                'email': customer_data['email'],
-                'current': float(customer_data['current']),
-                'days_31_60': float(customer_data['days_31_60']),
-                'days_61_90': float(customer_data['days_61_90']),
-                'days_91_120': float(customer_data['days_91_120']),
-                'days_120_plus': float(customer_data['days_120_plus']),
-                'total_outstanding': float(customer_data['total_outstanding']),
-                'invoice_count': customer_data['invoice_count'],
-                'oldest_invoice_date': customer_data['oldest_invoice_date'],
-                'invoices': customer_data['invoices']
+                'customer_id': row.customer_id,
+                'customer_name': row.name or 'Unknown Customer',
+                'customer_code': '',
+                'contact_person': row.contact_person or '',
+                'phone': row.phone or '',
+                'email': row.email or '',
             }
+            debtor_record.update({name: float(getattr(row, name) or 0) for name in AGING_BUCKETS})
+            debtor_record.update({
+                'total_outstanding': float(row.total_outstanding or 0),
+                'invoice_count': row.invoice_count,
+                'oldest_invoice_date': row.oldest_invoice_date,
+            })
             debtors_list.append(debtor_record)
         
-        # Sort by total outstanding (highest first)
-        debtors_list.sort(key=lambda x: x['total_outstanding'], reverse=True)
+        if include_invoices:
+            by_customer = {d['customer_id']: d for d in debtors_list}
+            for d in debtors_list:
+                d['invoices'] = []
+            for invoice in self.iter_debtor_invoices(as_of_date, customer_id, min_amount, branch_id):
+                by_customer[invoice['customer_id']]['invoices'].append(invoice)
         
-        # Calculate bucket totals
-        summary_totals = {
-            'current': sum(d['current'] for d in debtors_list),
-            'days_31_60': sum(d['days_31_60'] for d in debtors_list),
-            'days_61_90': sum(d['days_61_90'] for d in debtors_list),
-            'days_91_120': sum(d['days_91_120'] for d in debtors_list),
-            'days_120_plus': sum(d['days_120_plus'] for d in debtors_list),
-            'total': float(total_outstanding)
-        }
+        total_outstanding = sum(d['total_outstanding'] for d in debtors_list)
+        summary_totals = {name: sum(d[name] for d in debtors_list) for name in AGING_BUCKETS}
+        summary_totals['total'] = total_outstanding
         
         # IFRS 9 Expected Credit Loss calculation
         ecl_provision = self._calculate_expected_credit_loss(debtors_list)
@@ -175,7 +152,7 @@ class AgingReportsService:
             'as_of_date': as_of_date,
             'debtors': debtors_list,
             'summary': summary_totals,
-            'total_outstanding': float(total_outstanding),
+            'total_outstanding': total_outstanding,
             'customer_count': len(debtors_list),
             'expected_credit_loss': ecl_provision,
             'ifrs_compliance': {
@@ -186,196 +163,271 @@ class AgingReportsService:
             }
         }
     
+    def iter_debtor_invoices(
+        self,
+        as_of_date: date = None,
+        customer_id: Optional[str] = None,
+        min_amount: Decimal = None,
+        branch_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterator[Dict]:
+        """
+        Stream outstanding invoices for debtors drill-down
+
+        Rows are fetched in batches of DRILL_DOWN_BATCH_SIZE and are never
+        loaded as ORM objects.
+
+        Args:
+            limit: Maximum number of invoices, for paged access
+            offset: Number of invoices to skip, for paged access
+
+        Returns:
+            Iterator of invoice dicts, oldest first
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        outstanding = _invoice_outstanding()
+        stmt = (
+            select(
+                Invoice.id,
+                Invoice.customer_id,
+                Invoice.invoice_number,
+                Invoice.date,
+                Invoice.due_date,
+                Invoice.total_amount,
+                Invoice.amount_paid,
+                outstanding.label('outstanding_amount'),
+                Invoice.status,
+            )
+            .where(*self._invoice_filters(outstanding, customer_id, min_amount, branch_id))
+            .order_by(Invoice.date, Invoice.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit).offset(offset)
+        
+        result = self.db.execute(stmt, execution_options={'yield_per': DRILL_DOWN_BATCH_SIZE})
+        for row in result:
+            days_outstanding = (as_of_date - row.date).days if row.date else 0
+            yield {
+                'invoice_id': row.id,
+                'customer_id': row.customer_id,
+                'invoice_number': row.invoice_number or f"INV-{row.id[:8]}",
+                'invoice_date': row.date,
+                'due_date': row.due_date or row.date,
+                'total_amount': float(row.total_amount or 0),
+                'amount_paid': float(row.amount_paid or 0),
+                'outstanding_amount': float(row.outstanding_amount),
+                'days_outstanding': days_outstanding,
+                'aging_bucket': aging_bucket(days_outstanding),
+                'status': row.status
+            }
+    
+    def get_debtor_invoices_page(
+        self,
+        customer_id: str,
+        as_of_date: date = None,
+        branch_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Dict:
+        """One page of a customer's outstanding invoices"""
+        invoices = list(self.iter_debtor_invoices(
+            as_of_date, customer_id=customer_id, branch_id=branch_id, limit=limit + 1, offset=offset
+        ))
+        return {
+            'customer_id': customer_id,
+            'as_of_date': as_of_date or date.today(),
+            'invoices': invoices[:limit],
+            'limit': limit,
+            'offset': offset,
+            'has_more': len(invoices) > limit
+        }
+    
     def generate_creditors_aging(
         self,
         as_of_date: date = None,
         supplier_id: Optional[str] = None,
         min_amount: Decimal = None,
         currency: str = None,
-        branch_id: Optional[str] = None
+        branch_id: Optional[str] = None,
+        include_details: bool = False
     ) -> Dict:
         """
         Generate Creditors Aging Report
         IAS 1: Presentation of Financial Statements
+
+        Args:
+            include_details: Fill the per-bucket purchase lists in
+                'aging_buckets'. Off by default; use iter_creditor_purchases/
+                get_creditor_purchases_page to drill down instead.
         """
         if as_of_date is None:
             as_of_date = date.today()
-            
-        # Get outstanding purchases - those with unpaid balances
-        try:
-            query = self.db.query(Purchase).filter(
-                and_(
-                    Purchase.purchase_date <= as_of_date,
-                    or_(
-                        Purchase.amount_paid == None,
-                        Purchase.amount_paid < Purchase.total_amount
-                    )
-                )
-            ).limit(100)
-            # Filter by branch if provided
-            if branch_id:
-                query = query.filter(Purchase.branch_id == branch_id)
-        except Exception as e:
-            # If there are issues, return empty structure
-            return self._get_empty_creditors_aging_structure(as_of_date)
-        
-        if supplier_id:
-            query = query.filter(Purchase.supplier_id == supplier_id)
-            
-        if currency:
-            # Skip currency filter for now 
-            pass
-            
-        outstanding_purchases = query.all()
         
-        aging_buckets = {
-            '0-30': [],
-            '31-60': [],
-            '61-90': [],
-            '91-120': [],
-            '120+': []
-        }
-        
-        total_outstanding = Decimal('0.00')
-        
-        for purchase in outstanding_purchases:
-            try:
-                outstanding_amount = purchase.total_amount - (purchase.amount_paid or Decimal('0.00'))
-                
-                if min_amount and outstanding_amount < min_amount:
-                    continue
-                    
-                days_outstanding = (as_of_date - purchase.purchase_date).days if purchase.purchase_date else 0
-                
-                aging_item = {
-                    'supplier_id': purchase.supplier_id,
-                    'supplier_name': purchase.supplier.name if purchase.supplier else 'Unknown',
-                    'purchase_id': purchase.id,
-                    'invoice_number': getattr(purchase, 'reference', f'PUR-{purchase.id[:8]}'),
-                    'purchase_date': purchase.purchase_date,
-                    'due_date': purchase.due_date,
-                    'total_amount': float(purchase.total_amount),
-                    'amount_paid': float(purchase.amount_paid or 0),
-                    'outstanding_amount': float(outstanding_amount),
-                    'days_outstanding': days_outstanding,
-                    'currency': 'BWP',  # Default currency
-                    'status': purchase.status
-                }
-            except Exception as e:
-                # Skip problematic records
-                continue
-            
-            total_outstanding += outstanding_amount
-            
-            # Categorize by aging bucket
-            if days_outstanding <= 30:
-                aging_buckets['0-30'].append(aging_item)
-            elif days_outstanding <= 60:
-                aging_buckets['31-60'].append(aging_item)
-            elif days_outstanding <= 90:
-                aging_buckets['61-90'].append(aging_item)
-            elif days_outstanding <= 120:
-                aging_buckets['91-120'].append(aging_item)
-            else:
-                aging_buckets['120+'].append(aging_item)
-        
-        # Calculate bucket totals
-        bucket_totals = {}
-        for bucket, items in aging_buckets.items():
-            bucket_totals[bucket] = sum(item['outstanding_amount'] for item in items)
-        
-        # Group by supplier for frontend display
-        supplier_aging = {}
-        suppliers_cache = {}  # Cache supplier objects
-        
-        for bucket_name, items in aging_buckets.items():
-            for item in items:
-                supplier_id = item['supplier_id']
-                if supplier_id not in supplier_aging:
-                    # Get supplier details if not cached
-                    if supplier_id not in suppliers_cache:
-                        supplier = self.db.query(Supplier).filter(Supplier.id == supplier_id).first()
-                        suppliers_cache[supplier_id] = supplier
-                    else:
-                        supplier = suppliers_cache[supplier_id]
-                    
-                    supplier_aging[supplier_id] = {
-                        'supplier_id': supplier_id,
-                        'supplier_name': item['supplier_name'],
-                        'contact_person': supplier.contact_person if supplier else '',
-                        'phone': supplier.telephone if supplier else '',
-                        'email': supplier.email if supplier else '',
-                        'current': 0.0,
-                        'days_31_60': 0.0,
-                        'days_61_90': 0.0,
-                        'days_91_120': 0.0,
-                        'days_120_plus': 0.0,
-                        'total_payable': 0.0
-                    }
-                
-                # Add to appropriate aging bucket
-                amount = item['outstanding_amount']
-                if bucket_name == '0-30':
-                    supplier_aging[supplier_id]['current'] += amount
-                elif bucket_name == '31-60':
-                    supplier_aging[supplier_id]['days_31_60'] += amount
-                elif bucket_name == '61-90':
-                    supplier_aging[supplier_id]['days_61_90'] += amount
-                elif bucket_name == '91-120':
-                    supplier_aging[supplier_id]['days_91_120'] += amount
-                else:  # 120+
-                    supplier_aging[supplier_id]['days_120_plus'] += amount
-                
-                supplier_aging[supplier_id]['total_payable'] += amount
-        
-        # Convert to list for frontend
-        creditors_list = list(supplier_aging.values())
+        outstanding = _purchase_outstanding()
+        bucket = _bucket_case(Purchase.purchase_date, as_of_date)
+        total = func.sum(outstanding)
+        stmt = (
+            select(
+                Purchase.supplier_id,
+                Supplier.name,
+                Supplier.contact_person,
+                Supplier.telephone,
+                Supplier.email,
+                *_bucket_sums(bucket, outstanding),
+                total.label('total_payable'),
+            )
+            .select_from(Purchase)
+            .outerjoin(Supplier, Supplier.id == Purchase.supplier_id)
+            .where(*self._purchase_filters(outstanding, as_of_date, supplier_id, min_amount, branch_id))
+            .group_by(Purchase.supplier_id, Supplier.name, Supplier.contact_person, Supplier.telephone, Supplier.email)
+            .order_by(total.desc())
+        )
+        
+        creditors_list = []
+        for row in self.db.execute(stmt):
+            creditor = {
+                'supplier_id': row.supplier_id,
+                'supplier_name': row.name or 'Unknown',
+                'contact_person': row.contact_person or '',
+                'phone': row.telephone or '',
+                'email': row.email or '',
+            }
+            creditor.update({name: float(getattr(row, name) or 0) for name in AGING_BUCKETS})
+            creditor['total_payable'] = float(row.total_payable or 0)
+            creditors_list.append(creditor)
+        
+        aging_buckets = {label: [] for label in CREDITOR_BUCKET_LABELS.values()}
+        if include_details:
+            for item in self.iter_creditor_purchases(as_of_date, supplier_id, min_amount, branch_id):
+                aging_buckets[CREDITOR_BUCKET_LABELS[item['aging_bucket']]].append(item)
+        
+        summary = {name: sum(c[name] for c in creditors_list) for name in AGING_BUCKETS}
+        total_outstanding = sum(c['total_payable'] for c in creditors_list)
+        summary['total'] = total_outstanding
+        bucket_totals = {CREDITOR_BUCKET_LABELS[name]: summary[name] for name in AGING_BUCKETS}
             
         return {
             'as_of_date': as_of_date,
-            'total_outstanding': float(total_outstanding),
+            'total_outstanding': total_outstanding,
             'aging_buckets': aging_buckets,
             'bucket_totals': bucket_totals,
             'creditors': creditors_list,  # Frontend expects supplier-aggregated data
-            'summary': {
-                'current': float(bucket_totals.get('0-30', Decimal('0.00'))),
-                'days_31_60': float(bucket_totals.get('31-60', Decimal('0.00'))),
-                'days_61_90': float(bucket_totals.get('61-90', Decimal('0.00'))),
-                'days_91_120': float(bucket_totals.get('91-120', Decimal('0.00'))),
-                'days_120_plus': float(bucket_totals.get('120+', Decimal('0.00'))),
-                'total': float(total_outstanding)
-            },
+            'summary': summary,
             'ifrs_compliance': {
                 'standard': 'IAS 1 - Presentation of Financial Statements',
                 'note': 'Creditors aging for liquidity management and cash flow planning'
             }
         }
     
+    def iter_creditor_purchases(
+        self,
+        as_of_date: date = None,
+        supplier_id: Optional[str] = None,
+        min_amount: Decimal = None,
+        branch_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterator[Dict]:
+        """
+        Stream outstanding purchases for creditors drill-down
+
+        Args:
+            limit: Maximum number of purchases, for paged access
+            offset: Number of purchases to skip, for paged access
+
+        Returns:
+            Iterator of purchase dicts, oldest first
+        """
+        if as_of_date is None:
+            as_of_date = date.today()
+        outstanding = _purchase_outstanding()
+        stmt = (
+            select(
+                Purchase.id,
+                Purchase.supplier_id,
+                Supplier.name.label('supplier_name'),
+                Purchase.reference,
+                Purchase.purchase_date,
+                Purchase.due_date,
+                Purchase.total_amount,
+                Purchase.amount_paid,
+                outstanding.label('outstanding_amount'),
+                Purchase.status,
+            )
+            .select_from(Purchase)
+            .outerjoin(Supplier, Supplier.id == Purchase.supplier_id)
+            .where(*self._purchase_filters(outstanding, as_of_date, supplier_id, min_amount, branch_id))
+            .order_by(Purchase.purchase_date, Purchase.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit).offset(offset)
+        
+        result = self.db.execute(stmt, execution_options={'yield_per': DRILL_DOWN_BATCH_SIZE})
+        for row in result:
+            days_outstanding = (as_of_date - row.purchase_date).days if row.purchase_date else 0
+            yield {
+                'supplier_id': row.supplier_id,
+                'supplier_name': row.supplier_name or 'Unknown',
+                'purchase_id': row.id,
+                'invoice_number': row.reference or f'PUR-{row.id[:8]}',
+                'purchase_date': row.purchase_date,
+                'due_date': row.due_date,
+                'total_amount': float(row.total_amount or 0),
+                'amount_paid': float(row.amount_paid or 0),
+                'outstanding_amount': float(row.outstanding_amount),
+                'days_outstanding': days_outstanding,
+                'aging_bucket': aging_bucket(days_outstanding),
+                'currency': 'BWP',  # Default currency
+                'status': row.status
+            }
+    
+    def get_creditor_purchases_page(
+        self,
+        supplier_id: str,
+        as_of_date: date = None,
+        branch_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Dict:
+        """One page of a supplier's outstanding purchases"""
+        purchases = list(self.iter_creditor_purchases(
+            as_of_date, supplier_id=supplier_id, branch_id=branch_id, limit=limit + 1, offset=offset
+        ))
+        return {
+            'supplier_id': supplier_id,
+            'as_of_date': as_of_date or date.today(),
+            'purchases': purchases[:limit],
+            'limit': limit,
+            'offset': offset,
+            'has_more': len(purchases) > limit
+        }
+    
     def get_customer_aging_summary(self, as_of_date: date = None) -> Dict:
         """Get summary of customer aging by customer"""
         
         if as_of_date is None:
             as_of_date = date.today()
             
-        customers = self.db.query(Customer).all()
+        aging = self.generate_debtors_aging(as_of_date=as_of_date)
+        credit_limits = dict(self.db.execute(select(Customer.id, Customer.credit_limit)).all())
         customer_summaries = []
         
-        for customer in customers:
-            aging_data = self.generate_debtors_aging(
-                as_of_date=as_of_date,
-                customer_id=customer.id
-            )
-            
-            if aging_data['total_outstanding'] > 0:
-                customer_summaries.append({
-                    'customer_id': customer.id,
-                    'customer_name': customer.name,
-                    'total_outstanding': aging_data['total_outstanding'],
-                    'aging_summary': aging_data['summary'],
-                    'credit_limit': customer.credit_limit,
-                    'credit_available': customer.credit_limit - aging_data['total_outstanding'] if customer.credit_limit else None,
-                    'risk_rating': self._calculate_risk_rating(aging_data)
-                })
+        for debtor in aging['debtors']:
+            if debtor['customer_id'] not in credit_limits or debtor['total_outstanding'] <= 0:
+                continue
+            credit_limit = credit_limits[debtor['customer_id']]
+            aging_data = self._party_aging(debtor, debtor['total_outstanding'])
+            customer_summaries.append({
+                'customer_id': debtor['customer_id'],
+                'customer_name': debtor['customer_name'],
+                'total_outstanding': aging_data['total_outstanding'],
+                'aging_summary': aging_data['summary'],
+                'credit_limit': credit_limit,
+                'credit_available': float(credit_limit) - aging_data['total_outstanding'] if credit_limit else None,
+                'risk_rating': self._calculate_risk_rating(aging_data)
+            })
         
         return {
             'as_of_date': as_of_date,
@@ -390,24 +442,22 @@ class AgingReportsService:
         if as_of_date is None:
             as_of_date = date.today()
             
-        suppliers = self.db.query(Supplier).all()
+        aging = self.generate_creditors_aging(as_of_date=as_of_date)
+        payment_terms = dict(self.db.execute(select(Supplier.id, Supplier.payment_terms)).all())
         supplier_summaries = []
         
-        for supplier in suppliers:
-            aging_data = self.generate_creditors_aging(
-                as_of_date=as_of_date,
-                supplier_id=supplier.id
-            )
-            
-            if aging_data['total_outstanding'] > 0:
-                supplier_summaries.append({
-                    'supplier_id': supplier.id,
-                    'supplier_name': supplier.name,
-                    'total_outstanding': aging_data['total_outstanding'],
-                    'aging_summary': aging_data['summary'],
-                    'payment_terms': supplier.payment_terms,
-                    'priority_rating': self._calculate_payment_priority(aging_data)
-                })
+        for creditor in aging['creditors']:
+            if creditor['supplier_id'] not in payment_terms or creditor['total_payable'] <= 0:
+                continue
+            aging_data = self._party_aging(creditor, creditor['total_payable'])
+            supplier_summaries.append({
+                'supplier_id': creditor['supplier_id'],
+                'supplier_name': creditor['supplier_name'],
+                'total_outstanding': aging_data['total_outstanding'],
+                'aging_summary': aging_data['summary'],
+                'payment_terms': payment_terms[creditor['supplier_id']],
+                'priority_rating': self._calculate_payment_priority(aging_data)
+            })
         
         return {
             'as_of_date': as_of_date,
@@ -416,6 +466,35 @@ class AgingReportsService:
             'total_outstanding': sum(s['total_outstanding'] for s in supplier_summaries)
         }
     
+    def _invoice_filters(self, outstanding, customer_id, min_amount, branch_id) -> List:
+        """WHERE clauses selecting outstanding invoices"""
+        # Draft and other non-paid invoices count as outstanding
+        filters = [Invoice.status.in_(OUTSTANDING_INVOICE_STATUSES), outstanding > 0]
+        if branch_id:
+            filters.append(Invoice.branch_id == branch_id)
+        if customer_id:
+            filters.append(Invoice.customer_id == customer_id)
+        if min_amount:
+            filters.append(outstanding >= min_amount)
+        return filters
+    
+    def _purchase_filters(self, outstanding, as_of_date, supplier_id, min_amount, branch_id) -> List:
+        """WHERE clauses selecting purchases with unpaid balances"""
+        filters = [Purchase.purchase_date <= as_of_date, outstanding > 0]
+        if branch_id:
+            filters.append(Purchase.branch_id == branch_id)
+        if supplier_id:
+            filters.append(Purchase.supplier_id == supplier_id)
+        if min_amount:
+            filters.append(outstanding >= min_amount)
+        return filters
+    
+    def _party_aging(self, record: Dict, total: float) -> Dict:
+        """Per-customer/supplier aging in the shape the rating helpers expect"""
+        summary = {name: record[name] for name in AGING_BUCKETS}
+        summary['total'] = total
+        return {'total_outstanding': total, 'summary': summary}
+    
     def _calculate_risk_rating(self, aging_data: Dict) -> str:
         """Calculate customer risk rating based on aging"""
         
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import AppSettingsSnapshot, get_app_settings
 from typing import Dict, Any, Optional
 import json
 
@@ -12,10 +13,14 @@ class AppSettingService:
         self._settings = None
     
     def get_settings(self) -> AppSetting:
-        """Get the application settings singleton"""
+        """Get the application settings singleton (ORM row, for updates)"""
         if not self._settings:
             self._settings = AppSetting.get_instance(self.db)
         return self._settings
+
+    def get_snapshot(self) -> AppSettingsSnapshot:
+        """Get the cached, read-only settings snapshot (no query once loaded)"""
+        return get_app_settings(self.db)
     
     def update_settings(self, settings_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update application settings"""
@@ -42,6 +47,8 @@ class AppSettingService:
                 meta_payload["quotation_settings"] = quotation_payload
                 settings.meta_data = json.dumps(meta_payload)
 
+        # Committing a change to the settings row invalidates the cached snapshot in
+        # this process and, via Redis pub/sub, in other workers (see app_settings_cache)
         self.db.commit()
         self.db.refresh(settings)
 
@@ -49,7 +56,7 @@ class AppSettingService:
     
     def get_currency_settings(self) -> Dict[str, Any]:
         """Get currency-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "currency": settings.currency,
             "currency_symbol": self.get_currency_symbol(settings.currency),
@@ -80,14 +87,14 @@ class AppSettingService:
     def format_currency(self, amount: float, currency_code: Optional[str] = None) -> str:
         """Format amount with currency symbol"""
         if currency_code is None:
-            currency_code = self.get_settings().currency
+            currency_code = self.get_snapshot().currency
         
         symbol = self.get_currency_symbol(currency_code)
         return f"{symbol}{amount:,.2f}"
     
     def get_theme_settings(self) -> Dict[str, Any]:
         """Get theme-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "theme_mode": settings.theme_mode,
             "primary_color": settings.primary_color,
@@ -99,7 +106,7 @@ class AppSettingService:
     
     def get_business_settings(self) -> Dict[str, Any]:
         """Get business-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "company_name": settings.company_name,
             "app_name": settings.app_name,
@@ -122,7 +129,7 @@ class AppSettingService:
 
     def get_quotation_settings(self) -> Dict[str, Any]:
         """Get quotation-specific settings stored in meta_data"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         quotation_cfg = getattr(settings, "quotation_settings", None)
         if not isinstance(quotation_cfg, dict):
             defaults = getattr(settings, "quotation_settings_defaults", None)
@@ -141,7 +148,7 @@ class AppSettingService:
     
     def get_inventory_settings(self) -> Dict[str, Any]:
         """Get inventory-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "low_stock_threshold": settings.low_stock_threshold,
             "auto_reorder": settings.auto_reorder,
@@ -154,7 +161,7 @@ class AppSettingService:
     
     def get_sales_settings(self) -> Dict[str, Any]:
         """Get sales-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "allow_credit_sales": settings.allow_credit_sales,
             "require_customer_for_sales": settings.require_customer_for_sales,
@@ -165,7 +172,7 @@ class AppSettingService:
     
     def get_purchase_settings(self) -> Dict[str, Any]:
         """Get purchase-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "allow_credit_purchases": settings.allow_credit_purchases,
             "require_supplier_for_purchases": settings.require_supplier_for_purchases,
@@ -176,7 +183,7 @@ class AppSettingService:
     
     def get_vat_settings(self) -> Dict[str, Any]:
         """Get VAT-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "vat_rate": settings.vat_rate,
             "default_vat_rate": settings.default_vat_rate,
@@ -187,7 +194,7 @@ class AppSettingService:
     
     def get_security_settings(self) -> Dict[str, Any]:
         """Get security-related settings"""
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         return {
             "password_min_length": settings.password_min_length,
             "require_special_chars": settings.require_special_chars,
@@ -202,7 +209,7 @@ class AppSettingService:
     def get_all_settings(self) -> Dict[str, Any]:
         """Get all application settings with graceful error handling"""
         try:
-            settings = self.get_settings()
+            settings = self.get_snapshot()
             return {
                 "general": {
                     "app_name": getattr(settings, 'app_name', 'CNPERP ERP System'),
@@ -362,7 +369,7 @@ class AppSettingService:
 
     # POS-specific helpers
     def get_branch_default_card_bank_account(self, branch_id: str) -> Optional[str]:
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         try:
             meta = json.loads(settings.meta_data) if settings.meta_data else {}
         except json.JSONDecodeError:
@@ -412,7 +419,7 @@ class AppSettingService:
 
     # Global POS defaults
     def get_global_default_card_bank_account(self) -> Optional[str]:
-        settings = self.get_settings()
+        settings = self.get_snapshot()
         try:
             meta = json.loads(settings.meta_data) if settings.meta_data else {}
         except json.JSONDecodeError:
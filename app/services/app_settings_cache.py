@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import types
+import uuid
+from datetime import datetime
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import REDIS_RETRY_SECONDS, get_redis
+from app.core.database import SessionLocal
+from app.models.app_setting import AppSetting
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cnperp:app_settings:invalidate"
+
+
+class AppSettingsSnapshot:
+    """Immutable, process-wide view of the AppSetting singleton row.
+
+    Column values are copied out of the ORM row once, so the snapshot can be shared
+    across threads and sessions. Attribute access mirrors ``AppSetting`` (columns and
+    read-only properties such as ``quotation_settings``); assignment raises.
+    """
+
+    __slots__ = ("_values", "loaded_at")
+
+    id: Optional[str]
+    app_name: Optional[str]
+    company_name: Optional[str]
+    currency: Optional[str]
+    vat_rate: Optional[float]
+    default_vat_rate: Optional[float]
+    country: Optional[str]
+    locale: Optional[str]
+    timezone: Optional[str]
+    default_receipt_format: Optional[str]
+    meta_data: Optional[str]
+
+    def __init__(self, values: Mapping[str, Any], loaded_at: Optional[datetime] = None):
+        object.__setattr__(self, "_values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "loaded_at", loaded_at or datetime.utcnow())
+
+    @classmethod
+    def from_model(cls, instance: AppSetting) -> "AppSettingsSnapshot":
+        return cls({column.name: getattr(instance, column.name) for column in AppSetting.__table__.columns})
+
+    def __getattr__(self, name: str) -> Any:
+        values = object.__getattribute__(self, "_values")
+        if name in values:
+            return values[name]
+        attr = AppSetting.__dict__.get(name)
+        if isinstance(attr, property):
+            return attr.fget(self)
+        if isinstance(attr, types.FunctionType):
+            return types.MethodType(attr, self)
+        if isinstance(attr, (classmethod, staticmethod)):
+            return getattr(AppSetting, name)
+        raise AttributeError(f"AppSettingsSnapshot has no attribute '{name}'")
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("AppSettingsSnapshot is read-only; update settings through AppSettingService")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(object.__getattribute__(self, "_values"))
+
+
+class AppSettingsCache:
+    """Process-wide cache of the AppSetting singleton.
+
+    Readers get an ``AppSettingsSnapshot`` without touching the database once the
+    snapshot is loaded. ``invalidate`` drops the snapshot locally and, when Redis is
+    available, publishes on ``INVALIDATION_CHANNEL`` so other workers drop theirs.
+    A long safety TTL bounds staleness if a notification is missed.
+    """
+
+    _instance: Optional["AppSettingsCache"] = None
+    _instance_lock: Lock = Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, ttl_seconds: int = 300):
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self._ttl = ttl_seconds
+        self._snapshot: Optional[AppSettingsSnapshot] = None
+        self._expires_at = 0.0
+        self._version = 0
+        self._cache_lock: Lock = Lock()
+        self._origin = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._listener: Optional[threading.Thread] = None
+        self._listener_retry_at = 0.0
+
+    def get(self, db: Optional[Session] = None) -> AppSettingsSnapshot:
+        """Return the current settings snapshot, loading it on first use or after invalidation
+
+        The snapshot is always loaded in a session of its own: it is shared by the whole
+        process, so it must not see the caller's pending (possibly rolled back) changes.
+        db is accepted for callers that pass their session and is not used.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._expires_at:
+            return snapshot
+
+        self._ensure_listener()
+        with self._cache_lock:
+            version = self._version
+        snapshot = self._load()
+        with self._cache_lock:
+            # Only publish if no invalidation happened while we were loading
+            if snapshot is not None and version == self._version:
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self._ttl
+        return snapshot if snapshot is not None else self._defaults()
+
+    def invalidate(self, broadcast: bool = True):
+        """Drop the cached snapshot (and tell other workers to do the same)"""
+        with self._cache_lock:
+            self._snapshot = None
+            self._expires_at = 0.0
+            self._version += 1
+        if broadcast:
+            client = get_redis()
+            if client is not None:
+                try:
+                    client.publish(INVALIDATION_CHANNEL, self._origin)
+                except Exception as exc:
+                    logger.warning("App settings invalidation broadcast failed: %s", exc)
+
+    # ---------------------------------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------------------------------
+    def _load(self) -> Optional[AppSettingsSnapshot]:
+        session = SessionLocal()
+        try:
+            instance = session.query(AppSetting).first()
+            return AppSettingsSnapshot.from_model(instance) if instance else None
+        except Exception as exc:
+            logger.warning("Loading app settings failed: %s", exc)
+            return None
+        finally:
+            session.close()
+
+    @staticmethod
+    def _defaults() -> AppSettingsSnapshot:
+        """Snapshot of column defaults, used (uncached) until the singleton row exists"""
+        values = {}
+        for column in AppSetting.__table__.columns:
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            values[column.name] = default
+        return AppSettingsSnapshot(values)
+
+    def _ensure_listener(self):
+        if self._listener is not None or time.monotonic() < self._listener_retry_at:
+            return
+        with self._cache_lock:
+            if self._listener is not None or time.monotonic() < self._listener_retry_at:
+                return
+            client = get_redis()
+            if client is None:
+                # Try again on a later miss, but not on every one while Redis is down
+                self._listener_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+                return
+            self._listener = threading.Thread(target=self._listen, args=(client,),
+                                              name="app-settings-invalidation", daemon=True)
+            self._listener.start()
+
+    def _listen(self, client):
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    origin = message.get("data")
+                    if isinstance(origin, bytes):
+                        origin = origin.decode("utf-8", "ignore")
+                    if origin != self._origin:
+                        self.invalidate(broadcast=False)
+            except Exception as exc:
+                logger.warning("App settings invalidation listener error: %s", exc)
+                # The snapshot may have missed a change while disconnected
+                self.invalidate(broadcast=False)
+                time.sleep(5)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_app_setting_changes(session, flush_context):
+    """Flag sessions that wrote the settings row so every write path invalidates on commit"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, AppSetting):
+            session.info["app_settings_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("app_settings_changed", False):
+        invalidate_app_settings()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidation(session):
+    session.info.pop("app_settings_changed", None)
+
+
+def get_app_settings(db: Optional[Session] = None) -> AppSettingsSnapshot:
+    """Cached AppSetting snapshot; no query once loaded"""
+    return AppSettingsCache().get(db)
+
+
+def invalidate_app_settings(broadcast: bool = True):
+    AppSettingsCache().invalidate(broadcast=broadcast)
@@ -0,0 +1,480 @@
+"""
+Billing Run Service
+
+Bulk recurring billing behind BillingService.generate_all_due_invoices. A run
+
+- finds the due billing cycles (active, started, not ended and not yet billed for
+  the billing period containing the reference date) with two queries;
+- bills them chunk by chunk, billing_run_chunk_size cycles per transaction: each
+  chunk's items, products and customers are preloaded in three queries, its
+  invoices are numbered from one allocated block, and invoices, invoice lines and
+  recurring-invoice rows are written with bulk INSERTs;
+- records its progress on a BillingRun row after every chunk.
+
+An item is billed at most once per period: RecurringInvoice has a unique index on
+(billing_cycle_id, billable_item_id, period_start). A run that stopped part-way is
+resumed by running it again: only the cycles still unbilled are picked up. A chunk
+that fails is retried one cycle per transaction, so one bad cycle does not hold
+back the rest of the chunk; a cycle that an overlapping run billed first fails on
+the unique index and is skipped rather than billed twice.
+
+Invoices post the same journal lines and inventory movements as
+InvoiceService.create_invoice. Those are added through the session rather than
+bulk INSERTs so the flush hooks that maintain account balance snapshots, branch
+stock levels and cost layers see them.
+"""
+
+import uuid
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry
+from app.models.billing import BillableItem, BillingCycle, BillingRun, RecurringInvoice
+from app.models.inventory import InventoryTransaction, Product
+from app.models.sales import Customer, Invoice, InvoiceItem
+from app.services.invoice_service import InvoiceService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_INTERVAL_MONTHS = {'monthly': 1, 'quarterly': 3, 'annual': 12, 'annually': 12, 'yearly': 12}
+_INTERVAL_DAYS = {'daily': 1, 'weekly': 7}
+_PAYMENT_TERMS = {'monthly': 30, 'quarterly': 90, 'annual': 365}
+# Ledger accounts posted by InvoiceService._create_invoice_accounting_entries
+_LEDGER_CODES = {'receivable': '1200', 'revenue': '4000', 'vat': '2300', 'cogs': '5100', 'inventory': '1140'}
+_MAX_RECORDED_FAILURES = 100
+
+
+class DueCycle(NamedTuple):
+    id: str
+    name: str
+    customer_id: str
+    interval: str
+    # None bills the cycle outside period tracking
+    period_start: Optional[date]
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(value.day, monthrange(year, month)[1]))
+
+
+def billing_period_start(start_date: date, interval: str, interval_count: int, reference_date: date) -> date:
+    """Start of the billing period of a cycle that contains reference_date"""
+    count = max(int(interval_count or 1), 1)
+    interval = (interval or '').lower()
+    if interval in _INTERVAL_DAYS:
+        step = _INTERVAL_DAYS[interval] * count
+        return start_date + timedelta(days=(reference_date - start_date).days // step * step)
+
+    step = _INTERVAL_MONTHS.get(interval, 1) * count
+    months = (reference_date.year - start_date.year) * 12 + reference_date.month - start_date.month
+    period_start = _add_months(start_date, months // step * step)
+    if period_start > reference_date:
+        period_start = _add_months(start_date, (months // step - 1) * step)
+    return period_start
+
+
+class BillingRunService:
+    """Chunked, resumable bulk invoicing of due billing cycles"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.invoice_service = InvoiceService(db)
+        self._ledger_accounts: Optional[Dict[str, str]] = None
+
+    # ============================================================================
+    # RUNS
+    # ============================================================================
+
+    def start_run(
+        self,
+        reference_date: date = None,
+        created_by: str = None,
+        chunk_size: int = None
+    ) -> Dict:
+        """
+        Invoice every billing cycle due on reference_date
+
+        Args:
+            reference_date: Billing date (defaults to today)
+            created_by: User creating the invoices
+            chunk_size: Cycles per transaction (defaults to billing_run_chunk_size)
+
+        Returns:
+            Run progress with count and list of created invoices
+        """
+        run = BillingRun(
+            id=str(uuid.uuid4()),
+            reference_date=reference_date or date.today(),
+            status='running',
+            started_at=datetime.utcnow(),
+            created_by=created_by,
+            meta_data={}
+        )
+        self.db.add(run)
+        self.db.commit()
+        return self._execute(run, chunk_size)
+
+    def resume_run(self, run_id: str, chunk_size: int = None) -> Dict:
+        """Continue a run that stopped part-way, billing the cycles it has not billed yet"""
+        run = self.db.query(BillingRun).filter(BillingRun.id == run_id).first()
+        if not run:
+            raise ValueError(f"Billing run {run_id} not found")
+        run.status = 'running'
+        run.failed_cycles = 0
+        run.error_message = None
+        run.completed_at = None
+        run.meta_data = {}
+        self.db.commit()
+        return self._execute(run, chunk_size)
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        """Progress of a billing run"""
+        run = self.db.query(BillingRun).filter(BillingRun.id == run_id).first()
+        return self._run_summary(run) if run else None
+
+    def bill_cycle(self, cycle_id: str, invoice_date: date = None, created_by: str = None) -> List[Invoice]:
+        """
+        Invoice one billing cycle now
+
+        Bills the current period when it is still unbilled, so runs skip it; when it was
+        already billed, the invoice is an extra one outside period tracking.
+        """
+        invoice_date = invoice_date or date.today()
+        cycle = self.db.query(BillingCycle).filter(BillingCycle.id == cycle_id).first()
+        if not cycle:
+            raise ValueError(f"Billing cycle {cycle_id} not found")
+        period_start = billing_period_start(cycle.start_date, cycle.interval, cycle.interval_count, invoice_date)
+        if self._period_billed(cycle.id, period_start):
+            period_start = None
+        due = DueCycle(cycle.id, cycle.name, cycle.customer_id, cycle.interval, period_start)
+        created = self._bill_cycles([due], invoice_date, created_by)
+        self.db.commit()
+        if not created:
+            return []
+        return self.db.query(Invoice).filter(Invoice.id.in_([inv['id'] for inv in created])).all()
+
+    def find_due_cycles(self, reference_date: date) -> List[DueCycle]:
+        """Active cycles running on reference_date whose current period has not been billed"""
+        cycles = self.db.query(
+            BillingCycle.id, BillingCycle.name, BillingCycle.customer_id, BillingCycle.interval,
+            BillingCycle.interval_count, BillingCycle.start_date
+        ).filter(
+            BillingCycle.status == 'active',
+            BillingCycle.start_date <= reference_date,
+            or_(BillingCycle.end_date.is_(None), BillingCycle.end_date >= reference_date)
+        ).order_by(BillingCycle.id).all()
+        if not cycles:
+            return []
+
+        due = [
+            DueCycle(cycle.id, cycle.name, cycle.customer_id, cycle.interval,
+                     billing_period_start(cycle.start_date, cycle.interval, cycle.interval_count, reference_date))
+            for cycle in cycles
+        ]
+        billed = set(self.db.query(RecurringInvoice.billing_cycle_id, RecurringInvoice.period_start).filter(
+            RecurringInvoice.period_start >= min(cycle.period_start for cycle in due),
+            RecurringInvoice.period_start <= reference_date
+        ).distinct())
+        return [cycle for cycle in due if (cycle.id, cycle.period_start) not in billed]
+
+    def _period_billed(self, cycle_id: str, period_start: date) -> bool:
+        return self.db.query(RecurringInvoice.id).filter(
+            RecurringInvoice.billing_cycle_id == cycle_id,
+            RecurringInvoice.period_start == period_start
+        ).first() is not None
+
+    def _execute(self, run: BillingRun, chunk_size: int = None) -> Dict:
+        chunk_size = max(int(chunk_size or settings.billing_run_chunk_size), 1)
+        run_id, reference_date, created_by = run.id, run.reference_date, run.created_by
+        invoices: List[Dict] = []
+        failures: Dict[str, str] = {}
+        try:
+            due = self.find_due_cycles(reference_date)
+            run.total_cycles = (run.processed_cycles or 0) + len(due)
+            self.db.commit()
+
+            for offset in range(0, len(due), chunk_size):
+                chunk = due[offset:offset + chunk_size]
+                try:
+                    created = self._bill_cycles(chunk, reference_date, created_by, run_id)
+                    run.processed_cycles += len(chunk)
+                    run.invoices_created += len(created)
+                    self.db.commit()
+                    invoices.extend(created)
+                except Exception as exc:
+                    self.db.rollback()
+                    logger.warning("Billing run %s: chunk of %d cycles failed (%s), retrying one by one",
+                                   run_id, len(chunk), exc)
+                    for cycle in chunk:
+                        invoices.extend(self._bill_cycle_alone(run, cycle, failures))
+                logger.info("Billing run %s: %d/%d cycles, %d invoices, %d failed", run_id,
+                            run.processed_cycles, run.total_cycles, run.invoices_created, run.failed_cycles)
+
+            run.status = 'completed_with_errors' if failures else 'completed'
+            run.completed_at = datetime.utcnow()
+            self.db.commit()
+        except Exception as exc:
+            self.db.rollback()
+            logger.error("Billing run %s failed: %s", run_id, exc, exc_info=True)
+            run.status = 'failed'
+            run.error_message = str(exc)
+            self.db.commit()
+            raise
+
+        return self._run_summary(run, invoices)
+
+    def _bill_cycle_alone(self, run: BillingRun, cycle: DueCycle, failures: Dict[str, str]) -> List[Dict]:
+        """Bill one cycle in its own transaction, recording it on the run if it fails"""
+        try:
+            created = self._bill_cycles([cycle], run.reference_date, run.created_by, run.id)
+            run.processed_cycles += 1
+            run.invoices_created += len(created)
+            self.db.commit()
+            return created
+        except Exception as exc:
+            self.db.rollback()
+            if isinstance(exc, IntegrityError) and self._period_billed(cycle.id, cycle.period_start):
+                logger.info("Billing run %s: cycle %s was billed by another run, skipping", run.id, cycle.id)
+                run.processed_cycles += 1
+                self.db.commit()
+                return []
+            logger.error("Billing run %s: cycle %s failed: %s", run.id, cycle.id, exc)
+            failures[cycle.id] = str(exc)
+            run.failed_cycles += 1
+            run.meta_data = {'failed_cycles': dict(list(failures.items())[:_MAX_RECORDED_FAILURES])}
+            self.db.commit()
+            return []
+
+    @staticmethod
+    def _run_summary(run: BillingRun, invoices: List[Dict] = None) -> Dict:
+        summary = {
+            'run_id': run.id,
+            'status': run.status,
+            'reference_date': run.reference_date.isoformat(),
+            'total_cycles': run.total_cycles,
+            'processed_cycles': run.processed_cycles,
+            'failed_cycles': run.failed_cycles,
+            'count': run.invoices_created,
+            'errors': (run.meta_data or {}).get('failed_cycles', {}),
+        }
+        if invoices is not None:
+            summary['invoices'] = invoices
+        return summary
+
+    # ============================================================================
+    # BULK INVOICING
+    # ============================================================================
+
+    def _bill_cycles(
+        self,
+        cycles: List[DueCycle],
+        invoice_date: date,
+        created_by: str = None,
+        run_id: str = None
+    ) -> List[Dict]:
+        """Write one invoice per cycle with billable items; the caller commits"""
+        cycle_ids = [cycle.id for cycle in cycles]
+        items_by_cycle: Dict[str, List[Any]] = defaultdict(list)
+        for item in self.db.query(
+            BillableItem.id, BillableItem.billing_cycle_id, BillableItem.billable_type, BillableItem.billable_id,
+            BillableItem.amount, BillableItem.description, BillableItem.meta_data
+        ).filter(
+            BillableItem.billing_cycle_id.in_(cycle_ids),
+            BillableItem.status == 'active',
+            BillableItem.start_date <= invoice_date,
+            or_(BillableItem.end_date.is_(None), BillableItem.end_date >= invoice_date)
+        ).order_by(BillableItem.billing_cycle_id, BillableItem.created_at, BillableItem.id):
+            items_by_cycle[item.billing_cycle_id].append(item)
+
+        product_ids = {item.billable_id for items in items_by_cycle.values() for item in items}
+        products = {
+            product.id: product
+            for product in self.db.query(Product).filter(Product.id.in_(product_ids))
+        } if product_ids else {}
+        customers = {
+            customer.id: customer
+            for customer in self.db.query(Customer.id, Customer.name, Customer.branch_id).filter(
+                Customer.id.in_({cycle.customer_id for cycle in cycles})
+            )
+        }
+
+        billable = []
+        for cycle in cycles:
+            items = [item for item in items_by_cycle.get(cycle.id, []) if item.billable_id in products]
+            if not items:
+                continue
+            if cycle.customer_id not in customers:
+                raise ValueError(f"Customer {cycle.customer_id} not found")
+            billable.append((cycle, items))
+        if not billable:
+            return []
+
+        vat_rate = Decimal(str(self.invoice_service.app_settings['default_vat_rate']))
+        numbers = self.invoice_service.allocate_invoice_numbers(len(billable))
+        invoice_rows, item_rows, recurring_rows, entry_rows, created = [], [], [], [], []
+        ledger_lines: List[Dict[str, Any]] = []
+        for (cycle, items), invoice_number in zip(billable, numbers):
+            customer = customers[cycle.customer_id]
+            payment_terms = _PAYMENT_TERMS.get(cycle.interval, 30)
+            due_date = invoice_date + timedelta(days=payment_terms)
+            invoice_id = str(uuid.uuid4())
+            subtotal = total_vat = total_cogs = Decimal('0.00')
+            for item in items:
+                product = products[item.billable_id]
+                unit_price = Decimal(str(item.amount))
+                line_vat = unit_price * (vat_rate / 100)
+                description = item.description or item.billable_type.replace('_', ' ').title()
+                if item.billable_type.startswith('utility_'):
+                    meta = item.meta_data or {}
+                    description += f" (Meter: {meta.get('meter_number', 'N/A')}, "
+                    description += f"Usage: {meta.get('usage', 0)} units)"
+                item_rows.append({
+                    'id': str(uuid.uuid4()),
+                    'invoice_id': invoice_id,
+                    'product_id': product.id,
+                    'quantity': 1,
+                    'price': unit_price,
+                    'total': unit_price + line_vat,
+                    'vat_amount': line_vat,
+                    'vat_rate': vat_rate,
+                    'discount_amount': Decimal('0'),
+                    'discount_percentage': Decimal('0'),
+                    'description': description,
+                })
+                recurring_rows.append({
+                    'id': str(uuid.uuid4()),
+                    'billing_cycle_id': cycle.id,
+                    'billable_item_id': item.id,
+                    'invoice_number': invoice_number,
+                    'period_start': cycle.period_start,
+                    'due_date': due_date,
+                    'amount': item.amount,
+                    'status': 'pending',
+                    'description': f"Invoice for {item.description or item.billable_type}",
+                    'meta_data': {'invoice_id': invoice_id, 'billing_run_id': run_id},
+                })
+                subtotal += unit_price
+                total_vat += line_vat
+                total_cogs += self._issue_stock(product, invoice_number, customer.branch_id, invoice_date)
+
+            entry_id = str(uuid.uuid4())
+            entry_rows.append({
+                'id': entry_id,
+                'date_prepared': invoice_date,
+                'date_posted': invoice_date,
+                'particulars': f"Tax Invoice {invoice_number}",
+                'book': "Sales Journal",
+                'status': "posted",
+                'branch_id': customer.branch_id,
+            })
+            ledger_lines.extend(self._ledger_lines(entry_id, invoice_number, customer, invoice_date,
+                                                   subtotal, total_vat, total_cogs))
+            invoice_rows.append({
+                'id': invoice_id,
+                'customer_id': customer.id,
+                'branch_id': customer.branch_id,
+                'invoice_number': invoice_number,
+                'date': invoice_date,
+                'due_date': due_date,
+                'payment_terms': payment_terms,
+                'discount_percentage': Decimal('0'),
+                'discount_amount': Decimal('0'),
+                'notes': f"Billing for cycle: {cycle.name}",
+                'created_by': created_by,
+                'status': 'unpaid',
+                'total_vat_amount': total_vat,
+                'total_amount': subtotal + total_vat,
+            })
+            created.append({
+                'id': invoice_id,
+                'invoice_number': invoice_number,
+                'customer_id': customer.id,
+                'total_amount': float(subtotal + total_vat),
+            })
+
+        self.db.execute(insert(Invoice), invoice_rows)
+        self.db.execute(insert(InvoiceItem), item_rows)
+        self.db.execute(insert(RecurringInvoice), recurring_rows)
+        self.db.execute(insert(AccountingEntry), entry_rows)
+        self.db.add_all(JournalEntry(**line) for line in ledger_lines)
+        self.db.flush()
+        return created
+
+    def _issue_stock(self, product: Product, invoice_number: str, branch_id: str, invoice_date: date) -> Decimal:
+        """Stock movement of one billed unit, as create_invoice records it; returns its cost"""
+        line_cost = Decimal(str(product.cost_price or 0))
+        if product.quantity is not None:
+            product.quantity = max(0, (product.quantity or 0) - 1)
+        self.db.add(InventoryTransaction(
+            product_id=product.id,
+            transaction_type='sale',
+            quantity=1,
+            unit_cost=product.cost_price or 0,
+            total_cost=line_cost,
+            date=invoice_date,
+            reference=f"Invoice {invoice_number}",
+            branch_id=branch_id,
+            serial_numbers=[],
+            previous_quantity=None,
+            new_quantity=product.quantity
+        ))
+        return line_cost
+
+    def _ledger_lines(
+        self,
+        entry_id: str,
+        invoice_number: str,
+        customer: Any,
+        invoice_date: date,
+        subtotal: Decimal,
+        total_vat: Decimal,
+        total_cogs: Decimal
+    ) -> List[Dict[str, Any]]:
+        """Journal lines of one invoice: receivable, revenue, VAT and cost of sales"""
+        if self._ledger_accounts is None:
+            self._ledger_accounts = {
+                code: account_id for code, account_id in self.db.query(AccountingCode.code, AccountingCode.id)
+                .filter(AccountingCode.code.in_(_LEDGER_CODES.values()))
+            }
+        accounts = {name: self._ledger_accounts.get(code) for name, code in _LEDGER_CODES.items()}
+
+        def line(account, entry_type, amount, narration, description):
+            return {
+                'accounting_entry_id': entry_id,
+                'accounting_code_id': accounts[account],
+                'entry_type': entry_type,
+                'narration': narration,
+                'debit_amount': amount if entry_type == 'debit' else Decimal('0'),
+                'credit_amount': amount if entry_type == 'credit' else Decimal('0'),
+                'description': description,
+                'reference': invoice_number,
+                'date': invoice_date,
+                'branch_id': customer.branch_id,
+            }
+
+        lines = []
+        if accounts['receivable']:
+            lines.append(line('receivable', 'debit', subtotal + total_vat,
+                              f"Invoice {invoice_number} - {customer.name}", "Sales to customer"))
+        if accounts['revenue']:
+            lines.append(line('revenue', 'credit', subtotal,
+                              f"Sales Revenue - Invoice {invoice_number}", "Sales revenue"))
+        if accounts['vat'] and total_vat > 0:
+            lines.append(line('vat', 'credit', total_vat, f"VAT on Invoice {invoice_number}", "VAT payable"))
+        if total_cogs > 0 and accounts['cogs'] and accounts['inventory']:
+            lines.append(line('cogs', 'debit', total_cogs, f"COGS for Invoice {invoice_number}",
+                              "Cost of goods sold"))
+            lines.append(line('inventory', 'credit', total_cogs,
+                              f"Inventory reduction for Invoice {invoice_number}", "Inventory outflow"))
+        return lines
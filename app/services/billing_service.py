@@ -6,14 +6,14 @@ for rentals, utilities, subscriptions, and usage-based billing.
 """
 
 from sqlalchemy.orm import Session
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Dict, Optional
 import uuid
 
-from app.models.billing import BillingCycle, BillableItem, RecurringInvoice, RecurringPayment
-from app.models.sales import Customer, Invoice, InvoiceItem
-from app.models.inventory import Product
+from app.models.billing import BillingCycle, BillableItem
+from app.models.sales import Invoice
+from app.services.billing_run_service import BillingRunService
 from app.services.invoice_service import InvoiceService
 
 
@@ -287,99 +287,7 @@ class BillingService:
         Returns:
             List of created invoices
         """
-
-        if not invoice_date:
-            invoice_date = date.today()
-
-        cycle = self.get_billing_cycle(billing_cycle_id)
-        if not cycle:
-            raise ValueError(f"Billing cycle {billing_cycle_id} not found")
-
-        # Get all active billable items for this cycle
-        items = self.get_billable_items(
-            billing_cycle_id=billing_cycle_id,
-            status='active'
-        )
-
-        if not items:
-            return []
-
-        # Group items by customer (should all be same customer for a cycle)
-        invoices_created = []
-
-        # Get customer from cycle
-        customer = self.db.query(Customer).filter(Customer.id == cycle.customer_id).first()
-        if not customer:
-            raise ValueError(f"Customer {cycle.customer_id} not found")
-
-        # Prepare invoice items
-        invoice_items = []
-        for item in items:
-            # Get product details
-            product = self.db.query(Product).filter(Product.id == item.billable_id).first()
-            if not product:
-                continue
-
-            # Determine description based on billing type
-            description = item.description or f"{item.billable_type.replace('_', ' ').title()}"
-
-            # For utilities, include meter reading info
-            if item.billable_type.startswith('utility_'):
-                meta = item.meta_data or {}
-                description += f" (Meter: {meta.get('meter_number', 'N/A')}, "
-                description += f"Usage: {meta.get('usage', 0)} units)"
-
-            invoice_items.append({
-                'product_id': item.billable_id,
-                'quantity': 1,
-                'unit_price': float(item.amount),
-                'description': description
-            })
-
-        if not invoice_items:
-            return []
-
-        # Calculate due date based on cycle interval
-        payment_terms = 30  # Default
-        if cycle.interval == 'monthly':
-            payment_terms = 30
-        elif cycle.interval == 'quarterly':
-            payment_terms = 90
-        elif cycle.interval == 'annual':
-            payment_terms = 365
-
-        due_date = invoice_date + timedelta(days=payment_terms)
-
-        # Create the invoice
-        invoice = self.invoice_service.create_invoice(
-            customer_id=customer.id,
-            branch_id=customer.branch_id,
-            invoice_items=invoice_items,
-            due_date=due_date,
-            payment_terms=payment_terms,
-            notes=f"Billing for cycle: {cycle.name}",
-            created_by=created_by
-        )
-
-        # Create recurring invoice records for tracking
-        for item in items:
-            recurring_invoice = RecurringInvoice(
-                id=str(uuid.uuid4()),
-                billing_cycle_id=cycle.id,
-                billable_item_id=item.id,
-                invoice_number=invoice.invoice_number,
-                due_date=due_date,
-                amount=item.amount,
-                status='pending',
-                description=f"Invoice for {item.description or item.billable_type}",
-                meta_data={'invoice_id': invoice.id}
-            )
-            self.db.add(recurring_invoice)
-
-        self.db.commit()
-        invoices_created.append(invoice)
-
-        return invoices_created
+        return BillingRunService(self.db).bill_cycle(billing_cycle_id, invoice_date, created_by)
 
     def generate_all_due_invoices(
         self,
@@ -389,50 +297,25 @@ class BillingService:
         """
         Generate invoices for all billing cycles that are due
 
+        Cycles are billed in bulk, chunk by chunk, and at most once per billing
+        period; see BillingRunService.
+
         Args:
             reference_date: Date to check for due invoices (defaults to today)
             created_by: User creating the invoices
 
         Returns:
-            Dictionary with count and list of created invoices
+            Dictionary with the run's progress, count and list of created invoices
         """
+        return BillingRunService(self.db).start_run(reference_date, created_by)
 
-        if not reference_date:
-            reference_date = date.today()
-
-        # Get all active billing cycles
-        cycles = self.get_billing_cycles(status='active')
-
-        invoices_created = []
-
-        for cycle in cycles:
-            # Determine if invoices are due based on cycle type and last invoice date
-            # For now, generate for all active cycles
-            # TODO: Add logic to check last invoice date and interval
-
-            try:
-                cycle_invoices = self.generate_invoices_for_cycle(
-                    billing_cycle_id=cycle.id,
-                    invoice_date=reference_date,
-                    created_by=created_by
-                )
-                invoices_created.extend(cycle_invoices)
-            except Exception as e:
-                print(f"Error generating invoices for cycle {cycle.id}: {e}")
-                continue
+    def resume_billing_run(self, run_id: str) -> Dict:
+        """Continue a billing run that stopped part-way"""
+        return BillingRunService(self.db).resume_run(run_id)
 
-        return {
-            'count': len(invoices_created),
-            'invoices': [
-                {
-                    'id': inv.id,
-                    'invoice_number': inv.invoice_number,
-                    'customer_id': inv.customer_id,
-                    'total_amount': float(inv.total_amount)
-                }
-                for inv in invoices_created
-            ]
-        }
+    def get_billing_run(self, run_id: str) -> Optional[Dict]:
+        """Get the progress of a billing run"""
+        return BillingRunService(self.db).get_run(run_id)
 
     # ============================================================================
     # DASHBOARD & REPORTING
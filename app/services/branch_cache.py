@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
 from threading import Lock
 from typing import Dict, Optional
 
 from sqlalchemy.orm import Session
 
+from app.core.cache import get_cache
 from app.core.database import SessionLocal
 from app.models.branch import Branch
 
@@ -15,7 +15,8 @@ class BranchLookupCache:
 
     Keeps a small dictionary of branch id -> {"id", "name", "code"} that is refreshed
     periodically. Defaults to a 5 minute time-to-live which is a reasonable compromise for
-    low-churn branch records while keeping responses consistent across the app.
+    low-churn branch records while keeping responses consistent across the app. Entries
+    live in the shared ``branch_lookup`` cache namespace, so a refresh is single-flight.
     """
 
     _instance: Optional["BranchLookupCache"] = None
@@ -32,56 +33,53 @@ class BranchLookupCache:
         if getattr(self, "_initialized", False):
             return
         self._initialized = True
-        self._ttl = timedelta(seconds=ttl_seconds)
-        self._cache: Dict[str, Dict[str, Optional[str]]] = {}
-        self._expires_at: Optional[datetime] = None
-        self._cache_lock: Lock = Lock()
+        self._cache = get_cache("branch_lookup", max_entries=1024, ttl_seconds=ttl_seconds)
 
     def get_branch(self, branch_id: Optional[str], session: Optional[Session] = None) -> Optional[Dict[str, Optional[str]]]:
         if not branch_id:
             return None
 
-        with self._cache_lock:
-            if self._is_expired():
-                self._refresh_locked(session)
-
-            if branch_id in self._cache:
-                return self._cache[branch_id]
+        branches = self._cache.get_or_set("all", lambda: self._load_all(session))
+        if branch_id in branches:
+            return branches[branch_id]
 
         # Cache miss after potential refresh – perform targeted fetch and store
-        self._refresh_single(branch_id, session)
-        with self._cache_lock:
-            return self._cache.get(branch_id)
+        key = f"branch:{branch_id}"
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        record = self._load_single(branch_id, session)
+        if record is not None:
+            self._cache.set(key, record)
+        return record
+
+    def invalidate(self) -> None:
+        self._cache.clear()
 
     # ---------------------------------------------------------------------
     # Internal helpers
     # ---------------------------------------------------------------------
-    def _is_expired(self) -> bool:
-        if not self._expires_at:
-            return True
-        return datetime.utcnow() >= self._expires_at
-
-    def _refresh_locked(self, session: Optional[Session] = None) -> None:
+    @staticmethod
+    def _load_all(session: Optional[Session] = None) -> Dict[str, Dict[str, Optional[str]]]:
         db = session or SessionLocal()
         try:
             records = db.query(Branch.id, Branch.name, Branch.code).all()
-            self._cache = {
+            return {
                 record.id: {"id": record.id, "name": record.name, "code": record.code}
                 for record in records
             }
-            self._expires_at = datetime.utcnow() + self._ttl
         finally:
             if session is None:
                 db.close()
 
-    def _refresh_single(self, branch_id: str, session: Optional[Session] = None) -> None:
+    @staticmethod
+    def _load_single(branch_id: str, session: Optional[Session] = None) -> Optional[Dict[str, Optional[str]]]:
         db = session or SessionLocal()
         try:
             record = db.query(Branch.id, Branch.name, Branch.code).filter(Branch.id == branch_id).first()
             if not record:
-                return
-            with self._cache_lock:
-                self._cache[branch_id] = {"id": record.id, "name": record.name, "code": record.code}
+                return None
+            return {"id": record.id, "name": record.name, "code": record.code}
         finally:
             if session is None:
                 db.close()
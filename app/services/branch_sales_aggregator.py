@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import copy
+import logging
+import time
+from datetime import datetime, date
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, event, extract, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.branch import Branch
+from app.models.sales import Sale
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_branch(branch_id: str, branch_name: Optional[str]) -> Dict[str, Any]:
+    return {
+        'branch_id': branch_id,
+        'branch_name': branch_name or '',
+        'today_amount': Decimal('0'),
+        'today_count': 0,
+        'month_amount': Decimal('0'),
+        'month_count': 0,
+        'hourly': {},
+        'payments': {},
+        'last_sale_time': None
+    }
+
+
+class BranchSalesAggregator:
+    """Live per-branch sales counters for today and the current month.
+
+    Counters (totals, per-hour and per-payment-method) are updated in memory as sales
+    commit, via the session hooks at the bottom of this module, so dashboards read
+    them without querying ``sales``. The state is rebuilt from the database every
+    ``branch_sales_reconcile_seconds`` (and after edits/deletes of existing sales or
+    a sale for an unknown branch), which also picks up sales committed by other
+    worker processes. ``version`` increases on every change so readers can reuse a
+    payload rendered for the same version and streams only push when something moved.
+    """
+
+    _instance: Optional["BranchSalesAggregator"] = None
+    _instance_lock: Lock = Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, reconcile_seconds: Optional[int] = None):
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self._reconcile_seconds = reconcile_seconds or settings.branch_sales_reconcile_seconds
+        self._branches: Dict[str, Dict[str, Any]] = {}
+        self._day: Optional[date] = None
+        self._reconciled_at = 0.0
+        self._version = 0
+        self._state_lock: Lock = Lock()
+        self._reconcile_lock: Lock = Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def record_sale(self, branch_id: Optional[str], amount, payment_method: Optional[str] = None,
+                    sold_at: Optional[datetime] = None):
+        """Apply one committed sale to the live counters"""
+        if not branch_id:
+            return
+        sold_at = sold_at or datetime.now()
+        amount = Decimal(str(amount or 0))
+        with self._state_lock:
+            if self._day is None:
+                # Nothing loaded yet; the first read reconciles from the database
+                return
+            self._roll_over_locked(datetime.now().date())
+            if (sold_at.year, sold_at.month) != (self._day.year, self._day.month):
+                return
+            branch = self._branches.get(branch_id)
+            if branch is None:
+                branch = self._branches[branch_id] = _empty_branch(branch_id, None)
+                self._reconciled_at = 0.0  # pick up the branch name on the next read
+            branch['month_amount'] += amount
+            branch['month_count'] += 1
+            if sold_at.date() == self._day:
+                branch['today_amount'] += amount
+                branch['today_count'] += 1
+                hour = branch['hourly'].setdefault(sold_at.hour, {'count': 0, 'amount': Decimal('0')})
+                hour['count'] += 1
+                hour['amount'] += amount
+                method = payment_method or 'Unknown'
+                branch['payments'][method] = branch['payments'].get(method, Decimal('0')) + amount
+                if branch['last_sale_time'] is None or sold_at > branch['last_sale_time']:
+                    branch['last_sale_time'] = sold_at
+            self._bump_locked()
+
+    def mark_stale(self):
+        """Force a rebuild from the database on the next read"""
+        with self._state_lock:
+            self._reconciled_at = 0.0
+
+    def reconcile_due(self) -> bool:
+        return time.monotonic() - self._reconciled_at >= self._reconcile_seconds
+
+    def refresh_if_due(self, db: Optional[Session] = None):
+        if self.reconcile_due():
+            self.reconcile(db)
+
+    def snapshot(self, db: Optional[Session] = None) -> Dict[str, Any]:
+        """Current counters (reconciling first if they are stale)"""
+        self.refresh_if_due(db)
+        with self._state_lock:
+            self._roll_over_locked(datetime.now().date())
+            return {
+                'version': self._version,
+                'day': self._day,
+                'branches': copy.deepcopy(list(self._branches.values()))
+            }
+
+    def reconcile(self, db: Optional[Session] = None):
+        """Rebuild today's and this month's counters from the sales table"""
+        if not self._reconcile_lock.acquire(blocking=self._day is None):
+            # Another thread is already rebuilding; serve the current state meanwhile
+            return
+        owns_session = db is None
+        session = db or SessionLocal()
+        try:
+            branches = self._load(session, datetime.now())
+        except Exception as exc:
+            logger.warning("Branch sales reconcile failed: %s", exc)
+            return
+        finally:
+            if owns_session:
+                session.close()
+            self._reconcile_lock.release()
+
+        with self._state_lock:
+            today = datetime.now().date()
+            changed = branches != self._branches or self._day != today
+            self._branches = branches
+            self._day = today
+            self._reconciled_at = time.monotonic()
+            if changed:
+                self._bump_locked()
+
+    # ---------------------------------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------------------------------
+    @staticmethod
+    def _load(db: Session, now: datetime) -> Dict[str, Dict[str, Any]]:
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = today_start.replace(day=1)
+
+        branches = {
+            row.id: _empty_branch(row.id, row.name)
+            for row in db.query(Branch.id, Branch.name).all()
+        }
+
+        totals = db.query(
+            Sale.branch_id,
+            func.count(case((Sale.date >= today_start, 1))).label('today_count'),
+            func.coalesce(func.sum(case((Sale.date >= today_start, Sale.total_amount), else_=0)), 0).label('today_amount'),
+            func.count(Sale.id).label('month_count'),
+            func.coalesce(func.sum(Sale.total_amount), 0).label('month_amount'),
+            func.max(Sale.date).label('last_sale_time')
+        ).filter(
+            Sale.date >= month_start,
+            Sale.branch_id.isnot(None)
+        ).group_by(Sale.branch_id).all()
+
+        for row in totals:
+            branch = branches.setdefault(row.branch_id, _empty_branch(row.branch_id, None))
+            branch['today_count'] = int(row.today_count or 0)
+            branch['today_amount'] = Decimal(str(row.today_amount or 0))
+            branch['month_count'] = int(row.month_count or 0)
+            branch['month_amount'] = Decimal(str(row.month_amount or 0))
+            if row.today_count:
+                last_sale = row.last_sale_time
+                branch['last_sale_time'] = datetime.fromisoformat(last_sale) if isinstance(last_sale, str) else last_sale
+
+        # Today's hour x payment-method breakdown in one grouped pass
+        hour_col = extract('hour', Sale.date)
+        breakdown = db.query(
+            Sale.branch_id,
+            hour_col.label('hour'),
+            Sale.payment_method,
+            func.count(Sale.id).label('count'),
+            func.coalesce(func.sum(Sale.total_amount), 0).label('amount')
+        ).filter(
+            Sale.date >= today_start,
+            Sale.branch_id.isnot(None)
+        ).group_by(Sale.branch_id, hour_col, Sale.payment_method).all()
+
+        for row in breakdown:
+            branch = branches[row.branch_id]
+            amount = Decimal(str(row.amount or 0))
+            hour = branch['hourly'].setdefault(int(row.hour), {'count': 0, 'amount': Decimal('0')})
+            hour['count'] += int(row.count)
+            hour['amount'] += amount
+            method = row.payment_method or 'Unknown'
+            branch['payments'][method] = branch['payments'].get(method, Decimal('0')) + amount
+
+        return branches
+
+    def _roll_over_locked(self, today: date):
+        if self._day is None or self._day == today:
+            return
+        same_month = (self._day.year, self._day.month) == (today.year, today.month)
+        for branch in self._branches.values():
+            branch.update({'today_amount': Decimal('0'), 'today_count': 0, 'hourly': {}, 'payments': {},
+                           'last_sale_time': None})
+            if not same_month:
+                branch.update({'month_amount': Decimal('0'), 'month_count': 0})
+        self._day = today
+        self._bump_locked()
+
+    def _bump_locked(self):
+        self._version += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _track_sales(session, flush_context):
+    """Collect sales written in this transaction; applied to the counters only on commit"""
+    for obj in session.new:
+        if isinstance(obj, Sale):
+            session.info.setdefault("branch_sales_new", []).append(
+                (obj.branch_id, obj.total_amount, obj.payment_method, obj.date)
+            )
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Sale):
+            session.info["branch_sales_stale"] = True
+            break
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_sales(session):
+    new_sales = session.info.pop("branch_sales_new", None)
+    stale = session.info.pop("branch_sales_stale", False)
+    if not new_sales and not stale:
+        return
+    aggregator = get_branch_sales_aggregator()
+    for branch_id, amount, payment_method, sold_at in new_sales or ():
+        aggregator.record_sale(branch_id, amount, payment_method, sold_at)
+    if stale:
+        aggregator.mark_stale()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _savepoint_rolled_back(session, previous_transaction):
+    # Sales flushed inside a rolled-back savepoint can't be told apart; rebuild instead
+    if previous_transaction.nested and session.info.pop("branch_sales_new", None):
+        session.info["branch_sales_stale"] = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_sales(session):
+    session.info.pop("branch_sales_new", None)
+    session.info.pop("branch_sales_stale", None)
+
+
+def get_branch_sales_aggregator() -> BranchSalesAggregator:
+    return BranchSalesAggregator()
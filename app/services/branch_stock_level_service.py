@@ -0,0 +1,334 @@
+"""
+Branch Stock Level Service
+
+Maintains the branch_stock_levels table (one row per product and branch holding the
+on-hand quantity) and checks it against the inventory transaction log:
+
+- Every inventory transaction flush adds its signed quantity to the row of its
+  product and branch (transactions without a branch count towards the product's
+  home branch). Direction follows the inbound/outbound movement types used for
+  cost layers, so positive-signed sales and negative-signed transfers both reduce
+  stock.
+- Edits and deletes of existing transactions recompute the affected rows from the log.
+
+The flush hook runs inside the flushing transaction, so POS sales, transfers,
+allocations, production and receipts keep the table exact without calling this
+service. check_drift()/repair() (scripts/check_branch_stock_drift.py) compare the
+table with inventory_transactions and fix rows that drifted, e.g. after raw SQL edits.
+
+Because the upsert is part of the flushing transaction, the row of a product and
+branch stays locked until that transaction commits, so concurrent sales of the
+same product at one branch commit one after another. POS sales already lock their
+basket's product rows (PosService._lock_products) for the stock check, so this
+adds no new serialization point there; rows are written in key order to keep
+lock order consistent between transactions.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import uuid
+
+from sqlalchemy import and_, case, event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.inventory import BranchStockLevel, InventoryTransaction, Product
+from app.services.inventory_cost_layer_service import INBOUND_TYPES, OUTBOUND_TYPES, movement_direction
+
+# (product_id, branch_id or '')
+StockKey = Tuple[str, str]
+
+_TRACKED_COLUMNS = ('product_id', 'branch_id', 'transaction_type', 'quantity')
+_INSERT_CHUNK_SIZE = 1000
+_PRODUCT_CHUNK_SIZE = 500
+
+
+def signed_quantity(transaction_type: Optional[str], quantity) -> int:
+    """Stock change of a movement: +quantity inbound, -quantity outbound, 0 otherwise."""
+    return movement_direction(transaction_type, quantity) * abs(int(quantity or 0))
+
+
+def _chunks(values: List[str], size: int = _PRODUCT_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _write_level(connection, key: StockKey, quantity: int, replace: bool = False) -> None:
+    """Upsert one stock row, either adding the delta or replacing the quantity."""
+    table = BranchStockLevel.__table__
+    product_id, branch_id = key
+    now = datetime.utcnow()
+    values = {
+        'id': str(uuid.uuid4()),
+        'product_id': product_id,
+        'branch_id': branch_id,
+        'quantity': quantity,
+        'last_movement_at': now,
+        'created_at': now,
+        'updated_at': now,
+    }
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values)
+        quantity_update = stmt.excluded.quantity if replace else table.c.quantity + stmt.excluded.quantity
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['product_id', 'branch_id'],
+            set_={'quantity': quantity_update, 'last_movement_at': now, 'updated_at': now},
+        ))
+        return
+
+    # Portable fallback: update in place, insert when the row does not exist yet
+    match = and_(table.c.product_id == product_id, table.c.branch_id == branch_id)
+    result = connection.execute(table.update().where(match).values(
+        quantity=quantity if replace else table.c.quantity + quantity,
+        last_movement_at=now,
+        updated_at=now,
+    ))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**values))
+
+
+def _ledger_levels(
+    connection,
+    product_ids: Optional[Iterable[str]] = None,
+    branch_id: Optional[str] = None,
+) -> Dict[StockKey, Tuple[int, Optional[datetime]]]:
+    """On-hand quantity and last movement per (product, branch) summed from inventory_transactions."""
+    tx = InventoryTransaction.__table__
+    products = Product.__table__
+    branch_col = func.coalesce(tx.c.branch_id, products.c.branch_id, '')
+    signed = case(
+        (tx.c.transaction_type.in_(INBOUND_TYPES), func.abs(tx.c.quantity)),
+        (tx.c.transaction_type.in_(OUTBOUND_TYPES), -func.abs(tx.c.quantity)),
+        else_=0,
+    )
+    query = (
+        select(tx.c.product_id, branch_col, func.coalesce(func.sum(signed), 0), func.max(tx.c.created_at))
+        .select_from(tx.join(products, products.c.id == tx.c.product_id))
+        .group_by(tx.c.product_id, branch_col)
+    )
+    if branch_id is not None:
+        query = query.where(branch_col == branch_id)
+
+    levels: Dict[StockKey, Tuple[int, Optional[datetime]]] = {}
+    batches = [None] if product_ids is None else list(_chunks(list(product_ids)))
+    for batch in batches:
+        batch_query = query if batch is None else query.where(tx.c.product_id.in_(batch))
+        for product_id, branch, quantity, last_at in connection.execute(batch_query):
+            levels[(product_id, branch or '')] = (int(quantity or 0), last_at)
+    return levels
+
+
+def _recompute_levels(connection, keys: Iterable[StockKey]) -> None:
+    """Recalculate stock rows from inventory_transactions (used for edits and deletes)."""
+    keys = set(keys)
+    ledger = _ledger_levels(connection, product_ids={product_id for product_id, _ in keys})
+    for key in keys:
+        _write_level(connection, key, ledger.get(key, (0, None))[0], replace=True)
+
+
+def _home_branches(connection, product_ids: Set[str]) -> Dict[str, str]:
+    if not product_ids:
+        return {}
+    products = Product.__table__
+    return {
+        row.id: row.branch_id or '' for row in connection.execute(
+            select(products.c.id, products.c.branch_id).where(products.c.id.in_(product_ids))
+        )
+    }
+
+
+def _previous_and_current(obj: InventoryTransaction) -> Tuple[Dict[str, object], Dict[str, object], bool]:
+    """Return (previous, current, changed) values of the tracked transaction columns."""
+    previous: Dict[str, object] = {}
+    current: Dict[str, object] = {}
+    changed = False
+    for column in _TRACKED_COLUMNS:
+        history = get_history(obj, column)
+        if history.has_changes():
+            changed = True
+            previous[column] = history.deleted[0] if history.deleted else None
+            current[column] = history.added[0] if history.added else None
+        else:
+            value = history.unchanged[0] if history.unchanged else getattr(obj, column, None)
+            previous[column] = value
+            current[column] = value
+    return previous, current, changed
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_branch_stock_levels(session: Session, flush_context) -> None:
+    """Fold inventory transactions written by this flush into branch_stock_levels."""
+    additions: List[Tuple[str, Optional[str], int]] = []
+    touched: List[Tuple[str, Optional[str]]] = []
+
+    for obj in session.new:
+        if not isinstance(obj, InventoryTransaction) or not obj.product_id:
+            continue
+        delta = signed_quantity(obj.transaction_type, obj.quantity)
+        if delta:
+            additions.append((obj.product_id, obj.branch_id, delta))
+
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, InventoryTransaction):
+            continue
+        previous, current, changed = _previous_and_current(obj)
+        if not changed and obj not in session.deleted:
+            continue
+        for values in (previous, current):
+            if values['product_id']:
+                touched.append((values['product_id'], values['branch_id']))
+
+    if not additions and not touched:
+        return
+
+    connection = session.connection()
+    home = _home_branches(connection, {
+        product_id for product_id, branch_id, *_ in additions + touched if not branch_id
+    })
+
+    def _key(product_id: str, branch_id: Optional[str]) -> StockKey:
+        return product_id, branch_id or home.get(product_id, '')
+
+    recompute = {_key(product_id, branch_id) for product_id, branch_id in touched}
+    deltas: Dict[StockKey, int] = defaultdict(int)
+    for product_id, branch_id, delta in additions:
+        deltas[_key(product_id, branch_id)] += delta
+
+    for key, delta in sorted(deltas.items()):
+        if key not in recompute and delta:
+            _write_level(connection, key, delta)
+    if recompute:
+        _recompute_levels(connection, sorted(recompute))
+
+
+class BranchStockLevelService:
+    """Read, check and repair maintained branch stock levels"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_quantity(self, product_id: str, branch_id: str, for_update: bool = False) -> int:
+        """
+        On-hand quantity of a product in a branch.
+
+        Args:
+            product_id: Product to look up
+            branch_id: Branch holding the stock
+            for_update: Lock the row until the transaction ends (check-then-move paths)
+        """
+        query = self.db.query(BranchStockLevel.quantity).filter(
+            BranchStockLevel.product_id == product_id,
+            BranchStockLevel.branch_id == (branch_id or ''),
+        )
+        if for_update:
+            query = query.with_for_update()
+        return int(query.scalar() or 0)
+
+    def get_quantities(self, branch_id: str, product_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """On-hand quantity per product held in a branch (products without a row are absent)."""
+        query = self.db.query(BranchStockLevel.product_id, BranchStockLevel.quantity).filter(
+            BranchStockLevel.branch_id == (branch_id or '')
+        )
+        if product_ids is not None:
+            query = query.filter(BranchStockLevel.product_id.in_(list(product_ids)))
+        return {product_id: int(quantity or 0) for product_id, quantity in query}
+
+    def get_branch_total(self, branch_id: str) -> int:
+        """Total units on hand in a branch."""
+        return int(self.db.query(func.coalesce(func.sum(BranchStockLevel.quantity), 0)).filter(
+            BranchStockLevel.branch_id == (branch_id or '')
+        ).scalar() or 0)
+
+    def check_drift(
+        self,
+        branch_id: Optional[str] = None,
+        product_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict]:
+        """
+        Compare branch_stock_levels with the quantities summed from inventory_transactions.
+
+        Args:
+            branch_id: Only check this branch (default: every branch)
+            product_ids: Only check these products (default: every product)
+
+        Returns:
+            One dict per drifted (product, branch) with recorded, expected and difference
+        """
+        product_ids = list(product_ids) if product_ids is not None else None
+        expected = _ledger_levels(self.db.connection(), product_ids, branch_id)
+
+        query = self.db.query(BranchStockLevel.product_id, BranchStockLevel.branch_id, BranchStockLevel.quantity)
+        if branch_id is not None:
+            query = query.filter(BranchStockLevel.branch_id == branch_id)
+        recorded: Dict[StockKey, int] = {}
+        for batch in ([None] if product_ids is None else list(_chunks(product_ids))):
+            batch_query = query if batch is None else query.filter(BranchStockLevel.product_id.in_(batch))
+            for product_id, branch, quantity in batch_query:
+                recorded[(product_id, branch)] = int(quantity or 0)
+
+        drift = []
+        for key in sorted(set(expected) | set(recorded)):
+            expected_quantity = expected.get(key, (0, None))[0]
+            recorded_quantity = recorded.get(key)
+            if recorded_quantity == expected_quantity or (recorded_quantity is None and expected_quantity == 0):
+                continue
+            drift.append({
+                'product_id': key[0],
+                'branch_id': key[1] or None,
+                'recorded': recorded_quantity,
+                'expected': expected_quantity,
+                'difference': expected_quantity - (recorded_quantity or 0),
+            })
+        return drift
+
+    def repair(
+        self,
+        branch_id: Optional[str] = None,
+        product_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Rewrite drifted rows from inventory_transactions.
+
+        Returns:
+            Dict with the number of drifted rows found and rows rewritten
+        """
+        drift = self.check_drift(branch_id, product_ids)
+        if not drift:
+            return {'drifted': 0, 'repaired': 0}
+
+        table = BranchStockLevel.__table__
+        keys = {(row['product_id'], row['branch_id'] or '') for row in drift}
+        expected = _ledger_levels(self.db.connection(), {product_id for product_id, _ in keys})
+        now = datetime.utcnow()
+        try:
+            connection = self.db.connection()
+            for product_id, branch in keys:
+                connection.execute(table.delete().where(and_(
+                    table.c.product_id == product_id, table.c.branch_id == branch
+                )))
+            rows = [
+                {
+                    'id': str(uuid.uuid4()),
+                    'product_id': product_id,
+                    'branch_id': branch,
+                    'quantity': expected.get((product_id, branch), (0, None))[0],
+                    'last_movement_at': expected.get((product_id, branch), (0, None))[1],
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for product_id, branch in sorted(keys)
+            ]
+            for start in range(0, len(rows), _INSERT_CHUNK_SIZE):
+                connection.execute(table.insert(), rows[start:start + _INSERT_CHUNK_SIZE])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return {'drifted': len(drift), 'repaired': len(rows)}
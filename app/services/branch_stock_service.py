@@ -18,6 +18,7 @@ from app.models.inventory import Product, InventoryTransaction, InventoryAdjustm
 from app.models.sales import Sale, SaleItem
 from app.models.accounting import JournalEntry, AccountingEntry, AccountingCode
 from app.core.database import get_db
+from app.services.branch_stock_level_service import BranchStockLevelService
 
 
 class BranchStockService:
@@ -25,6 +26,7 @@ class BranchStockService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.stock_levels = BranchStockLevelService(db)
     
     def get_branch_stock_levels(self, branch_id: str) -> List[Dict]:
         """Get current stock levels for all products in a branch"""
@@ -32,10 +34,11 @@ class BranchStockService:
             Product.branch_id == branch_id
         ).all()
         
+        quantities = self.stock_levels.get_quantities(branch_id)
+
         stock_levels = []
         for product in products:
-            # Calculate current stock from transactions
-            current_stock = self._calculate_current_stock(product.id, branch_id)
+            current_stock = quantities.get(product.id, 0)
             
             # Check for low stock
             is_low_stock = current_stock <= (product.reorder_point or 5)
@@ -80,8 +83,8 @@ class BranchStockService:
         if not product:
             raise ValueError("Product not found")
         
-        # Check available stock in source branch
-        available_stock = self._calculate_current_stock(product_id, from_branch_id)
+        # Check available stock in source branch (row stays locked until the transfer commits)
+        available_stock = self._calculate_current_stock(product_id, from_branch_id, for_update=True)
         if available_stock < quantity:
             raise ValueError(f"Insufficient stock. Available: {available_stock}, Requested: {quantity}")
         
@@ -91,8 +94,8 @@ class BranchStockService:
             branch_id=from_branch_id,
             transaction_type='stock_transfer_out',
             quantity=-quantity,  # Negative for outbound
-            reference_number=f"XFER-OUT-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            notes=f"Transfer to {to_branch.name}: {reason}",
+            reference=f"XFER-OUT-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            note=f"Transfer to {to_branch.name}: {reason}",
             created_by=user_id
         )
         self.db.add(outbound_transaction)
@@ -103,8 +106,8 @@ class BranchStockService:
             branch_id=to_branch_id,
             transaction_type='stock_transfer_in',
             quantity=quantity,  # Positive for inbound
-            reference_number=f"XFER-IN-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            notes=f"Transfer from {from_branch.name}: {reason}",
+            reference=f"XFER-IN-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            note=f"Transfer from {from_branch.name}: {reason}",
             created_by=user_id
         )
         self.db.add(inbound_transaction)
@@ -156,8 +159,8 @@ class BranchStockService:
                 'sku': product.sku if product else '',
                 'transaction_type': transaction.transaction_type,
                 'quantity': transaction.quantity,
-                'reference_number': transaction.reference_number,
-                'notes': transaction.notes,
+                'reference_number': transaction.reference,
+                'notes': transaction.note,
                 'created_at': transaction.created_at,
                 'created_by': transaction.created_by
             })
@@ -174,9 +177,10 @@ class BranchStockService:
         total_stock_value = 0
         low_stock_count = 0
         out_of_stock_count = 0
+        quantities = self.stock_levels.get_quantities(branch_id)
         
         for product in products:
-            current_stock = self._calculate_current_stock(product.id, branch_id)
+            current_stock = quantities.get(product.id, 0)
             stock_value = current_stock * float(product.cost_price or 0)
             total_stock_value += stock_value
             
@@ -185,8 +189,11 @@ class BranchStockService:
             elif current_stock <= (product.reorder_point or 5):
                 low_stock_count += 1
         
-        # Get recent movements (last 7 days)
-        recent_movements = self.get_branch_stock_movements(branch_id, days=7)
+        # Count recent movements (last 7 days)
+        recent_movements_count = self.db.query(func.count(InventoryTransaction.id)).filter(
+            InventoryTransaction.branch_id == branch_id,
+            InventoryTransaction.created_at >= datetime.now() - timedelta(days=7)
+        ).scalar() or 0
         
         return {
             'branch_id': branch_id,
@@ -194,7 +201,7 @@ class BranchStockService:
             'total_stock_value': total_stock_value,
             'low_stock_count': low_stock_count,
             'out_of_stock_count': out_of_stock_count,
-            'recent_movements_count': len(recent_movements),
+            'recent_movements_count': recent_movements_count,
             'stock_turn_rate': self._calculate_stock_turnover(branch_id),
             'summary_date': datetime.now()
         }
@@ -218,18 +225,9 @@ class BranchStockService:
         
         return consolidation
     
-    def _calculate_current_stock(self, product_id: str, branch_id: str) -> int:
-        """Calculate current stock level from transactions"""
-        
-        # Sum all inventory transactions for this product in this branch
-        total_quantity = self.db.query(
-            func.sum(InventoryTransaction.quantity)
-        ).filter(
-            InventoryTransaction.product_id == product_id,
-            InventoryTransaction.branch_id == branch_id
-        ).scalar() or 0
-        
-        return int(total_quantity)
+    def _calculate_current_stock(self, product_id: str, branch_id: str, for_update: bool = False) -> int:
+        """Current stock level from the maintained branch stock table"""
+        return self.stock_levels.get_quantity(product_id, branch_id, for_update=for_update)
     
     def _calculate_stock_turnover(self, branch_id: str, days: int = 30) -> float:
         """Calculate stock turnover rate for a branch"""
@@ -245,11 +243,7 @@ class BranchStockService:
         ).scalar() or 0
         
         # Get average stock level
-        products = self.db.query(Product).filter(Product.branch_id == branch_id).all()
-        total_avg_stock = sum(
-            self._calculate_current_stock(product.id, branch_id) 
-            for product in products
-        )
+        total_avg_stock = self.stock_levels.get_branch_total(branch_id)
         
         if total_avg_stock > 0:
             return float(total_sales) / float(total_avg_stock) * (365 / days)
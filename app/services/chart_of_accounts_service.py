@@ -0,0 +1,214 @@
+"""
+Chart of Accounts Service
+
+Builds the chart-of-accounts tree with live balances from three queries - the
+accounting codes, the branch names they reference and one grouped SUM over
+journal_entries - and rolls child totals up into their parents in a single
+post-order pass.
+
+Built trees are cached under a chart version, which doubles as the HTTP ETag:
+while nothing changed, a request costs no query and the tree is never rebuilt.
+Commits that add, change or remove accounting codes, journal lines or branches
+bump the version. With Redis the version is shared by all workers; without it each
+worker counts its own commits, and its ETags also roll over every
+chart_of_accounts_cache_ttl_seconds so other workers' changes show up within that.
+"""
+
+import os
+import time
+import uuid
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache, get_redis
+from app.core.config import settings
+from app.models.accounting import AccountingCode, JournalEntry
+from app.models.branch import Branch
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEBIT_NORMAL_TYPES = ('Asset', 'Expense')
+
+_CHANGED_KEY = 'chart_of_accounts_changed'
+_VERSION_KEY = 'chart_of_accounts:version'
+
+_trees = get_cache('chart_of_accounts_tree', max_entries=16,
+                   ttl_seconds=settings.chart_of_accounts_cache_ttl_seconds)
+_origin = f"{os.getpid()}.{uuid.uuid4().hex[:8]}"
+_local_version = 0
+_version_lock = Lock()
+
+
+def chart_version() -> str:
+    """Current chart version: the shared Redis counter, else this worker's own"""
+    client = get_redis()
+    if client is not None:
+        try:
+            return 'r%d' % int(client.get(_VERSION_KEY) or 0)
+        except Exception as exc:
+            logger.warning("Reading the chart of accounts version failed: %s", exc)
+    epoch = int(time.time() // max(settings.chart_of_accounts_cache_ttl_seconds, 1))
+    return f"{_origin}.{_local_version}.{epoch}"
+
+
+def invalidate_chart_of_accounts() -> None:
+    """Move the chart to a new version, so cached trees and issued ETags go stale"""
+    global _local_version
+    with _version_lock:
+        _local_version += 1
+    client = get_redis()
+    if client is not None:
+        try:
+            client.incr(_VERSION_KEY)
+        except Exception as exc:
+            logger.warning("Bumping the chart of accounts version failed: %s", exc)
+
+
+def mark_chart_of_accounts_changed(session: Session) -> None:
+    """Bump the version when session commits (for writes made with raw SQL)"""
+    session.info[_CHANGED_KEY] = True
+
+
+class ChartOfAccountsService:
+    """Chart-of-accounts tree with rolled-up live balances"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_etag(self) -> str:
+        """Weak ETag that changes whenever accounts, branches or journal lines change"""
+        return 'W/"coa-%s"' % chart_version()
+
+    def get_tree(self, etag: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Root accounts, each with its full sub_accounts subtree"""
+        return self._cached('tree', etag, lambda: self._build()[0])
+
+    def get_accounts(self, etag: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every account (flat) with its direct sub-accounts, as GET /accounting-codes returns them"""
+        def flatten():
+            _, nodes = self._build()
+            return [
+                dict(node, sub_accounts=[dict(child, sub_accounts=[]) for child in node['sub_accounts']])
+                for node in nodes
+            ]
+        return self._cached('accounts', etag, flatten)
+
+    def _cached(self, kind: str, etag: Optional[str], build):
+        etag = etag or self.get_etag()
+        return _trees.get_or_set(f"{kind}:{etag}", build)
+
+    def _build(self):
+        """Build the tree: (roots, every node in code order)"""
+        codes = self.db.query(
+            AccountingCode.id, AccountingCode.code, AccountingCode.name, AccountingCode.account_type,
+            AccountingCode.category, AccountingCode.is_parent, AccountingCode.parent_id,
+            AccountingCode.branch_id, AccountingCode.currency, AccountingCode.reporting_tag,
+        ).order_by(AccountingCode.code).all()
+
+        branch_ids = {code.branch_id for code in codes if code.branch_id}
+        branches = {}
+        if branch_ids:
+            branches = {
+                branch.id: {"id": branch.id, "name": branch.name, "code": branch.code}
+                for branch in self.db.query(Branch.id, Branch.name, Branch.code).filter(Branch.id.in_(branch_ids))
+            }
+
+        totals = {
+            code_id: (Decimal(str(debits or 0)), Decimal(str(credits or 0)))
+            for code_id, debits, credits in self.db.query(
+                JournalEntry.accounting_code_id,
+                func.sum(JournalEntry.debit_amount),
+                func.sum(JournalEntry.credit_amount),
+            ).group_by(JournalEntry.accounting_code_id)
+        }
+
+        nodes: Dict[str, Dict[str, Any]] = {}
+        for code in codes:
+            debits, credits = totals.get(code.id, (Decimal('0'), Decimal('0')))
+            nodes[code.id] = {
+                "id": code.id,
+                "code": code.code,
+                "name": code.name,
+                "account_type": code.account_type,
+                "category": code.category,
+                "is_parent": code.is_parent,
+                "parent_id": code.parent_id,
+                "parent": None,
+                "branch_id": code.branch_id,
+                "branch": branches.get(code.branch_id),
+                "currency": code.currency or "BWP",
+                "reporting_tag": code.reporting_tag,
+                "total_debits": debits,
+                "total_credits": credits,
+                "sub_accounts": [],
+            }
+
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            if parent is None or parent is node:
+                roots.append(node)
+                continue
+            node["parent"] = {"id": parent["id"], "code": parent["code"], "name": parent["name"]}
+            parent["sub_accounts"].append(node)
+
+        visited = set()
+        root_ids = {node["id"] for node in roots}
+        for start in roots + list(nodes.values()):
+            if start["id"] in visited:
+                continue
+            if start["id"] not in root_ids:
+                # Only reachable through a parent cycle: show it at the top level
+                roots.append(start)
+            _roll_up(start, visited)
+
+        return roots, list(nodes.values())
+
+
+def _roll_up(root: Dict[str, Any], visited: set) -> None:
+    """Add every descendant's totals into its ancestors (iterative post-order)"""
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            for child in node["sub_accounts"]:
+                node["total_debits"] += child["total_debits"]
+                node["total_credits"] += child["total_credits"]
+            if (node["account_type"] or '').strip() in DEBIT_NORMAL_TYPES:
+                node["balance"] = float(node["total_debits"] - node["total_credits"])
+            else:
+                node["balance"] = float(node["total_credits"] - node["total_debits"])
+            continue
+        visited.add(node["id"])
+        # Drop the edge that would close a parent cycle
+        node["sub_accounts"] = [child for child in node["sub_accounts"] if child["id"] not in visited]
+        stack.append((node, True))
+        stack.extend((child, False) for child in node["sub_accounts"])
+
+
+_CHART_MODELS = (AccountingCode, JournalEntry, Branch)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_chart_changes(session: Session, flush_context) -> None:
+    """Flag sessions that wrote accounts, journal lines or branches"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _CHART_MODELS):
+            session.info[_CHANGED_KEY] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_chart_after_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        invalidate_chart_of_accounts()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_chart_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
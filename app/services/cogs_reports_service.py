@@ -1,21 +1,84 @@
 """
 COGS Reports Service
 Comprehensive Cost of Goods Sold analytics and reporting service
+
+COGS comes from three sources: direct COGS entries, sale item cost (quantity x
+cost_price) and cost-of-sales journal lines. Period reports and trends are built
+from a per-day rollup of those sources, fetched in one grouped query and cached per
+calendar month, so monthly, quarterly, annual and trend reports share the same
+pre-aggregated data instead of re-querying every period. A commit that adds,
+changes or removes a COGS entry, sale (item) or journal line drops the cached
+months containing its date.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from threading import Lock
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy import func, or_, case, event, literal_column, select, union_all
+from app.core.cache import get_cache
+from app.core.config import settings
 from app.models.inventory import COGSEntry
-from app.models.sales import Sale
+from app.models.sales import Sale, SaleItem
 from app.models.accounting import JournalEntry, AccountingCode
 from app.models.inventory import Product
-from app.models.accounting import JournalEntry
 from calendar import monthrange
 import calendar
 
+# Daily rollup values: (direct, sales, journal, direct_count, sales_count, journal_count)
+DailyCOGS = Tuple[Decimal, Decimal, Decimal, int, int, int]
+
+_SOURCES = ('direct', 'sales', 'journal')
+_EMPTY_DAY: DailyCOGS = (Decimal(0), Decimal(0), Decimal(0), 0, 0, 0)
+
+_ALL_MONTHS = '*'
+_CHANGES_KEY = 'cogs_rollup_changes'
+
+_COGS_DAILY_CACHE = get_cache('cogs_daily', max_entries=2048)
+_invalidation_lock = Lock()
+_generation = 0
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _month_end(value: date) -> date:
+    return value.replace(day=monthrange(value.year, value.month)[1])
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + (1 if value.month == 12 else 0), (value.month % 12) + 1, 1)
+
+
+def _as_date(value: Any) -> date:
+    """Normalise a grouped day/month bucket (date, datetime or ISO string) to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _period_start(value: date, period_type: str) -> date:
+    if period_type == "quarterly":
+        return date(value.year, ((value.month - 1) // 3) * 3 + 1, 1)
+    if period_type == "annual":
+        return date(value.year, 1, 1)
+    return _month_start(value)
+
+
+def _period_end(value: date, period_type: str) -> date:
+    if period_type == "quarterly":
+        quarter_end_month = ((value.month - 1) // 3) * 3 + 3
+        return date(value.year, quarter_end_month, monthrange(value.year, quarter_end_month)[1])
+    if period_type == "annual":
+        return date(value.year, 12, 31)
+    return _month_end(value)
+
+
 class COGSReportsService:
     """Service for generating comprehensive COGS reports"""
     
@@ -33,28 +96,6 @@ class COGSReportsService:
             return Decimal(str(value))
         except Exception:
             return Decimal(0)
-
-    @classmethod
-    def _entry_total_cost_decimal(cls, entry: Any) -> Decimal:
-        """Return the total cost represented by a COGS entry."""
-        if entry is None:
-            return Decimal(0)
-
-        total = getattr(entry, "total_cost", None)
-        if total is not None:
-            return cls._to_decimal(total)
-
-        unit_cost = getattr(entry, "unit_cost", None)
-        quantity = getattr(entry, "quantity", None)
-        if unit_cost is not None and quantity is not None:
-            return cls._to_decimal(unit_cost) * cls._to_decimal(quantity)
-
-        cost = getattr(entry, "cost", None)
-        if cost is not None:
-            qty = quantity if quantity is not None else 1
-            return cls._to_decimal(cost) * cls._to_decimal(qty)
-
-        return Decimal(0)
     
     def generate_monthly_cogs_report(
         self,
@@ -132,44 +173,24 @@ class COGSReportsService:
     ) -> Dict[str, Any]:
         """Generate COGS report for a specific period"""
         
-        # Get COGS entries for the period
-        cogs_query = self.db.query(COGSEntry).filter(
-            COGSEntry.date >= start_date,
-            COGSEntry.date <= end_date
-        )
-        
-        if product_id:
-            cogs_query = cogs_query.filter(COGSEntry.product_id == product_id)
+        daily = self._daily_cogs_rollup(start_date, end_date, product_id, category_id)
+        direct_total, sales_cogs_total, journal_cogs_total, direct_count, sales_count, journal_count = \
+            self._sum_days(daily.values())
         
-        cogs_entries = cogs_query.all()
-        
-        # Get sales data for the period to calculate COGS from sales
-        sales_cogs = self._calculate_sales_cogs(start_date, end_date, product_id, category_id)
-        
-        # Calculate total COGS
-        direct_cogs_total = sum(
-            (self._entry_total_cost_decimal(entry) for entry in cogs_entries),
-            Decimal(0)
-        )
-        journal_cogs_total, journal_entry_count = self._calculate_journal_cogs(
-            start_date,
-            end_date,
-            product_id=product_id,
-            category_id=category_id
-        )
-        direct_cogs_total += journal_cogs_total
-        sales_cogs_total = self._to_decimal(sales_cogs["total_cogs"])
+        # Journal COGS is reported as part of direct COGS
+        direct_cogs_total = direct_total + journal_cogs_total
         total_cogs = direct_cogs_total + sales_cogs_total
+        total_entries = direct_count + sales_count + journal_count
         
         # Get product breakdown
-        product_breakdown = self._get_product_cogs_breakdown(cogs_entries, sales_cogs["by_product"])
+        product_breakdown = self._get_product_cogs_breakdown(start_date, end_date, product_id)
         
         # Get category breakdown if applicable
         category_breakdown = self._get_category_cogs_breakdown(product_breakdown)
         
         # Calculate trends and comparisons
         previous_period_data = self._get_previous_period_comparison(
-            start_date, end_date, period_type, product_id, category_id
+            start_date, end_date, period_type, product_id, category_id, current_total=total_cogs
         )
         
         # Get monthly breakdown for quarterly/annual reports
@@ -189,12 +210,8 @@ class COGSReportsService:
                 "direct_cogs": float(direct_cogs_total),
                 "sales_cogs": float(sales_cogs_total),
                 "journal_cogs": float(journal_cogs_total),
-                "total_entries": len(cogs_entries) + sales_cogs["total_transactions"] + journal_entry_count,
-                "average_cogs_per_entry": float(
-                    total_cogs / Decimal(len(cogs_entries) + sales_cogs["total_transactions"] + journal_entry_count)
-                    if (len(cogs_entries) + sales_cogs["total_transactions"] + journal_entry_count) > 0
-                    else Decimal(0)
-                )
+                "total_entries": total_entries,
+                "average_cogs_per_entry": float(total_cogs / Decimal(total_entries) if total_entries > 0 else Decimal(0))
             },
             "product_breakdown": product_breakdown,
             "category_breakdown": category_breakdown,
@@ -203,176 +220,220 @@ class COGSReportsService:
             "generated_at": datetime.now().isoformat()
         }
     
-    def _calculate_sales_cogs(
+    # ------------------------------------------------------------------
+    # Per-day rollup
+    # ------------------------------------------------------------------
+    def _cogs_sources(
         self,
         start_date: date,
         end_date: date,
         product_id: Optional[str] = None,
         category_id: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Calculate COGS from sales transactions"""
-        
-        # Get sales within the period
-        sales_query = self.db.query(Sale).filter(
-            Sale.date >= start_date,
-            Sale.date <= end_date
+    ) -> List:
+        """One select per COGS source yielding (day, source, amount, entries)."""
+        direct = select(
+            func.date(COGSEntry.date).label('day'),
+            literal_column("'direct'").label('source'),
+            (COGSEntry.cost * func.coalesce(COGSEntry.quantity, 1)).label('amount'),
+            literal_column('1').label('entries'),
+        ).where(COGSEntry.date >= start_date, COGSEntry.date <= end_date)
+        
+        # Sale.date is a timestamp: include the whole end day
+        sales = select(
+            func.date(Sale.date).label('day'),
+            literal_column("'sales'").label('source'),
+            (func.coalesce(SaleItem.quantity, 0) * func.coalesce(SaleItem.cost_price, 0)).label('amount'),
+            literal_column('1').label('entries'),
+        ).select_from(SaleItem).join(Sale, Sale.id == SaleItem.sale_id).where(
+            Sale.date >= start_date, Sale.date < end_date + timedelta(days=1)
         )
         
-        sales = sales_query.all()
-        
-        total_cogs = Decimal(0)
-        total_transactions = 0
-        by_product = {}
-        
-        for sale in sales:
-            items = []
-            if hasattr(sale, 'items') and sale.items:
-                items = sale.items
-            elif hasattr(sale, 'sale_items') and sale.sale_items:
-                items = sale.sale_items
-
-            for item in items:
-                if product_id and str(item.product_id) != product_id:
-                    continue
-
-                quantity = self._to_decimal(getattr(item, "quantity", 0))
-                unit_cost = self._to_decimal(getattr(item, "cost_price", 0))
-                item_cogs = quantity * unit_cost
-                total_cogs += item_cogs
-                total_transactions += 1
-
-                product_key = str(item.product_id)
-                if product_key not in by_product:
-                    by_product[product_key] = {
-                        "product_id": item.product_id,
-                        "total_cogs": Decimal(0),
-                        "quantity_sold": Decimal(0),
-                        "transactions": 0
-                    }
-
-                by_product[product_key]["total_cogs"] += item_cogs
-                by_product[product_key]["quantity_sold"] += quantity
-                by_product[product_key]["transactions"] += 1
+        if product_id:
+            direct = direct.where(COGSEntry.product_id == product_id)
+            sales = sales.where(SaleItem.product_id == product_id)
+            # Journal entries are not linked to specific products, so respect product filters.
+            return [direct, sales]
+        
+        net = func.coalesce(JournalEntry.debit_amount, 0) - func.coalesce(JournalEntry.credit_amount, 0)
+        journal = select(
+            func.date(JournalEntry.date).label('day'),
+            literal_column("'journal'").label('source'),
+            net.label('amount'),
+            case((net != 0, 1), else_=0).label('entries'),
+        ).join(AccountingCode, JournalEntry.accounting_code_id == AccountingCode.id).where(
+            JournalEntry.date >= start_date,
+            JournalEntry.date <= end_date,
+            func.lower(AccountingCode.account_type) == 'expense',
+            # Limit to codes that clearly map to cost-of-goods buckets.
+            or_(
+                func.lower(AccountingCode.category).like('%cost of sales%'),
+                func.lower(AccountingCode.category).like('%cost of goods%'),
+                func.lower(AccountingCode.name).like('%cost of sales%'),
+                func.lower(AccountingCode.name).like('%cost of goods%'),
+                func.lower(AccountingCode.name).like('%cogs%')
+            )
+        )
+        if category_id:
+            journal = journal.where(AccountingCode.category == category_id)
+        return [direct, sales, journal]
         
-        return {
-            "total_cogs": total_cogs,
-            "total_transactions": total_transactions,
-            "by_product": by_product
-        }
+    def _query_daily_cogs(
+        self,
+        start_date: date,
+        end_date: date,
+        product_id: Optional[str] = None,
+        category_id: Optional[str] = None
+    ) -> Dict[date, DailyCOGS]:
+        """COGS per day and source between two dates in one grouped query."""
+        sources = union_all(*self._cogs_sources(start_date, end_date, product_id, category_id)).subquery()
+        rows = self.db.execute(
+            select(sources.c.day, sources.c.source, func.sum(sources.c.amount), func.sum(sources.c.entries))
+            .group_by(sources.c.day, sources.c.source)
+        ).all()
+
+        daily: Dict[date, List] = {}
+        for day, source, amount, entries in rows:
+            if day is None:
+                continue
+            values = daily.setdefault(_as_date(day), list(_EMPTY_DAY))
+            index = _SOURCES.index(source)
+            values[index] += self._to_decimal(amount)
+            values[index + 3] += int(entries or 0)
+        return {day: tuple(values) for day, values in daily.items()}
 
-    def _calculate_journal_cogs(
+    def _daily_cogs_rollup(
         self,
         start_date: date,
         end_date: date,
         product_id: Optional[str] = None,
         category_id: Optional[str] = None
-    ) -> Tuple[Decimal, int]:
-        """Derive COGS totals from general-ledger journal entries."""
+    ) -> Dict[date, DailyCOGS]:
+        """
+        Per-day COGS between two dates, served from month-sized cached chunks.
 
-        # Journal entries are not linked to specific products, so respect product filters.
-        if product_id:
-            return Decimal(0), 0
-
-        query = (
-            self.db.query(
-                JournalEntry.debit_amount,
-                JournalEntry.credit_amount,
-                AccountingCode.category,
-                AccountingCode.name
-            )
-            .join(AccountingCode, JournalEntry.accounting_code_id == AccountingCode.id)
-            .filter(
-                JournalEntry.date >= start_date,
-                JournalEntry.date <= end_date,
-                func.lower(AccountingCode.account_type) == 'expense'
-            )
-        )
+        Months missing from the cache are fetched together in one grouped query and
+        cached individually, so overlapping reports and trends reuse each other's work.
+        """
+        scope = f"{product_id or '*'}|{category_id or '*'}"
+        today = date.today()
+        months = []
+        month = _month_start(start_date)
+        while month <= end_date:
+            months.append(month)
+            month = _next_month(month)
 
-        # Limit to codes that clearly map to cost-of-goods buckets.
-        cogs_criteria = or_(
-            func.lower(AccountingCode.category).like('%cost of sales%'),
-            func.lower(AccountingCode.category).like('%cost of goods%'),
-            func.lower(AccountingCode.name).like('%cost of sales%'),
-            func.lower(AccountingCode.name).like('%cost of goods%'),
-            func.lower(AccountingCode.name).like('%cogs%')
-        )
-        query = query.filter(cogs_criteria)
+        daily: Dict[date, DailyCOGS] = {}
+        missing = []
+        for month in months:
+            chunk = _COGS_DAILY_CACHE.get(f"{scope}|{month.isoformat()}")
+            if chunk is None:
+                missing.append(month)
+            else:
+                daily.update(chunk)
 
-        if category_id:
-            query = query.filter(AccountingCode.category == category_id)
+        if missing:
+            generation = _generation
+            fetched = self._query_daily_cogs(missing[0], _month_end(missing[-1]), product_id, category_id)
+            with _invalidation_lock:
+                # Skip storing chunks computed while a commit was invalidating months
+                store = generation == _generation
+                for month in missing:
+                    chunk = {day: values for day, values in fetched.items() if _month_start(day) == month}
+                    if store:
+                        ttl = (settings.cogs_rollup_open_month_ttl_seconds if _month_end(month) >= today
+                               else settings.cogs_rollup_cache_ttl_seconds)
+                        _COGS_DAILY_CACHE.set(f"{scope}|{month.isoformat()}", chunk, ttl=ttl)
+                    daily.update(chunk)
 
-        totals = Decimal(0)
-        entry_count = 0
+        return {day: values for day, values in daily.items() if start_date <= day <= end_date}
 
-        for debit_amount, credit_amount, _, _ in query.all():
-            amount = self._to_decimal(debit_amount) - self._to_decimal(credit_amount)
-            if amount == 0:
-                continue
-            totals += amount
-            entry_count += 1
+    @staticmethod
+    def _sum_days(days) -> DailyCOGS:
+        totals = list(_EMPTY_DAY)
+        for values in days:
+            for index, value in enumerate(values):
+                totals[index] += value
+        return tuple(totals)
 
-        return totals, entry_count
+    # ------------------------------------------------------------------
+    # Breakdowns
+    # ------------------------------------------------------------------
+    def _product_sources(
+        self,
+        start_date: date,
+        end_date: date,
+        product_id: Optional[str] = None,
+        bucket: bool = False
+    ) -> Any:
+        """Direct and sales COGS rows (product_id, source, amount, quantity[, month]) as a subquery."""
+        direct_columns = [
+            COGSEntry.product_id.label('product_id'),
+            literal_column("'direct'").label('source'),
+            (COGSEntry.cost * func.coalesce(COGSEntry.quantity, 1)).label('amount'),
+            func.coalesce(COGSEntry.quantity, 0).label('quantity'),
+        ]
+        sales_columns = [
+            SaleItem.product_id.label('product_id'),
+            literal_column("'sales'").label('source'),
+            (func.coalesce(SaleItem.quantity, 0) * func.coalesce(SaleItem.cost_price, 0)).label('amount'),
+            func.coalesce(SaleItem.quantity, 0).label('quantity'),
+        ]
+        if bucket:
+            direct_columns.append(self._month_bucket(COGSEntry.date).label('month'))
+            sales_columns.append(self._month_bucket(Sale.date).label('month'))
+
+        direct = select(*direct_columns).where(COGSEntry.date >= start_date, COGSEntry.date <= end_date)
+        sales = select(*sales_columns).select_from(SaleItem).join(Sale, Sale.id == SaleItem.sale_id).where(
+            Sale.date >= start_date, Sale.date < end_date + timedelta(days=1)
+        )
+        if product_id:
+            direct = direct.where(COGSEntry.product_id == product_id)
+            sales = sales.where(SaleItem.product_id == product_id)
+        return union_all(direct, sales).subquery()
+
+    def _month_bucket(self, column):
+        """Month bucket of a date/timestamp column (date_trunc on PostgreSQL)."""
+        if self.db.get_bind().dialect.name == 'postgresql':
+            return func.date_trunc('month', column)
+        return func.strftime('%Y-%m-01', column)
     
     def _get_product_cogs_breakdown(
         self,
-        cogs_entries: List[COGSEntry],
-        sales_by_product: Dict[str, Any]
+        start_date: date,
+        end_date: date,
+        product_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get COGS breakdown by product"""
+        """Get COGS breakdown by product (one grouped query joined to product details)"""
 
-        product_totals = {}
+        sources = self._product_sources(start_date, end_date, product_id)
+        rows = self.db.execute(
+            select(
+                sources.c.product_id,
+                func.sum(case((sources.c.source == 'direct', sources.c.amount), else_=0)),
+                func.sum(case((sources.c.source == 'sales', sources.c.amount), else_=0)),
+                func.sum(sources.c.quantity),
+                func.count(),
+                Product.name,
+                Product.sku,
+                Product.category,
+            ).select_from(sources).outerjoin(Product, Product.id == sources.c.product_id)
+            .group_by(sources.c.product_id, Product.name, Product.sku, Product.category)
+        ).all()
         
-        # Process direct COGS entries
-        for entry in cogs_entries:
-            product_key = str(entry.product_id)
-            if product_key not in product_totals:
-                product_totals[product_key] = {
-                    "product_id": entry.product_id,
-                    "direct_cogs": Decimal(0),
-                    "sales_cogs": Decimal(0),
-                    "total_cogs": Decimal(0),
-                    "quantity": Decimal(0),
-                    "entries_count": 0
-                }
-
-            product_totals[product_key]["direct_cogs"] += self._entry_total_cost_decimal(entry)
-            product_totals[product_key]["quantity"] += self._to_decimal(getattr(entry, "quantity", 0))
-            product_totals[product_key]["entries_count"] += 1
-        
-        # Process sales COGS
-        for product_key, sales_data in sales_by_product.items():
-            if product_key not in product_totals:
-                product_totals[product_key] = {
-                    "product_id": sales_data["product_id"],
-                    "direct_cogs": Decimal(0),
-                    "sales_cogs": Decimal(0),
-                    "total_cogs": Decimal(0),
-                    "quantity": Decimal(0),
-                    "entries_count": 0
-                }
-            
-            product_totals[product_key]["sales_cogs"] += self._to_decimal(sales_data.get("total_cogs"))
-            product_totals[product_key]["quantity"] += self._to_decimal(sales_data.get("quantity_sold"))
-            product_totals[product_key]["entries_count"] += sales_data["transactions"]
-        
-        # Calculate totals and add product details
         breakdown = []
-        for product_key, data in product_totals.items():
-            data["total_cogs"] = data["direct_cogs"] + data["sales_cogs"]
-            
-            # Get product details
-            product = self.db.query(Product).filter(Product.id == data["product_id"]).first()
-            if product:
-                data["product_name"] = product.name
-                data["product_sku"] = product.sku
-                data["category_id"] = getattr(product, 'category_id', None)
-            
-            # Convert to float for JSON serialization
-            data["direct_cogs"] = float(data["direct_cogs"])
-            data["sales_cogs"] = float(data["sales_cogs"])
-            data["total_cogs"] = float(data["total_cogs"])
-            data["quantity"] = float(data["quantity"])
-            
+        for row_product_id, direct, sales, quantity, entries, name, sku, category in rows:
+            data = {
+                "product_id": row_product_id,
+                "direct_cogs": float(self._to_decimal(direct)),
+                "sales_cogs": float(self._to_decimal(sales)),
+                "total_cogs": float(self._to_decimal(direct) + self._to_decimal(sales)),
+                "quantity": float(self._to_decimal(quantity)),
+                "entries_count": int(entries or 0)
+            }
+            if name is not None:
+                data["product_name"] = name
+                data["product_sku"] = sku
+                data["category_id"] = category
             breakdown.append(data)
         
         # Sort by total COGS descending
@@ -418,6 +479,48 @@ class COGSReportsService:
         
         return breakdown
     
+    def _get_period_breakdowns(
+        self,
+        start_date: date,
+        end_date: date,
+        period_type: str,
+        breakdown: str,
+        product_id: Optional[str] = None
+    ) -> Dict[date, List[Dict[str, Any]]]:
+        """Product or category COGS per trend period from one month-bucketed grouped query."""
+        sources = self._product_sources(start_date, end_date, product_id, bucket=True)
+        if breakdown == "category":
+            key_columns = [func.coalesce(Product.category, 'uncategorized')]
+        else:
+            key_columns = [sources.c.product_id, Product.name]
+        rows = self.db.execute(
+            select(sources.c.month, *key_columns, func.sum(sources.c.amount))
+            .select_from(sources).outerjoin(Product, Product.id == sources.c.product_id)
+            .group_by(sources.c.month, *key_columns)
+        ).all()
+
+        periods: Dict[date, Dict[Tuple, Decimal]] = {}
+        for row in rows:
+            if row[0] is None:
+                continue
+            period = _period_start(_as_date(row[0]), period_type)
+            key = tuple(row[1:-1])
+            totals = periods.setdefault(period, {})
+            totals[key] = totals.get(key, Decimal(0)) + self._to_decimal(row[-1])
+
+        result: Dict[date, List[Dict[str, Any]]] = {}
+        for period, totals in periods.items():
+            if breakdown == "category":
+                items = [{"category": key[0], "total_cogs": float(total)} for key, total in totals.items()]
+            else:
+                items = [
+                    {"product_id": key[0], "product_name": key[1], "total_cogs": float(total)}
+                    for key, total in totals.items()
+                ]
+            items.sort(key=lambda x: x["total_cogs"], reverse=True)
+            result[period] = items
+        return result
+
     def _get_monthly_cogs_breakdown(
         self,
         start_date: date,
@@ -427,41 +530,26 @@ class COGSReportsService:
     ) -> List[Dict[str, Any]]:
         """Get monthly COGS breakdown for quarterly/annual reports"""
         
+        daily = self._daily_cogs_rollup(start_date, end_date, product_id, category_id)
         monthly_data = []
         current_date = start_date.replace(day=1)
         
         while current_date <= end_date:
-            # Get last day of current month
-            _, last_day = monthrange(current_date.year, current_date.month)
-            month_end = date(current_date.year, current_date.month, last_day)
-            
-            # Don't go beyond the end date
-            if month_end > end_date:
-                month_end = end_date
-            
-            # Generate monthly report
-            month_report = self._generate_period_cogs_report(
-                start_date=current_date,
-                end_date=month_end,
-                period_type="monthly",
-                product_id=product_id,
-                category_id=category_id
+            month_end = min(_month_end(current_date), end_date)
+            direct, sales, journal, *_ = self._sum_days(
+                values for day, values in daily.items() if current_date <= day <= month_end
             )
             
             monthly_data.append({
                 "month": current_date.strftime("%Y-%m"),
                 "month_name": calendar.month_name[current_date.month],
                 "year": current_date.year,
-                "total_cogs": month_report["summary"]["total_cogs"],
-                "direct_cogs": month_report["summary"]["direct_cogs"],
-                "sales_cogs": month_report["summary"]["sales_cogs"]
+                "total_cogs": float(direct + sales + journal),
+                "direct_cogs": float(direct + journal),
+                "sales_cogs": float(sales)
             })
             
-            # Move to next month
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
+            current_date = _next_month(current_date)
         
         return monthly_data
     
@@ -471,7 +559,8 @@ class COGSReportsService:
         end_date: date,
         period_type: str,
         product_id: Optional[str] = None,
-        category_id: Optional[str] = None
+        category_id: Optional[str] = None,
+        current_total: Optional[Decimal] = None
     ) -> Dict[str, Any]:
         """Get comparison with previous period"""
         
@@ -480,8 +569,8 @@ class COGSReportsService:
         prev_end_date = start_date - timedelta(days=1)
         prev_start_date = prev_end_date - timedelta(days=period_length - 1)
         
-        # Calculate changes using direct totals to avoid recursive report generation
-        current_total = self._calculate_period_total(start_date, end_date, product_id, category_id)
+        if current_total is None:
+            current_total = self._calculate_period_total(start_date, end_date, product_id, category_id)
         previous_total = self._calculate_period_total(prev_start_date, prev_end_date, product_id, category_id)
 
         change_amount = current_total - previous_total
@@ -512,30 +601,10 @@ class COGSReportsService:
         category_id: Optional[str] = None
     ) -> Decimal:
         """Calculate total COGS for a period"""
-        
-        # Direct COGS entries
-        cogs_query = self.db.query(COGSEntry).filter(
-            COGSEntry.date >= start_date,
-            COGSEntry.date <= end_date
-        )
-
-        if product_id:
-            cogs_query = cogs_query.filter(COGSEntry.product_id == product_id)
-
-        direct_entries = cogs_query.all()
-        direct_total = sum((self._entry_total_cost_decimal(entry) for entry in direct_entries), Decimal(0))
-
-        # Sales COGS
-        sales_cogs = self._calculate_sales_cogs(start_date, end_date, product_id, category_id)
-
-        journal_total, _ = self._calculate_journal_cogs(
-            start_date,
-            end_date,
-            product_id=product_id,
-            category_id=category_id
+        direct, sales, journal, *_ = self._sum_days(
+            self._daily_cogs_rollup(start_date, end_date, product_id, category_id).values()
         )
-
-        return direct_total + self._to_decimal(sales_cogs["total_cogs"]) + journal_total
+        return direct + sales + journal
     
     def _get_period_description(self, start_date: date, end_date: date, period_type: str) -> str:
         """Get human-readable period description"""
@@ -555,52 +624,51 @@ class COGSReportsService:
         start_date: date,
         end_date: date,
         period_type: str = "monthly",
-        product_id: Optional[str] = None
+        product_id: Optional[str] = None,
+        breakdown: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get COGS trend analysis over time"""
+        """
+        Get COGS trend analysis over time.
+
+        Args:
+            start_date: First day of the trend
+            end_date: Last day of the trend
+            period_type: monthly, quarterly or annual (anything else is monthly)
+            product_id: Only include COGS of this product
+            breakdown: Add per-period "breakdown" rows by "product" or "category"
+                (direct and sales COGS; journal COGS is not product-specific)
+
+        Returns:
+            Dict with one trend row per period and summary analysis
+        """
+        if period_type not in ("monthly", "quarterly", "annual"):
+            period_type = "monthly"
+
+        daily = self._daily_cogs_rollup(start_date, end_date, product_id)
+        period_totals: Dict[date, Decimal] = {}
+        for day, (direct, sales, journal, *_counts) in daily.items():
+            period = _period_start(day, period_type)
+            period_totals[period] = period_totals.get(period, Decimal(0)) + direct + sales + journal
+
+        breakdowns = {}
+        if breakdown in ("product", "category"):
+            breakdowns = self._get_period_breakdowns(start_date, end_date, period_type, breakdown, product_id)
         
         trends = []
         current_date = start_date
-        
         while current_date <= end_date:
-            if period_type == "monthly":
-                # Monthly periods
-                _, last_day = monthrange(current_date.year, current_date.month)
-                period_end = date(current_date.year, current_date.month, last_day)
-                next_date = date(current_date.year + (1 if current_date.month == 12 else 0), 
-                               (current_date.month % 12) + 1, 1)
-            elif period_type == "quarterly":
-                # Quarterly periods
-                quarter = ((current_date.month - 1) // 3) + 1
-                quarter_start_month = (quarter - 1) * 3 + 1
-                quarter_end_month = quarter * 3
-                _, last_day = monthrange(current_date.year, quarter_end_month)
-                period_end = date(current_date.year, quarter_end_month, last_day)
-                next_date = date(current_date.year + (1 if quarter == 4 else 0), 
-                               ((quarter % 4) * 3) + 1, 1)
-            else:
-                # Default to monthly
-                _, last_day = monthrange(current_date.year, current_date.month)
-                period_end = date(current_date.year, current_date.month, last_day)
-                next_date = date(current_date.year + (1 if current_date.month == 12 else 0), 
-                               (current_date.month % 12) + 1, 1)
-            
-            if period_end > end_date:
-                period_end = end_date
-            
-            # Calculate COGS for this period
-            period_total = self._calculate_period_total(current_date, period_end, product_id)
-            
-            trends.append({
+            period = _period_start(current_date, period_type)
+            period_end = min(_period_end(current_date, period_type), end_date)
+            trend = {
                 "period_start": current_date.isoformat(),
                 "period_end": period_end.isoformat(),
                 "period_label": self._get_period_description(current_date, period_end, period_type),
-                "total_cogs": float(period_total)
-            })
-            
-            current_date = next_date
-            if current_date > end_date:
-                break
+                "total_cogs": float(period_totals.get(period, Decimal(0)))
+            }
+            if breakdown in ("product", "category"):
+                trend["breakdown"] = breakdowns.get(period, [])
+            trends.append(trend)
+            current_date = _period_end(current_date, period_type) + timedelta(days=1)
         
         return {
             "trends": trends,
@@ -610,4 +678,62 @@ class COGSReportsService:
                 "highest_period": max(trends, key=lambda x: x["total_cogs"]) if trends else None,
                 "lowest_period": min(trends, key=lambda x: x["total_cogs"]) if trends else None
             }
-        }
\ No newline at end of file
+        }
+
+
+def invalidate_cogs_months(months: Optional[Set[date]] = None) -> None:
+    """Drop the cached daily COGS of the given months (first days), or of every month"""
+    global _generation
+    with _invalidation_lock:
+        _generation += 1
+        if months is None:
+            _COGS_DAILY_CACHE.clear()
+            return
+        stale = {month.isoformat() for month in months}
+        for key in _COGS_DAILY_CACHE.keys():
+            # Keys are "<product>|<category>|<month start>"
+            if key.rsplit('|', 1)[-1] in stale:
+                _COGS_DAILY_CACHE.delete(key)
+
+
+# Models whose rows feed the rollup -> their date column
+_COGS_SOURCE_DATES = {COGSEntry: 'date', Sale: 'date', JournalEntry: 'date'}
+
+
+def _row_dates(obj) -> Set:
+    history = get_history(obj, _COGS_SOURCE_DATES[type(obj)])
+    return {*history.added, *history.unchanged, *history.deleted}
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_cogs_changes(session: Session, flush_context) -> None:
+    """Record the dates of COGS source rows this transaction changes, applied on commit"""
+    changes = session.info.get(_CHANGES_KEY)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj) in _COGS_SOURCE_DATES:
+            affected = _row_dates(obj)
+        elif isinstance(obj, SaleItem):
+            with session.no_autoflush:
+                sale = session.get(Sale, obj.sale_id) if obj.sale_id else None
+            affected = _row_dates(sale) if sale is not None else {_ALL_MONTHS}
+        else:
+            continue
+        if changes is None:
+            changes = session.info[_CHANGES_KEY] = set()
+        changes.update(affected)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_cogs_after_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    if _ALL_MONTHS in changes:
+        invalidate_cogs_months()
+        return
+    invalidate_cogs_months({_month_start(_as_date(day)) for day in changes if day is not None})
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_cogs_changes(session: Session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
@@ -7,7 +7,7 @@ Integrates with invoice reversal system and provides proper accounting documenta
 
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
+from sqlalchemy import and_, func
 from decimal import Decimal
 from datetime import date, datetime
 import logging
@@ -17,6 +17,7 @@ from app.models.sales import Invoice, InvoiceItem, Customer, Sale, SaleItem
 from app.models.accounting import AccountingEntry, JournalEntry, AccountingCode
 from app.models.inventory import InventoryTransaction
 from app.services.accounting_service import AccountingService
+from app.services.document_sequence_service import DocumentSequenceService
 from app.services.inventory_service import InventoryService
 from app.services.accounting_dimensions_service import AccountingDimensionService
 # from app.core.exceptions import ValidationError, BusinessLogicError  # Not available - using Exception
@@ -944,23 +945,24 @@ class CreditNoteService:
             )
 
     def _generate_credit_note_number(self) -> str:
-        """Generate unique credit note number"""
+        """Generate unique credit note number, restarting at 1 every month (CN + YYYYMM + sequence)"""
 
         today = date.today()
         prefix = f"CN{today.strftime('%Y%m')}"
+        # One counter per month of the year, so the sequence restarts with the prefix
+        number = DocumentSequenceService(self.db).next_value(
+            f"credit_note_{today.month:02d}", year=today.year,
+            seed=lambda: self._last_credit_note_sequence(prefix)
+        )
+        return f"{prefix}{number:04d}"
 
-        # Get the next sequence number for this month
-        last_credit_note = self.db.query(CreditNote).filter(
+    def _last_credit_note_sequence(self, prefix: str) -> int:
+        """Highest sequence used under a month's prefix before that month's counter existed"""
+        numbers = self.db.query(CreditNote.credit_note_number).filter(
             CreditNote.credit_note_number.like(f"{prefix}%")
-        ).order_by(desc(CreditNote.credit_note_number)).first()
-
-        if last_credit_note:
-            last_number = int(last_credit_note.credit_note_number[-4:])
-            next_number = last_number + 1
-        else:
-            next_number = 1
-
-        return f"{prefix}{next_number:04d}"
+        )
+        return max((int(number[len(prefix):]) for (number,) in numbers if number[len(prefix):].isdigit()),
+                   default=0)
 
     def get_credit_note_by_id(self, credit_note_id: str) -> Optional[CreditNote]:
         """Get credit note by ID with all relationships"""
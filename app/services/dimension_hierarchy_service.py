@@ -0,0 +1,214 @@
+"""
+Dimension Hierarchy Service
+
+Keeps the materialised path of accounting dimension values (tree_path, e.g.
+``/<root id>/<child id>/``) in step with their parents, so a whole subtree can be
+selected with one indexed prefix predicate instead of a recursive walk:
+
+- Every flush gives new values the path of their parent plus their own ID (and
+  their parent's code path as hierarchy_path when none was set).
+- Moving a value (new parent) or recoding it rewrites the value and, with one
+  UPDATE, every descendant's tree_path, hierarchy_level and hierarchy_path.
+
+Rows that bypass the ORM can be repaired with rebuild_tree_paths().
+"""
+
+from typing import Dict, Iterable, List, Optional
+import uuid
+
+from sqlalchemy import bindparam, event, false, func, literal, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.accounting_dimensions import AccountingDimensionValue
+
+PATH_SEPARATOR = '/'
+
+_MOVES_KEY = 'dimension_value_moves'
+
+
+def child_tree_path(parent_path: Optional[str], value_id: str) -> str:
+    """tree_path of a value below a parent with the given path (None for roots)"""
+    return f"{parent_path or PATH_SEPARATOR}{value_id}{PATH_SEPARATOR}"
+
+
+def children_hierarchy_path(hierarchy_path: Optional[str], code: str) -> str:
+    """hierarchy_path (ancestor codes) given to the children of a value"""
+    return f"{hierarchy_path or ''}/{code}".lstrip('/')
+
+
+def subtree_condition(db: Session, value_entity, value_ids: Iterable[str]):
+    """Predicate matching rows of value_entity inside the subtrees of value_ids
+
+    Args:
+        db: Session used to look up the roots' paths (one query)
+        value_entity: AccountingDimensionValue or an alias of it
+        value_ids: Subtree roots, which are included in the match
+
+    Returns:
+        A SQL condition; always false when no root has a path
+    """
+    paths = db.execute(
+        select(AccountingDimensionValue.tree_path).where(AccountingDimensionValue.id.in_(list(value_ids)))
+    ).scalars().all()
+    conditions = [value_entity.tree_path.startswith(path, autoescape=True) for path in paths if path]
+    return or_(*conditions) if conditions else false()
+
+
+def rebuild_tree_paths(db: Session, dimension_id: Optional[str] = None) -> int:
+    """Recompute tree_path for every value (of one dimension) from parent links
+
+    Returns:
+        Number of values whose stored path changed
+    """
+    query = select(
+        AccountingDimensionValue.id, AccountingDimensionValue.parent_value_id, AccountingDimensionValue.tree_path
+    )
+    if dimension_id:
+        query = query.where(AccountingDimensionValue.dimension_id == dimension_id)
+    rows = db.execute(query).all()
+    paths = compute_tree_paths({row.id: row.parent_value_id for row in rows})
+
+    changed = [
+        {'value_id': row.id, 'new_tree_path': paths[row.id]} for row in rows if row.tree_path != paths[row.id]
+    ]
+    if changed:
+        table = AccountingDimensionValue.__table__
+        db.execute(
+            table.update().where(table.c.id == bindparam('value_id')).values(tree_path=bindparam('new_tree_path')),
+            changed
+        )
+        db.commit()
+    return len(changed)
+
+
+def compute_tree_paths(parents: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """tree_path for every value given its parent ID, in O(n)
+
+    Parents outside the mapping are treated as missing, making the value a
+    root; cycles are cut at the value where they are detected.
+    """
+    paths: Dict[str, str] = {}
+    for start in parents:
+        chain = []
+        current = start
+        while current is not None and current not in paths and current not in chain:
+            chain.append(current)
+            parent = parents.get(current)
+            current = parent if parent in parents else None
+        parent_path = paths.get(current) if current is not None else None
+        for value_id in reversed(chain):
+            parent_path = paths[value_id] = child_tree_path(parent_path, value_id)
+    return paths
+
+
+def _parent_of(session: Session, value: AccountingDimensionValue,
+               pending: Dict[str, AccountingDimensionValue]) -> Optional[AccountingDimensionValue]:
+    if get_history(value, 'parent_value').has_changes():
+        return value.parent_value
+    if not value.parent_value_id:
+        return None
+    return pending.get(value.parent_value_id) or session.get(AccountingDimensionValue, value.parent_value_id)
+
+
+def _path_of(session: Session, value: AccountingDimensionValue,
+             pending: Dict[str, AccountingDimensionValue], resolving: set) -> str:
+    """Current tree_path of a value, assigning it first when it is new or moved"""
+    if value.id not in pending and value.tree_path:
+        return value.tree_path
+    if value.id in resolving:
+        raise ValueError("Dimension value hierarchy would contain a cycle")
+    resolving.add(value.id)
+    parent = _parent_of(session, value, pending)
+    parent_path = _path_of(session, parent, pending, resolving) if parent is not None else None
+    resolving.discard(value.id)
+    value.tree_path = child_tree_path(parent_path, value.id)
+    if parent is not None and value.hierarchy_path is None:
+        value.hierarchy_path = children_hierarchy_path(parent.hierarchy_path, parent.code)
+    pending.pop(value.id, None)
+    return value.tree_path
+
+
+@event.listens_for(Session, 'before_flush')
+def _assign_tree_paths(session: Session, flush_context, instances) -> None:
+    """Give new and moved dimension values their materialised path."""
+    pending: Dict[str, AccountingDimensionValue] = {}
+    moves: List[Dict] = []
+
+    for obj in session.new:
+        if isinstance(obj, AccountingDimensionValue):
+            if not obj.id:
+                obj.id = str(uuid.uuid4())
+            pending[obj.id] = obj
+
+    for obj in session.dirty:
+        if not isinstance(obj, AccountingDimensionValue):
+            continue
+        reparented = (get_history(obj, 'parent_value_id').has_changes()
+                      or get_history(obj, 'parent_value').has_changes())
+        code_history = get_history(obj, 'code')
+        if not reparented and not code_history.has_changes():
+            continue
+        old_code = code_history.deleted[0] if code_history.deleted else obj.code
+        moves.append({
+            'value': obj,
+            'old_tree_path': obj.tree_path,
+            'old_level': obj.hierarchy_level,
+            'old_prefix': children_hierarchy_path(obj.hierarchy_path, old_code),
+            'reparented': reparented,
+        })
+        if reparented:
+            pending[obj.id] = obj
+
+    if not pending and not moves:
+        return
+
+    resolving: set = set()
+    for value in list(pending.values()):
+        if value.id in pending:
+            _path_of(session, value, pending, resolving)
+
+    for move in moves:
+        value = move['value']
+        if move['reparented']:
+            if move['old_tree_path'] and value.tree_path.startswith(move['old_tree_path']) \
+                    and value.tree_path != move['old_tree_path']:
+                raise ValueError("Dimension value cannot be moved below its own descendant")
+            parent = _parent_of(session, value, {})
+            value.hierarchy_level = parent.hierarchy_level + 1 if parent is not None else 1
+            value.hierarchy_path = (
+                children_hierarchy_path(parent.hierarchy_path, parent.code) if parent is not None else None
+            )
+        move['new_tree_path'] = value.tree_path
+        move['new_prefix'] = children_hierarchy_path(value.hierarchy_path, value.code)
+        move['level_delta'] = value.hierarchy_level - (move['old_level'] or value.hierarchy_level)
+        move['value_id'] = value.id
+        del move['value']
+
+    if moves:
+        session.info.setdefault(_MOVES_KEY, []).extend(moves)
+
+
+@event.listens_for(Session, 'after_flush')
+def _move_descendants(session: Session, flush_context) -> None:
+    """Rewrite the paths of every descendant of values moved by this flush."""
+    moves = session.info.pop(_MOVES_KEY, None)
+    if not moves:
+        return
+    table = AccountingDimensionValue.__table__
+    connection = session.connection()
+    for move in moves:
+        if not move['old_tree_path']:
+            continue
+        connection.execute(
+            table.update()
+            .where(table.c.tree_path.startswith(move['old_tree_path'], autoescape=True),
+                   table.c.id != move['value_id'])
+            .values(
+                tree_path=literal(move['new_tree_path'])
+                + func.substr(table.c.tree_path, len(move['old_tree_path']) + 1),
+                hierarchy_level=table.c.hierarchy_level + move['level_delta'],
+                hierarchy_path=literal(move['new_prefix'])
+                + func.substr(table.c.hierarchy_path, len(move['old_prefix']) + 1),
+            )
+        )
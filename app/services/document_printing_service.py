@@ -33,6 +33,7 @@ from reportlab.platypus import (
 from sqlalchemy.orm import Session
 
 from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import get_app_settings
 
 
 class DocumentPrintingService:
@@ -85,7 +86,7 @@ class DocumentPrintingService:
 
         settings = defaults.copy()
         try:
-            instance = AppSetting.get_instance(self.db)
+            instance = get_app_settings(self.db)
             if instance:
                 settings.update(
                     {
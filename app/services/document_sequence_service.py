@@ -0,0 +1,154 @@
+"""
+Document Sequence Service
+
+Invoice, credit note, receipt, POS sale and job card numbers come from one counter
+row per (document type, branch, year) in document_sequences. Taking a number is a
+single indexed UPDATE ... RETURNING (an upsert the first time a scope is used), so
+there is no MAX() scan and no probing for a free number.
+
+By default the counter moves inside the caller's transaction: concurrent writers
+of the same scope queue on the row lock and a rollback hands the number back, so
+numbers are gap-free - what tax documents need. Callers that do not need gap-free
+numbers pass block_size to reserve a block per worker in a short transaction of
+its own and hand numbers out from memory; numbers left in a block when the
+process stops are skipped.
+"""
+
+import os
+import uuid
+from datetime import date, datetime
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.document_sequence import DocumentSequence
+
+# (document_type, branch_id or '', year)
+SequenceKey = Tuple[str, str, int]
+
+# Numbers reserved by this process and not handed out yet: scope -> [next, last]
+_blocks: Dict[SequenceKey, List[int]] = {}
+_blocks_lock = Lock()
+# A forked worker must not hand out the numbers of blocks its parent reserved
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_blocks.clear)
+
+
+def _advance(connection, key: SequenceKey, count: int, seed: Optional[Callable[[], int]] = None) -> int:
+    """Move a counter forward by count and return the last number it now covers
+
+    seed, called only when the scope has no row yet, returns the last number already
+    used by documents numbered before the sequence existed.
+    """
+    table = DocumentSequence.__table__
+    document_type, branch_id, year = key
+    now = datetime.utcnow()
+    match = and_(
+        table.c.document_type == document_type,
+        table.c.branch_id == branch_id,
+        table.c.year == year,
+    )
+    increment = table.update().where(match).values(last_value=table.c.last_value + count, updated_at=now)
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        last = connection.execute(increment.returning(table.c.last_value)).scalar()
+        if last is not None:
+            return last
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(
+            id=str(uuid.uuid4()), document_type=document_type, branch_id=branch_id, year=year,
+            last_value=(seed() if seed else 0) + count, created_at=now, updated_at=now,
+        )
+        # Another transaction may create the row first: then this advances it instead
+        return connection.execute(stmt.on_conflict_do_update(
+            index_elements=['document_type', 'branch_id', 'year'],
+            set_={'last_value': table.c.last_value + count, 'updated_at': now},
+        ).returning(table.c.last_value)).scalar_one()
+
+    # Portable fallback: update in place, insert when the scope has no row yet
+    if connection.execute(increment).rowcount == 0:
+        connection.execute(table.insert().values(
+            id=str(uuid.uuid4()), document_type=document_type, branch_id=branch_id, year=year,
+            last_value=(seed() if seed else 0) + count, created_at=now, updated_at=now,
+        ))
+    return connection.execute(select(table.c.last_value).where(match)).scalar_one()
+
+
+class DocumentSequenceService:
+    """Sequential document numbers per document type, branch and year"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def next_value(
+        self,
+        document_type: str,
+        branch_id: Optional[str] = None,
+        year: Optional[int] = None,
+        seed: Optional[Callable[[], int]] = None,
+        block_size: int = 0
+    ) -> int:
+        """Next number of a sequence
+
+        Args:
+            document_type: Sequence name, e.g. 'invoice'
+            branch_id: Branch the numbers belong to; None for company-wide numbering
+            year: Numbering year (defaults to the current year)
+            seed: Returns the last number already in use, for a scope's first number
+            block_size: Reserve this many numbers per worker (not gap-free); 0 numbers
+                inside the caller's transaction
+
+        Returns:
+            The number, starting from 1 (or seed() + 1) every year
+        """
+        return self.next_values(document_type, 1, branch_id, year, seed, block_size)[0]
+
+    def next_values(
+        self,
+        document_type: str,
+        count: int,
+        branch_id: Optional[str] = None,
+        year: Optional[int] = None,
+        seed: Optional[Callable[[], int]] = None,
+        block_size: int = 0
+    ) -> List[int]:
+        """count numbers of a sequence at once (consecutive unless block-allocated)"""
+        if count <= 0:
+            return []
+        key = (document_type, branch_id or '', year or date.today().year)
+        engine = self._block_engine() if block_size > 1 else None
+        if engine is None:
+            last = _advance(self.db.connection(), key, count, seed)
+            return list(range(last - count + 1, last + 1))
+
+        numbers: List[int] = []
+        with _blocks_lock:
+            while len(numbers) < count:
+                block = _blocks.get(key)
+                if block is None or block[0] > block[1]:
+                    size = max(block_size, count - len(numbers))
+                    with engine.begin() as connection:
+                        last = _advance(connection, key, size, seed)
+                    block = _blocks[key] = [last - size + 1, last]
+                take = min(count - len(numbers), block[1] - block[0] + 1)
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return numbers
+
+    def _block_engine(self) -> Optional[Engine]:
+        """Engine to reserve blocks on, outside the caller's transaction, if possible
+
+        SQLite allows one writer at a time, so a second connection would wait for the
+        caller's own transaction; numbers are then taken in that transaction instead.
+        """
+        bind = self.db.get_bind()
+        if not isinstance(bind, Engine) or bind.dialect.name == 'sqlite':
+            return None
+        return bind
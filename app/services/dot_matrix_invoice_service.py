@@ -14,6 +14,7 @@ from textwrap import fill
 
 from app.models.sales import Invoice
 from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import get_app_settings
 
 
 class DotMatrixInvoiceService:
@@ -26,10 +27,19 @@ class DotMatrixInvoiceService:
     def _load_app_settings(self) -> Dict:
         """Load application settings for invoice generation"""
         settings = {}
-        app_settings = self.db.query(AppSetting).all()
-        
-        for setting in app_settings:
-            settings[setting.key] = setting.value
+        # Singleton settings row, served from the process-wide snapshot cache
+        snapshot = get_app_settings(self.db)
+        if snapshot.id:
+            header_fields = {
+                'company_name': snapshot.company_name,
+                'company_address': snapshot.address,
+                'company_phone': snapshot.phone and f"Phone: {snapshot.phone}",
+                'company_email': snapshot.email and f"Email: {snapshot.email}",
+                'vat_number': snapshot.vat_registration_number and f"VAT: {snapshot.vat_registration_number}",
+                'currency_symbol': snapshot.currency and AppSetting.get_currency_symbol(snapshot.currency),
+                'default_vat_rate': snapshot.default_vat_rate is not None and str(snapshot.default_vat_rate),
+            }
+            settings.update({key: value for key, value in header_fields.items() if value})
         
         # Default values for dot matrix printing
         defaults = {
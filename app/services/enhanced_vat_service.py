@@ -1,16 +1,58 @@
 """
 Enhanced VAT Service for calculating VAT Input/Output from actual transactions
+
+Output VAT (sales), input VAT (purchases) and output VAT reversed by credit notes
+are aggregated in one grouped UNION ALL query over the document headers and
+their lines: header rows give the period totals and document counts per branch
+and day, line rows give the split by VAT rate. Summary, rate breakdown and VAT
+return are all built from that one result.
+
+Results for closed periods (ending before today) are cached; a commit that adds,
+changes or removes a sale, purchase or credit note (or one of their lines) drops
+the cached periods containing that transaction's date.
 """
 from decimal import Decimal
-from typing import List, Dict, Optional, Tuple
+from threading import Lock
+from typing import Any, List, Dict, Optional, Set, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy import and_, or_, func, text, case, event, literal_column, null, select, union_all
 
+from app.core.cache import get_cache
+from app.core.config import settings
 from app.models.sales import Sale, SaleItem
-from app.models.purchases import Purchase, PurchaseItem  
+from app.models.purchases import Purchase, PurchaseItem
+from app.models.credit_notes import CreditNote, CreditNoteItem
 from app.models.accounting import AccountingCode, JournalEntry
 from app.models.branch import Branch
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+VAT_KINDS = ('output', 'input', 'credit_note')
+# Credit notes still in draft or cancelled do not reverse any output VAT
+CREDIT_NOTE_VAT_STATUSES = ('issued', 'processed')
+
+_ALL_PERIODS = '*'
+_CHANGES_KEY = 'vat_period_changes'
+
+_VAT_PERIODS = get_cache('vat_period_totals', max_entries=512,
+                         ttl_seconds=settings.vat_period_cache_ttl_seconds)
+_invalidation_lock = Lock()
+_generation = 0
+
+
+def _empty_totals() -> Dict[str, Decimal]:
+    return {kind: Decimal('0') for kind in VAT_KINDS}
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
 
 
 class EnhancedVatService:
@@ -22,38 +64,11 @@ class EnhancedVatService:
     def calculate_vat_summary(self, start_date: date, end_date: date, branch_id: str = None) -> Dict:
         """Calculate VAT summary from actual sales and purchase transactions"""
         try:
-            # Calculate VAT Output (from sales)
-            vat_output = self._calculate_vat_output(start_date, end_date, branch_id)
-            
-            # Calculate VAT Input (from purchases)  
-            vat_input = self._calculate_vat_input(start_date, end_date, branch_id)
-            
-            # Calculate net VAT (what's owed to tax authority)
-            net_vat = vat_output - vat_input
-            
-            # Get transaction counts for context
-            sales_count = self._get_sales_count(start_date, end_date, branch_id)
-            purchases_count = self._get_purchases_count(start_date, end_date, branch_id)
-            
-            return {
-                'period': {
-                    'start_date': start_date.isoformat(),
-                    'end_date': end_date.isoformat()
-                },
-                'vat_collected': float(vat_output),  # VAT collected from customers (Output VAT)
-                'vat_paid': float(vat_input),        # VAT paid to suppliers (Input VAT)
-                'net_vat_liability': float(net_vat), # Net amount owed to tax authority
-                'vat_rate': 14.0,                    # Botswana VAT rate
-                'transaction_counts': {
-                    'sales': sales_count,
-                    'purchases': purchases_count
-                },
-                'status': 'calculated',
-                'compliance_due_date': self._calculate_due_date(end_date)
-            }
-            
+            totals = self.get_vat_totals(start_date, end_date, branch_id)
+            return self._summary_from_totals(start_date, end_date, totals)
+
         except Exception as e:
-            print(f"Error calculating VAT summary: {str(e)}")
+            logger.error("Error calculating VAT summary: %s", e, exc_info=True)
             return {
                 'period': {
                     'start_date': start_date.isoformat() if start_date else None,
@@ -62,71 +77,171 @@ class EnhancedVatService:
                 'vat_collected': 0.0,
                 'vat_paid': 0.0,
                 'net_vat_liability': 0.0,
-                'vat_rate': 14.0,
-                'transaction_counts': {'sales': 0, 'purchases': 0},
+                'vat_rate': float(settings.default_vat_rate),
+                'transaction_counts': {'sales': 0, 'purchases': 0, 'credit_notes': 0},
                 'status': 'error',
                 'error': str(e)
             }
-    
-    def _calculate_vat_output(self, start_date: date, end_date: date, branch_id: str = None) -> Decimal:
-        """Calculate VAT Output (collected from sales)"""
-        query = self.db.query(func.sum(Sale.total_vat_amount)).filter(
-            and_(
-                Sale.date >= start_date,
-                Sale.date <= end_date,
-                Sale.total_vat_amount > 0  # Only include sales with VAT
-            )
-        )
-        
-        if branch_id:
-            query = query.filter(Sale.branch_id == branch_id)
-        
-        result = query.scalar()
-        return Decimal(str(result or 0))
-    
-    def _calculate_vat_input(self, start_date: date, end_date: date, branch_id: str = None) -> Decimal:
-        """Calculate VAT Input (paid on purchases)"""
-        query = self.db.query(func.sum(Purchase.total_vat_amount)).filter(
-            and_(
-                Purchase.purchase_date >= start_date,
-                Purchase.purchase_date <= end_date,
-                Purchase.total_vat_amount > 0  # Only include purchases with VAT
-            )
-        )
-        
-        if branch_id:
-            query = query.filter(Purchase.branch_id == branch_id)
-        
-        result = query.scalar()
-        return Decimal(str(result or 0))
-    
-    def _get_sales_count(self, start_date: date, end_date: date, branch_id: str = None) -> int:
-        """Get count of sales transactions"""
-        query = self.db.query(func.count(Sale.id)).filter(
-            and_(
-                Sale.date >= start_date,
-                Sale.date <= end_date
-            )
-        )
+
+    def _summary_from_totals(self, start_date: date, end_date: date, totals: Dict[str, Any]) -> Dict:
+        """VAT summary of a period from its get_vat_totals result"""
+        vat_output = totals['totals']['output'] - totals['totals']['credit_note']
+        vat_input = totals['totals']['input']
         
-        if branch_id:
-            query = query.filter(Sale.branch_id == branch_id)
+        # Calculate net VAT (what's owed to tax authority)
+        net_vat = vat_output - vat_input
         
-        return query.scalar() or 0
-    
-    def _get_purchases_count(self, start_date: date, end_date: date, branch_id: str = None) -> int:
-        """Get count of purchase transactions"""
-        query = self.db.query(func.count(Purchase.id)).filter(
-            and_(
-                Purchase.purchase_date >= start_date,
-                Purchase.purchase_date <= end_date
+        return {
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
+            'vat_collected': float(vat_output),  # VAT collected from customers less credit notes (Output VAT)
+            'vat_paid': float(vat_input),        # VAT paid to suppliers (Input VAT)
+            'net_vat_liability': float(net_vat), # Net amount owed to tax authority
+            'vat_rate': float(settings.default_vat_rate),
+            'credit_note_vat': float(totals['totals']['credit_note']),
+            'transaction_counts': {
+                'sales': totals['counts']['output'],
+                'purchases': totals['counts']['input'],
+                'credit_notes': totals['counts']['credit_note']
+            },
+            'by_branch': {
+                branch: {kind: float(amount) for kind, amount in amounts.items()}
+                for branch, amounts in totals['by_branch'].items()
+            },
+            'by_day': {
+                day.isoformat(): {kind: float(amount) for kind, amount in amounts.items()}
+                for day, amounts in sorted(totals['by_day'].items())
+            },
+            'status': 'calculated',
+            'compliance_due_date': self._calculate_due_date(end_date)
+        }
+
+    # ------------------------------------------------------------------
+    # Single-scan VAT totals
+    # ------------------------------------------------------------------
+    def get_vat_totals(self, start_date: date, end_date: date, branch_id: str = None) -> Dict[str, Any]:
+        """
+        VAT by kind (output, input, credit_note) for a period, with document counts and
+        splits by rate, branch and day. Closed periods are served from the cache.
+
+        Returns:
+            Dict with 'totals' and 'counts' per kind, and 'by_rate', 'by_branch' and
+            'by_day' mapping a rate / branch_id / date to per-kind amounts
+        """
+        if end_date >= date.today():
+            return self._query_vat_totals(start_date, end_date, branch_id)
+
+        key = f"{start_date.isoformat()}|{end_date.isoformat()}|{branch_id or '*'}"
+        cached = _VAT_PERIODS.get(key)
+        if cached is not None:
+            return cached
+        generation = _generation
+        totals = self._query_vat_totals(start_date, end_date, branch_id)
+        with _invalidation_lock:
+            # Skip storing totals computed while a commit was invalidating periods
+            if generation == _generation:
+                _VAT_PERIODS.set(key, totals)
+        return totals
+
+    def _vat_sources(self, start_date: date, end_date: date, branch_id: str = None) -> List:
+        """
+        One select per document and line table yielding
+        (kind, rate, branch_id, day, vat, taxable, documents); header rows have no rate.
+        """
+        def source(kind, rate, branch, day, vat, taxable, documents):
+            return select(
+                literal_column(f"'{kind}'").label('kind'),
+                rate.label('rate'),
+                branch.label('branch_id'),
+                func.date(day).label('day'),
+                func.coalesce(vat, 0).label('vat'),
+                func.coalesce(taxable, 0).label('taxable'),
+                literal_column(str(documents)).label('documents'),
             )
-        )
-        
+
+        sale_period, purchase_period, credit_period = self._period_filters(start_date, end_date, branch_id)
+
+        no_rate = null()
+        # Header VAT counts only where positive, as posted to the VAT accounts
+        sales = source('output', no_rate, Sale.branch_id, Sale.date,
+                       case((Sale.total_vat_amount > 0, Sale.total_vat_amount), else_=0),
+                       Sale.total_amount_ex_vat, 1).where(*sale_period)
+        purchases = source('input', no_rate, Purchase.branch_id, Purchase.purchase_date,
+                           case((Purchase.total_vat_amount > 0, Purchase.total_vat_amount), else_=0),
+                           Purchase.total_amount_ex_vat, 1).where(*purchase_period)
+        credit_notes = source('credit_note', no_rate, CreditNote.branch_id, CreditNote.issue_date,
+                              CreditNote.vat_amount, CreditNote.subtotal, 1).where(*credit_period)
+
+        sale_lines = source(
+            'output', func.coalesce(SaleItem.vat_rate, 0), Sale.branch_id, Sale.date, SaleItem.vat_amount,
+            func.coalesce(SaleItem.total_amount, 0) - func.coalesce(SaleItem.vat_amount, 0), 0,
+        ).select_from(SaleItem).join(Sale, Sale.id == SaleItem.sale_id).where(*sale_period)
+        purchase_lines = source(
+            'input', func.coalesce(PurchaseItem.vat_rate, 0), Purchase.branch_id, Purchase.purchase_date,
+            PurchaseItem.vat_amount, PurchaseItem.total_cost, 0,
+        ).select_from(PurchaseItem).join(Purchase, Purchase.id == PurchaseItem.purchase_id).where(*purchase_period)
+        credit_note_lines = source(
+            'credit_note', func.coalesce(CreditNoteItem.vat_rate, 0), CreditNote.branch_id, CreditNote.issue_date,
+            CreditNoteItem.vat_amount,
+            func.coalesce(CreditNoteItem.line_total, 0) - func.coalesce(CreditNoteItem.vat_amount, 0), 0,
+        ).select_from(CreditNoteItem).join(
+            CreditNote, CreditNote.id == CreditNoteItem.credit_note_id
+        ).where(*credit_period)
+
+        return [sales, purchases, credit_notes, sale_lines, purchase_lines, credit_note_lines]
+
+    @staticmethod
+    def _period_filters(start_date: date, end_date: date, branch_id: str = None) -> Tuple[List, List, List]:
+        """Sale, purchase and credit note predicates selecting the documents that count in the period"""
+        # Sale.date is a timestamp: include the whole end day
+        sale_period = [Sale.date >= start_date, Sale.date < end_date + timedelta(days=1)]
+        purchase_period = [Purchase.purchase_date >= start_date, Purchase.purchase_date <= end_date]
+        credit_period = [CreditNote.issue_date >= start_date, CreditNote.issue_date <= end_date,
+                         CreditNote.status.in_(CREDIT_NOTE_VAT_STATUSES)]
         if branch_id:
-            query = query.filter(Purchase.branch_id == branch_id)
-        
-        return query.scalar() or 0
+            sale_period.append(Sale.branch_id == branch_id)
+            purchase_period.append(Purchase.branch_id == branch_id)
+            credit_period.append(CreditNote.branch_id == branch_id)
+        return sale_period, purchase_period, credit_period
+
+    def _query_vat_totals(self, start_date: date, end_date: date, branch_id: str = None) -> Dict[str, Any]:
+        """VAT by kind, rate, branch and day between two dates in one grouped query"""
+        sources = union_all(*self._vat_sources(start_date, end_date, branch_id)).subquery()
+        rows = self.db.execute(
+            select(sources.c.kind, sources.c.rate, sources.c.branch_id, sources.c.day,
+                   func.sum(sources.c.vat), func.sum(sources.c.taxable), func.sum(sources.c.documents))
+            .group_by(sources.c.kind, sources.c.rate, sources.c.branch_id, sources.c.day)
+        ).all()
+
+        totals = _empty_totals()
+        counts = {kind: 0 for kind in VAT_KINDS}
+        by_rate: Dict[Decimal, Dict[str, Decimal]] = {}
+        by_branch: Dict[Optional[str], Dict[str, Decimal]] = {}
+        by_day: Dict[date, Dict[str, Decimal]] = {}
+        for kind, rate, branch, day, vat, taxable, documents in rows:
+            vat = Decimal(str(vat or 0))
+            if rate is not None:
+                amounts = by_rate.setdefault(Decimal(str(rate)).normalize(), {
+                    **_empty_totals(), **{f'{name}_taxable': Decimal('0') for name in VAT_KINDS}
+                })
+                amounts[kind] += vat
+                amounts[f'{kind}_taxable'] += Decimal(str(taxable or 0))
+                continue
+            totals[kind] += vat
+            counts[kind] += int(documents or 0)
+            by_branch.setdefault(branch, _empty_totals())[kind] += vat
+            if day is not None:
+                by_day.setdefault(_as_date(day), _empty_totals())[kind] += vat
+
+        return {
+            'totals': totals,
+            'counts': counts,
+            'by_rate': by_rate,
+            'by_branch': by_branch,
+            'by_day': by_day,
+        }
     
     def _calculate_due_date(self, period_end: date) -> str:
         """Calculate VAT return due date (21 days after period end for Botswana)"""
@@ -134,34 +249,38 @@ class EnhancedVatService:
         return due_date.isoformat()
     
     def get_vat_by_rate_breakdown(self, start_date: date, end_date: date, branch_id: str = None) -> List[Dict]:
-        """Get VAT breakdown by rate (currently only 14% in Botswana)"""
-        vat_output = self._calculate_vat_output(start_date, end_date, branch_id)
-        vat_input = self._calculate_vat_input(start_date, end_date, branch_id)
-        
-        return [{
-            'rate': '14%',
-            'vat_output': float(vat_output),
-            'vat_input': float(vat_input),
-            'net_vat': float(vat_output - vat_input)
-        }]
+        """Get VAT breakdown by rate, from the VAT rates on sale, purchase and credit note lines"""
+        return self._rate_breakdown(self.get_vat_totals(start_date, end_date, branch_id)['by_rate'])
+
+    @staticmethod
+    def _rate_breakdown(by_rate: Dict[Decimal, Dict[str, Decimal]]) -> List[Dict]:
+        breakdown = []
+        for rate in sorted(by_rate, reverse=True):
+            amounts = by_rate[rate]
+            vat_output = amounts['output'] - amounts['credit_note']
+            breakdown.append({
+                'rate': f'{rate:f}%',
+                'vat_output': float(vat_output),
+                'vat_input': float(amounts['input']),
+                'net_vat': float(vat_output - amounts['input']),
+                'credit_note_vat': float(amounts['credit_note']),
+                'taxable_output': float(amounts['output_taxable'] - amounts['credit_note_taxable']),
+                'taxable_input': float(amounts['input_taxable'])
+            })
+        return breakdown
     
     def get_vat_transactions_detail(self, start_date: date, end_date: date, branch_id: str = None, limit: int = 100) -> List[Dict]:
-        """Get detailed VAT transactions for the period"""
+        """
+        Latest VAT documents of the period, newest first: the same documents the
+        summary counts, with credit notes as negative output VAT
+        """
         transactions = []
+        sale_period, purchase_period, credit_period = self._period_filters(start_date, end_date, branch_id)
         
         # Get sales with VAT
-        sales_query = self.db.query(Sale).filter(
-            and_(
-                Sale.date >= start_date,
-                Sale.date <= end_date,
-                Sale.total_vat_amount > 0
-            )
-        )
-        
-        if branch_id:
-            sales_query = sales_query.filter(Sale.branch_id == branch_id)
-        
-        sales = sales_query.order_by(Sale.date.desc()).limit(limit // 2).all()
+        sales = self.db.query(Sale).filter(
+            *sale_period, Sale.total_vat_amount > 0
+        ).order_by(Sale.date.desc()).limit(limit).all()
         
         for sale in sales:
             transactions.append({
@@ -175,18 +294,9 @@ class EnhancedVatService:
             })
         
         # Get purchases with VAT
-        purchases_query = self.db.query(Purchase).filter(
-            and_(
-                Purchase.purchase_date >= start_date,
-                Purchase.purchase_date <= end_date,
-                Purchase.total_vat_amount > 0
-            )
-        )
-        
-        if branch_id:
-            purchases_query = purchases_query.filter(Purchase.branch_id == branch_id)
-        
-        purchases = purchases_query.order_by(Purchase.purchase_date.desc()).limit(limit // 2).all()
+        purchases = self.db.query(Purchase).filter(
+            *purchase_period, Purchase.total_vat_amount > 0
+        ).order_by(Purchase.purchase_date.desc()).limit(limit).all()
         
         for purchase in purchases:
             transactions.append({
@@ -199,15 +309,32 @@ class EnhancedVatService:
                 'total_amount': float(purchase.total_amount)
             })
         
+        # Issued credit notes reverse output VAT
+        credit_notes = self.db.query(CreditNote).filter(
+            *credit_period, CreditNote.vat_amount > 0
+        ).order_by(CreditNote.issue_date.desc()).limit(limit).all()
+        
+        for credit_note in credit_notes:
+            transactions.append({
+                'transaction_date': credit_note.issue_date.isoformat(),
+                'item_type': 'output',
+                'reference_type': 'credit_note',
+                'reference_id': str(credit_note.id),
+                'description': f'VAT reversed by Credit Note {credit_note.credit_note_number}',
+                'vat_amount': -float(credit_note.vat_amount),
+                'total_amount': -float(credit_note.total_amount)
+            })
+        
         # Sort by date (newest first)
         transactions.sort(key=lambda x: x['transaction_date'], reverse=True)
         
-        return transactions
+        return transactions[:limit]
     
     def generate_vat_return_data(self, start_date: date, end_date: date, branch_id: str = None) -> Dict:
         """Generate data for official VAT return submission to tax authority"""
-        summary = self.calculate_vat_summary(start_date, end_date, branch_id)
-        breakdown = self.get_vat_by_rate_breakdown(start_date, end_date, branch_id)
+        totals = self.get_vat_totals(start_date, end_date, branch_id)
+        summary = self._summary_from_totals(start_date, end_date, totals)
+        breakdown = self._rate_breakdown(totals['by_rate'])
         
         # Get branch information
         branch = None
@@ -236,7 +363,8 @@ class EnhancedVatService:
             'transaction_summary': {
                 'total_sales_transactions': summary['transaction_counts']['sales'],
                 'total_purchase_transactions': summary['transaction_counts']['purchases'],
-                'total_vat_transactions': summary['transaction_counts']['sales'] + summary['transaction_counts']['purchases']
+                'total_credit_note_transactions': summary['transaction_counts']['credit_notes'],
+                'total_vat_transactions': sum(summary['transaction_counts'].values())
             },
             'compliance_status': {
                 'calculation_date': datetime.now().isoformat(),
@@ -280,4 +408,69 @@ class EnhancedVatService:
                 "Ensure VAT Payable account exists for Output VAT tracking", 
                 "Run VAT account migration if accounts are missing"
             ] if issues else []
-        }
\ No newline at end of file
+        }
+
+
+def invalidate_vat_periods(dates: Optional[Set[date]] = None) -> None:
+    """Drop cached VAT totals of the periods containing any of dates, or of every period"""
+    global _generation
+    with _invalidation_lock:
+        _generation += 1
+        if dates is None:
+            _VAT_PERIODS.clear()
+            return
+        # Keys are "<start>|<end>|<branch>"; evicted and expired periods are not listed
+        for key in _VAT_PERIODS.keys():
+            start, end = (date.fromisoformat(part) for part in key.split('|', 2)[:2])
+            if any(start <= day <= end for day in dates):
+                _VAT_PERIODS.delete(key)
+
+
+# Document model -> its VAT date column; line model -> (document model, foreign key)
+_VAT_DOCUMENT_DATES = {Sale: 'date', Purchase: 'purchase_date', CreditNote: 'issue_date'}
+_VAT_LINE_DOCUMENTS = {
+    SaleItem: (Sale, 'sale_id'),
+    PurchaseItem: (Purchase, 'purchase_id'),
+    CreditNoteItem: (CreditNote, 'credit_note_id'),
+}
+
+
+def _document_dates(document) -> Set:
+    column = _VAT_DOCUMENT_DATES[type(document)]
+    history = get_history(document, column)
+    return {*history.added, *history.unchanged, *history.deleted}
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_vat_changes(session: Session, flush_context) -> None:
+    """Record the transaction dates this transaction changes, applied on commit"""
+    changes = session.info.get(_CHANGES_KEY)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj) in _VAT_DOCUMENT_DATES:
+            affected = _document_dates(obj)
+        elif type(obj) in _VAT_LINE_DOCUMENTS:
+            document_model, foreign_key = _VAT_LINE_DOCUMENTS[type(obj)]
+            with session.no_autoflush:
+                document = session.get(document_model, getattr(obj, foreign_key))
+            affected = _document_dates(document) if document is not None else {_ALL_PERIODS}
+        else:
+            continue
+        if changes is None:
+            changes = session.info[_CHANGES_KEY] = set()
+        changes.update(affected)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_vat_after_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    if _ALL_PERIODS in changes:
+        invalidate_vat_periods()
+        return
+    invalidate_vat_periods({_as_date(day) for day in changes if day is not None})
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_vat_changes(session: Session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
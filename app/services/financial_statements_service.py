@@ -6,9 +6,9 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, extract
+from sqlalchemy import or_, func, extract
 
-from app.models.accounting import AccountingCode, JournalEntry, AccountingEntry
+from app.models.accounting import AccountingCode, AccountingEntry
 from app.services.ifrs_reports_core import IFRSReportsCore
 from app.schemas.financial_statements import (
     BalanceSheet, BalanceSheetAssets, BalanceSheetLiabilitiesAndEquity,
@@ -26,6 +26,7 @@ class FinancialStatementsService:
     def __init__(self, db: Session):
         self.db = db
         self.ifrs_core = IFRSReportsCore(db)
+        self._movements_cache: Dict = {}
         
     def get_report_metadata(self, report_type: str, as_of_date: date = None) -> ReportMetadata:
         """Generate metadata for financial reports"""
@@ -456,12 +457,13 @@ class FinancialStatementsService:
         """Get account balances for a specific type and period"""
         try:
             accounts = self.db.query(AccountingCode).filter(
-                AccountingCode.account_type == account_type
+                func.lower(AccountingCode.account_type) == account_type.lower()
             ).all()
+            movements = self._get_period_movements(start_date, end_date)
             
             result = []
             for account in accounts:
-                balance_info = self._get_account_balance_for_period(account.id, start_date, end_date)
+                balance_info = self._get_account_balance_for_period(account.id, start_date, end_date, account, movements)
                 if balance_info['balance'] != 0:
                     result.append({
                         'account_code': getattr(account, 'code', f'ACC-{account.id}'),
@@ -473,23 +475,26 @@ class FinancialStatementsService:
         except Exception as e:
             return []
     
-    def _get_account_balance_for_period(self, account_id: int, start_date: date, end_date: date) -> Dict:
+    def _get_period_movements(self, start_date: date, end_date: date) -> Dict:
+        """Per-account debit/credit movements for a period, read from balance snapshots"""
+        key = (start_date, end_date)
+        if key not in self._movements_cache:
+            self._movements_cache[key] = self.ifrs_core.snapshots.get_period_movements(start_date, end_date)
+        return self._movements_cache[key]
+    
+    def _get_account_balance_for_period(self, account_id: str, start_date: date, end_date: date,
+                                        account: Optional[AccountingCode] = None,
+                                        movements: Optional[Dict] = None) -> Dict:
         """Get account balance for a specific period"""
         try:
-            entries = self.db.query(JournalEntry).filter(
-                and_(
-                    JournalEntry.account_id == account_id,
-                    JournalEntry.transaction_date >= start_date,
-                    JournalEntry.transaction_date <= end_date
-                )
-            ).all()
-            
-            total_debits = sum(entry.debit_amount or 0 for entry in entries)
-            total_credits = sum(entry.credit_amount or 0 for entry in entries)
+            if movements is None:
+                movements = self._get_period_movements(start_date, end_date)
+            total_debits, total_credits = movements.get(account_id, (Decimal('0.00'), Decimal('0.00')))
             
             # Get account to determine balance calculation
-            account = self.db.query(AccountingCode).filter(AccountingCode.id == account_id).first()
-            account_type = getattr(account, 'account_type', 'ASSET')
+            if account is None:
+                account = self.db.query(AccountingCode).filter(AccountingCode.id == account_id).first()
+            account_type = str(getattr(account, 'account_type', 'ASSET') or 'ASSET').upper()
             
             if account_type in ['ASSET', 'EXPENSE']:
                 balance = total_debits - total_credits
@@ -1,19 +1,24 @@
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple, Any
-from datetime import datetime, date
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from datetime import datetime, date, timedelta
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy import or_, func, desc, asc, case, tuple_
 from enum import Enum
+import base64
 import json
 
 from app.models.accounting import (
     AccountingCode, AccountingEntry, JournalEntry, 
-    Ledger, OpeningBalance, AccountType, NormalBalance
+    Ledger, OpeningBalance, AccountType, NormalBalance, AccountBalanceSnapshot
 )
-from app.models.accounting_constants import get_normal_balance
+from app.models.accounting_constants import ACCOUNT_TYPES, get_normal_balance
 from app.models.branch import Branch
+from app.services.account_balance_snapshot_service import period_bounds
 from app.services.ifrs_accounting_service import IFRSAccountingService
 from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class LedgerPeriod(Enum):
@@ -127,52 +132,19 @@ class GeneralLedgerService:
             Dictionary with entries and summary information
         """
         try:
-            # Build base query
-            query = self.db.query(JournalEntry).join(
-                AccountingCode, JournalEntry.accounting_code_id == AccountingCode.id
+            query = self._build_ledger_query(
+                account_id=account_id,
+                account_code=account_code,
+                account_type=account_type,
+                from_date=from_date,
+                to_date=to_date,
+                branch_id=branch_id,
+                search=search
             ).options(
                 joinedload(JournalEntry.accounting_code),
                 joinedload(JournalEntry.accounting_entry)
             )
 
-            # Apply filters
-            if account_id:
-                query = query.filter(JournalEntry.accounting_code_id == account_id)
-
-            # Allow filtering by account code for convenience (used by frontend)
-            if account_code:
-                query = query.filter(AccountingCode.code == account_code)
-
-            # Account type filter (case-insensitive to accept values like 'asset')
-            if account_type:
-                try:
-                    # Normalize to string and compare lower-cased
-                    atype = str(account_type)
-                    query = query.filter(func.lower(AccountingCode.account_type) == atype.lower())
-                except Exception:
-                    query = query.filter(AccountingCode.account_type == account_type)
-
-            if from_date:
-                query = query.filter(JournalEntry.date >= from_date)
-
-            if to_date:
-                query = query.filter(JournalEntry.date <= to_date)
-
-            if branch_id:
-                query = query.filter(JournalEntry.branch_id == branch_id)
-
-            if search:
-                search_term = f"%{search}%"
-                query = query.filter(
-                    or_(
-                        JournalEntry.description.ilike(search_term),
-                        JournalEntry.narration.ilike(search_term),
-                        JournalEntry.reference.ilike(search_term),
-                        AccountingCode.name.ilike(search_term),
-                        AccountingCode.code.ilike(search_term)
-                    )
-                )
-
             # Get total count
             total_count = query.count()
 
@@ -182,8 +154,19 @@ class GeneralLedgerService:
                 JournalEntry.id.asc()
             ).offset(offset).limit(limit).all()
 
+            # Carry forward balances from rows before this page so offset pages stay correct
+            openings = self._carried_forward_balances(
+                entries,
+                account_id=account_id,
+                account_code=account_code,
+                account_type=account_type,
+                from_date=from_date,
+                to_date=to_date,
+                branch_id=branch_id
+            ) if entries else {}
+
             # Calculate running balances and format entries
-            ledger_entries = self._calculate_running_balances(entries)
+            ledger_entries = self._calculate_running_balances(entries, openings=openings)
 
             # Calculate summary statistics
             summary = self._calculate_ledger_summary(entries)
@@ -212,10 +195,396 @@ class GeneralLedgerService:
                 'error': str(e)
             }
     
+    def get_general_ledger_page(self,
+                                account_id: Optional[str] = None,
+                                account_type: Optional[str] = None,
+                                from_date: Optional[date] = None,
+                                to_date: Optional[date] = None,
+                                branch_id: Optional[str] = None,
+                                search: Optional[str] = None,
+                                cursor: Optional[str] = None,
+                                limit: int = 100,
+                                account_code: Optional[str] = None,
+                                include_count: bool = False) -> Dict[str, Any]:
+        """
+        Get a keyset-paginated page of general ledger entries
+
+        Pages are keyed on (date, id), so a deep page costs the same as the first.
+        Running balances are computed in SQL with a window function over the page's
+        key range, on top of the balance carried forward from rows before the page.
+
+        Args:
+            account_id: Specific account filter (by ID)
+            account_type: Account type filter (Asset, Liability, etc.)
+            from_date: Start date filter
+            to_date: End date filter
+            branch_id: Branch filter
+            search: Text search filter (running balances still include unmatched rows)
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            limit: Maximum entries to return
+            account_code: Specific account filter (by account code)
+            include_count: Include an approximate total row count
+
+        Returns:
+            Dictionary with entries, next_cursor, has_more and summary information
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        filters = {
+            'account_id': account_id,
+            'account_code': account_code,
+            'account_type': account_type,
+            'from_date': from_date,
+            'to_date': to_date,
+            'branch_id': branch_id
+        }
+        after_key = self._decode_ledger_cursor(cursor) if cursor else None
+
+        # Rows without a date cannot be ordered by the keyset
+        query = self._build_ledger_query(search=search, **filters).filter(JournalEntry.date.isnot(None))
+
+        approximate_count = self._estimate_row_count(query) if include_count else None
+
+        page_query = query
+        if after_key:
+            page_query = page_query.filter(tuple_(JournalEntry.date, JournalEntry.id) > after_key)
+        rows = page_query.options(
+            joinedload(JournalEntry.accounting_code),
+            joinedload(JournalEntry.accounting_entry)
+        ).order_by(
+            JournalEntry.date.asc(),
+            JournalEntry.id.asc()
+        ).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        entries = rows[:limit]
+
+        running = {}
+        if entries:
+            openings = self._carried_forward_balances(entries, **filters)
+            running = self._window_running_balances(entries, openings, **filters)
+
+        ledger_entries = self._calculate_running_balances(entries)
+        for item in ledger_entries:
+            if item['id'] in running:
+                item['running_balance'] = float(running[item['id']])
+
+        next_cursor = None
+        if has_more:
+            next_cursor = self._encode_ledger_cursor(entries[-1].date, entries[-1].id)
+
+        return {
+            'entries': ledger_entries,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'approximate_count': approximate_count,
+            'summary': self._calculate_ledger_summary(entries),
+            'filters': {
+                'account_id': account_id,
+                'account_code': account_code,
+                'account_type': account_type,
+                'from_date': from_date.isoformat() if from_date else None,
+                'to_date': to_date.isoformat() if to_date else None,
+                'branch_id': branch_id,
+                'search': search
+            }
+        }
+
+    def _build_ledger_query(self,
+                            account_id: Optional[str] = None,
+                            account_code: Optional[str] = None,
+                            account_type: Optional[str] = None,
+                            from_date: Optional[date] = None,
+                            to_date: Optional[date] = None,
+                            branch_id: Optional[str] = None,
+                            search: Optional[str] = None,
+                            columns: Optional[List[Any]] = None):
+        """Build the filtered journal line query shared by the ledger views"""
+        query = self.db.query(*(columns or [JournalEntry])).select_from(JournalEntry).join(
+            AccountingCode, JournalEntry.accounting_code_id == AccountingCode.id
+        )
+
+        # Apply filters
+        if account_id:
+            query = query.filter(JournalEntry.accounting_code_id == account_id)
+
+        # Allow filtering by account code for convenience (used by frontend)
+        if account_code:
+            query = query.filter(AccountingCode.code == account_code)
+
+        # Account type filter (case-insensitive to accept values like 'asset')
+        if account_type:
+            try:
+                # Normalize to string and compare lower-cased
+                atype = str(account_type)
+                query = query.filter(func.lower(AccountingCode.account_type) == atype.lower())
+            except Exception:
+                query = query.filter(AccountingCode.account_type == account_type)
+
+        if from_date:
+            query = query.filter(JournalEntry.date >= from_date)
+
+        if to_date:
+            query = query.filter(JournalEntry.date <= to_date)
+
+        if branch_id:
+            query = query.filter(JournalEntry.branch_id == branch_id)
+
+        if search:
+            search_term = f"%{search}%"
+            query = query.filter(
+                or_(
+                    JournalEntry.description.ilike(search_term),
+                    JournalEntry.narration.ilike(search_term),
+                    JournalEntry.reference.ilike(search_term),
+                    AccountingCode.name.ilike(search_term),
+                    AccountingCode.code.ilike(search_term)
+                )
+            )
+
+        return query
+
+    def _signed_amount(self, debit_column=None, credit_column=None):
+        """SQL expression for a line's (or snapshot's) effect on its account's normal balance"""
+        credit_types = [
+            str(getattr(t, 'value', t)) for t, info in ACCOUNT_TYPES.items()
+            if info.get('normal_balance') == NormalBalance.CREDIT.value
+        ]
+        debit = func.coalesce(JournalEntry.debit_amount if debit_column is None else debit_column, 0)
+        credit = func.coalesce(JournalEntry.credit_amount if credit_column is None else credit_column, 0)
+        return case(
+            (AccountingCode.account_type.in_(credit_types), credit - debit),
+            else_=debit - credit
+        )
+
+    def _carried_forward_balances(self, entries: List[JournalEntry], **filters) -> Dict[str, Decimal]:
+        """
+        Per-account balance immediately before the first entry of a page
+
+        Without from_date the balance runs from the first posting: months before the
+        page's first entry come from account_balance_snapshots and only that month is
+        summed from journal_entries, so deep pages cost the same as the first one.
+        """
+        account_ids = list({entry.accounting_code_id for entry in entries})
+        from_date = filters.get('from_date')
+        openings = self._get_opening_balances_for_period(account_ids, from_date) if from_date else {}
+
+        first = entries[0]
+        if first.date is None:
+            return openings
+        if not from_date:
+            from_date = period_bounds(first.date)[0]
+            openings = self._snapshot_balances(account_ids, from_date, filters.get('branch_id'))
+        prior = self._build_ledger_query(
+            columns=[JournalEntry.accounting_code_id, func.sum(self._signed_amount())],
+            **{**filters, 'from_date': from_date}
+        ).filter(
+            JournalEntry.accounting_code_id.in_(account_ids),
+            tuple_(JournalEntry.date, JournalEntry.id) < (first.date, first.id)
+        ).group_by(JournalEntry.accounting_code_id)
+
+        for account_id, amount in prior.all():
+            openings[account_id] = openings.get(account_id, Decimal('0')) + Decimal(str(amount or 0))
+        return openings
+
+    def _snapshot_balances(self, account_ids: List[str], before: date,
+                           branch_id: Optional[str] = None) -> Dict[str, Decimal]:
+        """Per-account balance of the snapshot periods ending before a date"""
+        query = self.db.query(
+            AccountBalanceSnapshot.accounting_code_id,
+            func.sum(self._signed_amount(AccountBalanceSnapshot.total_debits, AccountBalanceSnapshot.total_credits))
+        ).join(
+            AccountingCode, AccountBalanceSnapshot.accounting_code_id == AccountingCode.id
+        ).filter(
+            AccountBalanceSnapshot.accounting_code_id.in_(account_ids),
+            AccountBalanceSnapshot.period_end < before
+        )
+        if branch_id:
+            query = query.filter(AccountBalanceSnapshot.branch_id == branch_id)
+        return {
+            account_id: Decimal(str(amount or 0))
+            for account_id, amount in query.group_by(AccountBalanceSnapshot.accounting_code_id)
+        }
+
+    def _window_running_balances(self, entries: List[JournalEntry], openings: Dict[str, Decimal],
+                                 **filters) -> Dict[str, Decimal]:
+        """Running balance per entry id, computed with a window over the page's key range"""
+        first, last = entries[0], entries[-1]
+        window = self._build_ledger_query(
+            columns=[
+                JournalEntry.id.label('id'),
+                JournalEntry.accounting_code_id.label('account_id'),
+                func.sum(self._signed_amount()).over(
+                    partition_by=JournalEntry.accounting_code_id,
+                    order_by=(JournalEntry.date, JournalEntry.id)
+                ).label('running')
+            ],
+            **filters
+        ).filter(
+            JournalEntry.accounting_code_id.in_(list({entry.accounting_code_id for entry in entries})),
+            tuple_(JournalEntry.date, JournalEntry.id) >= (first.date, first.id),
+            tuple_(JournalEntry.date, JournalEntry.id) <= (last.date, last.id)
+        ).subquery()
+
+        rows = self.db.query(window.c.id, window.c.account_id, window.c.running).filter(
+            window.c.id.in_([entry.id for entry in entries])
+        ).all()
+        return {
+            row.id: openings.get(row.account_id, Decimal('0')) + Decimal(str(row.running or 0))
+            for row in rows
+        }
+
+    def _estimate_row_count(self, query) -> int:
+        """Planner row estimate on PostgreSQL; exact count elsewhere"""
+        bind = self.db.get_bind()
+        if bind.dialect.name == 'postgresql':
+            try:
+                compiled = query.statement.compile(dialect=bind.dialect)
+                plan = self.db.connection().exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            except Exception as e:
+                logger.warning("Ledger count estimate failed, falling back to count(): %s", e)
+        return query.order_by(None).count()
+
+    @staticmethod
+    def _encode_ledger_cursor(entry_date: date, entry_id: str) -> str:
+        payload = json.dumps([entry_date.isoformat(), entry_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    @staticmethod
+    def _decode_ledger_cursor(cursor: str) -> Tuple[date, str]:
+        try:
+            entry_date, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return date.fromisoformat(entry_date), str(entry_id)
+        except Exception:
+            raise ValueError("Invalid ledger cursor")
+
+    def get_account_balances(self,
+                             as_of_date: Optional[date] = None,
+                             branch_id: Optional[str] = None,
+                             account_type: Optional[str] = None,
+                             from_date: Optional[date] = None,
+                             opening_year: Optional[int] = None,
+                             account_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Set-based balance engine: opening balance, debits, credits and closing
+        balance for every account in a single statement.
+
+        Journal lines and opening balances are pre-aggregated with GROUP BY and
+        outer-joined to accounting_codes, so the query count does not grow with
+        the chart of accounts.
+
+        Args:
+            as_of_date: Include journal lines dated on or before this date (defaults to today)
+            branch_id: Only count journal lines posted to this branch. Opening balances
+                carry no branch, so they only apply to accounts owned by the branch.
+            account_type: Case-insensitive account type filter
+            from_date: Only count journal lines dated on or after this date
+            opening_year: Opening balance year (defaults to the year of as_of_date)
+            account_ids: Restrict to these accounts
+
+        Returns:
+            List of account balance dictionaries ordered by account code
+        """
+        if not as_of_date:
+            as_of_date = date.today()
+        if opening_year is None:
+            opening_year = as_of_date.year
+
+        movement_query = self.db.query(
+            JournalEntry.accounting_code_id.label('account_id'),
+            func.coalesce(func.sum(JournalEntry.debit_amount), 0).label('total_debits'),
+            func.coalesce(func.sum(JournalEntry.credit_amount), 0).label('total_credits'),
+            func.count(JournalEntry.id).label('entry_count')
+        ).filter(JournalEntry.date <= as_of_date)
+        if from_date:
+            movement_query = movement_query.filter(JournalEntry.date >= from_date)
+        if branch_id:
+            movement_query = movement_query.filter(JournalEntry.branch_id == branch_id)
+        movements = movement_query.group_by(JournalEntry.accounting_code_id).subquery()
+
+        openings = self.db.query(
+            OpeningBalance.accounting_code_id.label('account_id'),
+            func.coalesce(func.sum(OpeningBalance.amount), 0).label('amount')
+        ).filter(
+            OpeningBalance.year == opening_year
+        ).group_by(OpeningBalance.accounting_code_id).subquery()
+
+        parent = aliased(AccountingCode)
+        query = self.db.query(
+            AccountingCode.id,
+            AccountingCode.code,
+            AccountingCode.name,
+            AccountingCode.account_type,
+            AccountingCode.category,
+            AccountingCode.reporting_tag,
+            AccountingCode.is_parent,
+            AccountingCode.parent_id,
+            AccountingCode.branch_id,
+            parent.code.label('parent_code'),
+            func.coalesce(movements.c.total_debits, 0).label('total_debits'),
+            func.coalesce(movements.c.total_credits, 0).label('total_credits'),
+            func.coalesce(movements.c.entry_count, 0).label('entry_count'),
+            func.coalesce(openings.c.amount, 0).label('opening_balance')
+        ).outerjoin(
+            movements, movements.c.account_id == AccountingCode.id
+        ).outerjoin(
+            openings, openings.c.account_id == AccountingCode.id
+        ).outerjoin(
+            parent, parent.id == AccountingCode.parent_id
+        )
+
+        if account_type:
+            query = query.filter(func.lower(AccountingCode.account_type) == str(account_type).lower())
+        if account_ids is not None:
+            if not account_ids:
+                return []
+            query = query.filter(AccountingCode.id.in_(account_ids))
+
+        results = []
+        for row in query.order_by(AccountingCode.code).all():
+            total_debits = Decimal(str(row.total_debits or 0))
+            total_credits = Decimal(str(row.total_credits or 0))
+            opening_balance = Decimal(str(row.opening_balance or 0))
+            if branch_id and row.branch_id != branch_id:
+                opening_balance = Decimal('0')
+
+            normal_balance = get_normal_balance(row.account_type)
+            if normal_balance == NormalBalance.CREDIT.value:
+                balance = opening_balance + total_credits - total_debits
+            else:
+                balance = opening_balance + total_debits - total_credits
+
+            results.append({
+                'account_id': row.id,
+                'account_code': row.code,
+                'account_name': row.name,
+                'account_type': row.account_type,
+                'category': row.category,
+                'reporting_tag': row.reporting_tag,
+                'is_parent': row.is_parent,
+                'parent_id': row.parent_id,
+                'parent_code': row.parent_code,
+                'branch_id': row.branch_id,
+                'normal_balance': normal_balance,
+                'opening_balance': opening_balance,
+                'total_debits': total_debits,
+                'total_credits': total_credits,
+                'entry_count': int(row.entry_count or 0),
+                'balance': balance
+            })
+        return results
+
     def get_trial_balance(self, 
                          as_of_date: Optional[date] = None,
                          branch_id: Optional[str] = None,
-                         include_zero_balances: bool = False) -> Dict[str, Any]:
+                         include_zero_balances: bool = False,
+                         account_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate IFRS-compliant trial balance
         
@@ -223,6 +592,7 @@ class GeneralLedgerService:
             as_of_date: Date for trial balance (defaults to today)
             branch_id: Branch filter
             include_zero_balances: Include accounts with zero balances
+            account_type: Account type filter
             
         Returns:
             Dictionary with trial balance data
@@ -231,20 +601,17 @@ class GeneralLedgerService:
             if not as_of_date:
                 as_of_date = date.today()
             
-            # Get all accounts
-            query = self.db.query(AccountingCode)
-            if branch_id:
-                query = query.filter(AccountingCode.branch_id == branch_id)
-            
-            accounts = query.all()
+            balances = self.get_account_balances(
+                as_of_date=as_of_date,
+                branch_id=branch_id,
+                account_type=account_type
+            )
             
             trial_balance_entries = []
             total_debits = Decimal('0')
             total_credits = Decimal('0')
             
-            for account in accounts:
-                balance_info = self._get_account_balance_as_of_date(account.id, as_of_date)
-                
+            for balance_info in balances:
                 if not include_zero_balances and balance_info['balance'] == 0:
                     continue
                 
@@ -252,7 +619,7 @@ class GeneralLedgerService:
                 debit_balance = Decimal('0')
                 credit_balance = Decimal('0')
                 
-                normal_balance = get_normal_balance(account.account_type)
+                normal_balance = balance_info['normal_balance']
                 if normal_balance == NormalBalance.DEBIT.value:
                     if balance_info['balance'] >= 0:
                         debit_balance = balance_info['balance']
@@ -268,22 +635,23 @@ class GeneralLedgerService:
                 total_credits += credit_balance
                 
                 trial_balance_entries.append({
-                    'account_id': account.id,
-                    'account_code': account.code,
-                    'account_name': account.name,
-                    'account_type': account.account_type if account.account_type else None,
-                    'category': account.category,
+                    'account_id': balance_info['account_id'],
+                    'account_code': balance_info['account_code'],
+                    'account_name': balance_info['account_name'],
+                    'account_type': balance_info['account_type'],
+                    'category': balance_info['category'],
+                    'reporting_tag': balance_info['reporting_tag'],
                     'debit_balance': float(debit_balance),
                     'credit_balance': float(credit_balance),
                     'net_balance': float(balance_info['balance']),
+                    'opening_balance': float(balance_info['opening_balance']),
+                    'total_debits': float(balance_info['total_debits']),
+                    'total_credits': float(balance_info['total_credits']),
                     'normal_balance': normal_balance,
-                    'is_parent': account.is_parent,
-                    'parent_code': account.parent.code if account.parent else None
+                    'is_parent': balance_info['is_parent'],
+                    'parent_code': balance_info['parent_code']
                 })
             
-            # Sort by account code
-            trial_balance_entries.sort(key=lambda x: x['account_code'])
-            
             return {
                 'trial_balance': trial_balance_entries,
                 'totals': {
@@ -333,8 +701,12 @@ class GeneralLedgerService:
             if not account:
                 return {'error': 'Account not found'}
             
-            # Get opening balance as of the start of the requested period
-            opening_balance = self._get_opening_balance_for_period(account_id, from_date)
+            # Opening balance as of the start of the requested period, from the grouped balance engine
+            opening_balance = Decimal('0')
+            if from_date:
+                opening_balance = self._get_opening_balances_for_period(
+                    [account_id], from_date
+                ).get(account_id, Decimal('0'))
             
             # Get journal entries
             query = self.db.query(JournalEntry).filter(
@@ -470,17 +842,23 @@ class GeneralLedgerService:
             'updated_at': account.updated_at.isoformat() if account.updated_at else None
         }
     
-    def _calculate_running_balances(self, entries: List[JournalEntry], from_date: Optional[date] = None) -> List[Dict[str, Any]]:
-        """Calculate running balances for journal entries (includes opening balances as of from_date if provided)"""
+    def _calculate_running_balances(self, entries: List[JournalEntry], from_date: Optional[date] = None,
+                                    openings: Optional[Dict[str, Decimal]] = None) -> List[Dict[str, Any]]:
+        """Calculate running balances for journal entries (starting from openings, or opening balances as of from_date)"""
         ledger_entries = []
         account_balances: Dict[str, Dict[str, Any]] = {}
+        openings = dict(openings or {})
+        if from_date and entries and not openings:
+            openings = self._get_opening_balances_for_period(
+                list({entry.accounting_code_id for entry in entries}), from_date
+            )
 
         for entry in entries:
             account_id = entry.accounting_code_id
 
             # Initialize account balance for this account (include opening balance for the period if provided)
             if account_id not in account_balances:
-                opening = self._get_opening_balance_for_period(account_id, from_date) if from_date else Decimal('0')
+                opening = openings.get(account_id, Decimal('0'))
                 account_balances[account_id] = {
                     'balance': opening,
                     'account': entry.accounting_code
@@ -549,122 +927,35 @@ class GeneralLedgerService:
             }
         }
     
-    def _get_account_balance_as_of_date(self, account_id: str, as_of_date: date) -> Dict[str, Any]:
-        """Get account balance as of specific date"""
-        # Get opening balance
-        opening_balance = self._get_opening_balance(account_id, as_of_date)
-        
-        # Get transactions up to date
-        entries = self.db.query(JournalEntry).filter(
-            and_(
-                JournalEntry.accounting_code_id == account_id,
-                JournalEntry.date <= as_of_date
-            )
-        ).all()
-        
-        total_debits = sum(entry.debit_amount or Decimal('0') for entry in entries)
-        total_credits = sum(entry.credit_amount or Decimal('0') for entry in entries)
-        
-        # Get account for normal balance
-        account = self.db.query(AccountingCode).filter(
-            AccountingCode.id == account_id
-        ).first()
-        
-        if account:
-            normal_balance = get_normal_balance(account.account_type)
-            if normal_balance == NormalBalance.DEBIT.value:
-                balance = opening_balance + total_debits - total_credits
-            else:
-                balance = opening_balance + total_credits - total_debits
-        else:
-            balance = opening_balance + total_debits - total_credits
-        
-        return {
-            'opening_balance': opening_balance,
-            'total_debits': total_debits,
-            'total_credits': total_credits,
-            'balance': balance
-        }
-
-    def _get_opening_balance_for_period(self, account_id: str, period_start: Optional[date]) -> Decimal:
-        """
-        Compute opening balance as of the start of the requested period.
-        This equals:
-          OpeningBalance for that account/year
-          + net movements from the start of that year up to (but not including) period_start,
-            taking into account the account's normal balance.
-        """
-        if not period_start:
-            return Decimal('0')
-
-        # Opening balance for the year containing period_start
-        opening_year_balance = self._get_opening_balance(account_id, period_start)
-
-        # Sum movements from beginning of the year to day before period_start
+    def _get_opening_balances_for_period(self, account_ids: List[str], period_start: date) -> Dict[str, Decimal]:
+        """Opening balances as of period_start for many accounts in one query"""
         year_start = date(period_start.year, 1, 1)
-        if period_start <= year_start:
-            return opening_year_balance
-
-        pre_entries = self.db.query(JournalEntry).filter(
-            and_(
-                JournalEntry.accounting_code_id == account_id,
-                JournalEntry.date >= year_start,
-                JournalEntry.date < period_start
-            )
-        ).all()
-
-        total_debits = sum(entry.debit_amount or Decimal('0') for entry in pre_entries)
-        total_credits = sum(entry.credit_amount or Decimal('0') for entry in pre_entries)
-
-        account = self.db.query(AccountingCode).filter(AccountingCode.id == account_id).first()
-        if account:
-            normal_balance = get_normal_balance(account.account_type)
-            if normal_balance == NormalBalance.DEBIT.value:
-                return opening_year_balance + total_debits - total_credits
-            else:
-                return opening_year_balance + total_credits - total_debits
+        balances = self.get_account_balances(
+            as_of_date=period_start - timedelta(days=1),
+            from_date=year_start,
+            opening_year=period_start.year,
+            account_ids=account_ids
+        )
+        return {item['account_id']: item['balance'] for item in balances}
 
-        # Fallback if account not found (treat as debit-normal)
-        return opening_year_balance + total_debits - total_credits
-    
-    def _get_opening_balance(self, account_id: str, as_of_date: Optional[date] = None) -> Decimal:
-        """Get opening balance for account"""
-        if not as_of_date:
-            as_of_date = date.today()
-        
-        opening_balance = self.db.query(OpeningBalance).filter(
-            and_(
-                OpeningBalance.accounting_code_id == account_id,
-                OpeningBalance.year == as_of_date.year
-            )
-        ).first()
-        
-        return opening_balance.amount if opening_balance else Decimal('0')
-    
     def _get_accounts_by_type(self, account_type: AccountType, 
                              as_of_date: date, branch_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get accounts of specific type with balances"""
-        query = self.db.query(AccountingCode).filter(
-            AccountingCode.account_type == account_type
+        balances = self.get_account_balances(
+            as_of_date=as_of_date,
+            branch_id=branch_id,
+            account_type=getattr(account_type, 'value', account_type)
         )
         
-        if branch_id:
-            query = query.filter(AccountingCode.branch_id == branch_id)
-        
-        accounts = query.all()
-        
-        result = []
-        for account in accounts:
-            balance_info = self._get_account_balance_as_of_date(account.id, as_of_date)
-            
-            result.append({
-                'id': account.id,
-                'code': account.code,
-                'name': account.name,
-                'category': account.category,
-                'balance': float(balance_info['balance']),
-                'is_parent': account.is_parent,
-                'parent_id': account.parent_id
-            })
-        
-        return result
+        return [
+            {
+                'id': item['account_id'],
+                'code': item['account_code'],
+                'name': item['account_name'],
+                'category': item['category'],
+                'balance': float(item['balance']),
+                'is_parent': item['is_parent'],
+                'parent_id': item['parent_id']
+            }
+            for item in balances
+        ]
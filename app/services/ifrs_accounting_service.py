@@ -3,7 +3,7 @@ from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime, date
 import uuid
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import or_, func, literal_column, null, select, union_all
 from enum import Enum
 
 from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry, OpeningBalance
@@ -1338,25 +1338,115 @@ class IFRSAccountingService:
                 'error': str(e)
             }
 
+    def get_ifrs_category_totals(
+        self,
+        end_date: date,
+        start_date: Optional[date] = None,
+        branch_id: Optional[str] = None,
+        ifrs_tags: Optional[List[str]] = None
+    ) -> Dict[Tuple[str, str], Decimal]:
+        """
+        Totals for every IFRS reporting tag and branch in a single query
+
+        Without a start date each total is a closing balance: the opening
+        balance for end_date's year plus journal movement up to end_date.
+        With a start date it is the journal movement for the period only.
+        Totals carry the sign of the accounts' normal balance, so assets and
+        expenses grow with debits and the other types with credits.
+
+        Args:
+            end_date: Last posting date included
+            start_date: First posting date included (period movement only)
+            branch_id: Restrict to one branch; all branches when omitted
+            ifrs_tags: Restrict to these reporting tags
+
+        Returns:
+            Dict mapping (branch_id, reporting_tag) to the signed total
+        """
+        movement = JournalEntry.debit_amount - JournalEntry.credit_amount
+        journal_filters = [AccountingEntry.date_posted <= end_date]
+        if start_date:
+            journal_filters.append(AccountingEntry.date_posted >= start_date)
+        sources = [
+            select(
+                JournalEntry.accounting_code_id.label('account_id'),
+                AccountingEntry.branch_id.label('entry_branch_id'),
+                literal_column('0').label('is_opening'),
+                literal_column('0').label('opening'),
+                movement.label('movement'),
+            ).join(AccountingEntry, AccountingEntry.id == JournalEntry.accounting_entry_id).where(*journal_filters)
+        ]
+        if start_date is None:
+            sources.append(
+                select(
+                    OpeningBalance.accounting_code_id,
+                    null(),
+                    literal_column('1'),
+                    OpeningBalance.amount,
+                    literal_column('0'),
+                ).where(OpeningBalance.year == end_date.year)
+            )
+        source = union_all(*sources).subquery()
+
+        # Journal lines only count towards accounts of their own entry's branch
+        account_filters = [or_(source.c.is_opening == 1, source.c.entry_branch_id == AccountingCode.branch_id)]
+        if branch_id:
+            account_filters.append(AccountingCode.branch_id == branch_id)
+        if ifrs_tags:
+            account_filters.append(AccountingCode.reporting_tag.in_(ifrs_tags))
+
+        rows = self.db.execute(
+            select(
+                AccountingCode.branch_id,
+                AccountingCode.reporting_tag,
+                AccountingCode.account_type,
+                func.sum(source.c.opening),
+                func.sum(source.c.movement),
+            )
+            .join(source, source.c.account_id == AccountingCode.id)
+            .where(*account_filters)
+            .group_by(AccountingCode.branch_id, AccountingCode.reporting_tag, AccountingCode.account_type)
+        ).all()
+
+        totals: Dict[Tuple[str, str], Decimal] = {}
+        for row_branch, tag, account_type, opening, moved in rows:
+            opening = Decimal(str(opening or 0))
+            moved = Decimal(str(moved or 0))
+            account_rules = self.IFRS_ACCOUNT_RULES[IFRSAccountType(account_type)]
+            if account_rules['normal_balance'] == 'debit':
+                total = opening + moved
+            else:
+                total = opening - moved
+            key = (row_branch, tag)
+            totals[key] = totals.get(key, Decimal('0')) + total
+        return totals
+
     def get_ifrs_balance_sheet_data(self, branch_id: str, as_of_date: date = None) -> Dict[str, Any]:
         """Get IFRS-compliant balance sheet data"""
         if not as_of_date:
             as_of_date = date.today()
 
+        totals = self.get_ifrs_category_totals(
+            as_of_date, branch_id=branch_id, ifrs_tags=['A1', 'A2', 'L1', 'L2', 'E1', 'E2', 'E3']
+        )
+
+        def balance(tag: str) -> Decimal:
+            return totals.get((branch_id, tag), Decimal('0'))
+
         balance_sheet_data = {
             'as_of_date': as_of_date,
             'assets': {
-                'current_assets': self._get_balance_for_ifrs_category('A1', branch_id, as_of_date),
-                'non_current_assets': self._get_balance_for_ifrs_category('A2', branch_id, as_of_date)
+                'current_assets': balance('A1'),
+                'non_current_assets': balance('A2')
             },
             'liabilities': {
-                'current_liabilities': self._get_balance_for_ifrs_category('L1', branch_id, as_of_date),
-                'non_current_liabilities': self._get_balance_for_ifrs_category('L2', branch_id, as_of_date)
+                'current_liabilities': balance('L1'),
+                'non_current_liabilities': balance('L2')
             },
             'equity': {
-                'share_capital': self._get_balance_for_ifrs_category('E1', branch_id, as_of_date),
-                'retained_earnings': self._get_balance_for_ifrs_category('E2', branch_id, as_of_date),
-                'other_equity': self._get_balance_for_ifrs_category('E3', branch_id, as_of_date)
+                'share_capital': balance('E1'),
+                'retained_earnings': balance('E2'),
+                'other_equity': balance('E3')
             }
         }
 
@@ -1376,17 +1466,24 @@ class IFRSAccountingService:
 
     def get_ifrs_income_statement_data(self, branch_id: str, start_date: date, end_date: date) -> Dict[str, Any]:
         """Get IFRS-compliant income statement data"""
+        totals = self.get_ifrs_category_totals(
+            end_date, start_date=start_date, branch_id=branch_id, ifrs_tags=['R1', 'R2', 'X1', 'X2', 'X3', 'X4']
+        )
+
+        def movement(tag: str) -> Decimal:
+            return totals.get((branch_id, tag), Decimal('0'))
+
         income_statement_data = {
             'period': {'start_date': start_date, 'end_date': end_date},
             'revenue': {
-                'revenue_from_contracts': self._get_movement_for_ifrs_category('R1', branch_id, start_date, end_date),
-                'other_income': self._get_movement_for_ifrs_category('R2', branch_id, start_date, end_date)
+                'revenue_from_contracts': movement('R1'),
+                'other_income': movement('R2')
             },
             'expenses': {
-                'cost_of_sales': self._get_movement_for_ifrs_category('X1', branch_id, start_date, end_date),
-                'selling_expenses': self._get_movement_for_ifrs_category('X2', branch_id, start_date, end_date),
-                'administrative_expenses': self._get_movement_for_ifrs_category('X3', branch_id, start_date, end_date),
-                'finance_costs': self._get_movement_for_ifrs_category('X4', branch_id, start_date, end_date)
+                'cost_of_sales': movement('X1'),
+                'selling_expenses': movement('X2'),
+                'administrative_expenses': movement('X3'),
+                'finance_costs': movement('X4')
             }
         }
 
@@ -1402,74 +1499,3 @@ class IFRSAccountingService:
         }
 
         return income_statement_data
-
-    def _get_balance_for_ifrs_category(self, ifrs_tag: str, branch_id: str, as_of_date: date) -> Decimal:
-        """Get balance for IFRS category as of a specific date"""
-        # Get all accounts with this IFRS tag
-        accounts = self.db.query(AccountingCode).filter(
-            and_(
-                AccountingCode.reporting_tag == ifrs_tag,
-                AccountingCode.branch_id == branch_id
-            )
-        ).all()
-
-        total_balance = Decimal('0')
-
-        for account in accounts:
-            # Get opening balance
-            opening_balance = self.db.query(func.sum(OpeningBalance.amount)).filter(
-                and_(
-                    OpeningBalance.accounting_code_id == account.id,
-                    OpeningBalance.year == as_of_date.year
-                )
-            ).scalar() or Decimal('0')
-
-            # Get movement from journal entries
-            journal_entries = self.db.query(JournalEntry).join(AccountingEntry).filter(
-                and_(
-                    JournalEntry.accounting_code_id == account.id,
-                    AccountingEntry.date_posted <= as_of_date,
-                    AccountingEntry.branch_id == branch_id
-                )
-            ).all()
-
-            movement = sum(je.debit_amount - je.credit_amount for je in journal_entries)
-
-            # Calculate balance based on account type
-            account_rules = self.IFRS_ACCOUNT_RULES[IFRSAccountType(account.account_type)]
-            if account_rules['normal_balance'] == 'debit':
-                balance = opening_balance + movement
-            else:
-                balance = opening_balance - movement
-
-            total_balance += balance
-
-        return total_balance
-
-    def _get_movement_for_ifrs_category(self, ifrs_tag: str, branch_id: str, start_date: date, end_date: date) -> Decimal:
-        """Get movement for IFRS category during a period"""
-        # Get all accounts with this IFRS tag
-        accounts = self.db.query(AccountingCode).filter(
-            and_(
-                AccountingCode.reporting_tag == ifrs_tag,
-                AccountingCode.branch_id == branch_id
-            )
-        ).all()
-
-        total_movement = Decimal('0')
-
-        for account in accounts:
-            # Get journal entries for the period
-            journal_entries = self.db.query(JournalEntry).join(AccountingEntry).filter(
-                and_(
-                    JournalEntry.accounting_code_id == account.id,
-                    AccountingEntry.date_posted >= start_date,
-                    AccountingEntry.date_posted <= end_date,
-                    AccountingEntry.branch_id == branch_id
-                )
-            ).all()
-
-            movement = sum(je.debit_amount - je.credit_amount for je in journal_entries)
-            total_movement += movement
-
-        return total_movement
@@ -9,16 +9,24 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text, and_, or_
-from app.models.accounting import AccountingCode, JournalEntry, AccountingEntry
+from app.models.accounting import AccountingCode, AccountingEntry
 from app.models.sales import Sale, Customer
 from app.models.purchases import Purchase, Supplier
 from app.models.inventory import Product, InventoryTransaction
+from app.services.account_balance_snapshot_service import AccountBalanceSnapshotService
+from app.services.general_ledger_service import GeneralLedgerService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 
 class IFRSReportsCore:
     """Core IFRS reporting functionality"""
 
     def __init__(self, db: Session):
         self.db = db
+        self.snapshots = AccountBalanceSnapshotService(db)
+        self._totals_cache: Dict[date, Dict[str, Tuple[Decimal, Decimal]]] = {}
         self._load_ifrs_mapping()
 
     def _load_ifrs_mapping(self):
@@ -31,36 +39,21 @@ class IFRSReportsCore:
             else:
                 self.ifrs_config = {}
         except Exception as e:
-            print(f"Warning: Could not load IFRS mapping config: {e}")
+            logger.warning("Could not load IFRS mapping config: %s", e)
             self.ifrs_config = {}
 
-    def get_account_balance_as_of_date(self, account_id: str, as_of_date: date) -> Dict:
-        """Get account balance as of specific date with IFRS compliance"""
-
-        total_debits = Decimal('0.00')
-        total_credits = Decimal('0.00')
-
-        try:
-            # Query journal entries directly - they contain the debit/credit amounts
-            journal_entries = self.db.query(JournalEntry).filter(
-                JournalEntry.accounting_code_id == account_id,
-                JournalEntry.date <= as_of_date
-            ).all()
-
-            print(f"Found {len(journal_entries)} journal entries for account {account_id}")
+    def _get_account_totals(self, as_of_date: date) -> Dict[str, Tuple[Decimal, Decimal]]:
+        """Debit/credit totals for every account as of a date (snapshot + open-period delta).
 
-            total_debits = sum(Decimal(str(entry.debit_amount or 0)) for entry in journal_entries)
-            total_credits = sum(Decimal(str(entry.credit_amount or 0)) for entry in journal_entries)
-
-            print(f"Account {account_id}: Debits={total_debits}, Credits={total_credits}")
-
-        except Exception as e:
-            # If there are issues with entries, use zero balances
-            # This could be due to missing tables, no data, or schema issues
-            print(f"Warning: Could not retrieve journal entries for account {account_id}: {str(e)}")
-            pass
+        Cached per instance so a report that asks for many accounts at the same date
+        runs the grouped queries once.
+        """
+        if as_of_date not in self._totals_cache:
+            self._totals_cache[as_of_date] = self.snapshots.get_account_totals(as_of_date)
+        return self._totals_cache[as_of_date]
 
-        account = self.db.query(AccountingCode).filter(AccountingCode.id == account_id).first()
+    @staticmethod
+    def _balance_info(account: Optional[AccountingCode], total_debits: Decimal, total_credits: Decimal) -> Dict:
         # Normalize account type to handle case differences (e.g., 'Asset' vs 'ASSET')
         account_type = getattr(account, 'account_type', 'Asset') or 'Asset'
         atype = str(account_type).strip().lower()
@@ -77,84 +70,84 @@ class IFRSReportsCore:
             'category': getattr(account, 'category', 'Other')
         }
 
+    def get_account_balance_as_of_date(self, account_id: str, as_of_date: date) -> Dict:
+        """Get account balance as of specific date with IFRS compliance"""
+
+        total_debits = Decimal('0.00')
+        total_credits = Decimal('0.00')
+
+        try:
+            total_debits, total_credits = self._get_account_totals(as_of_date).get(
+                account_id, (total_debits, total_credits)
+            )
+        except Exception as e:
+            # If there are issues with entries, use zero balances
+            # This could be due to missing tables, no data, or schema issues
+            logger.warning("Could not retrieve journal totals for account %s: %s", account_id, e)
+
+        account = self.db.query(AccountingCode).filter(AccountingCode.id == account_id).first()
+        return self._balance_info(account, total_debits, total_credits)
+
     def get_trial_balance_data(
         self,
         as_of_date: date = None,
         include_zero_balances: bool = False,
         account_type_filter: str = None
     ) -> Dict:
-        """Generate IFRS-compliant trial balance data"""
+        """Generate IFRS-compliant trial balance data
+
+        Built on GeneralLedgerService.get_trial_balance (the ledger's grouped opening
+        balance and movement query), so it matches the trial balance exports and the
+        general ledger: the year's opening balances are included and each account's
+        balance is presented on its debit or credit side.
+        """
         if as_of_date is None:
             as_of_date = date.today()
 
-        trial_balance_items: List[Dict] = []
-        total_debits = Decimal('0.00')
-        total_credits = Decimal('0.00')
-
-        try:
-            total_journal_entries = self.db.query(JournalEntry).count()
-            print(f"Found {total_journal_entries} total journal entries in database")
-
-            query = self.db.query(AccountingCode)
-            if account_type_filter:
-                try:
-                    query = query.filter(AccountingCode.account_type == account_type_filter)
-                except Exception:
-                    pass
-
-            # DO NOT limit accounts - trial balance must include ALL accounts
-            accounts = query.all()
-            print(f"Found {len(accounts)} accounting codes in database")
-
-            if not accounts:
-                print("No accounting codes found in database. Returning empty trial balance.")
-                return {
-                    'success': True,
-                    'data': {
-                        'as_of_date': as_of_date.isoformat(),
-                        'items': [],
-                        'totals': {
-                            'total_debits': 0.0,
-                            'total_credits': 0.0,
-                            'difference': 0.0
-                        },
-                        'is_balanced': True,
-                        'compliant': True,
-                        'message': 'No accounting codes found. Please initialize the chart of accounts.'
-                    }
+        if self.db.query(AccountingCode.id).first() is None:
+            logger.debug("No accounting codes found in database. Returning empty trial balance.")
+            return {
+                'success': True,
+                'data': {
+                    'as_of_date': as_of_date.isoformat(),
+                    'items': [],
+                    'totals': {
+                        'total_debits': 0.0,
+                        'total_credits': 0.0,
+                        'difference': 0.0
+                    },
+                    'is_balanced': True,
+                    'compliant': True,
+                    'message': 'No accounting codes found. Please initialize the chart of accounts.'
                 }
+            }
 
-            for account in accounts:
-                try:
-                    balance_info = self.get_account_balance_as_of_date(account.id, as_of_date)
-
-                    if not include_zero_balances and balance_info['balance'] == 0:
-                        continue
-
-                    # For trial balance, we use total debits and credits from all transactions
-                    # not the net balance (which would be debit - credit)
-                    account_total_debits = balance_info['total_debits']
-                    account_total_credits = balance_info['total_credits']
-
-                    trial_balance_items.append({
-                        'account_code': getattr(account, 'code', f'ACC-{account.id}'),
-                        'account_name': getattr(account, 'name', 'Unknown Account'),
-                        'account_type': getattr(account, 'account_type', 'UNKNOWN'),
-                        'category': getattr(account, 'category', 'Other'),
-                        'reporting_tag': getattr(account, 'reporting_tag', ''),
-                        'debit_balance': float(account_total_debits),
-                        'credit_balance': float(account_total_credits),
-                        'balance': float(balance_info['balance']),
-                        'total_debits': float(balance_info['total_debits']),
-                        'total_credits': float(balance_info['total_credits'])
-                    })
-
-                    total_debits += account_total_debits
-                    total_credits += account_total_credits
-                except Exception:
-                    continue
-        except Exception:
-            pass
+        ledger_tb = GeneralLedgerService(self.db).get_trial_balance(
+            as_of_date=as_of_date,
+            include_zero_balances=include_zero_balances,
+            account_type=account_type_filter
+        )
+        if ledger_tb.get('error'):
+            logger.warning("Could not build trial balance: %s", ledger_tb['error'])
+
+        trial_balance_items: List[Dict] = [
+            {
+                'account_code': item['account_code'],
+                'account_name': item['account_name'],
+                'account_type': item['account_type'],
+                'category': item['category'],
+                'reporting_tag': item['reporting_tag'] or '',
+                'debit_balance': item['debit_balance'],
+                'credit_balance': item['credit_balance'],
+                'balance': item['net_balance'],
+                'opening_balance': item['opening_balance'],
+                'total_debits': item['total_debits'],
+                'total_credits': item['total_credits']
+            }
+            for item in ledger_tb.get('trial_balance', [])
+        ]
+        total_debits = Decimal(str(ledger_tb['totals']['total_debits']))
+        total_credits = Decimal(str(ledger_tb['totals']['total_credits']))
 
         is_balanced = total_debits == total_credits
         variance = total_debits - total_credits
@@ -276,12 +269,15 @@ class IFRSReportsCore:
             return []
 
         section_items: List[Dict] = []
+        account_totals = self._get_account_totals(as_of_date)
+        zero = Decimal('0.00')
         for account in accounts:
             try:
                 bucket = self._classify_ifrs_section(account)
                 if bucket != ifrs_category:
                     continue
-                balance_info = self.get_account_balance_as_of_date(account.id, as_of_date)
+                debits, credits = account_totals.get(account.id, (zero, zero))
+                balance_info = self._balance_info(account, debits, credits)
                 if balance_info['balance'] == 0 and detail_level == 'summary':
                     continue
 
@@ -325,9 +321,9 @@ class IFRSReportsCore:
 
         # Debug: Log section population for troubleshooting
         if not section_items:
-            print(f"Info: No items found for IFRS section {ifrs_category} with {len(accounts)} accounts of type {account_type}")
+            logger.debug("No items found for IFRS section %s with %s accounts of type %s", ifrs_category, len(accounts), account_type)
         else:
-            print(f"Success: Found {len(section_items)} items for IFRS section {ifrs_category}")
+            logger.debug("Found %s items for IFRS section %s", len(section_items), ifrs_category)
 
         # DO NOT use fallback logic - rely on reporting_tag classification
         # Previously, fallback logic added ALL accounts to empty sections, causing double-counting
@@ -359,28 +355,18 @@ class IFRSReportsCore:
 
         # Calculate Net Income (Revenue - Expense) and add to Equity as Retained Earnings
         # This is essential for the Balance Sheet to balance: Assets = Liabilities + Equity + Net Income
-        from sqlalchemy import text, func
-        revenue_balance = self.db.execute(
-            text("""
-                SELECT COALESCE(SUM(je.credit_amount - je.debit_amount), 0) as net_revenue
-                FROM journal_entries je
-                JOIN accounting_codes ac ON je.accounting_code_id = ac.id
-                WHERE LOWER(ac.account_type) = 'revenue'
-                AND je.date <= :as_of_date
-            """),
-            {"as_of_date": as_of_date}
-        ).scalar() or 0
-
-        expense_balance = self.db.execute(
-            text("""
-                SELECT COALESCE(SUM(je.debit_amount - je.credit_amount), 0) as net_expense
-                FROM journal_entries je
-                JOIN accounting_codes ac ON je.accounting_code_id = ac.id
-                WHERE LOWER(ac.account_type) = 'expense'
-                AND je.date <= :as_of_date
-            """),
-            {"as_of_date": as_of_date}
-        ).scalar() or 0
+        account_totals = self._get_account_totals(as_of_date)
+        revenue_balance = Decimal('0.00')
+        expense_balance = Decimal('0.00')
+        income_accounts = self.db.query(AccountingCode.id, AccountingCode.account_type).filter(
+            func.lower(AccountingCode.account_type).in_(['revenue', 'expense'])
+        ).all()
+        for account_id, account_type in income_accounts:
+            debits, credits = account_totals.get(account_id, (Decimal('0.00'), Decimal('0.00')))
+            if str(account_type).lower() == 'revenue':
+                revenue_balance += credits - debits
+            else:
+                expense_balance += debits - credits
 
         net_income = float(revenue_balance) - float(expense_balance)
 
@@ -406,16 +392,16 @@ class IFRSReportsCore:
 
         total_equity = sum(item['amount'] for item in equity)
 
-        print(f"Balance Sheet Totals - Assets: {total_assets}, Liabilities: {total_liabilities}, Equity: {total_equity}")
+        logger.debug("Balance Sheet Totals - Assets: %s, Liabilities: %s, Equity: %s", total_assets, total_liabilities, total_equity)
 
         # IFRS Balance Check
         balance_check = total_assets == (total_liabilities + total_equity)
         variance = total_assets - (total_liabilities + total_equity)
 
         if not balance_check:
-            print(f"WARNING: Balance sheet does not balance: Assets {total_assets} != Liabilities + Equity {total_liabilities + total_equity} (variance: {variance})")
+            logger.warning("Balance sheet does not balance: Assets %s != Liabilities + Equity %s (variance: %s)", total_assets, total_liabilities + total_equity, variance)
         else:
-            print(f"SUCCESS: Balance sheet is balanced: Assets {total_assets} = Liabilities + Equity {total_liabilities + total_equity}")
+            logger.debug("Balance sheet is balanced: Assets %s = Liabilities + Equity %s", total_assets, total_liabilities + total_equity)
 
         return {
             'as_of_date': as_of_date,
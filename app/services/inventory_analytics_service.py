@@ -0,0 +1,182 @@
+"""
+Inventory Analytics Service
+
+Shared, set-based inputs for the inventory analytics reports (ABC, aging, category,
+valuation comparison). Everything for one branch is loaded in a handful of grouped
+queries into a pandas DataFrame with one row per product:
+
+- product attributes (quantity, cost/selling price, category, reorder point)
+- sales turnover over a trailing window, last movement date and average receipt cost,
+  from a single grouped pass over inventory_transactions
+- FIFO/LIFO values from inventory_cost_layers
+
+Reports classify and bucket those rows with vectorized NumPy/pandas operations
+instead of running one query per product.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, and_, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.inventory import InventoryCostLayer, InventoryTransaction, Product
+
+RECEIPT_TYPES = ('goods_receipt', 'opening_stock')
+SALE_TYPES = ('sale',)
+AGING_BUCKETS = ('0-30_days', '31-60_days', '61-90_days', '90+_days')
+
+_PRODUCT_COLUMNS = ['id', 'name', 'sku', 'category', 'quantity', 'cost_price', 'selling_price', 'reorder_point']
+_MOVEMENT_COLUMNS = ['id', 'last_movement_date', 'turnover', 'receipt_quantity', 'receipt_cost']
+_LAYER_COLUMNS = ['id', 'original_quantity', 'remaining_quantity', 'unit_cost']
+
+
+def _take_in_order(layers: pd.DataFrame, quantity_column: str, on_hand: pd.Series) -> pd.DataFrame:
+    """Per product, take layer quantities in row order until on-hand quantity is covered."""
+    if layers.empty:
+        return pd.DataFrame({'quantity': [], 'value': []}, index=pd.Index([], name='id'))
+    available = layers[quantity_column]
+    before = available.groupby(layers['id']).cumsum() - available
+    taken = np.clip(layers['id'].map(on_hand).fillna(0) - before, 0, available)
+    return pd.DataFrame({
+        'quantity': taken.groupby(layers['id']).sum(),
+        'value': (taken * layers['unit_cost']).groupby(layers['id']).sum(),
+    })
+
+
+class InventoryAnalyticsService:
+    """Branch-wide product metrics for inventory analytics"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def product_metrics(
+        self,
+        branch_id: str,
+        in_stock_only: bool = False,
+        turnover_days: int = 90,
+        as_of: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        One row per product of the branch with stock, value, turnover and movement data.
+
+        Args:
+            branch_id: Branch whose products are analysed
+            in_stock_only: Only include products with quantity > 0
+            turnover_days: Trailing window (days) for sales turnover
+            as_of: End of the turnover window (default: today)
+
+        Returns:
+            DataFrame with columns id, name, sku, category, quantity, cost_price,
+            selling_price, reorder_point, inventory_value, turnover, turnover_value,
+            last_movement_date and avg_cost. Prices and reorder point keep NaN where
+            the product has none; derived values treat them as 0.
+        """
+        end_date = as_of or date.today()
+        start_date = end_date - timedelta(days=turnover_days)
+
+        # Core selects with float casts: row volume is one per SKU, so skip ORM/Decimal processing
+        product_query = select(
+            Product.id, Product.name, Product.sku, Product.category, Product.quantity,
+            cast(Product.cost_price, Float), cast(Product.selling_price, Float), Product.reorder_point
+        ).where(Product.branch_id == branch_id)
+        if in_stock_only:
+            product_query = product_query.where(Product.quantity > 0)
+        df = pd.DataFrame(self.db.execute(product_query).all(), columns=_PRODUCT_COLUMNS)
+
+        in_window = and_(
+            InventoryTransaction.transaction_type.in_(SALE_TYPES),
+            InventoryTransaction.date >= start_date,
+            InventoryTransaction.date <= end_date
+        )
+        is_receipt = and_(
+            InventoryTransaction.transaction_type.in_(RECEIPT_TYPES),
+            InventoryTransaction.quantity > 0
+        )
+        movement_query = select(
+            InventoryTransaction.product_id,
+            func.max(InventoryTransaction.date),
+            func.sum(case((in_window, func.abs(InventoryTransaction.quantity)), else_=0)),
+            func.sum(case((is_receipt, InventoryTransaction.quantity), else_=0)),
+            cast(func.sum(case((is_receipt, InventoryTransaction.quantity * InventoryTransaction.unit_cost), else_=0)), Float),
+        ).join(Product, Product.id == InventoryTransaction.product_id).where(Product.branch_id == branch_id)
+        if in_stock_only:
+            movement_query = movement_query.where(Product.quantity > 0)
+        movements = pd.DataFrame(
+            self.db.execute(movement_query.group_by(InventoryTransaction.product_id)).all(), columns=_MOVEMENT_COLUMNS
+        )
+
+        df = df.merge(movements, on='id', how='left')
+        for column in ('cost_price', 'selling_price', 'reorder_point', 'receipt_cost'):
+            df[column] = df[column].astype(float)
+        for column in ('quantity', 'turnover', 'receipt_quantity'):
+            df[column] = df[column].astype(float).fillna(0).astype('int64')
+
+        df['inventory_value'] = df['quantity'] * df['cost_price'].fillna(0)
+        df['turnover_value'] = df['turnover'] * df['selling_price'].fillna(0)
+        received = df['receipt_quantity'] > 0
+        df['avg_cost'] = np.where(received, df['receipt_cost'].fillna(0) / df['receipt_quantity'].where(received, 1), 0.0)
+        df['last_movement_date'] = pd.to_datetime(df['last_movement_date'])
+        return df.drop(columns=['receipt_quantity', 'receipt_cost'])
+
+    def layer_values(self, branch_id: str, metrics: pd.DataFrame) -> pd.DataFrame:
+        """
+        FIFO and LIFO value of each product's on-hand quantity from its cost layers.
+
+        Under FIFO the stock on hand is the newest open layers; under LIFO it is the
+        oldest receipts. Quantity the layers do not cover is valued at cost price.
+
+        Args:
+            branch_id: Branch the metrics were loaded for
+            metrics: Output of product_metrics for that branch
+
+        Returns:
+            DataFrame aligned with metrics with fifo_value and lifo_value columns
+        """
+        rows = self.db.execute(
+            select(
+                InventoryCostLayer.product_id, InventoryCostLayer.original_quantity,
+                InventoryCostLayer.remaining_quantity, cast(InventoryCostLayer.unit_cost, Float)
+            ).join(Product, Product.id == InventoryCostLayer.product_id).where(
+                Product.branch_id == branch_id
+            ).order_by(
+                InventoryCostLayer.product_id, InventoryCostLayer.received_date,
+                InventoryCostLayer.created_at, InventoryCostLayer.id
+            )
+        ).all()
+        layers = pd.DataFrame(rows, columns=_LAYER_COLUMNS)
+        layers['unit_cost'] = layers['unit_cost'].astype(float)
+
+        products = metrics.set_index('id')
+        on_hand = products['quantity']
+        open_newest_first = layers[layers['remaining_quantity'] > 0].iloc[::-1]
+
+        result = pd.DataFrame(index=metrics.index)
+        for name, taken in (
+            ('fifo_value', _take_in_order(open_newest_first, 'remaining_quantity', on_hand)),
+            ('lifo_value', _take_in_order(layers, 'original_quantity', on_hand)),
+        ):
+            taken = taken.reindex(products.index).fillna(0)
+            shortfall = on_hand - taken['quantity']
+            result[name] = (taken['value'] + shortfall * products['cost_price'].fillna(0)).to_numpy()
+        return result
+
+    @staticmethod
+    def classify_abc(values: pd.Series, a_threshold: float = 70, b_threshold: float = 90) -> pd.Series:
+        """ABC class per row from the cumulative share of value (rows sorted by value, descending)"""
+        total = values.sum()
+        cumulative = values.cumsum() / total * 100 if total > 0 else pd.Series(0.0, index=values.index)
+        return pd.Series(
+            np.select([cumulative <= a_threshold, cumulative <= b_threshold], ['A', 'B'], 'C'),
+            index=values.index
+        )
+
+    @staticmethod
+    def aging_bucket(days: pd.Series) -> pd.Series:
+        """Aging bucket label for days since last movement"""
+        return pd.Series(
+            np.select([days <= 30, days <= 60, days <= 90], list(AGING_BUCKETS[:3]), AGING_BUCKETS[3]),
+            index=days.index
+        )
@@ -0,0 +1,334 @@
+"""
+Inventory Cost Layer Service
+
+Maintains the inventory_cost_layers table (FIFO layers with remaining quantity):
+
+- Inbound inventory transactions (receipts, opening stock, returns, production
+  receipts, transfers in, ...) open a layer at their unit cost.
+- Outbound transactions (sales, damage, production issues, transfers out, ...)
+  consume the oldest open layers of the product.
+
+Layers are kept current by a session flush hook, so every ORM stock path maintains
+them without calling this service explicitly. Edits and deletes of existing
+inventory transactions replay the affected products from history. FIFO issue cost
+and stock valuation become lookups over the open layers of a product.
+scripts/rebuild_inventory_cost_layers.py rebuilds the table from inventory_transactions.
+"""
+
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import uuid
+
+from sqlalchemy import and_, case, event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.inventory import InventoryCostLayer, InventoryTransaction, Product
+
+ZERO = Decimal('0')
+
+INBOUND_TYPES = frozenset({
+    'goods_receipt', 'opening_stock', 'purchase', 'return', 'sale_cancellation', 'job_return',
+    'production_receipt', 'headquarters_receipt', 'headquarters_production_receipt',
+    'branch_receipt', 'stock_transfer_in', 'transfer_in', 'adjustment_in',
+})
+OUTBOUND_TYPES = frozenset({
+    'sale', 'damage', 'theft', 'expiry', 'write_off', 'job_issue', 'issue_to_wip',
+    'headquarters_issue_to_production', 'branch_allocation', 'stock_transfer_out', 'transfer_out',
+    'adjustment_out',
+    # Legacy type: only ever written for stock decreases (adjustments are now typed by direction)
+    'adjustment',
+})
+
+_TRACKED_COLUMNS = ('product_id', 'transaction_type', 'quantity', 'unit_cost', 'date')
+_INSERT_CHUNK_SIZE = 1000
+_CONSUME_BATCH = 64
+
+
+def movement_direction(transaction_type: Optional[str], quantity) -> int:
+    """+1 for movements that add stock, -1 for ones that remove it, 0 for neither."""
+    if not quantity:
+        return 0
+    if transaction_type in INBOUND_TYPES:
+        return 1
+    if transaction_type in OUTBOUND_TYPES:
+        return -1
+    return 0
+
+
+def _to_decimal(value) -> Decimal:
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _layer_row(product_id: str, branch_id: Optional[str], source_id: Optional[str], received,
+               quantity: int, unit_cost, created_at: datetime) -> Dict[str, object]:
+    if isinstance(received, datetime):
+        received = received.date()
+    return {
+        'id': str(uuid.uuid4()),
+        'product_id': product_id,
+        'branch_id': branch_id,
+        'source_transaction_id': source_id,
+        'received_date': received or created_at.date(),
+        'original_quantity': quantity,
+        'remaining_quantity': quantity,
+        'unit_cost': _to_decimal(unit_cost),
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+
+def _fifo_order(table):
+    return table.c.received_date, table.c.created_at, table.c.id
+
+
+def _consume_layers(connection, product_id: str, quantity: int) -> Tuple[Decimal, int]:
+    """Take quantity from the oldest open layers. Returns (cost, quantity actually covered)."""
+    table = InventoryCostLayer.__table__
+    remaining = quantity
+    cost = ZERO
+    while remaining > 0:
+        layers = connection.execute(
+            select(table.c.id, table.c.remaining_quantity, table.c.unit_cost)
+            .where(and_(table.c.product_id == product_id, table.c.remaining_quantity > 0))
+            .order_by(*_fifo_order(table))
+            .limit(_CONSUME_BATCH)
+            .with_for_update()
+        ).all()
+        if not layers:
+            break
+        for layer_id, available, unit_cost in layers:
+            taken = min(available, remaining)
+            connection.execute(
+                table.update().where(table.c.id == layer_id)
+                .values(remaining_quantity=available - taken, updated_at=datetime.utcnow())
+            )
+            cost += _to_decimal(unit_cost) * taken
+            remaining -= taken
+            if remaining == 0:
+                break
+    return cost, quantity - remaining
+
+
+def _replay_products(connection, product_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Rebuild layers from inventory_transactions for the given products (None = all)."""
+    layers_table = InventoryCostLayer.__table__
+    tx = InventoryTransaction.__table__
+    products = Product.__table__
+    ids = list(product_ids) if product_ids is not None else None
+
+    query = (
+        select(tx.c.id, tx.c.product_id, tx.c.branch_id, tx.c.transaction_type, tx.c.quantity,
+               tx.c.unit_cost, tx.c.date, tx.c.created_at, products.c.branch_id, products.c.cost_price)
+        .select_from(tx.join(products, products.c.id == tx.c.product_id))
+        # Inbound first on timestamp ties (rows written in one transaction share now())
+        .order_by(tx.c.product_id, tx.c.date, tx.c.created_at,
+                  case((tx.c.transaction_type.in_(INBOUND_TYPES), 0), else_=1), tx.c.id)
+    )
+    stale = layers_table.delete()
+    if ids is not None:
+        if not ids:
+            return {'products': 0, 'layers_written': 0}
+        query = query.where(tx.c.product_id.in_(ids))
+        stale = stale.where(layers_table.c.product_id.in_(ids))
+
+    connection.execute(stale)
+
+    pending: List[Dict[str, object]] = []
+    written = 0
+    product_count = 0
+
+    def _flush_rows(force: bool = False):
+        nonlocal pending, written
+        if pending and (force or len(pending) >= _INSERT_CHUNK_SIZE):
+            connection.execute(layers_table.insert(), pending)
+            written += len(pending)
+            pending = []
+
+    current_product = None
+    open_layers: deque = deque()
+    for (tx_id, product_id, tx_branch, tx_type, quantity, unit_cost, tx_date,
+         created_at, product_branch, cost_price) in connection.execute(query):
+        if product_id != current_product:
+            pending.extend(open_layers)
+            _flush_rows()
+            open_layers = deque()
+            current_product = product_id
+            product_count += 1
+        direction = movement_direction(tx_type, quantity)
+        amount = abs(int(quantity or 0))
+        if direction > 0:
+            open_layers.append(_layer_row(
+                product_id, tx_branch or product_branch, tx_id, tx_date, amount,
+                unit_cost if unit_cost is not None else cost_price, created_at or datetime.utcnow()
+            ))
+        elif direction < 0:
+            while amount > 0 and open_layers:
+                layer = open_layers[0]
+                taken = min(layer['remaining_quantity'], amount)
+                layer['remaining_quantity'] -= taken
+                amount -= taken
+                if layer['remaining_quantity'] == 0:
+                    # Fully consumed layers are history only; keep them for traceability
+                    pending.append(open_layers.popleft())
+    pending.extend(open_layers)
+    _flush_rows(force=True)
+    return {'products': product_count, 'layers_written': written}
+
+
+def _changed_products(obj: InventoryTransaction) -> Set[str]:
+    """Product ids whose layers an edit/delete of obj invalidates (empty when untouched)."""
+    products: Set[str] = set()
+    changed = False
+    for column in _TRACKED_COLUMNS:
+        history = get_history(obj, column)
+        if history.has_changes():
+            changed = True
+            if column == 'product_id':
+                products.update(value for value in history.deleted if value)
+    if changed:
+        products.add(obj.product_id)
+    return products
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_inventory_cost_layers(session: Session, flush_context) -> None:
+    """Open layers for inbound transactions and consume them for outbound ones."""
+    inbound: List[InventoryTransaction] = []
+    outbound: Dict[str, int] = defaultdict(int)
+    replay: Set[str] = set()
+
+    for obj in session.new:
+        if not isinstance(obj, InventoryTransaction) or not obj.product_id:
+            continue
+        direction = movement_direction(obj.transaction_type, obj.quantity)
+        if direction > 0:
+            inbound.append(obj)
+        elif direction < 0:
+            outbound[obj.product_id] += abs(int(obj.quantity))
+
+    for obj in session.dirty:
+        if isinstance(obj, InventoryTransaction):
+            replay.update(_changed_products(obj))
+    for obj in session.deleted:
+        if isinstance(obj, InventoryTransaction) and obj.product_id:
+            replay.add(obj.product_id)
+
+    if not inbound and not outbound and not replay:
+        return
+
+    connection = session.connection()
+    now = datetime.utcnow()
+    inbound = [obj for obj in inbound if obj.product_id not in replay]
+    if inbound:
+        products = Product.__table__
+        defaults = {
+            row.id: row for row in connection.execute(
+                select(products.c.id, products.c.branch_id, products.c.cost_price)
+                .where(products.c.id.in_({obj.product_id for obj in inbound}))
+            )
+        }
+        rows = []
+        for obj in inbound:
+            product = defaults.get(obj.product_id)
+            unit_cost = obj.unit_cost if obj.unit_cost is not None else (product.cost_price if product else ZERO)
+            rows.append(_layer_row(
+                obj.product_id, obj.branch_id or (product.branch_id if product else None), obj.id,
+                obj.date or now.date(), abs(int(obj.quantity)), unit_cost, now
+            ))
+        connection.execute(InventoryCostLayer.__table__.insert(), rows)
+
+    for product_id, quantity in sorted(outbound.items()):
+        if product_id not in replay:
+            _consume_layers(connection, product_id, quantity)
+
+    if replay:
+        _replay_products(connection, replay)
+
+
+class InventoryCostLayerService:
+    """Read and maintain FIFO cost layers"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_open_layers(self, product_id: str) -> List[InventoryCostLayer]:
+        """Open layers of a product, oldest first."""
+        return self.db.query(InventoryCostLayer).filter(
+            InventoryCostLayer.product_id == product_id,
+            InventoryCostLayer.remaining_quantity > 0,
+        ).order_by(
+            InventoryCostLayer.received_date, InventoryCostLayer.created_at, InventoryCostLayer.id
+        ).all()
+
+    def get_fifo_cost(self, product_id: str, quantity: int) -> Tuple[Decimal, int]:
+        """
+        FIFO cost of issuing quantity now, without consuming anything.
+
+        Returns:
+            Tuple of (cost, quantity covered by open layers)
+        """
+        remaining = quantity
+        cost = ZERO
+        layers = self.db.query(InventoryCostLayer.remaining_quantity, InventoryCostLayer.unit_cost).filter(
+            InventoryCostLayer.product_id == product_id,
+            InventoryCostLayer.remaining_quantity > 0,
+        ).order_by(
+            InventoryCostLayer.received_date, InventoryCostLayer.created_at, InventoryCostLayer.id
+        ).yield_per(_CONSUME_BATCH)
+        for available, unit_cost in layers:
+            if remaining <= 0:
+                break
+            taken = min(available, remaining)
+            cost += _to_decimal(unit_cost) * taken
+            remaining -= taken
+        return cost, quantity - remaining
+
+    def get_product_valuations(
+        self,
+        branch_id: Optional[str] = None,
+        product_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Tuple[int, Decimal]]:
+        """
+        On-hand quantity and FIFO value of the open layers per product, in one grouped query.
+
+        Returns:
+            Dict mapping product_id to (remaining quantity, value)
+        """
+        query = self.db.query(
+            InventoryCostLayer.product_id,
+            func.coalesce(func.sum(InventoryCostLayer.remaining_quantity), 0),
+            func.coalesce(func.sum(InventoryCostLayer.remaining_quantity * InventoryCostLayer.unit_cost), 0),
+        ).filter(InventoryCostLayer.remaining_quantity > 0)
+        if branch_id:
+            query = query.join(Product, Product.id == InventoryCostLayer.product_id).filter(Product.branch_id == branch_id)
+        if product_ids is not None:
+            query = query.filter(InventoryCostLayer.product_id.in_(list(product_ids)))
+        return {
+            product_id: (int(quantity or 0), _to_decimal(value))
+            for product_id, quantity, value in query.group_by(InventoryCostLayer.product_id)
+        }
+
+    def rebuild(self, product_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Recreate cost layers by replaying inventory_transactions in date order.
+
+        Args:
+            product_ids: Limit the rebuild to these products (default: every product)
+
+        Returns:
+            Dict with the number of products replayed and layer rows written
+        """
+        try:
+            result = _replay_products(self.db.connection(), product_ids)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return result
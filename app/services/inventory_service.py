@@ -2,11 +2,12 @@ from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, case
+from sqlalchemy import and_, or_, func
 
 from app.models.inventory import Product, InventoryTransaction, InventoryAdjustment, SerialNumber
 from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry
 from app.services.accounting_service import AccountingService
+from app.services.inventory_cost_layer_service import InventoryCostLayerService
 from app.core.config import settings
 
 
@@ -14,7 +15,7 @@ class InventoryService:
     """Comprehensive inventory business logic service"""
 
     TRANSACTION_TYPES = [
-        'goods_receipt', 'sale', 'return', 'adjustment', 'opening_stock',
+        'goods_receipt', 'sale', 'return', 'adjustment_in', 'adjustment_out', 'opening_stock',
         'sale_cancellation', 'damage', 'theft', 'expiry', 'job_issue', 'job_return'
     ]
 
@@ -119,7 +120,7 @@ class InventoryService:
                     return False, f"Insufficient stock. Available: {product.quantity}, Required: {quantity_change}"
 
             # Update product quantity
-            if transaction_type in ['goods_receipt', 'return', 'opening_stock', 'job_return']:
+            if transaction_type in ['goods_receipt', 'return', 'opening_stock', 'job_return', 'adjustment_in']:
                 product.quantity += quantity_change
             else:
                 product.quantity -= quantity_change
@@ -192,10 +193,10 @@ class InventoryService:
             if product.quantity < 0:
                 product.quantity = 0
 
-            # Create inventory transaction
+            # Create inventory transaction (the type carries the direction, the quantity is unsigned)
             transaction = InventoryTransaction(
                 product_id=product.id,
-                transaction_type='adjustment',
+                transaction_type='adjustment_in' if adjustment_data['quantity_change'] > 0 else 'adjustment_out',
                 quantity=abs(adjustment_data['quantity_change']),
                 unit_cost=product.cost_price,
                 date=date.today(),
@@ -628,60 +629,65 @@ class InventoryService:
         ]
 
     def calculate_fifo_cost(self, product_id: str, quantity: int) -> Decimal:
-        """Calculate FIFO cost for a given quantity"""
-        # Get inventory transactions in FIFO order
-        transactions = self.db.query(InventoryTransaction).filter(
-            and_(
-                InventoryTransaction.product_id == product_id,
-                InventoryTransaction.transaction_type.in_(['goods_receipt', 'opening_stock']),
-                InventoryTransaction.quantity > 0
-            )
-        ).order_by(InventoryTransaction.date, InventoryTransaction.created_at).all()
-
-        remaining_quantity = quantity
-        total_cost = Decimal('0')
-
-        for transaction in transactions:
-            if remaining_quantity <= 0:
-                break
-
-            available_quantity = min(remaining_quantity, transaction.quantity)
-            total_cost += available_quantity * transaction.unit_cost
-            remaining_quantity -= available_quantity
-
-        return total_cost
+        """Calculate FIFO cost for a given quantity from the open cost layers"""
+        cost, covered = InventoryCostLayerService(self.db).get_fifo_cost(product_id, quantity)
+        if covered < quantity:
+            # Stock not backed by layers (history predating the layer ledger) at standard cost
+            product = self.db.query(Product.cost_price).filter(Product.id == product_id).first()
+            cost += Decimal(quantity - covered) * Decimal(str(product.cost_price or 0) if product else '0')
+        return cost
 
     def calculate_average_cost(self, product_id: str) -> Decimal:
         """Calculate average cost for a product"""
-        # Get total quantity and total cost from receipts
-        result = self.db.query(
+        return self._average_costs([product_id]).get(product_id, Decimal('0'))
+
+    def _average_costs(self, product_ids: Optional[List[str]] = None, branch_id: Optional[str] = None) -> Dict[str, Decimal]:
+        """Average receipt cost per product in one grouped query"""
+        query = self.db.query(
+            InventoryTransaction.product_id,
             func.sum(InventoryTransaction.quantity).label('total_quantity'),
             func.sum(InventoryTransaction.quantity * InventoryTransaction.unit_cost).label('total_cost')
         ).filter(
             and_(
-                InventoryTransaction.product_id == product_id,
                 InventoryTransaction.transaction_type.in_(['goods_receipt', 'opening_stock']),
                 InventoryTransaction.quantity > 0
             )
-        ).first()
+        )
+        if product_ids is not None:
+            query = query.filter(InventoryTransaction.product_id.in_(product_ids))
+        if branch_id:
+            query = query.join(Product, Product.id == InventoryTransaction.product_id).filter(Product.branch_id == branch_id)
 
-        if result.total_quantity and result.total_quantity > 0:
-            return result.total_cost / result.total_quantity
-        else:
-            return Decimal('0')
+        averages = {}
+        for product_id, total_quantity, total_cost in query.group_by(InventoryTransaction.product_id):
+            if total_quantity and total_quantity > 0:
+                averages[product_id] = Decimal(str(total_cost or 0)) / Decimal(total_quantity)
+        return averages
 
     def get_inventory_valuation(self, branch_id: str, valuation_method: str = 'average') -> Dict:
         """Get inventory valuation report"""
         products = self.db.query(Product).filter(Product.branch_id == branch_id).all()
+        average_costs = self._average_costs(branch_id=branch_id)
+        layer_values = (
+            InventoryCostLayerService(self.db).get_product_valuations(branch_id=branch_id)
+            if valuation_method == 'fifo' else {}
+        )
 
         total_value = Decimal('0')
         valuation_details = []
 
         for product in products:
+            quantity = product.quantity or 0
+            average_cost = average_costs.get(product.id, Decimal('0'))
             if valuation_method == 'fifo':
-                value = self.calculate_fifo_cost(product.id, product.quantity)
+                layer_quantity, layer_value = layer_values.get(product.id, (0, Decimal('0')))
+                if layer_quantity >= quantity:
+                    # Layers can only run ahead of on-hand stock after out-of-band edits; value pro rata
+                    value = layer_value * quantity / layer_quantity if layer_quantity else Decimal('0')
+                else:
+                    value = layer_value + Decimal(quantity - layer_quantity) * Decimal(str(product.cost_price or 0))
             else:  # average
-                value = self.calculate_average_cost(product.id) * product.quantity
+                value = average_cost * quantity
 
             total_value += value
 
@@ -689,7 +695,7 @@ class InventoryService:
                 'product_name': product.name,
                 'sku': product.sku,
                 'quantity': product.quantity,
-                'unit_cost': float(self.calculate_average_cost(product.id)),
+                'unit_cost': float(average_cost),
                 'total_value': float(value),
                 'valuation_method': valuation_method
             })
@@ -948,60 +954,30 @@ class InventoryService:
     def get_inventory_aging_report(self, branch_id: str) -> Dict:
         """Get inventory aging analysis based on last movement date"""
         try:
-            from datetime import datetime, timedelta
-            from sqlalchemy import func, desc
-
-            products = self.db.query(Product).filter(Product.branch_id == branch_id).all()
-
-            aging_buckets = {
-                '0-30_days': {'count': 0, 'value': 0.0, 'products': []},
-                '31-60_days': {'count': 0, 'value': 0.0, 'products': []},
-                '61-90_days': {'count': 0, 'value': 0.0, 'products': []},
-                '90+_days': {'count': 0, 'value': 0.0, 'products': []}
-            }
-
-            today = date.today()
-
-            for product in products:
-                if product.quantity <= 0:
-                    continue
-
-                # Get last transaction date - fix field name
-                last_transaction = self.db.query(InventoryTransaction).filter(
-                    InventoryTransaction.product_id == product.id
-                ).order_by(desc(InventoryTransaction.date)).first()
-
-                last_movement_date = last_transaction.date if last_transaction else today
-                days_since_movement = (today - last_movement_date).days
-
-                product_value = float(product.quantity * (product.cost_price or 0))
-                product_data = {
-                    'id': str(product.id),
-                    'name': product.name,
-                    'sku': product.sku,
-                    'quantity': product.quantity,
-                    'value': product_value,
-                    'days_since_movement': days_since_movement,
-                    'last_movement_date': last_movement_date.isoformat()
+            import pandas as pd
+            from app.services.inventory_analytics_service import AGING_BUCKETS, InventoryAnalyticsService
+
+            analytics = InventoryAnalyticsService(self.db)
+            metrics = analytics.product_metrics(branch_id, in_stock_only=True)
+
+            today = pd.Timestamp(date.today())
+            last_movement = metrics['last_movement_date'].fillna(today)
+            metrics['last_movement_date'] = last_movement.dt.date.map(date.isoformat)
+            metrics['days_since_movement'] = (today - last_movement.dt.normalize()).dt.days
+            metrics['bucket'] = analytics.aging_bucket(metrics['days_since_movement'])
+            metrics = metrics.rename(columns={'inventory_value': 'value'})
+
+            aging_buckets = {}
+            for bucket in AGING_BUCKETS:
+                rows = metrics[metrics['bucket'] == bucket]
+                aging_buckets[bucket] = {
+                    'count': len(rows),
+                    'value': float(rows['value'].sum()),
+                    'products': rows[[
+                        'id', 'name', 'sku', 'quantity', 'value', 'days_since_movement', 'last_movement_date'
+                    ]].to_dict('records')
                 }
 
-                if days_since_movement <= 30:
-                    aging_buckets['0-30_days']['count'] += 1
-                    aging_buckets['0-30_days']['value'] += product_value
-                    aging_buckets['0-30_days']['products'].append(product_data)
-                elif days_since_movement <= 60:
-                    aging_buckets['31-60_days']['count'] += 1
-                    aging_buckets['31-60_days']['value'] += product_value
-                    aging_buckets['31-60_days']['products'].append(product_data)
-                elif days_since_movement <= 90:
-                    aging_buckets['61-90_days']['count'] += 1
-                    aging_buckets['61-90_days']['value'] += product_value
-                    aging_buckets['61-90_days']['products'].append(product_data)
-                else:
-                    aging_buckets['90+_days']['count'] += 1
-                    aging_buckets['90+_days']['value'] += product_value
-                    aging_buckets['90+_days']['products'].append(product_data)
-
             return {
                 'success': True,
                 'data': {
@@ -1023,80 +999,32 @@ class InventoryService:
     def get_abc_analysis(self, branch_id: str) -> Dict:
         """Get ABC analysis based on inventory value and turnover"""
         try:
-            from datetime import datetime, timedelta
-            from sqlalchemy import func, desc
-
-            products = self.db.query(Product).filter(
-                and_(Product.branch_id == branch_id, Product.quantity > 0)
-            ).all()
+            from app.services.inventory_analytics_service import InventoryAnalyticsService
 
-            # Calculate product values and turnover for last 90 days
-            end_date = date.today()
-            start_date = end_date - timedelta(days=90)
+            analytics = InventoryAnalyticsService(self.db)
+            metrics = analytics.product_metrics(branch_id, in_stock_only=True, turnover_days=90)
 
-            product_analysis = []
-            total_value = 0
+            # Sort by inventory value (descending); A = top 70% of value, B = next 20%, C = rest
+            metrics = metrics.sort_values('inventory_value', ascending=False, kind='mergesort')
+            metrics['category'] = analytics.classify_abc(metrics['inventory_value'])
+            columns = ['id', 'name', 'sku', 'inventory_value', 'turnover', 'turnover_value', 'category']
 
-            for product in products:
-                # Calculate inventory value
-                inventory_value = float(product.quantity * (product.cost_price or 0))
-
-                # Calculate turnover (sales in last 90 days) - fix field name
-                turnover = self.db.query(func.sum(InventoryTransaction.quantity)).filter(
-                    and_(
-                        InventoryTransaction.product_id == product.id,
-                        InventoryTransaction.transaction_type == 'sale',
-                        InventoryTransaction.date >= start_date,
-                        InventoryTransaction.date <= end_date
-                    )
-                ).scalar() or 0
-
-                product_analysis.append({
-                    'id': str(product.id),
-                    'name': product.name,
-                    'sku': product.sku,
-                    'inventory_value': inventory_value,
-                    'turnover': abs(int(turnover)),
-                    'turnover_value': float(abs(turnover) * (product.selling_price or 0))
-                })
-
-                total_value += inventory_value
-
-            # Sort by inventory value (descending)
-            product_analysis.sort(key=lambda x: x['inventory_value'], reverse=True)
-
-            # Calculate ABC categories
-            cumulative_value = 0
-            abc_categories = {'A': [], 'B': [], 'C': []}
-
-            for product in product_analysis:
-                cumulative_value += product['inventory_value']
-                cumulative_percentage = (cumulative_value / total_value * 100) if total_value > 0 else 0
-
-                if cumulative_percentage <= 70:  # A items: top 70% of value
-                    product['category'] = 'A'
-                    abc_categories['A'].append(product)
-                elif cumulative_percentage <= 90:  # B items: next 20% of value
-                    product['category'] = 'B'
-                    abc_categories['B'].append(product)
-                else:  # C items: remaining 10% of value
-                    product['category'] = 'C'
-                    abc_categories['C'].append(product)
+            abc_categories = {}
+            summary = {
+                'total_products': len(metrics),
+                'total_value': float(metrics['inventory_value'].sum()),
+            }
+            for category in ('A', 'B', 'C'):
+                rows = metrics[metrics['category'] == category]
+                abc_categories[category] = rows[columns].to_dict('records')
+                summary[f'category_{category}_count'] = len(rows)
+                summary[f'category_{category}_value'] = float(rows['inventory_value'].sum())
 
             return {
                 'success': True,
                 'data': {
                     'abc_categories': abc_categories,
-                    'summary': {
-                        'total_products': len(product_analysis),
-                        'total_value': total_value,
-                        'category_A_count': len(abc_categories['A']),
-                        'category_B_count': len(abc_categories['B']),
-                        'category_C_count': len(abc_categories['C']),
-                        'category_A_value': sum(p['inventory_value'] for p in abc_categories['A']),
-                        'category_B_value': sum(p['inventory_value'] for p in abc_categories['B']),
-                        'category_C_value': sum(p['inventory_value'] for p in abc_categories['C'])
-                    }
+                    'summary': summary
                 },
                 'generated_at': datetime.now().isoformat()
             }
@@ -1110,55 +1038,38 @@ class InventoryService:
             }
 
     def get_category_analysis(self, branch_id: str) -> Dict:
-        """Get detailed category analysis with stock levels and values"""
+        """Get detailed category analysis with stock levels, values and 90-day turnover"""
         try:
-            from sqlalchemy import func
-
-            # Get products grouped by category
-            category_data = self.db.query(
-                Product.category,
-                func.count(Product.id).label('product_count'),
-                func.sum(Product.quantity).label('total_quantity'),
-                func.sum(Product.quantity * Product.cost_price).label('total_value'),
-                func.avg(Product.cost_price).label('avg_cost_price'),
-                func.sum(case((Product.quantity <= Product.reorder_point, 1), else_=0)).label('low_stock_count')
-            ).filter(Product.branch_id == branch_id).group_by(Product.category).all()
-
-            categories = []
-            total_products = 0
-            total_value = 0
-
-            for row in category_data:
-                category_name = row.category or 'Uncategorized'
-                category_total_value = float(row.total_value or 0)
-                total_products += row.product_count or 0
-                total_value += category_total_value
-
-                categories.append({
-                    'category': category_name,
-                    'product_count': row.product_count or 0,
-                    'total_quantity': row.total_quantity or 0,
-                    'total_value': category_total_value,
-                    'value': category_total_value,  # Add alias for frontend compatibility
-                    'avg_cost_price': float(row.avg_cost_price or 0),
-                    'low_stock_count': row.low_stock_count or 0,
-                    'percentage_of_total': 0  # Will calculate after we have total
-                })
-
-            # Calculate percentages
-            for category in categories:
-                category['percentage_of_total'] = (category['total_value'] / total_value * 100) if total_value > 0 else 0
+            from app.services.inventory_analytics_service import InventoryAnalyticsService
+
+            metrics = InventoryAnalyticsService(self.db).product_metrics(branch_id, turnover_days=90)
+            metrics['category'] = metrics['category'].fillna('Uncategorized')
+            metrics['low_stock'] = (metrics['quantity'] <= metrics['reorder_point']).astype(int)
+
+            grouped = metrics.groupby('category', sort=False).agg(
+                product_count=('id', 'size'),
+                total_quantity=('quantity', 'sum'),
+                total_value=('inventory_value', 'sum'),
+                avg_cost_price=('cost_price', 'mean'),
+                low_stock_count=('low_stock', 'sum'),
+                turnover_90d=('turnover', 'sum'),
+                turnover_value_90d=('turnover_value', 'sum'),
+            ).reset_index()
+            grouped['avg_cost_price'] = grouped['avg_cost_price'].fillna(0.0)
+            grouped['value'] = grouped['total_value']  # Alias for frontend compatibility
+            total_value = float(grouped['total_value'].sum())
+            grouped['percentage_of_total'] = grouped['total_value'] / total_value * 100 if total_value > 0 else 0.0
 
             # Sort by total value descending
-            categories.sort(key=lambda x: x['total_value'], reverse=True)
+            grouped = grouped.sort_values('total_value', ascending=False, kind='mergesort')
 
             return {
                 'success': True,
                 'data': {
-                    'categories': categories,
+                    'categories': grouped.to_dict('records'),
                     'summary': {
-                        'total_categories': len(categories),
-                        'total_products': total_products,
+                        'total_categories': len(grouped),
+                        'total_products': len(metrics),
                         'total_value': total_value
                     }
                 },
@@ -1176,70 +1087,24 @@ class InventoryService:
     def get_valuation_methods_comparison(self, branch_id: str) -> Dict:
         """Compare FIFO, LIFO, and Average Cost valuation methods"""
         try:
-            from datetime import datetime, timedelta
-            from sqlalchemy import func, desc
-
-            products = self.db.query(Product).filter(
-                and_(Product.branch_id == branch_id, Product.quantity > 0)
-            ).all()
-
-            total_fifo = 0
-            total_lifo = 0
-            total_avg_cost = 0
-
-            product_valuations = []
-
-            for product in products:
-                quantity = product.quantity
-
-                # Get recent transactions for FIFO/LIFO calculation - fix field name
-                recent_receipts = self.db.query(InventoryTransaction).filter(
-                    and_(
-                        InventoryTransaction.product_id == product.id,
-                        InventoryTransaction.transaction_type.in_(['goods_receipt', 'opening_stock']),
-                        InventoryTransaction.quantity > 0
-                    )
-                ).order_by(InventoryTransaction.date).all()
-
-                # FIFO calculation (First In, First Out)
-                fifo_value = 0
-                remaining_qty = quantity
-                for txn in recent_receipts:
-                    if remaining_qty <= 0:
-                        break
-                    qty_to_value = min(remaining_qty, txn.quantity)
-                    fifo_value += qty_to_value * float(txn.unit_cost or product.cost_price or 0)
-                    remaining_qty -= qty_to_value
-
-                # LIFO calculation (Last In, First Out)
-                lifo_value = 0
-                remaining_qty = quantity
-                for txn in reversed(recent_receipts):
-                    if remaining_qty <= 0:
-                        break
-                    qty_to_value = min(remaining_qty, txn.quantity)
-                    lifo_value += qty_to_value * float(txn.unit_cost or product.cost_price or 0)
-                    remaining_qty -= qty_to_value
-
-                # Average Cost calculation
-                avg_cost_value = quantity * float(product.cost_price or 0)
-
-                product_valuations.append({
-                    'id': str(product.id),
-                    'name': product.name,
-                    'sku': product.sku,
-                    'quantity': quantity,
-                    'fifo_value': fifo_value,
-                    'lifo_value': lifo_value,
-                    'avg_cost_value': avg_cost_value,
-                    'fifo_unit_cost': fifo_value / quantity if quantity > 0 else 0,
-                    'lifo_unit_cost': lifo_value / quantity if quantity > 0 else 0,
-                    'avg_unit_cost': float(product.cost_price or 0)
-                })
-
-                total_fifo += fifo_value
-                total_lifo += lifo_value
-                total_avg_cost += avg_cost_value
+            from app.services.inventory_analytics_service import InventoryAnalyticsService
+
+            analytics = InventoryAnalyticsService(self.db)
+            metrics = analytics.product_metrics(branch_id, in_stock_only=True)
+            metrics = metrics.join(analytics.layer_values(branch_id, metrics))
+
+            metrics['avg_unit_cost'] = metrics['cost_price'].fillna(0.0)
+            metrics['avg_cost_value'] = metrics['quantity'] * metrics['avg_unit_cost']
+            metrics['fifo_unit_cost'] = metrics['fifo_value'] / metrics['quantity']
+            metrics['lifo_unit_cost'] = metrics['lifo_value'] / metrics['quantity']
+
+            product_valuations = metrics[[
+                'id', 'name', 'sku', 'quantity', 'fifo_value', 'lifo_value', 'avg_cost_value',
+                'fifo_unit_cost', 'lifo_unit_cost', 'avg_unit_cost'
+            ]].to_dict('records')
+            total_fifo = float(metrics['fifo_value'].sum())
+            total_lifo = float(metrics['lifo_value'].sum())
+            total_avg_cost = float(metrics['avg_cost_value'].sum())
 
             return {
                 'success': True,
@@ -28,6 +28,8 @@ from app.models.inventory import Product, InventoryTransaction
 from app.models.branch import Branch
 from app.models.user import User
 from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import AppSettingsSnapshot, get_app_settings
+from app.services.document_sequence_service import DocumentSequenceService
 from app.models.accounting import JournalEntry, AccountingEntry, AccountingCode
 from app.core.database import get_db
 
@@ -37,39 +39,19 @@ class InvoiceService:
     
     def __init__(self, db: Session):
         self.db = db
-        self._app_setting_instance: Optional[AppSetting] = None
+        self._app_setting_instance: Optional[AppSettingsSnapshot] = None
         self.app_settings = self._load_app_settings()
         self.invoice_designer_config = self._load_invoice_designer_config()
     
     def _load_app_settings(self) -> Dict:
         """Load application settings for invoice generation"""
         settings: Dict[str, str] = {}
-        app_settings = self.db.query(AppSetting).all()
-        # Two possible schemas:
-        # 1. Key/Value rows (legacy) where each row has 'key' and 'value' columns
-        # 2. Singleton settings row with many explicit columns (current model)
-        if app_settings:
-            first = app_settings[0]
-            if hasattr(first, 'invoice_designer_config'):
-                self._app_setting_instance = first
-            if hasattr(first, 'key') and hasattr(first, 'value'):
-                # Legacy style: multiple key/value rows
-                for setting in app_settings:
-                    try:
-                        settings[str(setting.key)] = str(setting.value)
-                    except Exception:
-                        continue
-            else:
-                # Singleton style: only use the first row; extract column values
-                # Avoid SQLAlchemy internal attributes
-                cols = [c.name for c in first.__table__.columns]
-                for col in cols:
-                    try:
-                        val = getattr(first, col)
-                        # Skip id/meta fields if desired
-                        settings[col] = '' if val is None else str(val)
-                    except Exception:
-                        continue
+        # Singleton settings row, served from the process-wide snapshot cache
+        snapshot = get_app_settings(self.db)
+        if snapshot.id:
+            self._app_setting_instance = snapshot
+            for col, val in snapshot.as_dict().items():
+                settings[col] = '' if val is None else str(val)
         
         # Default values if not set
         defaults = {
@@ -96,10 +78,8 @@ class InvoiceService:
         """Load saved invoice designer layout configuration."""
         settings_row = self._app_setting_instance
 
-        if not settings_row or not hasattr(settings_row, 'invoice_designer_config'):
-            settings_row = self.db.query(AppSetting).first()
-            if settings_row and hasattr(settings_row, 'invoice_designer_config'):
-                self._app_setting_instance = settings_row
+        if not settings_row:
+            settings_row = get_app_settings(self.db)
 
         if settings_row and hasattr(settings_row, 'invoice_designer_config'):
             try:
@@ -149,38 +129,43 @@ class InvoiceService:
     
     def generate_invoice_number(self, branch_id: str = None) -> str:
         """Generate next sequential invoice number"""
+        return self.allocate_invoice_numbers(1)[0]
+
+    def allocate_invoice_numbers(self, count: int) -> List[str]:
+        """
+        Take count consecutive invoice numbers (company-wide, per year).
+
+        Numbers come from the 'invoice' document sequence inside the current
+        transaction, so they are gap-free: a rollback gives them back.
+        """
+        if count <= 0:
+            return []
         prefix = self.app_settings.get('invoice_prefix', 'INV')
-        start_number = int(self.app_settings.get('invoice_start_number', 1000) or 1000)
         auto_gen = str(self.app_settings.get('auto_generate_invoices', 'true')).lower() == 'true'
-
         if not auto_gen:
             # Fallback to UUID-based if auto generation disabled
-            return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
+            return [f"{prefix}-{uuid.uuid4().hex[:8].upper()}" for _ in range(count)]
 
         current_year = datetime.now().year
-        # Find the highest invoice number for the current year
         year_prefix = f"{prefix}-{current_year}-"
+        numbers = DocumentSequenceService(self.db).next_values(
+            'invoice', count, year=current_year, seed=lambda: self._last_invoice_sequence(year_prefix)
+        )
+        return [f"{year_prefix}{number:05d}" for number in numbers]
+
+    def _last_invoice_sequence(self, year_prefix: str) -> int:
+        """Highest sequence already used this year, to start a new year's counter after it"""
+        start_number = int(self.app_settings.get('invoice_start_number', 1000) or 1000)
         latest_invoice = self.db.query(Invoice).filter(
             Invoice.invoice_number.like(f"{year_prefix}%")
         ).order_by(desc(Invoice.invoice_number)).first()
 
         if latest_invoice and latest_invoice.invoice_number:
             try:
-                # Extract the sequence number from the invoice number
-                seq_part = latest_invoice.invoice_number.replace(year_prefix, "")
-                number = int(seq_part) + 1
+                return max(int(latest_invoice.invoice_number.replace(year_prefix, "")), start_number - 1)
             except (ValueError, AttributeError):
-                number = start_number
-        else:
-            number = start_number
-
-        # Ensure uniqueness by checking if the generated number already exists
-        invoice_number = f"{year_prefix}{number:05d}"
-        while self.db.query(Invoice).filter(Invoice.invoice_number == invoice_number).first():
-            number += 1
-            invoice_number = f"{year_prefix}{number:05d}"
-
-        return invoice_number
+                pass
+        return start_number - 1
     
     def create_invoice(
         self,
@@ -290,7 +275,7 @@ class InvoiceService:
     def get_printer_settings(self) -> Dict:
         """Get current printer settings from app settings"""
         # Get the singleton app settings record
-        app_settings = self.db.query(AppSetting).first()
+        app_settings = get_app_settings(self.db)
         
         # Create printer settings dictionary with defaults
         printer_settings = {
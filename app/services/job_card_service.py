@@ -9,7 +9,8 @@ from app.models.job_card import JobCard, JobCardMaterial, JobCardLabor, JobCardN
 from app.models.inventory import Product, InventoryTransaction
 from app.models.branch import Branch
 from app.models.sales import Invoice
-from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import get_app_settings
+from app.services.document_sequence_service import DocumentSequenceService
 from app.models.user import User
 from app.services.inventory_service import InventoryService
 from app.services.invoice_service import InvoiceService
@@ -326,7 +327,7 @@ class JobCardService:
     # Internal helpers
     # ------------------------------------------------------------------
     def _load_financial_defaults(self) -> Tuple[str, Decimal]:
-        settings = self.db.query(AppSetting).first()
+        settings = get_app_settings(self.db)
         currency = (settings.currency if settings and getattr(settings, "currency", None) else "BWP")
         vat_value = None
         if settings and getattr(settings, "vat_rate", None) is not None:
@@ -338,21 +339,19 @@ class JobCardService:
     def _generate_job_number(self, branch_id: str) -> str:
         branch = self.db.query(Branch).filter(Branch.id == branch_id).first()
         prefix = (branch.code if branch and branch.code else "JC").upper()
-        date_part = datetime.utcnow().strftime("%Y%m%d")
-        like_pattern = f"{prefix}-{date_part}-%"
-        last_job = (
-            self.db.query(JobCard)
-            .filter(JobCard.job_number.like(like_pattern))
-            .order_by(JobCard.job_number.desc())
-            .first()
-        )
-        if last_job:
-            try:
-                seq = int(last_job.job_number.split("-")[-1]) + 1
-            except (ValueError, AttributeError):
-                seq = 1
-        else:
-            seq = 1
+        now = datetime.utcnow()
+        date_part = now.strftime("%Y%m%d")
+
+        def last_used() -> int:
+            # Job numbers restarted every day before the yearly per-branch sequence
+            numbers = self.db.query(JobCard.job_number).filter(JobCard.job_number.like(f"{prefix}-{now.year}%"))
+            return max(
+                (int(number.rsplit("-", 1)[-1]) for (number,) in numbers if number.rsplit("-", 1)[-1].isdigit()),
+                default=0,
+            )
+
+        seq = DocumentSequenceService(self.db).next_value('job_card', branch_id=branch_id, year=now.year,
+                                                          seed=last_used)
         return f"{prefix}-{date_part}-{seq:04d}"
 
     def _sync_materials(self, job: JobCard, materials: List[Dict[str, object]], mode: str = "append") -> None:
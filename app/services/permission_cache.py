@@ -0,0 +1,138 @@
+"""
+Effective Permission Cache
+
+Compiles a user's effective permissions - grants of their role plus
+unexpired direct grants - into a frozenset of (module, action, resource) with one
+query, and keeps it in-process for a short TTL so permission checks are set
+lookups.
+
+An entry never outlives the earliest direct grant it includes. Commits that
+change role or user grants, a user's role, a role or a permission drop the
+affected entries (every PermissionService write path commits through the ORM);
+other workers pick the change up within permission_cache_ttl_seconds.
+"""
+
+from datetime import datetime
+from threading import Lock
+from typing import FrozenSet, Optional, Tuple
+
+from sqlalchemy import DateTime, event, null, or_, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.models.role import Permission, Role, RolePermission, UserPermission
+from app.models.user import User
+
+PermissionKey = Tuple[str, str, str]
+
+_ALL_USERS = '*'
+_CHANGES_KEY = 'permission_cache_changes'
+
+_permission_sets = get_cache('user_permission_sets', max_entries=4096,
+                             ttl_seconds=settings.permission_cache_ttl_seconds)
+_generation = 0
+_generation_lock = Lock()
+
+
+def get_permission_set(db: Session, user_id: str) -> FrozenSet[PermissionKey]:
+    """Effective (module, action, resource) permissions of a user, cached
+
+    Args:
+        db: Session used to compile the set on a cache miss
+        user_id: User ID; unknown users get an empty set
+
+    Returns:
+        Frozen set of permission keys
+    """
+    cached = _permission_sets.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    permissions, expires_at = compile_permission_set(db, user_id)
+    ttl = settings.permission_cache_ttl_seconds
+    if expires_at is not None:
+        ttl = min(ttl, max((expires_at - datetime.utcnow()).total_seconds(), 0))
+    with _generation_lock:
+        # Skip storing a set compiled while a commit was invalidating entries
+        if generation == _generation and ttl > 0:
+            _permission_sets.set(user_id, permissions, ttl)
+    return permissions
+
+
+def compile_permission_set(db: Session, user_id: str) -> Tuple[FrozenSet[PermissionKey], Optional[datetime]]:
+    """Load a user's effective permissions in one query
+
+    Returns:
+        (permission keys, earliest expiry among the direct grants included)
+    """
+    now = datetime.utcnow()
+    direct = (
+        select(Permission.module, Permission.action, Permission.resource, UserPermission.expires_at)
+        .join(UserPermission, UserPermission.permission_id == Permission.id)
+        .where(UserPermission.user_id == user_id,
+               or_(UserPermission.expires_at.is_(None), UserPermission.expires_at > now))
+    )
+    via_role = (
+        select(Permission.module, Permission.action, Permission.resource, type_coerce(null(), DateTime))
+        .join(RolePermission, RolePermission.permission_id == Permission.id)
+        .join(Role, Role.id == RolePermission.role_id)
+        .join(User, User.role_id == Role.id)
+        .where(User.id == user_id)
+    )
+    permissions = set()
+    expires_at = None
+    for module, action, resource, grant_expires_at in db.execute(union_all(direct, via_role)):
+        permissions.add((module, action, resource))
+        if grant_expires_at is not None and (expires_at is None or grant_expires_at < expires_at):
+            expires_at = grant_expires_at
+    return frozenset(permissions), expires_at
+
+
+def invalidate_permission_sets(user_id: Optional[str] = None) -> None:
+    """Drop the cached set of one user, or of every user when user_id is None"""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        if user_id is None:
+            _permission_sets.clear()
+        else:
+            _permission_sets.delete(user_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_permission_changes(session: Session, flush_context) -> None:
+    """Record whose permission sets this transaction changes, applied on commit"""
+    changes = session.info.get(_CHANGES_KEY)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, RolePermission) or (isinstance(obj, (Role, Permission)) and obj not in session.new):
+            affected = {_ALL_USERS}
+        elif isinstance(obj, UserPermission):
+            affected = {obj.user_id, *get_history(obj, 'user_id').deleted}
+        elif isinstance(obj, User) and (obj in session.deleted or get_history(obj, 'role_id').has_changes()):
+            affected = {obj.id}
+        else:
+            continue
+        if changes is None:
+            changes = session.info[_CHANGES_KEY] = set()
+        changes.update(affected)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    if _ALL_USERS in changes:
+        invalidate_permission_sets()
+        return
+    for user_id in changes:
+        if user_id:
+            invalidate_permission_sets(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_permission_changes(session: Session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
@@ -10,6 +10,7 @@ from datetime import datetime
 from app.models.role import Role, Permission, RolePermission, UserPermission
 from app.models.user import User
 from app.services.activity_service import ActivityService
+from app.services.permission_cache import get_permission_set
 from app.models.activity_log import ActivityModule
 
 
@@ -553,42 +554,8 @@ class PermissionService:
         Returns:
             True if user has permission, False otherwise
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return False
-
-        # Check user-specific permissions first (overrides)
-        user_permission = self.db.query(Permission).join(UserPermission).filter(
-            and_(
-                UserPermission.user_id == user_id,
-                Permission.module == module,
-                Permission.action == action,
-                Permission.resource == resource,
-                or_(
-                    UserPermission.expires_at.is_(None),
-                    UserPermission.expires_at > datetime.utcnow()
-                )
-            )
-        ).first()
-
-        if user_permission:
-            return True
-
-        # Check role permissions
-        if user.role_id:
-            role_permission = self.db.query(Permission).join(RolePermission).filter(
-                and_(
-                    RolePermission.role_id == user.role_id,
-                    Permission.module == module,
-                    Permission.action == action,
-                    Permission.resource == resource
-                )
-            ).first()
-
-            if role_permission:
-                return True
-
-        return False
+        # Compiled from role and unexpired direct grants, cached per user
+        return (module, action, resource) in get_permission_set(self.db, user_id)
 
     def check_permission(
         self,
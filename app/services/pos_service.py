@@ -2,7 +2,8 @@ from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, date
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, or_, func, case, update
 import uuid
 
 from app.models.pos import PosSession
@@ -14,7 +15,8 @@ from app.models.inventory import Product
 from app.models.accounting import AccountingEntry, JournalEntry, AccountingCode
 from app.models.user import User
 from app.models.branch import Branch
-from app.models.app_setting import AppSetting
+from app.services.app_settings_cache import get_app_settings
+from app.services.document_sequence_service import DocumentSequenceService
 from app.core.config import settings
 
 
@@ -143,6 +145,24 @@ class POSService:
             taxable_subtotal = Decimal('0')
             non_taxable_subtotal = Decimal('0')
 
+            # Lock every product in the basket with one SELECT ... FOR UPDATE, ordered by id
+            # so concurrent tills acquire row locks in the same order and cannot deadlock
+            requested: Dict[str, int] = {}
+            for item_data in items:
+                product_id = item_data.get('product_id')
+                requested[product_id] = requested.get(product_id, 0) + int(item_data.get('quantity', 1))
+            products = self._lock_products(list(requested.keys()))
+
+            for product_id, quantity in requested.items():
+                product = products.get(product_id)
+                if not product:
+                    self.db.rollback()
+                    return None, {'success': False, 'error': f'Product {product_id} not found'}
+                # Check inventory against the whole basket (a product may appear on several lines)
+                if (product.quantity or 0) < quantity:
+                    self.db.rollback()
+                    return None, {'success': False, 'error': f'Insufficient stock for {product.name}'}
+
             # Validate and process items
             sale_items = []
             for item_data in items:
@@ -151,15 +171,7 @@ class POSService:
                 unit_price = Decimal(str(item_data.get('unit_price', '0')))
                 discount_amount = Decimal(str(item_data.get('discount_amount', '0')))
                 is_taxable = item_data.get('is_taxable', True)
-
-                # Get product
-                product = self.db.query(Product).filter(Product.id == product_id).first()
-                if not product:
-                    return None, {'success': False, 'error': f'Product {product_id} not found'}
-
-                # Check inventory
-                if product.quantity < quantity:
-                    return None, {'success': False, 'error': f'Insufficient stock for {product.name}'}
+                product = products[product_id]
 
                 # Calculate item totals
                 item_total = unit_price * quantity
@@ -190,34 +202,39 @@ class POSService:
                 )
                 sale_items.append(sale_item)
 
-                # Update inventory
-                product.quantity -= quantity
+            # Calculate final totals
+            total_amount = subtotal - total_discount + total_vat
+            change_given = amount_tendered - total_amount
 
-                # Record inventory transaction for traceability (POS sale)
-                try:
-                    from app.models.inventory import InventoryTransaction
-                    inv_tx = InventoryTransaction(
+            if change_given < 0:
+                self.db.rollback()
+                return None, {'success': False, 'error': 'Insufficient payment'}
+
+            # Update inventory in one statement and record inventory transactions in bulk
+            stock_result = self._decrement_stock(products, requested)
+            if not stock_result['success']:
+                self.db.rollback()
+                return None, stock_result
+            try:
+                from app.models.inventory import InventoryTransaction
+                inv_txs = []
+                for sale_item in sale_items:
+                    product = products[sale_item.product_id]
+                    inv_txs.append(InventoryTransaction(
                         product_id=product.id,
                         transaction_type='sale',
-                        quantity=quantity,
+                        quantity=sale_item.quantity,
                         unit_cost=product.cost_price or Decimal('0'),
-                        total_cost=(product.cost_price or Decimal('0')) * quantity,
+                        total_cost=(product.cost_price or Decimal('0')) * sale_item.quantity,
                         date=datetime.now().date(),
                         reference=f"POS {session.till_id} / {sale_data.get('reference') or 'N/A'}",
                         branch_id=session.branch_id,
-                        previous_quantity=None,
+                        previous_quantity=stock_result['previous'][product.id],
                         new_quantity=product.quantity
-                    )
-                    self.db.add(inv_tx)
-                except Exception as _inv_err:
-                    logger.warning("POS inventory transaction logging failed: %s", _inv_err)
-
-            # Calculate final totals
-            total_amount = subtotal - total_discount + total_vat
-            change_given = amount_tendered - total_amount
-
-            if change_given < 0:
-                return None, {'success': False, 'error': 'Insufficient payment'}
+                    ))
+                self.db.add_all(inv_txs)
+            except Exception as _inv_err:
+                logger.warning("POS inventory transaction logging failed: %s", _inv_err)
 
             # Get default Output VAT account (2132 - VAT Payable)
             output_vat_account = None
@@ -242,7 +259,7 @@ class POSService:
                 branch_id=session.branch_id,
                 pos_session_id=session_id,
                 salesperson_id=session.user_id,
-                reference=f"POS{datetime.now().strftime('%Y%m%d%H%M%S')}{str(uuid.uuid4())[:8]}",
+                reference=self._next_sale_reference(),
                 discount_amount=total_discount,
                 discount_percentage=Decimal('0') if subtotal == 0 else (total_discount / subtotal) * Decimal('100'),
                 output_vat_account_id=output_vat_account.id if output_vat_account else None
@@ -265,30 +282,43 @@ class POSService:
                 if not journal_result['success']:
                     return None, journal_result
 
-            # Generate receipt automatically
+            # Create the receipt record and HTML in the sale transaction; the PDF is rendered
+            # by the receipt queue after commit so checkout latency excludes reportlab
+            receipt_result = None
             try:
                 from app.services.receipt_service import ReceiptService
                 receipt_service = ReceiptService(self.db)
 
                 # Get default receipt format from app settings
-                app_setting = self.db.query(AppSetting).first()
+                app_setting = get_app_settings(self.db)
                 default_format = app_setting.default_receipt_format if app_setting else '80mm'
 
                 # Use configurable format for POS receipts, allow override from sale_data
                 receipt_format = sale_data.get('receipt_format', default_format)
-                receipt_result = receipt_service.generate_receipt(str(sale.id), str(session.user_id), receipt_format)
-                if not receipt_result['success']:
-                    logger.warning("Receipt generation failed: %s", receipt_result['error'])
-                    receipt_result = None
-                else:
-                    # Mark as printed since we're auto-printing
-                    receipt_service.mark_receipt_printed(receipt_result['receipt_id'])
+                with self.db.begin_nested():
+                    receipt_result = receipt_service.create_sale_receipt(
+                        sale, sale_items, str(session.user_id), receipt_format,
+                        app_settings=app_setting, mark_printed=True  # auto-printed at the till
+                    )
+                receipt_result.pop('receipt_data', None)
             except Exception as receipt_error:
                 logger.warning("Receipt generation error: %s", receipt_error)
                 receipt_result = None
 
             self.db.commit()
 
+            if receipt_result:
+                try:
+                    from app.services.receipt_queue import get_receipt_queue
+                    receipt_result['job_id'] = get_receipt_queue().submit(
+                        receipt_result['receipt_id'], receipt_result['format_type'], bind=self.db.get_bind()
+                    )
+                    receipt_result['pdf_status'] = 'queued'
+                except Exception as queue_error:
+                    logger.warning("Receipt PDF queueing failed: %s", queue_error)
+                    receipt_result['job_id'] = None
+                    receipt_result['pdf_status'] = 'failed'
+
             return sale, {
                 'success': True,
                 'sale_id': str(sale.id),
@@ -305,6 +335,52 @@ class POSService:
             err_msg = str(e) or e.__class__.__name__ or 'Unknown sale error'
             return None, {'success': False, 'error': err_msg}
 
+    def _next_sale_reference(self) -> str:
+        """Next POS sale reference from the block-allocated 'pos_sale' sequence"""
+        now = datetime.now()
+        number = DocumentSequenceService(self.db).next_value(
+            'pos_sale', year=now.year, block_size=settings.document_sequence_block_size
+        )
+        return f"POS{now.strftime('%Y%m%d')}-{number:06d}"
+
+    def _lock_products(self, product_ids: List[str]) -> Dict[str, Product]:
+        """Load and row-lock basket products in one query, ordered by id to avoid deadlocks"""
+        if not product_ids:
+            return {}
+        products = self.db.query(Product).filter(
+            Product.id.in_(product_ids)
+        ).order_by(Product.id).with_for_update().all()
+        return {product.id: product for product in products}
+
+    def _decrement_stock(self, products: Dict[str, Product], requested: Dict[str, int]) -> Dict:
+        """Decrement stock for all basket products in a single guarded UPDATE.
+
+        The WHERE clause re-checks availability, so even on databases without
+        row locks a concurrent sale cannot drive stock below zero.
+        """
+        if not requested:
+            return {'success': True, 'previous': {}}
+        amount = case(
+            *[(Product.id == product_id, quantity) for product_id, quantity in requested.items()],
+            else_=0
+        )
+        result = self.db.execute(
+            update(Product).where(
+                Product.id.in_(list(requested.keys())),
+                Product.quantity >= amount
+            ).values(quantity=Product.quantity - amount).execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(requested):
+            return {'success': False, 'error': 'Insufficient stock: inventory changed during checkout'}
+
+        previous = {}
+        for product_id, quantity in requested.items():
+            product = products[product_id]
+            previous[product_id] = product.quantity
+            # Keep the identity map in step with the UPDATE without marking rows dirty
+            set_committed_value(product, 'quantity', (product.quantity or 0) - quantity)
+        return {'success': True, 'previous': previous}
+
     def _create_sale_journal_entries(self, sale: Sale, session: PosSession, sale_items: List[SaleItem]) -> Dict:
         """Create balanced journal entries for a sale transaction.
 
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def render_receipt_pdf_job(receipt_id: str, format_type: Optional[str] = None, bind=None) -> Dict[str, Any]:
+    """Render a receipt PDF in its own session (runs on a worker, never in the sale transaction)"""
+    from app.services.receipt_service import ReceiptService
+
+    db = Session(bind=bind) if bind is not None else SessionLocal()
+    try:
+        return ReceiptService(db).render_receipt_pdf(receipt_id, format_type)
+    finally:
+        db.close()
+
+
+class ReceiptQueue:
+    """Background queue for receipt PDF rendering.
+
+    The POS commits the sale and the receipt HTML first, then hands the PDF to this
+    queue. Jobs run on an in-process thread pool by default. When
+    ``receipt_queue_backend`` is ``"celery"`` and Celery is installed, jobs are sent
+    to a Celery worker on the Redis broker instead. Job status is kept in a bounded
+    in-memory map (and in the Celery result backend for Celery jobs).
+    """
+
+    _instance: Optional["ReceiptQueue"] = None
+    _instance_lock: Lock = Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, max_workers: Optional[int] = None, max_jobs: int = 1000):
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self._max_workers = max_workers or settings.receipt_queue_workers
+        self._max_jobs = max_jobs
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Any] = {}
+        self._jobs_lock: Lock = Lock()
+        self._celery = celery_app
+
+    def submit(self, receipt_id: str, format_type: Optional[str] = None, bind=None) -> str:
+        """Queue PDF rendering for a committed receipt and return the job id"""
+        job_id = str(uuid.uuid4())
+        self._set_job(job_id, {
+            'job_id': job_id,
+            'receipt_id': receipt_id,
+            'status': 'queued',
+            'backend': 'celery' if self._celery else 'thread',
+            'pdf_path': None,
+            'error': None,
+            'queued_at': datetime.utcnow().isoformat(),
+            'finished_at': None
+        })
+
+        if self._celery:
+            try:
+                self._celery.send_task('receipts.render_pdf', args=[receipt_id, format_type], task_id=job_id)
+                return job_id
+            except Exception as exc:
+                logger.warning("Celery receipt dispatch failed, using thread pool: %s", exc)
+                self._update_job(job_id, backend='thread')
+
+        future = self._get_executor().submit(self._run, job_id, receipt_id, format_type, bind)
+        with self._jobs_lock:
+            self._futures[job_id] = future
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current status of a receipt job: queued, running, completed or failed"""
+        with self._jobs_lock:
+            job = dict(self._jobs[job_id]) if job_id in self._jobs else None
+        if job and job['backend'] == 'celery' and job['status'] not in ('completed', 'failed'):
+            job.update(self._celery_status(job_id))
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until a thread-pool job finishes (used by tests and scripts)"""
+        with self._jobs_lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.get_status(job_id)
+
+    def shutdown(self, wait: bool = True):
+        with self._jobs_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    # ---------------------------------------------------------------------
+    # Internal helpers
+    # ---------------------------------------------------------------------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._jobs_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix="receipt-pdf")
+            return self._executor
+
+    def _run(self, job_id: str, receipt_id: str, format_type: Optional[str], bind):
+        self._update_job(job_id, status='running')
+        try:
+            result = render_receipt_pdf_job(receipt_id, format_type, bind=bind)
+        except Exception as exc:
+            result = {'success': False, 'error': str(exc)}
+        if result.get('success'):
+            self._update_job(job_id, status='completed', pdf_path=result.get('pdf_path'),
+                             finished_at=datetime.utcnow().isoformat())
+        else:
+            logger.warning("Receipt PDF job %s failed: %s", job_id, result.get('error'))
+            self._update_job(job_id, status='failed', error=result.get('error'),
+                             finished_at=datetime.utcnow().isoformat())
+        with self._jobs_lock:
+            self._futures.pop(job_id, None)
+
+    def _set_job(self, job_id: str, job: Dict[str, Any]):
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self._max_jobs:
+                evicted, _ = self._jobs.popitem(last=False)
+                self._futures.pop(evicted, None)
+
+    def _update_job(self, job_id: str, **changes):
+        with self._jobs_lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(changes)
+
+    def _celery_status(self, job_id: str) -> Dict[str, Any]:
+        try:
+            result = self._celery.AsyncResult(job_id)
+            state = result.state
+        except Exception as exc:
+            return {'error': str(exc)}
+        if state == 'SUCCESS':
+            payload = result.result or {}
+            if payload.get('success'):
+                return {'status': 'completed', 'pdf_path': payload.get('pdf_path')}
+            return {'status': 'failed', 'error': payload.get('error')}
+        if state == 'FAILURE':
+            return {'status': 'failed', 'error': str(result.result)}
+        return {'status': 'running' if state == 'STARTED' else 'queued'}
+
+
+def _create_celery_app():
+    """Celery app for the optional worker backend; None when Celery is not installed"""
+    try:
+        from celery import Celery
+    except ImportError:
+        logger.warning("receipt_queue_backend=celery but Celery is not installed; using thread pool")
+        return None
+
+    app = Celery('cnperp_receipts', broker=settings.redis_url, backend=settings.redis_url)
+
+    @app.task(name='receipts.render_pdf')
+    def render_pdf_task(receipt_id: str, format_type: Optional[str] = None):
+        return render_receipt_pdf_job(receipt_id, format_type)
+
+    return app
+
+
+# Worker: celery -A app.services.receipt_queue:celery_app worker
+celery_app = _create_celery_app() if settings.receipt_queue_backend == "celery" else None
+
+
+def get_receipt_queue() -> ReceiptQueue:
+    return ReceiptQueue()
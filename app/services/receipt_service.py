@@ -6,7 +6,9 @@ from app.models.sales import Sale, SaleItem, Customer
 from app.models.user import User
 from app.models.branch import Branch
 from app.models.receipt import Receipt
-import uuid
+from app.services.app_settings_cache import get_app_settings
+from app.services.document_sequence_service import DocumentSequenceService
+from app.core.config import settings
 import os
 from reportlab.lib.pagesizes import letter, A4, inch, mm
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -38,72 +40,143 @@ class ReceiptService:
             # Get sale items with product details
             sale_items = self.db.query(SaleItem).filter_by(sale_id=sale_id).all()
 
-            # Get user and branch info
-            user = self.db.query(User).filter_by(id=user_id).first()
-            branch = self.db.query(Branch).filter_by(id=sale.branch_id).first()
+            result = self.create_sale_receipt(sale, sale_items, user_id, format_type)
+            receipt = self.db.get(Receipt, result['receipt_id'])
 
-            # Get customer info if available
-            customer = None
-            if sale.customer_id:
-                customer = self.db.query(Customer).filter_by(id=sale.customer_id).first()
+            # Generate PDF based on format
+            pdf_path = self._generate_pdf(result['receipt_data'], result['receipt_number'], result['format_type'])
 
-            # Get app settings for company info and default format
-            from app.models.app_setting import AppSetting
-            app_settings = self.db.query(AppSetting).first()
+            # Update receipt record
+            receipt.pdf_path = pdf_path
 
-            # Use provided format or default from settings
-            if not format_type and app_settings:
-                format_type = app_settings.default_receipt_format or "80mm"
-            elif not format_type:
-                format_type = "80mm"  # fallback default
+            self.db.commit()
 
-            # Generate receipt number
-            receipt_number = f"RCP-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            result['pdf_path'] = pdf_path
+            return result
 
-            # Create receipt record
-            receipt = Receipt(
-                sale_id=sale_id,
-                receipt_number=receipt_number,
-                created_by_user_id=user_id,
-                branch_id=sale.branch_id,
-                customer_id=sale.customer_id,
-                amount=sale.total_amount or 0,
-                currency=sale.currency or "BWP",
-                payment_method=sale.payment_method,
-                payment_date=sale.date or sale.sale_time or datetime.utcnow(),
-                notes=f"Receipt for Sale {sale.reference}" if sale.reference else None
-            )
-            self.db.add(receipt)
-            self.db.flush()
+        except Exception as e:
+            self.db.rollback()
+            return {'success': False, 'error': str(e)}
 
-            # Generate receipt data
-            receipt_data = self._prepare_receipt_data(sale, sale_items, user, branch, customer, app_settings, receipt_number)
+    def create_sale_receipt(self, sale: Sale, sale_items: List[SaleItem], user_id: str,
+                            format_type: str = None, app_settings=None, mark_printed: bool = False) -> Dict:
+        """
+        Create the receipt record and its HTML for a sale, without rendering the PDF.
 
-            # Generate PDF based on format
-            pdf_path = self._generate_pdf(receipt_data, receipt_number, format_type)
+        Runs inside the caller's transaction (flush only, no commit) so the POS can
+        return the HTML immediately and queue the PDF with render_receipt_pdf.
 
-            # Generate HTML
-            html_content = self._generate_html(receipt_data, format_type)
+        Args:
+            sale: Sale being receipted (already flushed)
+            sale_items: Items of the sale
+            user_id: Cashier user ID
+            format_type: Receipt format (50mm, 80mm, a4); defaults to app settings
+            app_settings: AppSetting instance if the caller already loaded it
+            mark_printed: Record the receipt as printed once (POS auto-print)
 
-            # Update receipt record
-            receipt.pdf_path = pdf_path
-            receipt.html_content = html_content
+        Returns:
+            Dictionary with receipt_id, receipt_number, html_content and receipt_data
+        """
+        user, branch, customer, app_settings = self._load_receipt_context(sale, user_id, app_settings)
+
+        # Use provided format or default from settings
+        if not format_type and app_settings:
+            format_type = app_settings.default_receipt_format or "80mm"
+        elif not format_type:
+            format_type = "80mm"  # fallback default
+
+        # Generate receipt number
+        receipt_number = self._next_receipt_number()
+
+        # Create receipt record
+        receipt = Receipt(
+            sale_id=sale.id,
+            receipt_number=receipt_number,
+            created_by_user_id=user_id,
+            branch_id=sale.branch_id,
+            customer_id=sale.customer_id,
+            amount=sale.total_amount or 0,
+            currency=sale.currency or "BWP",
+            payment_method=sale.payment_method,
+            payment_date=sale.date or sale.sale_time or datetime.utcnow(),
+            notes=f"Receipt for Sale {sale.reference}" if sale.reference else None,
+            printed=mark_printed,
+            print_count=1 if mark_printed else 0
+        )
+        self.db.add(receipt)
+        self.db.flush()
+
+        # Generate receipt data and HTML (cheap string formatting, no PDF)
+        receipt_data = self._prepare_receipt_data(sale, sale_items, user, branch, customer, app_settings, receipt_number)
+        html_content = self._generate_html(receipt_data, format_type)
+        receipt.html_content = html_content
+
+        return {
+            'success': True,
+            'receipt_id': receipt.id,
+            'receipt_number': receipt_number,
+            'pdf_path': None,
+            'html_content': html_content,
+            'receipt_data': receipt_data,
+            'format_type': format_type
+        }
+
+    def render_receipt_pdf(self, receipt_id: str, format_type: str = None) -> Dict:
+        """Render and store the PDF for an existing sale receipt (used by the receipt queue)"""
+        try:
+            receipt = self.db.query(Receipt).filter(Receipt.id == receipt_id).first()
+            if not receipt or not receipt.sale_id:
+                return {'success': False, 'error': 'Sale receipt not found'}
 
+            sale = self.db.query(Sale).filter_by(id=receipt.sale_id).first()
+            if not sale:
+                return {'success': False, 'error': 'Sale not found'}
+            sale_items = self.db.query(SaleItem).filter_by(sale_id=sale.id).all()
+            user, branch, customer, app_settings = self._load_receipt_context(sale, receipt.created_by_user_id)
+
+            if not format_type:
+                format_type = (app_settings.default_receipt_format if app_settings else None) or "80mm"
+
+            receipt_data = self._prepare_receipt_data(sale, sale_items, user, branch, customer,
+                                                      app_settings, receipt.receipt_number)
+            receipt.pdf_path = self._generate_pdf(receipt_data, receipt.receipt_number, format_type)
             self.db.commit()
 
             return {
                 'success': True,
                 'receipt_id': receipt.id,
-                'receipt_number': receipt_number,
-                'pdf_path': pdf_path,
-                'html_content': html_content,
-                'receipt_data': receipt_data
+                'receipt_number': receipt.receipt_number,
+                'pdf_path': receipt.pdf_path
             }
 
         except Exception as e:
             self.db.rollback()
             return {'success': False, 'error': str(e)}
 
+    def _next_receipt_number(self) -> str:
+        """Next receipt number from the block-allocated 'receipt' sequence (unique, not gap-free)"""
+        today = datetime.now()
+        number = DocumentSequenceService(self.db).next_value(
+            'receipt', year=today.year, block_size=settings.document_sequence_block_size
+        )
+        return f"RCP-{today.strftime('%Y%m%d')}-{number:06d}"
+
+    def _load_receipt_context(self, sale: Sale, user_id: str, app_settings=None):
+        """Load cashier, branch, customer and app settings for a sale receipt"""
+        # Primary-key gets are served from the session identity map when already loaded
+        user = self.db.get(User, user_id) if user_id else None
+        branch = self.db.get(Branch, sale.branch_id) if sale.branch_id else None
+
+        # Get customer info if available
+        customer = None
+        if sale.customer_id:
+            customer = self.db.get(Customer, sale.customer_id)
+
+        # Get app settings for company info and default format
+        if app_settings is None:
+            app_settings = get_app_settings(self.db)
+        return user, branch, customer, app_settings
+
     def _prepare_receipt_data(self, sale: Sale, sale_items: List[SaleItem],
                             user: User, branch: Branch, customer: Customer,
                             app_settings, receipt_number: str) -> Dict:
@@ -791,8 +864,7 @@ class ReceiptService:
             customer = self.db.query(Customer).filter_by(id=invoice.customer_id).first()
 
             # Get app settings for company info and default format
-            from app.models.app_setting import AppSetting
-            app_settings = self.db.query(AppSetting).first()
+            app_settings = get_app_settings(self.db)
 
             # Use provided format or default from settings
             if not format_type and app_settings:
@@ -801,7 +873,7 @@ class ReceiptService:
                 format_type = "80mm"  # fallback default
 
             # Generate receipt number
-            receipt_number = f"RCP-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            receipt_number = self._next_receipt_number()
 
             # Create receipt record
             receipt = Receipt(
@@ -4,19 +4,33 @@ Centralized Logging Configuration for CNPERP ERP System
 This module provides a standardized logging setup with:
 - File rotation to prevent disk space issues
 - Separate error log file for critical issues
-- Consistent formatting across all modules
+- Non-blocking output: loggers only enqueue records; a QueueListener thread
+  formats them and writes to the console and log files
+- Structured JSON records in the log files (extra= fields become JSON keys)
+- Per-module levels, configurable with LOG_LEVEL / LOG_LEVELS and changeable at
+  runtime with set_log_levels()
 - Performance tracking capabilities
+
+Row-level diagnostics belong at DEBUG with lazy %-style arguments (and an
+isEnabledFor(DEBUG) guard around loops), so they cost nothing when disabled.
 """
 
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Dict, Mapping, Optional, Union
 import traceback
 
+from app.core.config import settings
+
 # Create logs directory if it doesn't exist
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
@@ -26,7 +40,7 @@ APP_LOG_FILE = LOGS_DIR / "app.log"
 ERROR_LOG_FILE = LOGS_DIR / "errors.log"
 PERFORMANCE_LOG_FILE = LOGS_DIR / "performance.log"
 
-# Log format
+# Console log format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -35,32 +49,60 @@ MAX_BYTES = 10 * 1024 * 1024
 # Keep 5 backup files
 BACKUP_COUNT = 5
 
+# LogRecord attributes; anything else on a record came from extra= and is emitted as a JSON field
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
 
-def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
-    """
-    Create a configured logger instance.
 
-    Args:
-        name: Logger name (typically __name__ of the module)
-        level: Logging level (default: INFO)
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
 
-    Returns:
-        Configured logger instance
-    """
-    logger = logging.getLogger(name)
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = record.stack_info
+        return json.dumps(payload, default=str, ensure_ascii=False)
 
-    # Avoid adding handlers multiple times
-    if logger.handlers:
-        return logger
 
-    logger.setLevel(level)
-    logger.propagate = False
+class _RecordQueueHandler(QueueHandler):
+    """Enqueue records unformatted; the listener thread does all formatting and I/O"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, as they may change after the call returns
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = _RecordQueueHandler(_log_queue)
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+_default_level = logging.INFO
+_level_overrides: Dict[str, int] = {}
+_configured_loggers: Dict[str, logging.Logger] = {}
+
+
+def _build_handlers():
     # Console handler - INFO and above
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
 
     # Main app log file handler - DEBUG and above
     file_handler = RotatingFileHandler(
@@ -70,8 +112,7 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
         encoding='utf-8'
     )
     file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(JsonFormatter())
 
     # Error log file handler - ERROR and above
     error_handler = RotatingFileHandler(
@@ -81,18 +122,118 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
         encoding='utf-8'
     )
     error_handler.setLevel(logging.ERROR)
-    error_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d]\n"
-        "Message: %(message)s\n"
-        "%(exc_info)s\n",
-        DATE_FORMAT
-    )
-    error_handler.setFormatter(error_formatter)
+    error_handler.setFormatter(JsonFormatter())
+
+    return console_handler, file_handler, error_handler
+
+
+def _ensure_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_log_queue, *_build_handlers(), respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread (registered with atexit)"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def _to_level(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+
+def parse_level_spec(spec: Optional[str]) -> Dict[str, int]:
+    """Parse "app.services=DEBUG,app.api.accounting_codes=WARNING" into {module: level}"""
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = _to_level(level)
+    return levels
+
+
+def _level_for(name: str) -> int:
+    """Level of the most specific override covering name (module or package), else the default"""
+    best = None
+    for prefix, level in _level_overrides.items():
+        if name == prefix or name.startswith(prefix + "."):
+            if best is None or len(prefix) > len(best[0]):
+                best = (prefix, level)
+    return best[1] if best else _default_level
+
+
+def set_log_levels(levels: Mapping[str, Union[str, int]], default: Union[str, int, None] = None,
+                   replace: bool = True) -> Dict[str, str]:
+    """
+    Change per-module log levels at runtime.
 
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    logger.addHandler(error_handler)
+    Args:
+        levels: Logger or package name -> level (e.g. {"app.services": "DEBUG"})
+        default: New level for loggers without an override
+        replace: Drop overrides not listed in levels (otherwise merge)
+
+    Returns:
+        The overrides now in effect, as level names
+    """
+    global _default_level
+    parsed = {name: _to_level(level) for name, level in levels.items()}
+    if default is not None:
+        _default_level = _to_level(default)
+    if replace:
+        _level_overrides.clear()
+    _level_overrides.update(parsed)
+    for name, logger in list(_configured_loggers.items()):
+        logger.setLevel(_level_for(name))
+    return get_log_levels()
+
+
+def get_log_levels() -> Dict[str, str]:
+    """Overrides in effect (plus the default under "*"), as level names"""
+    levels = {name: logging.getLevelName(level) for name, level in sorted(_level_overrides.items())}
+    levels["*"] = logging.getLevelName(_default_level)
+    return levels
+
+
+def setup_logger(name: str, level: Optional[int] = None) -> logging.Logger:
+    """
+    Create a configured logger instance.
+
+    Args:
+        name: Logger name (typically __name__ of the module)
+        level: Logging level; by default the level configured for the module
+
+    Returns:
+        Configured logger instance
+    """
+    logger = logging.getLogger(name)
+
+    # Avoid adding handlers multiple times
+    if _queue_handler in logger.handlers:
+        return logger
+
+    if level is not None and name not in _level_overrides:
+        _level_overrides[name] = level
+    logger.setLevel(_level_for(name))
+    logger.propagate = False
+    logger.addHandler(_queue_handler)
+    _configured_loggers[name] = logger
+    _ensure_listener()
 
     return logger
 
@@ -278,6 +419,8 @@ def performance_tracker(logger: logging.Logger = None):
     return decorator
 
 
+set_log_levels(parse_level_spec(settings.log_levels), default=settings.log_level)
+
 # Create default loggers
 app_logger = get_logger("app")
 db_logger = get_logger("database")
@@ -0,0 +1,100 @@
+"""
+Streaming CSV/XLSX exports
+
+Export endpoints read their rows through a server-side cursor (yield_per), format
+them one batch at a time and hand a generator to StreamingResponse, so memory use
+stays flat whatever the number of rows. XLSX files are built with openpyxl's
+write-only workbook, which spools rows to disk instead of keeping cells in memory.
+
+Usage (any list endpoint - sales, invoices, purchases, journals):
+
+    rows = (format_row(r) for r in stream_query(query))
+    return streaming_export_response(rows, HEADER, "sales_export", export_format)
+
+The generator runs after the endpoint returns, while the request's session is
+still open (get_db closes it once the response has been sent).
+"""
+import csv
+import tempfile
+from datetime import datetime
+from io import StringIO
+from typing import Any, Iterable, Iterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = ('csv', 'xlsx')
+XLSX_CHUNK_BYTES = 64 * 1024
+
+MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def stream_query(query, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Any]:
+    """Iterate an ORM query through a server-side cursor, batch_size rows at a time"""
+    return iter(query.execution_options(stream_results=True).yield_per(batch_size))
+
+
+def csv_chunks(header: Sequence[str], rows: Iterable[Sequence[Any]],
+               batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """CSV text for header and rows, yielded every batch_size rows"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def xlsx_chunks(header: Sequence[str], rows: Iterable[Sequence[Any]],
+                sheet_title: str = 'Export') -> Iterator[bytes]:
+    """XLSX file bytes for header and rows, built in write-only mode"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(XLSX_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def streaming_export_response(rows: Iterable[Sequence[Any]], header: Sequence[str], filename_prefix: str,
+                              export_format: str = 'csv', sheet_title: str = 'Export') -> StreamingResponse:
+    """StreamingResponse serving rows as a CSV or XLSX attachment
+
+    Args:
+        rows: Lazily produced row values (e.g. formatted from stream_query)
+        header: Column titles
+        filename_prefix: Attachment name before the timestamp and extension
+        export_format: 'csv' or 'xlsx'
+        sheet_title: Worksheet name for XLSX
+
+    Returns:
+        StreamingResponse whose body is generated while it is sent
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == 'xlsx':
+        body = xlsx_chunks(header, rows, sheet_title)
+    else:
+        body = csv_chunks(header, rows)
+    filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Content-Type": f"{media_type}; charset=utf-8" if export_format == 'csv' else media_type,
+    }
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare branch_stock_levels with the inventory transaction log.
+
+Reports every (product, branch) whose maintained quantity differs from the sum of its
+inventory_transactions, and rewrites those rows with --fix. Exits with status 1 when
+drift is found and not fixed, so it can run from cron or CI.
+
+Usage:
+  python scripts/check_branch_stock_drift.py
+  python scripts/check_branch_stock_drift.py --branch <branch_id> --fix
+  python scripts/check_branch_stock_drift.py --product <product_id> [--product <product_id> ...]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.branch_stock_level_service import BranchStockLevelService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check branch stock levels against inventory transactions")
+    parser.add_argument("--branch", help="Only check this branch; defaults to every branch")
+    parser.add_argument("--product", action="append", dest="products",
+                        help="Only check this product (repeatable); defaults to every product")
+    parser.add_argument("--fix", action="store_true", help="Rewrite drifted rows from the transaction log")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum drifted rows to print")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = BranchStockLevelService(db)
+        drift = service.check_drift(branch_id=args.branch, product_ids=args.products)
+        for row in drift[:args.limit]:
+            print(f"[stock-levels] product={row['product_id']} branch={row['branch_id']} "
+                  f"recorded={row['recorded']} expected={row['expected']} difference={row['difference']:+d}")
+        if len(drift) > args.limit:
+            print(f"[stock-levels] ... {len(drift) - args.limit} more")
+        print(f"[stock-levels] {len(drift)} drifted row(s)")
+
+        if drift and args.fix:
+            result = service.repair(branch_id=args.branch, product_ids=args.products)
+            print(f"[stock-levels] Repaired branch stock levels: {result}")
+            return 0
+        return 1 if drift else 0
+    except Exception as exc:
+        print(f"[stock-levels] Drift check failed: {exc}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Rebuild account balance snapshots from journal_entries.
+
+Run once after deploying the snapshot table, and again whenever journal rows have
+been changed outside the application (bulk imports, manual SQL fixes).
+
+Usage:
+  python scripts/rebuild_account_balance_snapshots.py
+  python scripts/rebuild_account_balance_snapshots.py --close-through 2025-09-30
+  python scripts/rebuild_account_balance_snapshots.py --close-period 2025-10
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.account_balance_snapshot_service import AccountBalanceSnapshotService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild account balance snapshots")
+    parser.add_argument("--close-through", help="Close periods ending on or before this date (YYYY-MM-DD); "
+                                                "defaults to the end of last month")
+    parser.add_argument("--close-period", help="Only recalculate and close periods up to this month (YYYY-MM)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = AccountBalanceSnapshotService(db)
+        if args.close_period:
+            period = datetime.strptime(args.close_period, "%Y-%m")
+            result = service.close_period(period.year, period.month)
+            print(f"[snapshots] Closed through {args.close_period}: {result}")
+        else:
+            close_through = datetime.strptime(args.close_through, "%Y-%m-%d").date() if args.close_through else None
+            result = service.rebuild(close_through=close_through)
+            print(f"[snapshots] Rebuilt account balance snapshots: {result}")
+        return 0
+    except Exception as exc:
+        print(f"[snapshots] Rebuild failed: {exc}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
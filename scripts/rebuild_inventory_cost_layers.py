@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Rebuild FIFO inventory cost layers from inventory_transactions.
+
+Run once after deploying the cost layer table, and again whenever inventory
+transactions have been changed outside the application (bulk imports, manual SQL fixes).
+
+Usage:
+  python scripts/rebuild_inventory_cost_layers.py
+  python scripts/rebuild_inventory_cost_layers.py --product <product_id> [--product <product_id> ...]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.inventory_cost_layer_service import InventoryCostLayerService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild inventory cost layers")
+    parser.add_argument("--product", action="append", dest="products",
+                        help="Only rebuild this product (repeatable); defaults to every product")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = InventoryCostLayerService(db).rebuild(product_ids=args.products)
+        print(f"[cost-layers] Rebuilt inventory cost layers: {result}")
+        return 0
+    except Exception as exc:
+        print(f"[cost-layers] Rebuild failed: {exc}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
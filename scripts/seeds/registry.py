@@ -21,3 +21,6 @@ def run_selected(db: Session, names: List[str]):
             continue
         print(f"[seed] Running: {n}")
         fn(db)
+    # Seeds may add or rename accounts; re-check the core chart on next use
+    from app.core.database import invalidate_core_accounts_bootstrap
+    invalidate_core_accounts_bootstrap()
@@ -0,0 +1,101 @@
+"""Concurrency stress test for POS stock decrements.
+
+Many tills sell the same SKUs in parallel, each with its own session. Whatever
+the interleaving, stock must never go negative and every successful sale must be
+reflected exactly once in both product quantities and inventory transactions.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.branch import Branch
+from app.models.inventory import InventoryTransaction, Product
+from app.models.pos import PosSession
+from app.models.user import User
+from app.services.pos_service import POSService
+
+INITIAL_STOCK = 30
+SALES = 24
+
+
+@pytest.mark.integration
+def test_parallel_sales_never_oversell(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pos_stress.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    branch = Branch(id=str(uuid4()), name="Stress Branch", code="STRESS", currency="BWP")
+    user = User(username="stress_till", email="stress@example.com", password_digest="x")
+    widget = Product(name="Widget", sku="STRESS-W", quantity=INITIAL_STOCK,
+                     cost_price=Decimal("5.00"), selling_price=Decimal("10.00"))
+    gadget = Product(name="Gadget", sku="STRESS-G", quantity=INITIAL_STOCK,
+                     cost_price=Decimal("2.00"), selling_price=Decimal("4.00"))
+    db.add_all([branch, user, widget, gadget])
+    db.flush()
+    pos_session = PosSession(user_id=user.id, branch_id=branch.id, till_id="T1", status="open")
+    db.add(pos_session)
+    db.commit()
+    ids = {"session": pos_session.id, "widget": widget.id, "gadget": gadget.id}
+    db.close()
+
+    # Basket hits the widget on two lines so the check must cover the whole basket
+    basket = {
+        "items": [
+            {"product_id": ids["widget"], "quantity": 2, "unit_price": "10.00"},
+            {"product_id": ids["gadget"], "quantity": 1, "unit_price": "4.00"},
+            {"product_id": ids["widget"], "quantity": 1, "unit_price": "10.00"},
+        ],
+        "payment_method": "cash",
+        "amount_tendered": "100.00",
+        # GL posting is covered elsewhere; keep contention on the stock rows
+        "use_ifrs_posting": True,
+    }
+
+    def sell():
+        session = Session()
+        try:
+            sale, result = POSService(session).create_sale(dict(basket), ids["session"])
+            return bool(result.get("success"))
+        finally:
+            session.close()
+
+    start = threading.Barrier(8)
+
+    def contended_sell():
+        try:
+            start.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass
+        return sell()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outcomes = list(pool.map(lambda _: contended_sell(), range(SALES)))
+    successes = sum(outcomes)
+
+    db = Session()
+    try:
+        widget = db.get(Product, ids["widget"])
+        gadget = db.get(Product, ids["gadget"])
+        assert widget.quantity >= 0 and gadget.quantity >= 0
+        assert widget.quantity == INITIAL_STOCK - 3 * successes
+        assert gadget.quantity == INITIAL_STOCK - successes
+        # Demand (24 baskets x 3 widgets) exceeds stock, so some sales must be refused
+        assert 0 < successes <= INITIAL_STOCK // 3
+        widget_lines = db.query(InventoryTransaction).filter(
+            InventoryTransaction.product_id == ids["widget"]
+        ).count()
+        assert widget_lines == 2 * successes
+    finally:
+        db.close()
+        engine.dispose()
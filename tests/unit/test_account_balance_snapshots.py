@@ -0,0 +1,82 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting import (
+    AccountBalanceSnapshot, AccountingCode, AccountingEntry, JournalEntry
+)
+from app.models.branch import Branch
+from app.services.account_balance_snapshot_service import AccountBalanceSnapshotService
+from app.services.ifrs_reports_core import IFRSReportsCore
+
+
+def _setup_ledger(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Snapshot Branch {suffix}", code=f"SB{suffix}")
+    cash = AccountingCode(code=f"C{suffix}", name=f"Cash {suffix}", account_type="Asset", category="Cash")
+    sales = AccountingCode(code=f"R{suffix}", name=f"Sales {suffix}", account_type="Revenue", category="Sales")
+    db_session.add_all([branch, cash, sales])
+    db_session.flush()
+    header = AccountingEntry(date_prepared=date.today(), particulars="Snapshot test", branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    return branch, cash, sales, header
+
+
+def _post(db_session, header, branch, debit_account, credit_account, amount, on):
+    lines = [
+        JournalEntry(accounting_code_id=debit_account.id, accounting_entry_id=header.id, branch_id=branch.id,
+                     date=on, debit_amount=Decimal(amount), credit_amount=Decimal("0")),
+        JournalEntry(accounting_code_id=credit_account.id, accounting_entry_id=header.id, branch_id=branch.id,
+                     date=on, debit_amount=Decimal("0"), credit_amount=Decimal(amount)),
+    ]
+    db_session.add_all(lines)
+    db_session.commit()
+    return lines
+
+
+@pytest.mark.unit
+def test_posting_maintains_snapshots(db_session):
+    branch, cash, sales, header = _setup_ledger(db_session)
+    last_month = date.today().replace(day=1) - timedelta(days=1)
+    _post(db_session, header, branch, cash, sales, "100.00", last_month)
+    _post(db_session, header, branch, cash, sales, "40.00", date.today())
+
+    rows = db_session.query(AccountBalanceSnapshot).filter(
+        AccountBalanceSnapshot.accounting_code_id == cash.id
+    ).order_by(AccountBalanceSnapshot.period_start).all()
+    assert [(float(r.total_debits), r.entry_count) for r in rows] == [(100.0, 1), (40.0, 1)]
+
+    totals = AccountBalanceSnapshotService(db_session).get_account_totals(date.today())
+    assert totals[cash.id] == (Decimal("140"), Decimal("0"))
+    assert totals[sales.id] == (Decimal("0"), Decimal("140"))
+
+
+@pytest.mark.unit
+def test_closed_periods_and_edits_stay_consistent(db_session):
+    branch, cash, sales, header = _setup_ledger(db_session)
+    last_month = date.today().replace(day=1) - timedelta(days=1)
+    old_lines = _post(db_session, header, branch, cash, sales, "250.00", last_month)
+    _post(db_session, header, branch, cash, sales, "10.00", date.today())
+
+    service = AccountBalanceSnapshotService(db_session)
+    service.rebuild()
+    assert service.get_last_closed_period_end(date.today()) >= last_month.replace(day=1)
+
+    # Editing a line inside a closed period is folded back into its snapshot
+    old_lines[0].debit_amount = Decimal("200.00")
+    old_lines[1].credit_amount = Decimal("200.00")
+    db_session.commit()
+
+    totals = service.get_account_totals(date.today())
+    assert totals[cash.id] == (Decimal("210"), Decimal("0"))
+    balance = IFRSReportsCore(db_session).get_account_balance_as_of_date(sales.id, date.today())
+    assert balance['balance'] == Decimal("210")
+
+    db_session.delete(old_lines[0])
+    db_session.delete(old_lines[1])
+    db_session.commit()
+    movements = service.get_period_movements(last_month.replace(day=1), last_month)
+    assert cash.id not in movements
@@ -0,0 +1,94 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting import AccountingCode
+from app.models.purchases import Purchase, Supplier
+from app.models.sales import Customer, Invoice
+from app.services.aging_reports_service import AgingReportsService
+
+AS_OF = date(2026, 6, 30)
+
+
+@pytest.fixture
+def aging_parties(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    customer = Customer(name=f"Debtor {suffix}", phone="555-0100", credit_limit=Decimal("1000.00"))
+    payable = AccountingCode(code=f"AP{suffix}", name=f"Payables {suffix}", account_type="Liability",
+                             category="Current Liabilities")
+    db_session.add_all([customer, payable])
+    db_session.flush()
+    supplier = Supplier(name=f"Creditor {suffix}", telephone="555-0200", accounting_code_id=payable.id)
+    db_session.add(supplier)
+    db_session.flush()
+
+    # (days outstanding, total, paid, status)
+    for i, (days, total, paid, status) in enumerate([
+        (10, "100.00", "0", "sent"),
+        (30, "50.00", "20.00", "partial"),      # last day of the current bucket
+        (45, "80.00", "0", "overdue"),
+        (95, "40.00", "0", "sent"),
+        (200, "300.00", "0", "overdue"),
+        (15, "60.00", "60.00", "partial"),      # fully paid: ignored
+        (15, "70.00", "0", "paid"),             # closed status: ignored
+    ]):
+        db_session.add(Invoice(customer_id=customer.id, invoice_number=f"AG-{suffix}-{i}",
+                               date=AS_OF - timedelta(days=days), status=status,
+                               total_amount=Decimal(total), amount_paid=Decimal(paid)))
+    for days, total, paid in [(5, "200.00", "50.00"), (61, "90.00", "0"), (121, "10.00", "0"), (-3, "500.00", "0")]:
+        db_session.add(Purchase(supplier_id=supplier.id, purchase_date=AS_OF - timedelta(days=days),
+                                total_amount=Decimal(total), amount_paid=Decimal(paid), reference=f"PO-{suffix}"))
+    db_session.commit()
+    return customer, supplier
+
+
+@pytest.mark.unit
+def test_debtors_buckets_computed_in_sql(db_session, aging_parties):
+    customer, _ = aging_parties
+    service = AgingReportsService(db_session)
+
+    report = service.generate_debtors_aging(as_of_date=AS_OF, customer_id=customer.id)
+    assert report['summary'] == {'current': 130.0, 'days_31_60': 80.0, 'days_61_90': 0.0,
+                                 'days_91_120': 40.0, 'days_120_plus': 300.0, 'total': 550.0}
+    debtor = report['debtors'][0]
+    assert debtor['customer_name'] == customer.name
+    assert debtor['invoice_count'] == 5
+    assert debtor['oldest_invoice_date'] == AS_OF - timedelta(days=200)
+    assert 'invoices' not in debtor
+    assert report['expected_credit_loss']['bucket_provisions']['days_120_plus'] == 150.0
+
+    assert service.generate_debtors_aging(as_of_date=AS_OF, customer_id=customer.id,
+                                          min_amount=Decimal("100"))['total_outstanding'] == 400.0
+
+    page = service.get_debtor_invoices_page(customer.id, as_of_date=AS_OF, limit=2)
+    assert [i['days_outstanding'] for i in page['invoices']] == [200, 95]
+    assert page['invoices'][1]['aging_bucket'] == 'days_91_120'
+    assert page['has_more']
+    last = service.get_debtor_invoices_page(customer.id, as_of_date=AS_OF, limit=2, offset=4)
+    assert [i['outstanding_amount'] for i in last['invoices']] == [100.0]
+    assert not last['has_more']
+
+    detailed = service.generate_debtors_aging(as_of_date=AS_OF, customer_id=customer.id, include_invoices=True)
+    assert len(detailed['debtors'][0]['invoices']) == 5
+
+
+@pytest.mark.unit
+def test_creditors_buckets_and_drill_down(db_session, aging_parties):
+    _, supplier = aging_parties
+    service = AgingReportsService(db_session)
+
+    report = service.generate_creditors_aging(as_of_date=AS_OF, supplier_id=supplier.id, include_details=True)
+    assert report['bucket_totals'] == {'0-30': 150.0, '31-60': 0.0, '61-90': 90.0, '91-120': 0.0, '120+': 10.0}
+    assert report['total_outstanding'] == 250.0     # the future-dated purchase is excluded
+    assert report['creditors'][0]['phone'] == "555-0200"
+    assert [p['outstanding_amount'] for p in report['aging_buckets']['61-90']] == [90.0]
+
+    assert service.generate_creditors_aging(as_of_date=AS_OF, supplier_id=supplier.id)['aging_buckets']['0-30'] == []
+    page = service.get_creditor_purchases_page(supplier.id, as_of_date=AS_OF)
+    assert [p['days_outstanding'] for p in page['purchases']] == [121, 61, 5]
+
+    summary = service.get_supplier_aging_summary(as_of_date=AS_OF)
+    mine = [s for s in summary['suppliers'] if s['supplier_id'] == supplier.id]
+    assert mine[0]['priority_rating'] == 'URGENT'
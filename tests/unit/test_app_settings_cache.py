@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.app_setting import AppSetting
+from app.services.app_setting_service import AppSettingService
+from app.services import app_settings_cache
+from app.services.app_settings_cache import get_app_settings, invalidate_app_settings
+
+
+@pytest.mark.unit
+def test_settings_snapshot_is_cached_and_invalidated_on_update(db_session, monkeypatch):
+    # The snapshot is loaded in a session of its own, never the caller's
+    monkeypatch.setattr(app_settings_cache, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    AppSetting.get_instance(db_session)
+    invalidate_app_settings(broadcast=False)
+    service = AppSettingService(db_session)
+    service.update_settings({"currency": "USD"})
+
+    snapshot = service.get_snapshot()
+    assert snapshot.currency == "USD"
+    assert isinstance(snapshot.quotation_settings, dict)
+    with pytest.raises(AttributeError):
+        snapshot.currency = "EUR"
+
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert service.get_currency_settings()["currency_symbol"] == "$"
+        assert get_app_settings(db_session) is snapshot
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+
+    # Any committed write to the settings row drops the snapshot
+    row = db_session.query(AppSetting).first()
+    row.currency = "BWP"
+    db_session.commit()
+    assert get_app_settings(db_session).currency == "BWP"
@@ -0,0 +1,85 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.billing import BillableItem, BillingCycle, BillingRun, RecurringInvoice
+from app.models.branch import Branch
+from app.models.inventory import Product
+from app.models.sales import Customer, Invoice, InvoiceItem
+from app.services.billing_run_service import BillingRunService, billing_period_start
+
+
+@pytest.mark.unit
+def test_billing_period_start():
+    assert billing_period_start(date(2026, 1, 31), "monthly", 1, date(2026, 3, 15)) == date(2026, 2, 28)
+    assert billing_period_start(date(2026, 1, 31), "monthly", 1, date(2026, 3, 31)) == date(2026, 3, 31)
+    assert billing_period_start(date(2025, 11, 1), "quarterly", 1, date(2026, 4, 30)) == date(2026, 2, 1)
+    assert billing_period_start(date(2026, 3, 2), "weekly", 2, date(2026, 3, 20)) == date(2026, 3, 16)
+
+
+@pytest.mark.unit
+def test_run_bills_due_cycles_in_chunks_and_resumes_failed_ones(db_session, monkeypatch):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Billing Branch {suffix}", code=f"BB{suffix}")
+    product = Product(name=f"Rent {suffix}", sku=f"RENT-{suffix}", quantity=0)
+    db_session.add_all([branch, product])
+    db_session.flush()
+    customers = [Customer(name=f"Tenant {n} {suffix}", branch_id=branch.id) for n in range(3)]
+    # No branch: its invoice cannot be posted until one is set
+    customers.append(Customer(name=f"Tenant X {suffix}"))
+    db_session.add_all(customers)
+    db_session.flush()
+    for customer in customers:
+        cycle = BillingCycle(name=f"Rent {customer.name}", customer_id=customer.id, cycle_type="rental",
+                             interval="monthly", start_date=date(2031, 1, 1))
+        db_session.add(cycle)
+        db_session.flush()
+        db_session.add_all([
+            BillableItem(billing_cycle_id=cycle.id, billable_type="rental_property", billable_id=product.id,
+                         amount=Decimal("1000.00"), start_date=date(2031, 1, 1)),
+            BillableItem(billing_cycle_id=cycle.id, billable_type="utility_water", billable_id=product.id,
+                         amount=Decimal("50.00"), start_date=date(2031, 1, 1), meta_data={"meter_number": "W1"}),
+        ])
+    db_session.commit()
+
+    service = BillingRunService(db_session)
+    due = service.find_due_cycles(date(2031, 2, 10))
+    result = service.start_run(date(2031, 2, 10), chunk_size=2)
+    assert result["status"] == "completed_with_errors"
+    assert (result["total_cycles"], result["processed_cycles"], result["failed_cycles"]) == (4, 3, 1)
+    assert result["count"] == 3 and len(result["invoices"]) == 3
+
+    numbers = sorted(invoice["invoice_number"] for invoice in result["invoices"])
+    sequence = [int(number.rsplit("-", 1)[1]) for number in numbers]
+    assert sequence == list(range(sequence[0], sequence[0] + 3))
+
+    invoice = db_session.query(Invoice).filter(Invoice.id == result["invoices"][0]["id"]).one()
+    assert invoice.date == date(2031, 2, 10) and invoice.due_date == date(2031, 3, 12)
+    assert float(invoice.total_amount - invoice.total_vat_amount) == pytest.approx(1050.0)
+    assert db_session.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).count() == 2
+    rows = db_session.query(RecurringInvoice).filter(RecurringInvoice.invoice_number == invoice.invoice_number).all()
+    assert len(rows) == 2 and {row.period_start for row in rows} == {date(2031, 2, 1)}
+
+    customers[3].branch_id = branch.id
+    db_session.commit()
+    resumed = service.resume_run(result["run_id"])
+    assert resumed["status"] == "completed"
+    assert (resumed["total_cycles"], resumed["processed_cycles"], resumed["count"]) == (4, 4, 4)
+    assert [invoice["customer_id"] for invoice in resumed["invoices"]] == [customers[3].id]
+    # Billed cycles are not billed again for the same period
+    assert service.start_run(date(2031, 2, 20))["count"] == 0
+    assert db_session.query(BillingRun).filter(BillingRun.id == result["run_id"]).one().failed_cycles == 0
+
+    # An overlapping run working from a stale list of due cycles hits the unique index
+    monkeypatch.setattr(service, "find_due_cycles", lambda reference_date: due)
+    overlapping = service.start_run(date(2031, 2, 10), chunk_size=2)
+    assert overlapping["status"] == "completed"
+    assert (overlapping["processed_cycles"], overlapping["failed_cycles"], overlapping["count"]) == (4, 0, 0)
+
+    # Billing a cycle by hand once its period is billed raises an extra, off-period invoice
+    extra = service.bill_cycle(due[0].id, date(2031, 2, 20))
+    assert len(extra) == 1
+    rows = db_session.query(RecurringInvoice).filter(RecurringInvoice.invoice_number == extra[0].invoice_number).all()
+    assert len(rows) == 2 and {row.period_start for row in rows} == {None}
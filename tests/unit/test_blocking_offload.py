@@ -0,0 +1,70 @@
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+
+from app.core.blocking import offload_blocking, run_blocking
+
+
+@pytest.mark.unit
+def test_offloaded_route_keeps_signature_and_runs_off_loop():
+    app = FastAPI()
+    loop_threads = []
+
+    @app.get("/report")
+    @offload_blocking(limit=2)
+    def report(days: int = Query(7)):
+        return {"days": days, "thread": threading.current_thread().name}
+
+    @app.middleware("http")
+    async def record_loop_thread(request, call_next):
+        loop_threads.append(threading.current_thread().name)
+        return await call_next(request)
+
+    assert inspect.iscoroutinefunction(report)
+    assert list(inspect.signature(report).parameters) == ["days"]
+
+    body = TestClient(app).get("/report?days=30").json()
+    assert body["days"] == 30
+    assert body["thread"].startswith("blocking")
+    assert body["thread"] not in loop_threads
+
+
+@pytest.mark.unit
+def test_route_limit_and_responsive_loop():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    @offload_blocking(limit=2, name="test_limited")
+    def slow():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.create_task(ticker())
+        await asyncio.gather(*(slow() for _ in range(6)))
+        tick_task.cancel()
+        assert await run_blocking(lambda: 42) == 42
+        return ticks
+
+    ticks = asyncio.run(main())
+    assert max(peak) == 2
+    # ~0.3s of blocking work ran while the loop kept ticking
+    assert ticks >= 10
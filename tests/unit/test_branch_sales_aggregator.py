@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.branch import Branch
+from app.models.sales import Sale
+from app.services.branch_sales_aggregator import get_branch_sales_aggregator
+
+
+def _branch_state(snapshot, branch_id):
+    return next(b for b in snapshot['branches'] if b['branch_id'] == branch_id)
+
+
+@pytest.mark.unit
+def test_committed_sales_update_live_counters(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Live Branch {suffix}", code=f"LB{suffix}")
+    db_session.add(branch)
+    db_session.commit()
+
+    aggregator = get_branch_sales_aggregator()
+    aggregator.reconcile(db_session)
+    version = aggregator.version
+
+    now = datetime.now()
+    db_session.add_all([
+        Sale(branch_id=branch.id, total_amount=Decimal("100.00"), payment_method="cash", date=now),
+        Sale(branch_id=branch.id, total_amount=Decimal("50.00"), payment_method="card", date=now),
+    ])
+    db_session.commit()
+
+    # Rolled back sales never reach the counters
+    db_session.add(Sale(branch_id=branch.id, total_amount=Decimal("999.00"), payment_method="cash", date=now))
+    db_session.flush()
+    db_session.rollback()
+
+    assert aggregator.version > version
+    live = _branch_state(aggregator.snapshot(db_session), branch.id)
+    assert live['today_count'] == 2
+    assert live['today_amount'] == Decimal("150.00")
+    assert live['payments'] == {"cash": Decimal("100.00"), "card": Decimal("50.00")}
+    assert live['hourly'][now.hour]['count'] == 2
+
+    # A rebuild from the database agrees with the incremental state
+    aggregator.reconcile(db_session)
+    rebuilt = _branch_state(aggregator.snapshot(db_session), branch.id)
+    assert rebuilt['today_amount'] == live['today_amount']
+    assert rebuilt['month_count'] == live['month_count'] == 2
+    assert rebuilt['payments'] == live['payments']
+    assert rebuilt['hourly'][now.hour]['amount'] == Decimal("150.00")
@@ -0,0 +1,91 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models.branch import Branch
+from app.models.inventory import InventoryTransaction, Product
+from app.services.branch_stock_level_service import BranchStockLevelService
+from app.services.branch_stock_service import BranchStockService
+
+
+def _move(db_session, product, transaction_type, quantity, branch_id=None):
+    tx = InventoryTransaction(product_id=product.id, transaction_type=transaction_type, quantity=quantity,
+                              unit_cost=Decimal("2.00"), date=date.today(), branch_id=branch_id)
+    db_session.add(tx)
+    db_session.commit()
+    return tx
+
+
+@pytest.fixture
+def two_branches(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    main = Branch(name=f"Stock Main {suffix}", code=f"SM{suffix}")
+    outlet = Branch(name=f"Stock Outlet {suffix}", code=f"SO{suffix}")
+    db_session.add_all([main, outlet])
+    db_session.flush()
+    product = Product(name=f"Stocked {suffix}", sku=f"STK-{suffix}", quantity=0,
+                      cost_price=Decimal("2.00"), reorder_point=3, branch_id=main.id)
+    db_session.add(product)
+    db_session.commit()
+    return main, outlet, product
+
+
+@pytest.mark.unit
+def test_movements_maintain_branch_levels(db_session, two_branches):
+    main, outlet, product = two_branches
+    levels = BranchStockLevelService(db_session)
+
+    _move(db_session, product, 'goods_receipt', 20)        # no branch: counts to the home branch
+    _move(db_session, product, 'sale', 4, main.id)         # POS writes positive sale quantities
+    receipt = _move(db_session, product, 'goods_receipt', 5, main.id)
+    assert levels.get_quantity(product.id, main.id) == 21
+
+    result = BranchStockService(db_session).transfer_stock_between_branches(product.id, main.id, outlet.id, 6)
+    assert result['success']
+    assert levels.get_quantity(product.id, main.id) == 15
+    assert levels.get_quantity(product.id, outlet.id) == 6
+
+    receipt.quantity = 1
+    db_session.commit()
+    assert levels.get_quantity(product.id, main.id) == 11
+
+    summary = BranchStockService(db_session).get_branch_stock_summary(main.id)
+    assert summary['total_stock_value'] == 22.0
+    assert summary['recent_movements_count'] == 3
+    with pytest.raises(ValueError):
+        BranchStockService(db_session).transfer_stock_between_branches(product.id, outlet.id, main.id, 7)
+    assert levels.check_drift(product_ids=[product.id]) == []
+
+
+@pytest.mark.unit
+def test_adjustments_move_branch_levels_by_direction(db_session, two_branches):
+    main, _, product = two_branches
+    levels = BranchStockLevelService(db_session)
+
+    _move(db_session, product, 'goods_receipt', 10, main.id)
+    _move(db_session, product, 'adjustment_in', 4, main.id)
+    _move(db_session, product, 'adjustment_out', 1, main.id)
+    assert levels.get_quantity(product.id, main.id) == 13
+    assert levels.check_drift(product_ids=[product.id]) == []
+
+
+@pytest.mark.unit
+def test_drift_checker_repairs_out_of_band_changes(db_session, two_branches):
+    main, _, product = two_branches
+    levels = BranchStockLevelService(db_session)
+    _move(db_session, product, 'opening_stock', 10, main.id)
+
+    db_session.execute(
+        text("UPDATE branch_stock_levels SET quantity = 3 WHERE product_id = :pid"), {"pid": product.id}
+    )
+    db_session.commit()
+
+    drift = levels.check_drift(branch_id=main.id, product_ids=[product.id])
+    assert drift == [{'product_id': product.id, 'branch_id': main.id,
+                      'recorded': 3, 'expected': 10, 'difference': 7}]
+    assert levels.repair(product_ids=[product.id]) == {'drifted': 1, 'repaired': 1}
+    assert levels.get_quantity(product.id, main.id) == 10
+    assert levels.check_drift(product_ids=[product.id]) == []
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import CacheNamespace
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(cache_module, "get_redis", lambda: None)
+
+
+@pytest.mark.unit
+def test_lru_entry_and_byte_limits(no_redis):
+    ns = CacheNamespace("test_lru", max_entries=2, max_bytes=10, sizeof=len)
+    ns.set("a", b"1234")
+    ns.set("b", b"1234")
+    assert ns.get("a") == b"1234"  # touch "a" so "b" is least recently used
+    ns.set("c", b"12")
+    assert ns.get("b") is None
+    assert ns.get("a") == b"1234" and ns.get("c") == b"12"
+
+    ns.set("d", b"123456")  # over the byte budget: evicts from the LRU end
+    assert ns.stats()["bytes"] <= 10
+    assert ns.get("d") == b"123456"
+    ns.set("huge", b"x" * 11)  # larger than the namespace budget, never stored
+    assert ns.get("huge") is None
+
+
+@pytest.mark.unit
+def test_ttl_expiry(no_redis):
+    ns = CacheNamespace("test_ttl", ttl_seconds=60)
+    ns.set("short", 1, ttl=0.05)
+    ns.set("long", 2)
+    time.sleep(0.1)
+    assert ns.get("short") is None
+    assert ns.get("long") == 2
+    assert len(ns) == 1
+
+
+@pytest.mark.unit
+def test_get_or_set_is_single_flight(no_redis):
+    ns = CacheNamespace("test_single_flight")
+    calls = []
+    gate = threading.Event()
+
+    def factory():
+        calls.append(1)
+        gate.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ns.get_or_set("k", factory))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+def test_redis_errors_fall_back_to_memory(monkeypatch):
+    class BrokenRedis:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def setex(self, key, ttl, value):
+            raise ConnectionError("down")
+
+    client = BrokenRedis()
+    monkeypatch.setattr(cache_module, "get_redis", lambda: client)
+    monkeypatch.setattr(cache_module, "_reset_redis", lambda: None)
+    ns = CacheNamespace("test_fallback", codec=(lambda v: v.encode(), lambda raw: raw.decode()))
+    ns.set("k", "v")
+    assert ns.get("k") == "v"
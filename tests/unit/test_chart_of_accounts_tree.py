@@ -0,0 +1,74 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.accounting_codes import router
+from app.core.database import get_db
+from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry
+from app.models.branch import Branch
+
+
+@pytest.mark.unit
+def test_tree_rolls_up_balances_and_supports_conditional_get(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"COA Branch {suffix}", code=f"CB{suffix}")
+    db_session.add(branch)
+    db_session.flush()
+    assets = AccountingCode(code=f"T1{suffix}", name="Assets", account_type="Asset", category="Asset",
+                            is_parent=True, branch_id=branch.id)
+    db_session.add(assets)
+    db_session.flush()
+    cash = AccountingCode(code=f"T11{suffix}", name="Cash", account_type="Asset", category="Asset",
+                          is_parent=True, parent_id=assets.id)
+    db_session.add(cash)
+    db_session.flush()
+    till = AccountingCode(code=f"T111{suffix}", name="Till", account_type="Asset", category="Asset",
+                          parent_id=cash.id)
+    db_session.add(till)
+    db_session.flush()
+    header = AccountingEntry(date_prepared=date(2026, 4, 1), particulars="COA test", branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    for account, debit, credit in [(cash, "100", "0"), (till, "50", "0"), (till, "0", "20")]:
+        db_session.add(JournalEntry(accounting_code_id=account.id, accounting_entry_id=header.id,
+                                    branch_id=branch.id, date=date(2026, 4, 1),
+                                    debit_amount=Decimal(debit), credit_amount=Decimal(credit)))
+    db_session.commit()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/accounting-codes")
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    response = client.get("/accounting-codes/tree")
+    assert response.status_code == 200
+    root = next(node for node in response.json() if node["id"] == assets.id)
+    assert root["balance"] == 130.0 and root["branch"]["name"] == branch.name
+    assert root["sub_accounts"][0]["balance"] == 130.0
+    assert root["sub_accounts"][0]["sub_accounts"][0]["balance"] == 30.0
+
+    etag = response.headers["ETag"]
+    assert client.get("/accounting-codes/tree", headers={"If-None-Match": etag}).status_code == 304
+
+    accounts = {node["id"]: node for node in client.get("/accounting-codes/").json()}
+    assert accounts[cash.id]["total_debits"] == 150.0
+    assert [sub["id"] for sub in accounts[cash.id]["sub_accounts"]] == [till.id]
+    assert accounts[till.id]["parent"]["code"] == cash.code
+
+    db_session.add(JournalEntry(accounting_code_id=till.id, accounting_entry_id=header.id, branch_id=branch.id,
+                                date=date(2026, 4, 2), debit_amount=Decimal("5"), credit_amount=Decimal("0")))
+    db_session.commit()
+    response = client.get("/accounting-codes/tree", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert next(node for node in response.json() if node["id"] == assets.id)["balance"] == 135.0
+
+    # An edit in the same second as the last one still moves the ETag
+    etag = response.headers["ETag"]
+    till.name = "Till float"
+    db_session.commit()
+    response = client.get("/accounting-codes/tree", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
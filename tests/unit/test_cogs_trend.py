@@ -0,0 +1,89 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.inventory import COGSEntry, Product
+from app.models.sales import Sale, SaleItem
+from app.services import cogs_reports_service
+from app.services.cogs_reports_service import COGSReportsService
+
+
+@pytest.fixture
+def cogs_history(db_session):
+    cogs_reports_service._COGS_DAILY_CACHE.clear()
+    suffix = uuid.uuid4().hex[:6]
+    # Committed rows outlive the test, so each run gets its own year
+    year = 2200 + int(suffix, 16) % 700
+    widget = Product(name=f"Widget {suffix}", sku=f"WID-{suffix}", quantity=0, category="Hardware")
+    gadget = Product(name=f"Gadget {suffix}", sku=f"GAD-{suffix}", quantity=0, category="Electronics")
+    db_session.add_all([widget, gadget])
+    db_session.flush()
+
+    db_session.add_all([
+        COGSEntry(product_id=widget.id, cost=Decimal("10.00"), quantity=2, date=date(year, 1, 15)),
+        COGSEntry(product_id=gadget.id, cost=Decimal("5.00"), quantity=1, date=date(year, 2, 3)),
+        COGSEntry(product_id=widget.id, cost=Decimal("1.00"), quantity=4, date=date(year, 5, 31)),
+    ])
+    # Late on the last day of March: the whole end day belongs to the period
+    sale = Sale(date=datetime(year, 3, 31, 18, 30), total_amount=Decimal("50.00"))
+    db_session.add(sale)
+    db_session.flush()
+    db_session.add(SaleItem(sale_id=sale.id, product_id=gadget.id, quantity=3,
+                            selling_price=Decimal("15.00"), cost_price=Decimal("7.00")))
+    db_session.commit()
+    return widget, gadget, year
+
+
+@pytest.mark.unit
+def test_trend_buckets_from_daily_rollup(db_session, cogs_history):
+    widget, gadget, year = cogs_history
+    service = COGSReportsService(db_session)
+
+    monthly = service.get_cogs_trend_analysis(date(year, 1, 10), date(year, 6, 30), "monthly")
+    totals = [t["total_cogs"] for t in monthly["trends"]]
+    assert totals == [20.0, 5.0, 21.0, 0.0, 4.0, 0.0]
+    assert monthly["trends"][0]["period_start"] == f"{year}-01-10"
+    assert monthly["analysis"]["highest_period"]["period_label"] == f"March {year}"
+
+    # A commit drops only the cached months it touches
+    march = cogs_reports_service._COGS_DAILY_CACHE.get(f"*|*|{year}-03-01")
+    assert march is not None
+    db_session.add(COGSEntry(product_id=widget.id, cost=Decimal("100.00"), quantity=1, date=date(year, 2, 10)))
+    db_session.commit()
+    assert cogs_reports_service._COGS_DAILY_CACHE.get(f"*|*|{year}-02-01") is None
+    assert cogs_reports_service._COGS_DAILY_CACHE.get(f"*|*|{year}-03-01") is march
+
+    quarterly = service.get_cogs_trend_analysis(date(year, 1, 1), date(year, 6, 30), "quarterly",
+                                                breakdown="category")
+    assert [t["total_cogs"] for t in quarterly["trends"]] == [146.0, 4.0]
+    assert quarterly["trends"][0]["breakdown"] == [
+        {"category": "Hardware", "total_cogs": 120.0},
+        {"category": "Electronics", "total_cogs": 26.0},
+    ]
+
+    cogs_reports_service._COGS_DAILY_CACHE.clear()
+    annual = service.get_cogs_trend_analysis(date(year, 1, 1), date(year, 12, 31), "annual",
+                                             product_id=widget.id, breakdown="product")
+    assert annual["trends"][0]["total_cogs"] == 124.0
+    assert annual["trends"][0]["breakdown"][0]["product_id"] == widget.id
+
+
+@pytest.mark.unit
+def test_period_reports_share_rollup(db_session, cogs_history):
+    widget, gadget, year = cogs_history
+    service = COGSReportsService(db_session)
+
+    quarter = service.generate_quarterly_cogs_report(year, 1)
+    assert quarter["summary"]["total_cogs"] == 46.0
+    assert quarter["summary"]["sales_cogs"] == 21.0
+    assert quarter["summary"]["total_entries"] == 3
+    assert [m["total_cogs"] for m in quarter["monthly_breakdown"]] == [20.0, 5.0, 21.0]
+    by_product = {row["product_id"]: row for row in quarter["product_breakdown"]}
+    assert by_product[gadget.id]["total_cogs"] == 26.0
+    assert by_product[gadget.id]["category_id"] == "Electronics"
+
+    second = service.generate_quarterly_cogs_report(year, 2)
+    assert second["comparison"]["previous_period"]["total_cogs"] == 46.0
+    assert second["comparison"]["change"]["trend"] == "decrease"
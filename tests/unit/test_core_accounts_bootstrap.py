@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import event
+
+from app.core import database
+from app.models.accounting import AccountingCode
+
+
+@pytest.mark.unit
+def test_core_accounts_bootstrap_runs_once_until_invalidated(db_session):
+    database.invalidate_core_accounts_bootstrap()
+    assert database.ensure_core_accounts(db_session) is True
+    assert db_session.query(AccountingCode).filter(AccountingCode.code == '1300').count() <= 1
+
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert database.ensure_core_accounts(db_session) is False
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+
+    database.invalidate_core_accounts_bootstrap()
+    assert database.ensure_core_accounts(db_session) is True
@@ -0,0 +1,86 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry
+from app.models.accounting_dimensions import (
+    AccountingDimension, AccountingDimensionAssignment, AccountingDimensionValue
+)
+from app.models.branch import Branch
+from app.schemas.accounting_dimensions import DimensionAnalysisFilter
+from app.services.accounting_dimensions_service import AccountingDimensionService
+
+
+@pytest.fixture
+def dimensional_entries(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Dim Branch {suffix}", code=f"DB{suffix}")
+    expense = AccountingCode(code=f"DX{suffix}", name=f"Expense {suffix}", account_type="Expense", category="Expenses")
+    dept = AccountingDimension(code=f"DEPT{suffix}", name=f"Department {suffix}")
+    project = AccountingDimension(code=f"PROJ{suffix}", name=f"Project {suffix}")
+    db_session.add_all([branch, expense, dept, project])
+    db_session.flush()
+    sales = AccountingDimensionValue(dimension_id=dept.id, code="SAL", name="Sales")
+    ops = AccountingDimensionValue(dimension_id=dept.id, code="OPS", name="Ops")
+    alpha = AccountingDimensionValue(dimension_id=project.id, code="ALP", name="Alpha")
+    header = AccountingEntry(date_prepared=date(2026, 3, 1), particulars="Dimension test", branch_id=branch.id)
+    db_session.add_all([sales, ops, alpha, header])
+    db_session.flush()
+
+    def entry(debit, credit, *assignments):
+        je = JournalEntry(accounting_code_id=expense.id, accounting_entry_id=header.id, branch_id=branch.id,
+                          date=date(2026, 3, 1), debit_amount=Decimal(debit), credit_amount=Decimal(credit))
+        db_session.add(je)
+        db_session.flush()
+        for value, percentage in assignments:
+            db_session.add(AccountingDimensionAssignment(
+                journal_entry_id=je.id, dimension_id=value.dimension_id, dimension_value_id=value.id,
+                allocation_percentage=Decimal(percentage)))
+
+    entry("100", "0", (sales, "100"), (alpha, "50"))
+    entry("200", "0", (ops, "100"), (alpha, "100"))
+    entry("0", "40", (sales, "100"))
+    db_session.commit()
+    return branch, dept, project
+
+
+@pytest.mark.unit
+def test_breakdown_applies_allocations_in_sql(db_session, dimensional_entries):
+    branch, dept, project = dimensional_entries
+    result = AccountingDimensionService(db_session).analyze_by_dimensions(
+        DimensionAnalysisFilter(branch_ids=[branch.id]))
+
+    assert result.dimension_breakdown[dept.name]["Sales"] == {'debit': 100.0, 'credit': 40.0, 'net': 60.0, 'count': 2}
+    assert result.dimension_breakdown[project.name]["Alpha"]['debit'] == 250.0
+    assert result.totals == {'debit': 550.0, 'credit': 40.0, 'net': 510.0}
+    assert result.metadata['total_entries'] == 5
+    assert result.pivot is None
+
+
+@pytest.mark.unit
+def test_pivot_rollup_and_cube_subtotals(db_session, dimensional_entries):
+    branch, dept, project = dimensional_entries
+    service = AccountingDimensionService(db_session)
+
+    rollup = service.analyze_by_dimensions(DimensionAnalysisFilter(
+        branch_ids=[branch.id], pivot_dimension_ids=[dept.id, project.id])).pivot
+    rows = {tuple(r['dimensions'].values()): (r['debit'], r['count'], r['is_subtotal']) for r in rollup}
+    assert rows == {
+        ("Ops", "Alpha"): (200.0, 1, False),
+        ("Sales", "Alpha"): (50.0, 1, False),
+        ("Ops", None): (200.0, 1, True),
+        ("Sales", None): (50.0, 1, True),
+        (None, None): (250.0, 2, True),
+    }
+    assert rollup[-1]['dimensions'] == {dept.name: None, project.name: None}
+
+    cube = service.analyze_by_dimensions(DimensionAnalysisFilter(
+        branch_ids=[branch.id], pivot_dimension_ids=[dept.id, project.id], pivot_mode="cube")).pivot
+    assert len(cube) == 6
+    assert {'dimensions': {dept.name: None, project.name: "Alpha"}, 'is_subtotal': True,
+            'debit': 250.0, 'credit': 0.0, 'net': 250.0, 'count': 2} in cube
+
+    with pytest.raises(ValueError):
+        service.analyze_by_dimensions(DimensionAnalysisFilter(pivot_dimension_ids=["missing"]))
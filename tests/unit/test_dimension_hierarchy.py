@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+
+from app.models.accounting_dimensions import AccountingDimension, AccountingDimensionValue
+from app.schemas.accounting_dimensions import AccountingDimensionValueUpdate
+from app.services.accounting_dimensions_service import AccountingDimensionService
+from app.services.dimension_hierarchy_service import compute_tree_paths
+
+
+@pytest.mark.unit
+def test_tree_paths_follow_moves(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    dimension = AccountingDimension(code=f"CC{suffix}", name=f"Cost Centre {suffix}", max_hierarchy_levels=5)
+    db_session.add(dimension)
+    db_session.flush()
+
+    def value(code, parent=None, level=1):
+        return AccountingDimensionValue(dimension_id=dimension.id, code=code, name=code.title(),
+                                        parent_value=parent, hierarchy_level=level)
+
+    east = value("east")
+    west = value("west")
+    retail = value("retail", east, 2)
+    online = value("online", retail, 3)
+    db_session.add_all([east, west, retail, online])
+    db_session.commit()
+    assert online.tree_path == f"/{east.id}/{retail.id}/{online.id}/"
+
+    service = AccountingDimensionService(db_session)
+    assert {v.code for v in service.get_value_subtree(east.id)} == {"east", "retail", "online"}
+    tree = service.get_dimension_hierarchy_tree(dimension.id)
+    assert [n['code'] for n in tree] == ["east", "west"]
+    assert tree[0]['children'][0]['children'][0]['full_path'] == "East > Retail > Online"
+
+    with pytest.raises(ValueError):
+        service.update_dimension_value(east.id, AccountingDimensionValueUpdate(parent_value_id=online.id))
+
+    service.update_dimension_value(retail.id, AccountingDimensionValueUpdate(parent_value_id=west.id))
+    db_session.expire_all()
+    assert (retail.hierarchy_level, retail.hierarchy_path) == (2, "west")
+    assert online.tree_path == f"/{west.id}/{retail.id}/{online.id}/"
+    assert (online.hierarchy_level, online.hierarchy_path) == (3, "west/retail")
+    assert {v.code for v in service.get_value_subtree(east.id)} == {"east"}
+
+    service.update_dimension_value(retail.id, AccountingDimensionValueUpdate(parent_value_id=None))
+    db_session.expire_all()
+    assert online.tree_path == f"/{retail.id}/{online.id}/"
+    assert (online.hierarchy_level, online.hierarchy_path) == (2, "retail")
+
+
+@pytest.mark.unit
+def test_compute_tree_paths_handles_orphans_and_cycles():
+    paths = compute_tree_paths({"a": None, "b": "a", "c": "b", "d": "missing", "x": "y", "y": "x"})
+    assert paths["c"] == "/a/b/c/"
+    assert paths["d"] == "/d/"
+    assert paths["x"] in ("/x/", "/y/x/")
+    assert len(paths) == 6
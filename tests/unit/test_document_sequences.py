@@ -0,0 +1,55 @@
+import uuid
+from datetime import date
+
+import pytest
+
+from app.services.document_sequence_service import DocumentSequenceService
+from app.services.invoice_service import InvoiceService
+
+
+@pytest.mark.unit
+def test_sequences_are_scoped_per_type_branch_and_year_and_gap_free(db_session):
+    document_type = f"test_{uuid.uuid4().hex[:8]}"
+    sequences = DocumentSequenceService(db_session)
+
+    assert sequences.next_value(document_type, seed=lambda: 41) == 42
+    assert sequences.next_values(document_type, 3) == [43, 44, 45]
+    assert sequences.next_value(document_type, branch_id="branch-a") == 1
+    assert sequences.next_value(document_type, year=2031) == 1
+    db_session.commit()
+
+    # A rolled-back number is handed out again
+    assert sequences.next_value(document_type) == 46
+    db_session.rollback()
+    assert sequences.next_value(document_type, seed=lambda: 1000) == 46
+    db_session.commit()
+
+
+@pytest.mark.unit
+def test_invoice_numbers_are_consecutive(db_session):
+    service = InvoiceService(db_session)
+    service.app_settings["invoice_prefix"] = "INV"
+    service.app_settings["auto_generate_invoices"] = "true"
+    year_prefix = f"INV-{date.today().year}-"
+
+    first = service.generate_invoice_number()
+    assert first.startswith(year_prefix)
+    number = int(first[len(year_prefix):])
+    expected = [f"{year_prefix}{n:05d}" for n in (number + 1, number + 2)]
+    assert service.allocate_invoice_numbers(2) == expected
+    db_session.rollback()
+    assert service.generate_invoice_number() == first
+    db_session.commit()
+
+
+@pytest.mark.unit
+def test_credit_note_numbers_continue_the_months_last_number(db_session, monkeypatch):
+    from app.services.credit_note_service import CreditNoteService
+
+    service = CreditNoteService(db_session)
+    prefix = f"CN{date.today().strftime('%Y%m')}"
+    # Numbers issued before the month's counter existed seed it
+    monkeypatch.setattr(service, "_last_credit_note_sequence", lambda month_prefix: 7)
+    assert service._generate_credit_note_number() == f"{prefix}0008"
+    assert service._generate_credit_note_number() == f"{prefix}0009"
+    db_session.rollback()
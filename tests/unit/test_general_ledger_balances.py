@@ -0,0 +1,136 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry, OpeningBalance
+from app.models.branch import Branch
+from app.services.general_ledger_service import GeneralLedgerService
+from app.services.ifrs_reports_core import IFRSReportsCore
+
+
+@pytest.mark.unit
+def test_account_balances_match_per_account_totals(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"GL Branch {suffix}", code=f"GL{suffix}")
+    db_session.add(branch)
+    db_session.flush()
+    cash = AccountingCode(code=f"GC{suffix}", name=f"Cash {suffix}", account_type="Asset",
+                          category="Cash", branch_id=branch.id)
+    sales = AccountingCode(code=f"GR{suffix}", name=f"Sales {suffix}", account_type="Revenue", category="Sales")
+    db_session.add_all([cash, sales])
+    db_session.flush()
+    db_session.add(OpeningBalance(accounting_code_id=cash.id, amount=Decimal("50.00"), year=date.today().year))
+    header = AccountingEntry(date_prepared=date.today(), particulars="GL engine test", branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    for amount, on in (("100.00", date.today()), ("30.00", date.today() + timedelta(days=5))):
+        db_session.add_all([
+            JournalEntry(accounting_code_id=cash.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=on, debit_amount=Decimal(amount), credit_amount=Decimal("0")),
+            JournalEntry(accounting_code_id=sales.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=on, debit_amount=Decimal("0"), credit_amount=Decimal(amount)),
+        ])
+    db_session.commit()
+
+    service = GeneralLedgerService(db_session)
+    balances = {b['account_id']: b for b in service.get_account_balances(as_of_date=date.today())}
+    assert balances[cash.id]['balance'] == Decimal("150")
+    assert balances[sales.id]['balance'] == Decimal("100")
+    assert balances[cash.id]['entry_count'] == 1
+
+    tb = service.get_trial_balance(as_of_date=date.today(), branch_id=branch.id)
+    rows = {r['account_code']: r for r in tb['trial_balance']}
+    assert rows[cash.code]['debit_balance'] == 150.0
+    assert rows[sales.code]['credit_balance'] == 100.0
+
+    # The IFRS trial balance and the account ledger use the same engine, opening balance included
+    ifrs_rows = {r['account_code']: r for r in IFRSReportsCore(db_session).get_trial_balance_data(
+        as_of_date=date.today())['accounts']}
+    assert ifrs_rows[cash.code]['debit_balance'] == 150.0 and ifrs_rows[cash.code]['opening_balance'] == 50.0
+    ledger = service.get_account_ledger(cash.id, from_date=date.today() + timedelta(days=1))
+    assert ledger['opening_balance'] == 150.0 and ledger['closing_balance'] == 180.0
+
+    revenue = service.get_account_balances(as_of_date=date.today(), account_type="revenue")
+    assert sales.id in {b['account_id'] for b in revenue}
+    assert cash.id not in {b['account_id'] for b in revenue}
+
+
+@pytest.mark.unit
+def test_keyset_pages_carry_running_balance_forward(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Page Branch {suffix}", code=f"PG{suffix}")
+    cash = AccountingCode(code=f"PC{suffix}", name=f"Cash {suffix}", account_type="Asset", category="Cash")
+    sales = AccountingCode(code=f"PR{suffix}", name=f"Sales {suffix}", account_type="Revenue", category="Sales")
+    db_session.add_all([branch, cash, sales])
+    db_session.flush()
+    header = AccountingEntry(date_prepared=date.today(), particulars="Paging test", branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    start = date.today() - timedelta(days=10)
+    for day in range(7):
+        db_session.add_all([
+            JournalEntry(accounting_code_id=cash.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=start + timedelta(days=day), debit_amount=Decimal("10.00"), credit_amount=Decimal("0")),
+            JournalEntry(accounting_code_id=sales.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=start + timedelta(days=day), debit_amount=Decimal("0"), credit_amount=Decimal("10.00")),
+        ])
+    db_session.commit()
+
+    service = GeneralLedgerService(db_session)
+    balances, cursor, pages = [], None, 0
+    while True:
+        page = service.get_general_ledger_page(account_id=cash.id, cursor=cursor, limit=3, include_count=True)
+        assert page['approximate_count'] == 7
+        balances.extend(item['running_balance'] for item in page['entries'])
+        pages += 1
+        if not page['has_more']:
+            break
+        cursor = page['next_cursor']
+    assert pages == 3
+    assert balances == [10.0 * n for n in range(1, 8)]
+
+    offset_page = service.get_general_ledger_entries(account_id=sales.id, limit=2, offset=4)
+    assert [item['running_balance'] for item in offset_page['entries']] == [50.0, 60.0]
+
+    with pytest.raises(ValueError):
+        service.get_general_ledger_page(cursor="not-a-cursor")
+
+
+@pytest.mark.unit
+def test_deep_pages_start_from_balance_snapshots(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Snapshot Branch {suffix}", code=f"SB{suffix}")
+    cash = AccountingCode(code=f"SC{suffix}", name=f"Cash {suffix}", account_type="Asset", category="Cash")
+    db_session.add_all([branch, cash])
+    db_session.flush()
+    header = AccountingEntry(date_prepared=date.today(), particulars="Snapshot paging test", branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    months = [date(2030, month, 15) for month in (1, 2, 3)]
+    for on in months:
+        db_session.add_all([
+            JournalEntry(accounting_code_id=cash.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=on, debit_amount=Decimal("10.00"), credit_amount=Decimal("0")),
+            JournalEntry(accounting_code_id=cash.id, accounting_entry_id=header.id, branch_id=branch.id,
+                         date=on + timedelta(days=1), debit_amount=Decimal("5.00"), credit_amount=Decimal("0")),
+        ])
+    db_session.commit()
+
+    service = GeneralLedgerService(db_session)
+    first = service.get_general_ledger_page(account_id=cash.id, limit=3)
+    second = service.get_general_ledger_page(account_id=cash.id, cursor=first['next_cursor'], limit=3)
+    assert [item['running_balance'] for item in first['entries'] + second['entries']] == [
+        10.0, 15.0, 25.0, 30.0, 40.0, 45.0
+    ]
+
+    # Earlier months are read from the snapshots, not re-summed from journal lines
+    db_session.execute(text(
+        "UPDATE account_balance_snapshots SET total_debits = total_debits + 100 "
+        "WHERE accounting_code_id = :code AND period_start = :start"
+    ), {"code": cash.id, "start": date(2030, 1, 1)})
+    db_session.commit()
+    second = service.get_general_ledger_page(account_id=cash.id, cursor=first['next_cursor'], limit=3)
+    assert [item['running_balance'] for item in second['entries']] == [130.0, 140.0, 145.0]
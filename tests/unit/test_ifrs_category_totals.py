@@ -0,0 +1,69 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting import AccountingCode, AccountingEntry, JournalEntry, OpeningBalance
+from app.models.branch import Branch
+from app.services.ifrs_accounting_service import IFRSAccountingService
+
+
+def _post(db_session, branch, posted, lines):
+    header = AccountingEntry(date_prepared=posted, date_posted=posted, particulars="IFRS totals test",
+                             branch_id=branch.id)
+    db_session.add(header)
+    db_session.flush()
+    for account, debit, credit in lines:
+        db_session.add(JournalEntry(accounting_code_id=account.id, accounting_entry_id=header.id,
+                                    branch_id=branch.id, date=posted,
+                                    debit_amount=Decimal(debit), credit_amount=Decimal(credit)))
+
+
+@pytest.mark.unit
+def test_statements_share_one_batched_result(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    main = Branch(name=f"IFRS Main {suffix}", code=f"IM{suffix}")
+    other = Branch(name=f"IFRS Other {suffix}", code=f"IO{suffix}")
+    db_session.add_all([main, other])
+    db_session.flush()
+
+    def account(code, account_type, tag, branch):
+        acct = AccountingCode(code=f"{code}{suffix}", name=f"{code} {suffix}", account_type=account_type,
+                              category=tag, reporting_tag=tag, branch_id=branch.id)
+        db_session.add(acct)
+        return acct
+
+    cash = account("IC", "Asset", "A1", main)
+    loan = account("IL", "Liability", "L2", main)
+    sales = account("IS", "Revenue", "R1", main)
+    rent = account("IX", "Expense", "X3", main)
+    other_cash = account("OC", "Asset", "A1", other)
+    db_session.flush()
+    db_session.add_all([
+        OpeningBalance(accounting_code_id=cash.id, amount=Decimal("40.00"), year=2026),
+        OpeningBalance(accounting_code_id=cash.id, amount=Decimal("999.00"), year=2025),
+        OpeningBalance(accounting_code_id=loan.id, amount=Decimal("500.00"), year=2026),
+    ])
+    _post(db_session, main, date(2026, 2, 1), [(cash, "300", "0"), (sales, "0", "300")])
+    _post(db_session, main, date(2026, 3, 1), [(rent, "120", "0"), (cash, "0", "120")])
+    _post(db_session, main, date(2026, 7, 1), [(cash, "1000", "0"), (loan, "0", "1000")])
+    _post(db_session, other, date(2026, 2, 1), [(other_cash, "75", "0"), (sales, "0", "75")])
+    db_session.commit()
+
+    service = IFRSAccountingService(db_session)
+    totals = service.get_ifrs_category_totals(date(2026, 6, 30))
+    assert totals[(main.id, 'A1')] == Decimal("220")
+    assert totals[(main.id, 'L2')] == Decimal("500")
+    assert totals[(other.id, 'A1')] == Decimal("75")
+    # Lines posted by another branch's entry do not count towards this branch's accounts
+    assert totals[(main.id, 'R1')] == Decimal("300")
+
+    sheet = service.get_ifrs_balance_sheet_data(main.id, date(2026, 12, 31))
+    assert sheet['assets']['current_assets'] == Decimal("1220")
+    assert sheet['liabilities']['non_current_liabilities'] == Decimal("1500")
+
+    income = service.get_ifrs_income_statement_data(main.id, date(2026, 1, 1), date(2026, 6, 30))
+    assert income['revenue']['revenue_from_contracts'] == Decimal("300")
+    assert income['expenses']['administrative_expenses'] == Decimal("120")
+    assert income['totals']['net_income'] == 180.0
@@ -0,0 +1,98 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.branch import Branch
+from app.models.inventory import InventoryTransaction, Product
+from app.services.inventory_service import InventoryService
+
+
+def _move(db_session, product, transaction_type, quantity, unit_cost=None, days_ago=0):
+    db_session.add(InventoryTransaction(
+        product_id=product.id, transaction_type=transaction_type, quantity=quantity, unit_cost=unit_cost,
+        date=date.today() - timedelta(days=days_ago), branch_id=product.branch_id
+    ))
+    db_session.commit()
+
+
+@pytest.fixture
+def analytics_branch(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Analytics Branch {suffix}", code=f"AN{suffix}")
+    db_session.add(branch)
+    db_session.flush()
+
+    def product(name, quantity, cost, price, category, reorder_point=0):
+        item = Product(name=f"{name} {suffix}", sku=f"{name[:3].upper()}-{suffix}", quantity=quantity,
+                       cost_price=Decimal(cost), selling_price=Decimal(price), category=category,
+                       reorder_point=reorder_point, branch_id=branch.id)
+        db_session.add(item)
+        db_session.commit()
+        return item
+
+    fast = product("Fast", 8, "10.00", "15.00", "Tools", reorder_point=10)
+    _move(db_session, fast, 'opening_stock', 10, Decimal("8.00"), days_ago=120)
+    _move(db_session, fast, 'goods_receipt', 10, Decimal("10.00"), days_ago=20)
+    _move(db_session, fast, 'sale', 12, days_ago=5)
+
+    slow = product("Slow", 5, "4.00", "6.00", "Tools")
+    _move(db_session, slow, 'opening_stock', 5, Decimal("4.00"), days_ago=45)
+
+    idle = product("Idle", 2, "1.00", "2.00", None)
+    product("Empty", 0, "3.00", "5.00", "Parts")
+    return branch, fast, slow, idle
+
+
+@pytest.mark.unit
+def test_abc_and_aging_from_batched_metrics(db_session, analytics_branch):
+    branch, fast, slow, idle = analytics_branch
+    service = InventoryService(db_session)
+
+    abc = service.get_abc_analysis(branch.id)
+    assert abc['success'], abc.get('error')
+    by_id = {row['id']: row for rows in abc['data']['abc_categories'].values() for row in rows}
+    # Cumulative share of value: 80/102 = 78% -> B, then 98% and 100% -> C
+    assert by_id[fast.id]['category'] == 'B'
+    assert by_id[slow.id]['category'] == 'C'
+    assert by_id[fast.id]['turnover'] == 12
+    assert by_id[fast.id]['turnover_value'] == 180.0
+    assert by_id[idle.id]['category'] == 'C'
+    assert abc['data']['summary']['total_products'] == 3
+    assert abc['data']['summary']['total_value'] == 102.0
+
+    aging = service.get_inventory_aging_report(branch.id)
+    assert aging['success'], aging.get('error')
+    buckets = aging['data']['aging_buckets']
+    assert [p['id'] for p in buckets['0-30_days']['products']] == [fast.id, idle.id]
+    assert buckets['0-30_days']['products'][0]['days_since_movement'] == 5
+    assert [p['id'] for p in buckets['31-60_days']['products']] == [slow.id]
+    assert buckets['31-60_days']['value'] == 20.0
+    assert aging['data']['total_products'] == 3
+
+
+@pytest.mark.unit
+def test_category_and_valuation_comparison(db_session, analytics_branch):
+    branch, fast, slow, idle = analytics_branch
+    service = InventoryService(db_session)
+
+    categories = service.get_category_analysis(branch.id)
+    assert categories['success'], categories.get('error')
+    tools = next(c for c in categories['data']['categories'] if c['category'] == 'Tools')
+    assert tools['product_count'] == 2
+    assert tools['total_value'] == 100.0
+    assert tools['low_stock_count'] == 1
+    assert tools['turnover_90d'] == 12
+    assert {c['category'] for c in categories['data']['categories']} == {'Tools', 'Parts', 'Uncategorized'}
+
+    comparison = service.get_valuation_methods_comparison(branch.id)
+    assert comparison['success'], comparison.get('error')
+    fast_row = next(p for p in comparison['data']['product_valuations'] if p['id'] == fast.id)
+    # FIFO keeps the newest receipt (8 @ 10), LIFO the oldest (8 @ 8)
+    assert fast_row['fifo_value'] == 80.0
+    assert fast_row['lifo_value'] == 64.0
+    assert fast_row['avg_cost_value'] == 80.0
+    idle_row = next(p for p in comparison['data']['product_valuations'] if p['id'] == idle.id)
+    # No layers: valued at cost price
+    assert idle_row['fifo_value'] == idle_row['lifo_value'] == 2.0
@@ -0,0 +1,95 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.branch import Branch
+from app.models.inventory import InventoryCostLayer, InventoryTransaction, Product
+from app.services.inventory_cost_layer_service import InventoryCostLayerService
+from app.services.inventory_service import InventoryService
+
+
+def _move(db_session, product, transaction_type, quantity, unit_cost=None, on=None):
+    tx = InventoryTransaction(product_id=product.id, transaction_type=transaction_type, quantity=quantity,
+                              unit_cost=unit_cost, date=on or date.today(), branch_id=product.branch_id)
+    db_session.add(tx)
+    db_session.commit()
+    return tx
+
+
+def _layers(db_session, product):
+    return [
+        (layer.original_quantity, layer.remaining_quantity, Decimal(layer.unit_cost))
+        for layer in db_session.query(InventoryCostLayer).filter(InventoryCostLayer.product_id == product.id)
+        .order_by(InventoryCostLayer.received_date, InventoryCostLayer.unit_cost)
+    ]
+
+
+@pytest.mark.unit
+def test_issues_consume_oldest_layers_and_rebuild_matches(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Layer Branch {suffix}", code=f"LY{suffix}")
+    db_session.add(branch)
+    db_session.flush()
+    product = Product(name=f"Layered {suffix}", sku=f"LAY-{suffix}", quantity=0,
+                      cost_price=Decimal("12.00"), branch_id=branch.id)
+    db_session.add(product)
+    db_session.commit()
+
+    week_ago = date.today() - timedelta(days=7)
+    _move(db_session, product, 'opening_stock', 10, Decimal("10.00"), on=week_ago)
+    _move(db_session, product, 'goods_receipt', 10, Decimal("12.00"))
+    _move(db_session, product, 'sale', 4)
+    _move(db_session, product, 'stock_transfer_out', -8)  # negative-signed outbound convention
+
+    assert _layers(db_session, product) == [(10, 0, Decimal("10.00")), (10, 8, Decimal("12.00"))]
+
+    product.quantity = 8
+    db_session.commit()
+    service = InventoryService(db_session)
+    assert service.calculate_fifo_cost(product.id, 3) == Decimal("36.00")
+    # Quantities beyond the layers fall back to the product cost price
+    assert service.calculate_fifo_cost(product.id, 9) == Decimal("108.00")
+    valuation = service.get_inventory_valuation(branch.id, 'fifo')
+    assert valuation['total_value'] == 96.0
+
+    before = _layers(db_session, product)
+    result = InventoryCostLayerService(db_session).rebuild([product.id])
+    assert result['products'] == 1
+    assert _layers(db_session, product) == before
+
+
+@pytest.mark.unit
+def test_editing_a_movement_replays_the_product(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    product = Product(name=f"Edited {suffix}", sku=f"EDT-{suffix}", quantity=0, cost_price=Decimal("5.00"))
+    db_session.add(product)
+    db_session.commit()
+
+    receipt = _move(db_session, product, 'goods_receipt', 5, Decimal("5.00"))
+    _move(db_session, product, 'sale', 3)
+    receipt.quantity = 4
+    db_session.commit()
+    assert _layers(db_session, product) == [(4, 1, Decimal("5.00"))]
+
+    valuations = InventoryCostLayerService(db_session).get_product_valuations(product_ids=[product.id])
+    assert valuations[product.id] == (1, Decimal("5.00"))
+
+
+@pytest.mark.unit
+def test_positive_adjustment_opens_a_layer(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    product = Product(name=f"Adjusted {suffix}", sku=f"ADJ-{suffix}", quantity=0, cost_price=Decimal("7.00"))
+    db_session.add(product)
+    db_session.commit()
+
+    service = InventoryService(db_session)
+    _move(db_session, product, 'goods_receipt', 5, Decimal("5.00"), on=date.today() - timedelta(days=1))
+    assert service.update_product_quantity(product.id, 3, 'adjustment_in')[0]
+    assert service.update_product_quantity(product.id, 2, 'adjustment_out')[0]
+    assert _layers(db_session, product) == [(5, 3, Decimal("5.00")), (3, 3, Decimal("7.00"))]
+
+    before = _layers(db_session, product)
+    InventoryCostLayerService(db_session).rebuild([product.id])
+    assert _layers(db_session, product) == before
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.role import Permission, Role, RolePermission, UserPermission
+from app.models.user import User
+from app.services.permission_cache import get_permission_set
+
+
+@pytest.mark.unit
+def test_permission_set_is_cached_until_grants_change(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    role = Role(name=f"Clerk {suffix}")
+    view = Permission(name=f"sales.read {suffix}", module="sales", action="read", resource=suffix)
+    post = Permission(name=f"sales.post {suffix}", module="sales", action="post", resource=suffix)
+    clerk = User(username=f"clerk{suffix}")
+    db_session.add_all([role, view, post, clerk])
+    db_session.flush()
+    db_session.add(RolePermission(role_id=role.id, permission_id=view.id))
+    clerk.role_id = role.id
+    db_session.commit()
+    assert get_permission_set(db_session, clerk.id) == {("sales", "read", suffix)}
+
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        for _ in range(5):
+            assert ("sales", "read", suffix) in get_permission_set(db_session, clerk.id)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+
+    # Role-level and user-level writes drop the cached set on commit
+    db_session.add(RolePermission(role_id=role.id, permission_id=post.id))
+    db_session.commit()
+    assert ("sales", "post", suffix) in get_permission_set(db_session, clerk.id)
+    # Deactivating a role never gated its grants and still does not
+    role.is_active = False
+    db_session.commit()
+    assert len(get_permission_set(db_session, clerk.id)) == 2
+    clerk.role_id = None
+    db_session.commit()
+    assert get_permission_set(db_session, clerk.id) == frozenset()
+
+    grant = UserPermission(user_id=clerk.id, permission_id=view.id, granted_at=datetime.utcnow(),
+                           expires_at=datetime.utcnow() + timedelta(hours=1))
+    db_session.add(grant)
+    db_session.commit()
+    assert get_permission_set(db_session, clerk.id) == {("sales", "read", suffix)}
+    grant.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert get_permission_set(db_session, clerk.id) == frozenset()
+
+    clerk.role_id = role.id
+    db_session.commit()
+    assert len(get_permission_set(db_session, clerk.id)) == 2
+    assert get_permission_set(db_session, "missing-user") == frozenset()
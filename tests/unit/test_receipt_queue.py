@@ -0,0 +1,56 @@
+import os
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.branch import Branch
+from app.models.inventory import Product
+from app.models.pos import PosSession
+from app.models.receipt import Receipt
+from app.models.user import User
+from app.services.pos_service import POSService
+from app.services.receipt_queue import get_receipt_queue
+from app.services.receipt_service import ReceiptService
+
+
+@pytest.mark.unit
+def test_sale_commits_before_receipt_pdf_is_rendered(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'receipts.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    branch = Branch(id=str(uuid4()), name="Receipt Branch", code="RCPT", currency="BWP")
+    user = User(username="receipt_till", email="receipt@example.com", password_digest="x")
+    product = Product(name="Receipt Widget", sku="RCPT-W", quantity=5,
+                      cost_price=Decimal("5.00"), selling_price=Decimal("10.00"))
+    db.add_all([branch, user, product])
+    db.flush()
+    pos_session = PosSession(user_id=user.id, branch_id=branch.id, till_id="T1", status="open")
+    db.add(pos_session)
+    db.commit()
+
+    sale, result = POSService(db).create_sale({
+        "items": [{"product_id": product.id, "quantity": 1, "unit_price": "10.00"}],
+        "amount_tendered": "20.00",
+        "use_ifrs_posting": True,
+    }, pos_session.id)
+    assert result['success'], result
+    receipt = result['receipt']
+    assert receipt['html_content'] and receipt['pdf_path'] is None
+    assert receipt['pdf_status'] == 'queued'
+
+    job = get_receipt_queue().wait(receipt['job_id'], timeout=60)
+    assert job['status'] == 'completed', job
+    db.expire_all()
+    stored = db.get(Receipt, receipt['receipt_id'])
+    assert stored.printed and stored.pdf_path == job['pdf_path']
+    pdf_file = os.path.join(ReceiptService(db).receipts_dir, os.path.basename(stored.pdf_path))
+    assert os.path.exists(pdf_file)
+    os.remove(pdf_file)
+    db.close()
+    engine.dispose()
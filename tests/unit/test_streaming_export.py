@@ -0,0 +1,69 @@
+import csv
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.api.v1.endpoints import sales
+from app.core.database import get_db
+from app.models.branch import Branch
+from app.models.inventory import Product
+from app.models.sales import Customer, Sale, SaleItem
+from app.models.user import User
+from app.utils.streaming_export import csv_chunks
+
+
+@pytest.mark.unit
+def test_csv_chunks_flush_per_batch():
+    rows = ([i, f"row {i}"] for i in range(5))
+    chunks = list(csv_chunks(["N", "Label"], rows, batch_size=2))
+    assert len(chunks) == 3
+    assert "".join(chunks).splitlines()[-1] == "4,row 4"
+
+
+@pytest.mark.unit
+def test_sales_export_streams_csv_and_xlsx(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Export Branch {suffix}", code=f"EX{suffix}")
+    customer = Customer(name=f"Export Customer {suffix}")
+    cashier = User(username=f"cashier{suffix}", first_name="Kea", last_name="Molefe")
+    product = Product(name=f"Exported {suffix}", sku=f"EXP-{suffix}", quantity=0)
+    db_session.add_all([branch, customer, cashier, product])
+    db_session.flush()
+    sale = Sale(branch_id=branch.id, customer_id=customer.id, salesperson_id=cashier.id, reference=f"S-{suffix}",
+                total_amount=Decimal("115.00"), total_vat_amount=Decimal("15.00"), payment_method="cash",
+                date=datetime(2026, 5, 4, 9, 30))
+    walk_in = Sale(branch_id=branch.id, reference=f"W-{suffix}", total_amount=Decimal("20.00"),
+                   payment_method="card", date=datetime(2026, 5, 3, 12, 0), notes="line one\nline two")
+    db_session.add_all([sale, walk_in])
+    db_session.flush()
+    db_session.add_all([SaleItem(sale_id=sale.id, product_id=product.id, quantity=1),
+                        SaleItem(sale_id=sale.id, product_id=product.id, quantity=2)])
+    db_session.commit()
+
+    app = FastAPI()
+    app.include_router(sales.router, prefix="/sales")
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    response = client.get("/sales/export.csv", params={"branch_id": branch.id})
+    assert response.status_code == 200
+    rows = list(csv.reader(StringIO(response.text)))
+    assert rows[0][0] == "Reference"
+    assert rows[1][:4] == [f"S-{suffix}", "2026-05-04T09:30:00", customer.name, "Kea Molefe"]
+    assert rows[1][10] == "2"
+    assert rows[2][2] == "Walk-in Customer" and rows[2][11] == "line one line two"
+
+    response = client.get("/sales/export", params={"branch_id": branch.id, "format": "xlsx"})
+    assert response.status_code == 200
+    sheet = load_workbook(BytesIO(response.content), read_only=True)["Sales"]
+    values = list(sheet.values)
+    assert len(values) == 3
+    assert values[1][0] == f"S-{suffix}" and values[1][8] == 115.0
+
+    assert client.get("/sales/export", params={"format": "pdf"}).status_code == 400
@@ -0,0 +1,55 @@
+import json
+import logging
+import sys
+import uuid
+
+import pytest
+
+from app.utils.logger import JsonFormatter, get_log_levels, get_logger, parse_level_spec, set_log_levels
+
+
+class _Counted:
+    formatted = 0
+
+    def __str__(self):
+        _Counted.formatted += 1
+        return "row"
+
+
+@pytest.mark.unit
+def test_levels_are_per_module_and_reloadable():
+    package = f"app.logtest{uuid.uuid4().hex[:6]}"
+    logger = get_logger(f"{package}.rows")
+    previous = {name: level for name, level in get_log_levels().items() if name != "*"}
+    try:
+        logger.debug("dump %s", _Counted())
+        assert _Counted.formatted == 0
+        assert not logger.isEnabledFor(logging.DEBUG)
+
+        set_log_levels({package: "DEBUG"}, replace=False)
+        assert logger.isEnabledFor(logging.DEBUG)
+        assert get_log_levels()[package] == "DEBUG"
+
+        set_log_levels({f"{package}.rows": "WARNING"}, replace=False)
+        assert logger.getEffectiveLevel() == logging.WARNING
+    finally:
+        set_log_levels(previous)
+    assert logger.getEffectiveLevel() == logging.INFO
+    assert parse_level_spec("app.api=debug, app.services.x=ERROR") == {"app.api": 10, "app.services.x": 40}
+    with pytest.raises(ValueError):
+        set_log_levels({"app": "LOUD"}, replace=False)
+
+
+@pytest.mark.unit
+def test_json_formatter_emits_extra_fields_and_exception():
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.getLogger("app.test").makeRecord(
+            "app.test", logging.ERROR, __file__, 10, "failed %s", ("posting",), sys.exc_info(),
+            extra={"account_id": "A1"})
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "failed posting"
+    assert payload["level"] == "ERROR" and payload["logger"] == "app.test"
+    assert payload["account_id"] == "A1"
+    assert "RuntimeError: boom" in payload["exception"]
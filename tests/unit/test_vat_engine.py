@@ -0,0 +1,87 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting import AccountingCode
+from app.models.branch import Branch
+from app.models.credit_notes import CreditNote, CreditNoteItem
+from app.models.inventory import Product
+from app.models.purchases import Purchase, PurchaseItem, Supplier
+from app.models.sales import Customer, Sale, SaleItem
+from app.services.enhanced_vat_service import EnhancedVatService
+
+
+@pytest.mark.unit
+def test_vat_totals_by_rate_branch_and_day_cached_per_closed_period(db_session):
+    suffix = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"VAT Branch {suffix}", code=f"VB{suffix}")
+    customer = Customer(name=f"VAT Customer {suffix}")
+    product = Product(name=f"VAT Product {suffix}", sku=f"VAT-{suffix}", quantity=0)
+    code = AccountingCode(code=f"V2{suffix}", name="Creditors", account_type="Liability", category="Liability")
+    db_session.add_all([branch, customer, product, code])
+    db_session.flush()
+    supplier = Supplier(name=f"VAT Supplier {suffix}", accounting_code_id=code.id)
+    db_session.add(supplier)
+    db_session.flush()
+
+    sale = Sale(branch_id=branch.id, customer_id=customer.id, reference=f"VS-{suffix}", payment_method="cash",
+                date=datetime(2025, 3, 31, 18, 0), total_amount=Decimal("214.00"),
+                total_amount_ex_vat=Decimal("200.00"), total_vat_amount=Decimal("14.00"))
+    purchase = Purchase(branch_id=branch.id, supplier_id=supplier.id, purchase_date=date(2025, 3, 10),
+                        total_amount=Decimal("57.00"), total_amount_ex_vat=Decimal("50.00"),
+                        total_vat_amount=Decimal("7.00"))
+    db_session.add_all([sale, purchase])
+    db_session.flush()
+    db_session.add_all([
+        SaleItem(sale_id=sale.id, product_id=product.id, quantity=1, vat_rate=Decimal("14"),
+                 vat_amount=Decimal("14.00"), total_amount=Decimal("114.00")),
+        SaleItem(sale_id=sale.id, product_id=product.id, quantity=1, vat_rate=Decimal("0"),
+                 vat_amount=Decimal("0"), total_amount=Decimal("100.00")),
+        PurchaseItem(purchase_id=purchase.id, product_id=product.id, quantity=1, cost=Decimal("50.00"),
+                     total_cost=Decimal("50.00"), vat_rate=Decimal("14"), vat_amount=Decimal("7.00")),
+    ])
+    credit_note = CreditNote(credit_note_number=f"CN-{suffix}", issue_date=date(2025, 3, 31), source_type="pos_receipt",
+                             source_id=sale.id, customer_id=customer.id, branch_id=branch.id,
+                             return_reason="faulty_product", refund_method="cash", status="issued",
+                             subtotal=Decimal("50.00"), vat_amount=Decimal("7.00"), total_amount=Decimal("57.00"))
+    db_session.add(credit_note)
+    db_session.flush()
+    db_session.add(CreditNoteItem(credit_note_id=credit_note.id, product_id=product.id, quantity_returned=1,
+                                  unit_price=Decimal("50.00"), vat_rate=Decimal("14"), vat_amount=Decimal("7.00"),
+                                  line_total=Decimal("57.00"), item_condition="faulty", return_reason="faulty_product"))
+    db_session.commit()
+
+    service = EnhancedVatService(db_session)
+    start, end = date(2025, 3, 1), date(2025, 3, 31)
+    summary = service.calculate_vat_summary(start, end, branch.id)
+    assert summary["status"] == "calculated"
+    assert summary["vat_collected"] == 7.0 and summary["vat_paid"] == 7.0 and summary["net_vat_liability"] == 0.0
+    assert summary["transaction_counts"] == {"sales": 1, "purchases": 1, "credit_notes": 1}
+    assert summary["by_day"]["2025-03-31"] == {"output": 14.0, "input": 0.0, "credit_note": 7.0}
+    assert summary["by_branch"][branch.id]["input"] == 7.0
+
+    breakdown = {row["rate"]: row for row in service.get_vat_by_rate_breakdown(start, end, branch.id)}
+    assert breakdown["14%"]["vat_output"] == 7.0 and breakdown["14%"]["taxable_output"] == 50.0
+    assert breakdown["0%"]["vat_output"] == 0.0 and breakdown["0%"]["taxable_output"] == 100.0
+
+    # The detail lists the same documents, the evening sale included and the credit note negative
+    detail = {row["reference_type"]: row for row in service.get_vat_transactions_detail(start, end, branch.id)}
+    assert detail["sale"]["vat_amount"] == 14.0
+    assert detail["purchase"]["vat_amount"] == 7.0
+    assert detail["credit_note"]["item_type"] == "output"
+    assert detail["credit_note"]["vat_amount"] == -7.0 and detail["credit_note"]["total_amount"] == -57.0
+
+    # Served from the cache until a transaction in the period changes
+    assert service.get_vat_totals(start, end, branch.id) is service.get_vat_totals(start, end, branch.id)
+    april = service.get_vat_totals(date(2025, 4, 1), date(2025, 4, 30), branch.id)
+
+    sale.total_vat_amount = Decimal("28.00")
+    db_session.commit()
+    assert service.calculate_vat_summary(start, end, branch.id)["vat_collected"] == 21.0
+    assert service.get_vat_totals(date(2025, 4, 1), date(2025, 4, 30), branch.id) is april
+
+    db_session.delete(db_session.query(CreditNoteItem).filter_by(credit_note_id=credit_note.id).one())
+    db_session.commit()
+    assert service.get_vat_by_rate_breakdown(start, end, branch.id)[0]["credit_note_vat"] == 0.0